@@ -17,14 +17,22 @@
 
 import asyncio
 import base64
+import copy
+import functools
 import hashlib
+import http.cookiejar
+import inspect
 import io
 import json
+import math
+import operator
 import os
 import pathlib
+import queue
 import random
 import re
 import socket
+import sqlite3
 import ssl
 import string
 import struct
@@ -35,11 +43,14 @@ import types
 import urllib
 import urllib.request
 import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from functools import lru_cache, reduce
 from pathlib import Path
-from typing import Optional, Dict, Literal, Union, List, Any, Callable, Iterator, TypedDict, Set, OrderedDict
+from typing import Optional, Dict, Literal, Union, List, Any, Callable, Iterator, TypedDict, Set, OrderedDict, \
+    Hashable, Iterable, Pattern, TextIO, Tuple, Type
 from urllib.error import URLError
 from urllib.parse import quote, unquote, parse_qs, urlparse
 
@@ -49,7 +60,12 @@ import requests
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 import websockets
+try:
+    import brotli
+except ImportError:
+    brotli = None
 from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
 from requests.exceptions import SSLError
 from werkzeug.serving import make_server
 
@@ -67,6 +83,7 @@ def script_path():
 
 # import 结束 ====================================================================================================
 
+
 class FlaskServer:
     """封装Flask服务器，提供start/stop接口"""
 
@@ -141,7 +158,885 @@ class SslErrorCode:
     """SSL未知错误"""
 
 
+class DanmuProtocol:
+    """定义弹幕 wss 协议常量"""
+    HEADER: struct.Struct = struct.Struct('>IHHII')
+    """封包头部格式: 封包总大小, 头部大小, 协议版本, 操作码, 序列号"""
+    VERSION_NORMAL: int = 0
+    """协议版本:0: 普通包 (正文不使用压缩)"""
+    VERSION_ZIP: int = 2
+    """协议版本:2: 普通包 (正文使用 zlib 压缩)"""
+    VERSION_BROTLI: int = 3
+    """协议版本:3: 普通包 (使用 brotli 压缩的多个带文件头的普通包)"""
+    SUPPORTED_PROTOVER: int = VERSION_BROTLI if brotli is not None else VERSION_ZIP
+    """认证包中可请求的最高协议版本，未安装 brotli 时退回 zlib"""
+
+
 # 工具类函数
+class HttpSessionPool:
+    """
+    共享的 HTTP 长连接池
+
+    所有 B站 API 客户端共用一个 requests.Session，按主机分配连接池大小和默认超时，
+    同一主机的请求复用已建立的 TCP/TLS 连接，不再每次请求都重新握手。
+    Session 不保存响应中的 Cookie，各账号的 Cookie 仍由请求头传入，不会互相串用。
+    """
+
+    DEFAULT_HOST_POOL_SIZES: Dict[str, int] = {
+        "api.bilibili.com": 8,
+        "api.live.bilibili.com": 8,
+        "passport.bilibili.com": 2,
+        "member.bilibili.com": 2,
+        "www.bilibili.com": 2,
+    }
+    """各主机的连接池大小"""
+
+    _shared: Optional["HttpSessionPool"] = None
+    _shared_lock = threading.Lock()
+
+    class TimeoutHTTPAdapter(HTTPAdapter):
+        """请求没有指定 timeout 时使用默认超时的适配器"""
+
+        def __init__(self, timeout: Union[float, Tuple[float, float]], *args, **kwargs):
+            self.timeout = timeout
+            """默认超时 (连接超时, 读取超时)"""
+            super().__init__(*args, **kwargs)
+
+        def send(self, request, **kwargs):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = self.timeout
+            return super().send(request, **kwargs)
+
+    def __init__(self, host_pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = 4,
+                 timeout: Union[float, Tuple[float, float]] = (5, 30),
+                 host_timeouts: Optional[Dict[str, Union[float, Tuple[float, float]]]] = None):
+        """
+        Args:
+            host_pool_sizes: 各主机的连接池大小，默认 DEFAULT_HOST_POOL_SIZES
+            default_pool_size: 其他主机的连接池大小
+            timeout: 请求没有指定 timeout 时的默认超时 (连接超时, 读取超时)
+            host_timeouts: 各主机单独的默认超时
+        """
+        self.host_pool_sizes = dict(self.DEFAULT_HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+        """各主机的连接池大小"""
+        self.timeout = timeout
+        """默认超时"""
+        self.host_timeouts = dict(host_timeouts or {})
+        """各主机单独的默认超时"""
+        self.session = requests.Session()
+        """共享的会话，线程间共用"""
+        # 拒绝保存任何 Cookie，避免一个账号的响应 Cookie 被带到其他账号的请求里
+        self.session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        for scheme in ("https://", "http://"):
+            self.session.mount(scheme, self.TimeoutHTTPAdapter(
+                timeout, pool_connections=default_pool_size, pool_maxsize=default_pool_size))
+        for host, pool_size in self.host_pool_sizes.items():
+            self.session.mount(f"https://{host}/", self.TimeoutHTTPAdapter(
+                self.host_timeouts.get(host, timeout), pool_connections=1, pool_maxsize=pool_size))
+
+    @classmethod
+    def shared(cls) -> "HttpSessionPool":
+        """进程内共享的连接池，第一次调用时创建"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+class ConcurrentPaginator:
+    """
+    并发分页获取器
+
+    调用方先请求第一页得到总页数，其余页交给本类在线程池中并发请求，按页序逐页产出。
+    相邻两次请求开始的间隔不小于 min_interval；失败的页按指数退避重试，
+    仍然失败时停止产出，并取消还没开始的页。
+    """
+
+    class PageError(Exception):
+        """某一页请求失败，result 为 {"success": False, ...} 形式的失败结果"""
+
+        def __init__(self, result: Dict[str, Any]):
+            self.result = result
+            """失败结果"""
+            super().__init__(result.get("error") or result.get("message"))
+
+    def __init__(self, fetch_page: Callable[[int], Any], max_workers: int = 4, min_interval: float = 0.0,
+                 max_retries: int = 0, retry_backoff: float = 0.5,
+                 retry_on: Tuple[Type[BaseException], ...] = (Exception,)):
+        """
+        Args:
+            fetch_page: 请求一页的函数，参数为页码，返回该页数据，失败时抛出异常
+            max_workers: 同时请求的最大页数
+            min_interval: 相邻两次请求开始的最小间隔（秒）
+            max_retries: 每页失败后的最大重试次数
+            retry_backoff: 第一次重试前的等待时间（秒），之后每次翻倍
+            retry_on: 需要重试的异常类型，其他异常直接视为失败
+        """
+        self.fetch_page = fetch_page
+        """请求一页的函数"""
+        self.max_workers = max_workers
+        """同时请求的最大页数"""
+        self.min_interval = min_interval
+        """相邻两次请求开始的最小间隔"""
+        self.max_retries = max_retries
+        """每页失败后的最大重试次数"""
+        self.retry_backoff = retry_backoff
+        """第一次重试前的等待时间"""
+        self.retry_on = retry_on
+        """需要重试的异常类型"""
+        self.error: Optional[BaseException] = None
+        """最近一次 fetch_pages 停止时的异常，全部成功时为 None"""
+        self.failed_page: Optional[int] = None
+        """最近一次 fetch_pages 失败的页码，全部成功时为 None"""
+        self._next_start = 0.0
+        self._rate_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def page_count(total_items: int, page_size: int) -> int:
+        """由总条数和每页数量计算总页数"""
+        return math.ceil(total_items / page_size) if total_items > 0 and page_size > 0 else 0
+
+    def _wait_turn(self):
+        """按 min_interval 排队，等到本次请求可以开始"""
+        if self.min_interval <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def fetch(self, page: int) -> Any:
+        """
+        请求一页，遇到 retry_on 中的异常时退避重试
+        Args:
+            page: 页码
+
+        Returns:
+            该页数据；重试用完仍失败时抛出最后一次的异常
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn()
+            try:
+                return self.fetch_page(page)
+            except self.retry_on:
+                if attempt >= self.max_retries:
+                    raise
+            time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _fetch_unless_stopped(self, page: int) -> Any:
+        """线程池中执行，迭代已经停止时不再请求"""
+        return None if self._stopped.is_set() else self.fetch(page)
+
+    def iter_pages(self, first_page: int, last_page: int) -> Iterator[Tuple[int, Any]]:
+        """
+        并发请求 first_page 到 last_page（含）的各页，按页序产出
+        Args:
+            first_page: 起始页码，通常为 2
+            last_page: 结束页码
+
+        Returns:
+            (页码, 该页数据) 的迭代器；某页最终失败时抛出它的异常。提前停止迭代会取消还没开始的页
+        """
+        if last_page < first_page:
+            return
+        pages = range(first_page, last_page + 1)
+        self._stopped.clear()
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pages))))
+        futures = [executor.submit(self._fetch_unless_stopped, page) for page in pages]
+        try:
+            for page, future in zip(pages, futures):
+                yield page, future.result()
+        finally:
+            self._stopped.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_pages(self, first_page: int, last_page: int) -> List[Any]:
+        """
+        并发请求 first_page 到 last_page（含）的各页
+        Returns:
+            按页序排列的各页数据；某页失败时只返回它之前的页，并记录 error 和 failed_page
+        """
+        self.error = None
+        self.failed_page = None
+        pages = []
+        try:
+            for page, data in self.iter_pages(first_page, last_page):
+                pages.append(data)
+        except Exception as e:
+            self.error = e
+            self.failed_page = first_page + len(pages)
+        return pages
+
+
+class ResponseCache:
+    """
+    只读 API 的响应缓存
+
+    按 (接口名, 参数) 缓存成功的结果字典，每个接口有自己的有效期 (ttl) 和过期后可继续使用的时长 (max_stale)：
+    有效期内直接返回；过期但仍可使用时先返回旧结果，同时在后台重新请求；超过可用时长才同步请求。
+    条目数超过上限时淘汰最久未使用的结果，可以保存到文件，下次启动时读取。
+    """
+
+    DEFAULT_POLICIES: Dict[str, Tuple[float, float]] = {
+        "area_obj_list": (86400, 7 * 86400),
+        "anchor_common_areas": (600, 3600),
+        "bilibili_user_card": (600, 86400),
+        "room_emoticons": (3600, 86400),
+        "medal_wall": (300, 3600),
+    }
+    """各接口的 (有效期, 过期后可继续使用的时长)，单位秒"""
+
+    _shared: Optional["ResponseCache"] = None
+    _shared_lock = threading.Lock()
+    _revalidate_executor: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, max_entries: int = 512, default_policy: Tuple[float, float] = (60, 0),
+                 policies: Optional[Dict[str, Tuple[float, float]]] = None,
+                 cache_path: Optional[Union[str, pathlib.Path]] = None):
+        """
+        Args:
+            max_entries: 最多缓存的结果数量
+            default_policy: 没有单独设置的接口使用的 (有效期, 过期后可继续使用的时长)
+            policies: 各接口的 (有效期, 过期后可继续使用的时长)，默认 DEFAULT_POLICIES
+            cache_path: 保存缓存的文件路径，None 表示不保存
+        """
+        self.max_entries = max_entries
+        """最多缓存的结果数量"""
+        self.default_policy = default_policy
+        """没有单独设置的接口使用的策略"""
+        self.policies = dict(self.DEFAULT_POLICIES if policies is None else policies)
+        """各接口的策略"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """保存缓存的文件路径"""
+        self.hits = 0
+        """有效期内命中次数"""
+        self.stale_hits = 0
+        """过期后返回旧结果的次数"""
+        self.misses = 0
+        """同步请求次数"""
+        self._entries: OrderedDict = OrderedDict()  # {(接口名, 参数 JSON): (结果, 获取时间)}
+        self._refreshing = set()  # 正在后台重新请求的键
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "ResponseCache":
+        """进程内共享的响应缓存，第一次调用时创建，不保存到文件"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def cached(endpoint: str):
+        """
+        装饰 API 客户端的只读方法，使用客户端的 response_cache 缓存成功的结果
+        Args:
+            endpoint: 接口名，对应 policies 中的键
+
+        客户端的 response_cache 为 None 时不缓存；请求头带 Cookie 时按 Cookie 的摘要区分账号
+        """
+
+        def decorator(method: Callable[..., Dict[str, Any]]):
+            @functools.wraps(method)
+            def wrapper(client, *args, **kwargs):
+                cache = getattr(client, "response_cache", None)
+                if cache is None:
+                    return method(client, *args, **kwargs)
+                params = {"args": args, "kwargs": kwargs, "scope": ResponseCache.scope_of(client.headers)}
+                return cache.get_or_fetch(endpoint, params, lambda: method(client, *args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def invalidates(*endpoints: str):
+        """
+        装饰 API 客户端的写操作，成功后删除客户端 response_cache 中这些接口的结果
+        Args:
+            *endpoints: 受写操作影响的接口名
+        """
+
+        def decorator(method: Callable[..., Dict[str, Any]]):
+            @functools.wraps(method)
+            def wrapper(client, *args, **kwargs):
+                result = method(client, *args, **kwargs)
+                cache = getattr(client, "response_cache", None)
+                if cache is not None and isinstance(result, dict) and result.get("success"):
+                    for endpoint in endpoints:
+                        cache.invalidate(endpoint)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def scope_of(headers: Optional[Dict[str, str]]) -> str:
+        """请求头中 Cookie 的摘要，没有 Cookie 时为空字符串，缓存和文件中都不保存 Cookie 原文"""
+        cookie = (headers or {}).get("cookie", "")
+        return hashlib.sha256(cookie.encode()).hexdigest()[:16] if cookie else ""
+
+    def policy(self, endpoint: str) -> Tuple[float, float]:
+        """返回接口的 (有效期, 过期后可继续使用的时长)"""
+        return self.policies.get(endpoint, self.default_policy)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> Tuple[str, str]:
+        """缓存键 (接口名, 参数 JSON)"""
+        return endpoint, json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get_or_fetch(self, endpoint: str, params: Dict[str, Any],
+                     fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        取出缓存的结果，没有可用结果时调用 fetch 请求
+        Args:
+            endpoint: 接口名
+            params: 请求参数，用于区分缓存
+            fetch: 发出请求的函数，返回结果字典，success 为真时才缓存
+
+        Returns:
+            结果字典的副本
+        """
+        key = self.make_key(endpoint, params)
+        ttl, max_stale = self.policy(endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            result, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                self.hits += 1
+                return copy.deepcopy(result)
+            if age < ttl + max_stale:
+                self.stale_hits += 1
+                self._revalidate(key, fetch)
+                return copy.deepcopy(result)
+        self.misses += 1
+        return self._fetch_and_store(key, fetch)
+
+    def _fetch_and_store(self, key: Tuple[str, str], fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        result = fetch()
+        if isinstance(result, dict) and result.get("success"):
+            self._store(key, copy.deepcopy(result), time.time())
+        return result
+
+    def _store(self, key: Tuple[str, str], result: Dict[str, Any], fetched_at: float):
+        with self._lock:
+            self._entries[key] = (result, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key: Tuple[str, str], fetch: Callable[[], Dict[str, Any]]):
+        """在后台重新请求，同一个键同时只有一个请求"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if ResponseCache._revalidate_executor is None:
+            with ResponseCache._shared_lock:
+                if ResponseCache._revalidate_executor is None:
+                    ResponseCache._revalidate_executor = ThreadPoolExecutor(
+                        max_workers=2, thread_name_prefix="api-cache")
+
+        def revalidate():
+            try:
+                self._fetch_and_store(key, fetch)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        ResponseCache._revalidate_executor.submit(revalidate)
+
+    def invalidate(self, endpoint: Optional[str] = None) -> int:
+        """
+        删除缓存的结果
+        Args:
+            endpoint: 接口名，None 表示全部
+
+        Returns:
+            删除的数量
+        """
+        with self._lock:
+            keys = [key for key in self._entries if endpoint is None or key[0] == endpoint]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中统计和当前条目数"""
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "size": len(self)}
+
+    def load(self) -> int:
+        """
+        读取保存的缓存，丢弃已经不可使用的结果
+        Returns:
+            读取到的数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("entries", [])
+        except (OSError, ValueError, AttributeError):
+            return 0
+        now = time.time()
+        count = 0
+        for endpoint, params_json, result, fetched_at in entries:
+            ttl, max_stale = self.policy(endpoint)
+            if now - fetched_at < ttl + max_stale:
+                self._store((endpoint, params_json), result, fetched_at)
+                count += 1
+        return count
+
+    def save(self):
+        """保存缓存，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            entries = [[endpoint, params_json, result, fetched_at]
+                       for (endpoint, params_json), (result, fetched_at) in self._entries.items()]
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"entries": entries}, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, self.cache_path)
+
+
+class AccountStatusService:
+    """
+    账号状态服务 {uid: {"nickname": 昵称, "valid": Cookie 是否有效, "checked_at": 检查时间}}
+
+    所有账号在线程池中并发检查，结果带检查时间保存，超过有效期才重新检查。
+    控制台先用上次的结果立即显示，过期的账号在后台检查，检查完成后由调用方刷新界面。
+    检查时网络出错的账号保留上次的结果，不会被当作过期账号。
+    """
+
+    def __init__(self, check_account: Callable[[str], Dict[str, Any]],
+                 cache_path: Optional[Union[str, pathlib.Path]] = None, ttl: float = 600, max_workers: int = 4):
+        """
+        Args:
+            check_account: 检查一个账号的函数，参数为 uid，返回 {"valid": 是否有效, "nickname": 昵称}，
+                无法确认状态（如网络错误）时抛出异常
+            cache_path: 状态的保存路径，None 表示不保存
+            ttl: 状态的有效期（秒）
+            max_workers: 同时检查的最大账号数
+        """
+        self.check_account = check_account
+        """检查一个账号的函数"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """状态的保存路径"""
+        self.ttl = ttl
+        """状态的有效期"""
+        self.max_workers = max_workers
+        """同时检查的最大账号数"""
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Future] = {}  # 正在后台检查的账号
+        self._changed: Set[str] = set()  # 后台检查后状态发生变化的账号
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def get(self, uid: Any) -> Optional[Dict[str, Any]]:
+        """返回账号上次检查的状态，没有检查过时返回 None"""
+        status = self._statuses.get(str(uid))
+        return dict(status) if status else None
+
+    def is_stale(self, uid: Any) -> bool:
+        """账号没有检查过或状态已超过有效期"""
+        status = self._statuses.get(str(uid))
+        return status is None or time.time() - status["checked_at"] >= self.ttl
+
+    def busy(self) -> bool:
+        """是否还有账号在后台检查"""
+        with self._lock:
+            return bool(self._pending)
+
+    def take_changes(self) -> bool:
+        """返回后台检查后是否有状态变化，并清除这个标记"""
+        with self._lock:
+            changed, self._changed = bool(self._changed), set()
+        return changed
+
+    def forget(self, uid: Any):
+        """删除账号的状态，用于账号被删除后"""
+        with self._lock:
+            removed = self._statuses.pop(str(uid), None)
+        if removed:
+            self.save_cache()
+
+    def _executor_or_new(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="account-status")
+        return self._executor
+
+    def _check(self, uid: str):
+        """线程池中执行，检查一个账号并记录结果"""
+        try:
+            result = self.check_account(uid)
+        except Exception:
+            result = None
+        with self._lock:
+            if result is not None:
+                status = {"nickname": result.get("nickname") or uid, "valid": bool(result.get("valid")),
+                          "checked_at": time.time()}
+                previous = self._statuses.get(uid)
+                self._statuses[uid] = status
+                if not previous or (previous["nickname"], previous["valid"]) != (status["nickname"], status["valid"]):
+                    self._changed.add(uid)
+            self._pending.pop(uid, None)
+        if result is not None:
+            self.save_cache()
+
+    def _submit(self, uids: Iterable[Any], force: bool = False) -> Dict[str, Future]:
+        """提交需要检查的账号，正在检查的账号不重复提交，返回本次涉及的 {uid: Future}"""
+        futures = {}
+        with self._lock:
+            for uid in map(str, uids):
+                if uid in self._pending:
+                    futures[uid] = self._pending[uid]
+                elif force or self.is_stale(uid):
+                    futures[uid] = self._pending[uid] = self._executor_or_new().submit(self._check, uid)
+        return futures
+
+    def statuses(self, uids: Iterable[Any], timeout: Optional[float] = 15) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        返回各账号的状态，用于立即显示
+        Args:
+            uids: 账号 uid
+            timeout: 等待从未检查过的账号的最长时间（秒）
+
+        Returns:
+            {uid: 状态}；有上次结果的账号直接返回上次结果，从未检查过的账号并发检查后返回，
+            仍无法确认的为 None
+        """
+        uids = [str(uid) for uid in uids]
+        unknown = [uid for uid in uids if uid not in self._statuses]
+        if unknown:
+            wait(self._submit(unknown).values(), timeout=timeout)
+            with self._lock:
+                # 这些结果已经直接用于显示，不需要再通知界面刷新
+                self._changed.difference_update(self._statuses.keys() & set(unknown))
+        return {uid: self.get(uid) for uid in uids}
+
+    def refresh(self, uids: Iterable[Any], force: bool = False) -> int:
+        """
+        在后台并发检查过期的账号
+        Args:
+            uids: 账号 uid
+            force: 是否忽略有效期检查所有账号
+
+        Returns:
+            正在后台检查的账号数
+        """
+        return len(self._submit(uids, force))
+
+    def load_cache(self) -> int:
+        """
+        读取上次保存的状态
+        Returns:
+            读取到的账号数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                statuses = json.load(f).get("statuses", {})
+        except (OSError, ValueError, AttributeError):
+            return 0
+        with self._lock:
+            for uid, status in statuses.items():
+                self._statuses.setdefault(str(uid), status)
+        return len(statuses)
+
+    def save_cache(self):
+        """保存状态，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            statuses = {uid: dict(status) for uid, status in self._statuses.items()}
+        with self._save_lock:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"statuses": statuses}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+
+    def shutdown(self):
+        """关闭检查线程池，不等待正在进行的检查"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class LogRecorder:
+    """
+    日志记录器
+
+    内存中只保留最近 capacity 行，供界面显示；每一行同时放入队列，由后台线程每 flush_interval 秒批量写入文件。
+    当前文件超过 max_bytes 字节或已写入 max_age 秒时换一个新文件，目录中只保留最新的 keep_files 个 .log 文件。
+    设置目录之前记录的行先留在队列中，设置目录后一起写入；写入失败的行保留下来，下次写入时放在最前面。
+    """
+
+    def __init__(self, directory: Optional[Union[str, pathlib.Path]] = None, capacity: int = 2000,
+                 flush_interval: float = 1.0, max_bytes: int = 5 * 1024 * 1024, max_age: float = 86400,
+                 keep_files: Optional[int] = 100):
+        """
+        Args:
+            directory: 日志文件夹，None 表示稍后用 set_directory 设置
+            capacity: 内存中保留的最大行数
+            flush_interval: 后台线程写入文件的间隔（秒）
+            max_bytes: 单个日志文件的最大字节数
+            max_age: 单个日志文件的最长写入时间（秒）
+            keep_files: 文件夹中保留的日志文件数，None 表示不删除旧文件
+        """
+        self.capacity = capacity
+        """内存中保留的最大行数"""
+        self.flush_interval = flush_interval
+        """后台线程写入文件的间隔"""
+        self.max_bytes = max_bytes
+        """单个日志文件的最大字节数"""
+        self.max_age = max_age
+        """单个日志文件的最长写入时间"""
+        self.keep_files = keep_files
+        """文件夹中保留的日志文件数，None 表示不删除旧文件"""
+        self.directory: Optional[pathlib.Path] = None
+        """日志文件夹"""
+        self.current_path: Optional[pathlib.Path] = None
+        """正在写入的日志文件"""
+        self._recent: deque = deque(maxlen=capacity)
+        self._queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._unwritten: List[str] = []  # 已从队列取出但写入失败的行
+        self._file: Optional[TextIO] = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if directory is not None:
+            self.set_directory(directory)
+
+    def append(self, line: str):
+        """记录一行日志，不含换行符"""
+        self._recent.append(line)
+        self._queue.put(line)
+
+    def lines(self) -> List[str]:
+        """内存中保留的最近几行"""
+        return list(self._recent)
+
+    def text(self) -> str:
+        """内存中保留的最近几行，每行以换行符结尾"""
+        return "".join(line + "\n" for line in self.lines())
+
+    def set_directory(self, directory: Union[str, pathlib.Path]):
+        """设置日志文件夹并启动后台写入线程，文件夹改变时换新文件"""
+        directory = pathlib.Path(directory)
+        with self._write_lock:
+            if directory != self.directory:
+                self._close_file()
+                self.directory = directory
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="log-recorder", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass  # 磁盘错误时 flush 已保留没写入的行，下次再写
+
+    def _drain(self) -> List[str]:
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                return lines
+
+    def flush(self):
+        """把队列中的行写入当前日志文件，需要时换新文件"""
+        with self._write_lock:
+            if self.directory is None:
+                return
+            lines = self._unwritten + self._drain()
+            self._unwritten = []
+            if not lines:
+                return
+            try:
+                if self._file is not None and (self._file_bytes >= self.max_bytes
+                                               or time.time() - self._file_opened_at >= self.max_age):
+                    self._close_file()
+                if self._file is None:
+                    self._open_file()
+                data = "".join(line + "\n" for line in lines)
+                self._file.write(data)
+                self._file.flush()
+            except OSError:
+                self._unwritten = lines
+                self._close_file()  # 下次写入时重新打开文件
+                raise
+            self._file_bytes += len(data.encode("utf-8"))
+
+    def _open_file(self):
+        """打开一个以当前时间命名的新文件，并删除多余的旧文件"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = self.directory / f"{stem}.log"
+        index = 1
+        while path.exists():
+            path = self.directory / f"{stem}_{index}.log"
+            index += 1
+        self._file = open(path, "w", encoding="utf-8")
+        self.current_path = path
+        self._file_bytes = 0
+        self._file_opened_at = time.time()
+        self._prune()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _prune(self):
+        """按修改时间只保留最新的 keep_files 个 .log 文件"""
+        if self.keep_files is None:
+            return
+        log_files = sorted(
+            (f for f in self.directory.iterdir() if f.is_file() and f.suffix.lower() == '.log'),
+            key=lambda f: f.stat().st_mtime,
+            reverse=True
+        )
+        for old_file in log_files[self.keep_files:]:
+            if old_file != self.current_path:
+                old_file.unlink(missing_ok=True)
+
+    def close(self):
+        """停止后台线程，写入剩余的行并关闭文件"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self._thread = None
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                self._close_file()
+
+
+class NetworkHealthMonitor:
+    """
+    网络连接与 SSL 证书验证的状态监视器
+
+    后台线程定期执行网络连接检查，连通时再检查 SSL 证书验证，保存最近一次的结果和检查时间；
+    读取状态不会发出任何请求。检查失败后按较短的间隔重试，恢复后回到正常间隔。
+    """
+
+    def __init__(self, check_network: Callable[[], Dict[str, Any]], check_ssl: Callable[[], Dict[str, Any]],
+                 interval: float = 60.0, retry_interval: float = 10.0):
+        """
+        Args:
+            check_network: 网络连接检查函数，如 Tools.check_network_connection，返回值含 'connected'
+            check_ssl: SSL 证书验证检查函数，如 Tools.check_ssl_verification，返回值含 'success'
+            interval: 网络正常时的检查间隔（秒）
+            retry_interval: 网络异常时的检查间隔（秒）
+        """
+        self.check_network = check_network
+        """网络连接检查函数"""
+        self.check_ssl = check_ssl
+        """SSL 证书验证检查函数"""
+        self.interval = interval
+        """网络正常时的检查间隔"""
+        self.retry_interval = retry_interval
+        """网络异常时的检查间隔"""
+        self.network: Optional[Dict[str, Any]] = None
+        """最近一次网络连接检查的结果，没有检查过时为 None"""
+        self.ssl: Optional[Dict[str, Any]] = None
+        """最近一次 SSL 证书验证检查的结果，没有检查过时为 None"""
+        self.checked_at: Optional[float] = None
+        """最近一次检查完成的时间戳，没有检查过时为 None"""
+        self._check_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        """最近一次检查时网络是否连通"""
+        return bool(self.network and self.network.get("connected"))
+
+    @property
+    def ssl_verified(self) -> bool:
+        """最近一次检查时 SSL 证书验证是否可用，没有检查过时按可用处理"""
+        return self.ssl is None or bool(self.ssl.get("success"))
+
+    def age(self) -> Optional[float]:
+        """距离最近一次检查完成的秒数，没有检查过时为 None"""
+        return None if self.checked_at is None else time.time() - self.checked_at
+
+    def check_now(self):
+        """立即检查一次，正在检查时等待那次检查完成"""
+        if not self._check_lock.acquire(blocking=False):
+            with self._check_lock:
+                return
+        try:
+            network = self.check_network()
+            ssl_result = self.check_ssl() if network.get("connected") else self.ssl
+            self.network, self.ssl = network, ssl_result
+            self.checked_at = time.time()
+        finally:
+            self._check_lock.release()
+
+    def request_check(self):
+        """让后台线程尽快检查一次，不等待结果"""
+        self._wake.set()
+
+    def start(self):
+        """启动后台检查线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="network-health", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval if self.connected else self.retry_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.check_now()
+            except Exception:
+                pass  # 检查函数本身出错时保留上次的结果
+
+    def stop(self):
+        """停止后台检查线程"""
+        self._stop.set()
+        self._wake.set()
+
+
 class Tools:
     """工具函数"""
 
@@ -418,7 +1313,8 @@ class Tools:
             - 'Message': 成功时为"Success"，失败时为错误信息
         """
         try:
-            with requests.get(url, headers=headers, stream=True, verify=verify_ssl) as response:
+            with HttpSessionPool.shared().session.get(url, headers=headers, stream=True,
+                                                      verify=verify_ssl) as response:
                 response.raise_for_status()
                 image_data = io.BytesIO()
                 for chunk in response.iter_content(chunk_size=8192):
@@ -568,6 +1464,47 @@ class Tools:
 
         return module
 
+    @staticmethod
+    def iter_danmu_packets(byte_buffer: Union[bytes, bytearray, memoryview]) -> Iterator[tuple]:
+        """
+        逐个解析 wss 消息中的封包，压缩包会被解压后按原顺序继续展开
+
+        整个过程只在一个 memoryview 上用 struct.unpack_from 移动偏移，
+        拼接在一起的多个封包不会因为切片而复制剩余数据。
+
+        Args:
+            byte_buffer: 从 wss 收到的二进制消息
+
+        Returns:
+            依次产出 (操作码, 序列号, 正文) 的迭代器，正文为 memoryview
+        """
+        header_size = DanmuProtocol.HEADER.size
+        unpack_from = DanmuProtocol.HEADER.unpack_from
+        # 待处理的 (缓冲区, 偏移)，解压出的缓冲区压在外层剩余部分之上以保持顺序
+        stack = [(memoryview(byte_buffer), 0)]
+        while stack:
+            view, offset = stack.pop()
+            end = len(view)
+            while offset + header_size <= end:
+                package_len, head_length, prot_ver, opt_code, sequence = unpack_from(view, offset)
+                if head_length < header_size or package_len < head_length or offset + package_len > end:
+                    break  # 封包不完整或头部损坏，丢弃剩余部分；长度小于头部时偏移无法前进
+                body = view[offset + head_length:offset + package_len]
+                offset += package_len
+
+                if prot_ver == DanmuProtocol.VERSION_ZIP:
+                    stack.append((view, offset))
+                    stack.append((memoryview(zlib.decompress(body)), 0))
+                    break
+                elif prot_ver == DanmuProtocol.VERSION_BROTLI:
+                    if brotli is None:
+                        continue  # 无法解压，跳过该封包
+                    stack.append((view, offset))
+                    stack.append((memoryview(brotli.decompress(body)), 0))
+                    break
+
+                yield opt_code, sequence, body
+
     @staticmethod
     def utf_8_to_url(text: str, safe: str = "/:") -> str:
         """
@@ -1014,6 +1951,13 @@ class Tools:
 
 
 class DanmuProtoDecoder:
+    _compiled_modules: Dict[str, types.ModuleType] = {}
+    """进程级 pb2 模块注册表 {模块名: 模块}，每个模块只编译一次，所有连接共用"""
+    _compile_lock = threading.Lock()
+    """编译 pb2 模块时的锁，避免多个连接同时 exec 同一份源码"""
+    _field_plans: Dict[str, tuple] = {}
+    """消息字段遍历计划缓存 {消息全名: ((字段名, 是否重复字段, 是否消息字段), ...)}"""
+
     def __init__(self):
         self.online_rank_v3_pb2 = """
 from google.protobuf import descriptor as _descriptor
@@ -1184,13 +2128,31 @@ if not _descriptor._USE_C_DESCRIPTORS:
 # @@protoc_insertion_point(module_scope)
 """
 
+    def get_pb2_module(self, module_name: str) -> types.ModuleType:
+        """
+        获取已编译的 pb2 模块，首次调用时编译并登记到进程级注册表
+        Args:
+            module_name: 模块名，同时也是保存 pb2 源码的属性名，如 "interact_word_v2_pb2"
+
+        Returns:
+            编译后的 pb2 模块
+        """
+        module = DanmuProtoDecoder._compiled_modules.get(module_name)
+        if module is None:
+            with DanmuProtoDecoder._compile_lock:
+                module = DanmuProtoDecoder._compiled_modules.get(module_name)
+                if module is None:
+                    module = Tools.str_to_module(module_name, getattr(self, module_name))
+                    DanmuProtoDecoder._compiled_modules[module_name] = module
+        return module
+
     # 更完整的解决方案：使用protobuf库编译proto文件
     def decode_online_rank_v3_protobuf(self, base64_string):
         """
-        使用protobuf库完整解码（需要先编译proto文件）
+        使用protobuf库完整解码（pb2 模块只在首次调用时编译）
         """
-        # 导入编译后的模块
-        online_rank_v3_pb2 = Tools.str_to_module("online_rank_v3_pb2", self.online_rank_v3_pb2)
+        # 获取编译后的模块
+        online_rank_v3_pb2 = self.get_pb2_module("online_rank_v3_pb2")
         # 解码
         pb_data = base64.b64decode(base64_string)
         message = online_rank_v3_pb2.GoldRankBroadcast()
@@ -1201,10 +2163,10 @@ if not _descriptor._USE_C_DESCRIPTORS:
 
     def decode_interact_word_v2_protobuf(self, base64_string):
         """
-        使用protobuf库完整解码（需要先编译proto文件）
+        使用protobuf库完整解码（pb2 模块只在首次调用时编译）
         """
-        # 导入编译后的模块
-        interact_word_v2_pb2 = Tools.str_to_module("interact_word_v2_pb2", self.interact_word_v2_pb2)
+        # 获取编译后的模块
+        interact_word_v2_pb2 = self.get_pb2_module("interact_word_v2_pb2")
         # 解码
         pb_data = base64.b64decode(base64_string)
         message = interact_word_v2_pb2.InteractWord()
@@ -1213,19 +2175,32 @@ if not _descriptor._USE_C_DESCRIPTORS:
         # 转换为字典
         return self.protobuf_to_dict(message)
 
+    def _get_field_plan(self, descriptor) -> tuple:
+        """获取消息的字段遍历计划，按消息全名缓存"""
+        plan = DanmuProtoDecoder._field_plans.get(descriptor.full_name)
+        if plan is None:
+            # 新版 protobuf 移除了 FieldDescriptor.label，改用 is_repeated
+            plan = tuple(
+                (field.name,
+                 field.is_repeated if hasattr(field, 'is_repeated') else field.label == field.LABEL_REPEATED,
+                 field.type == field.TYPE_MESSAGE)
+                for field in descriptor.fields
+            )
+            DanmuProtoDecoder._field_plans[descriptor.full_name] = plan
+        return plan
+
     def protobuf_to_dict(self, obj):
         """将protobuf对象转换为字典"""
         result = {}
 
-        for field in obj.DESCRIPTOR.fields:
-            field_name = field.name
+        for field_name, is_repeated, is_message in self._get_field_plan(obj.DESCRIPTOR):
             value = getattr(obj, field_name)
 
-            if field.label == field.LABEL_REPEATED:
+            if is_repeated:
                 # 重复字段
                 result[field_name] = [self.protobuf_to_dict(item) if hasattr(item, 'DESCRIPTOR') else item
                                       for item in value]
-            elif field.type == field.TYPE_MESSAGE:
+            elif is_message:
                 # 消息类型字段
                 if hasattr(value, 'DESCRIPTOR'):
                     result[field_name] = self.protobuf_to_dict(value)
@@ -1321,50 +2296,358 @@ class OptimizedMessageDeduplication:
         return len(self.message_store) * 50  # 近似值
 
 
-class BiliDanmu:
-
-    def __init__(self, headers: dict):
-        self.headers = headers
-        self.cookie = headers['cookie']
-
-    def _get_websocket_client(self, roomid: int):
-        danmu_info = WbiSigna(self.headers).get_danmu_info(roomid)
-        log_save(obs.LOG_INFO, f"{danmu_info}")
-        token = danmu_info['data']['token']
-        host = danmu_info['data']['host_list'][-1]
-        wss_url = f"wss://{host['host']}:{host['wss_port']}/sub"
+class TimeBucketMessageDeduplication:
+    """
+    分桶的消息去重类
 
-        user_info = BilibiliCSRFAuthenticator(self.headers).get_user_live_info()['data']
-        cookies = Tools.parse_cookie(self.cookie)
-        auth_body = {
-            "uid": user_info["uid"],
-            "roomid": roomid,
-            "protover": 2,
-            "buvid": cookies['buvid3'],
-            "platform": "web",
-            "type": 3,
-            "key": token
-        }
-        return wss_url, auth_body
+    消息以 64 位整数指纹保存，指纹按时间分到若干个集合（桶）里，
+    过期时整桶丢弃，不需要逐条扫描，add/contains 的清理开销均摊为 O(1)。
+    接口与 OptimizedMessageDeduplication 相同 (add/contains/size/clear)，可直接替换。
+    """
 
-    def connect_room(self, roomid: int, num_r: int = 6, connection_interval: float = 0.6):
+    def __init__(self, max_size: int = 1000, ttl_seconds: Optional[float] = 5, bucket_count: int = 4):
         """
-        连接直播间
         Args:
-            roomid: 直播间真实id
-            num_r: 同时连接多个弹幕减少丢包
-            connection_interval: 同时连接多个弹幕的间隔秒
+            max_size: 最大存储数量，超出时整桶丢弃最旧的消息
+            ttl_seconds: 消息存活时间（秒），None 或 0 表示不过期、只按 max_size 淘汰（与 OptimizedMessageDeduplication 一致）；
+                实际存活时间在 ttl 到 ttl + ttl/bucket_count 之间
+            bucket_count: 时间桶数量，越多过期越精确，contains 需要检查的集合也越多
 
-        Returns:
-            ws客户端实例
+        Raises:
+            ValueError: ttl_seconds 为负数
         """
-        wss_url, auth_body = self._get_websocket_client(roomid)
-        return self._WebSocketClient(wss_url, auth_body, num_r, connection_interval)
+        self._max_size = max_size
+        self._ttl_seconds = self._check_ttl(ttl_seconds)
+        self.bucket_count = max(1, bucket_count)
+        """时间桶数量"""
+        self._buckets: deque = deque()  # [(桶创建时间, 指纹集合)]，右端为当前桶
+        self._count = 0
+        self._capacity = 1
+        """当前桶的容量"""
+        self._next_check = 0.0
+        """下一次需要轮换或清理桶的时间"""
 
-    class _WebSocketClient:
+    @property
+    def max_size(self) -> int:
+        """最大存储数量"""
+        return self._max_size
 
-        def __init__(self, url: str, auth_body: dict[str, Union[str, int]], num_r: int, connection_interval: float):
-            self.url = url
+    @max_size.setter
+    def max_size(self, value: int):
+        self._max_size = value
+        self._next_check = 0.0
+
+    @property
+    def ttl_seconds(self) -> Optional[float]:
+        """消息存活时间（秒），None 或 0 表示不过期"""
+        return self._ttl_seconds
+
+    @ttl_seconds.setter
+    def ttl_seconds(self, value: Optional[float]):
+        self._ttl_seconds = self._check_ttl(value)
+        self._next_check = 0.0
+
+    @staticmethod
+    def _check_ttl(value: Optional[float]) -> Optional[float]:
+        if value is not None and value < 0:
+            raise ValueError(f"ttl_seconds 不能为负数: {value}")
+        return value
+
+    @staticmethod
+    def _get_fingerprint(message: str) -> int:
+        """获取消息的 64 位整数指纹（字符串的哈希值会缓存在字符串对象上）"""
+        return hash(message)
+
+    def _maybe_rotate(self, current_time: float):
+        """快速判断是否需要轮换，绝大多数调用只做两次比较"""
+        if current_time >= self._next_check or len(self._buckets[-1][1]) >= self._capacity:
+            self._rotate(current_time)
+
+    def _rotate(self, current_time: float):
+        """丢弃过期或超出容量的旧桶，并在需要时开启新桶"""
+        buckets = self._buckets
+        ttl_seconds = self._ttl_seconds
+        span = ttl_seconds / self.bucket_count if ttl_seconds else 0
+        if ttl_seconds:
+            # 桶内最新的消息也已超过存活时间时，整桶丢弃
+            while buckets and current_time - buckets[0][0] - span >= ttl_seconds:
+                self._count -= len(buckets.popleft()[1])
+        while len(buckets) > 1 and self._count > self._max_size:
+            self._count -= len(buckets.popleft()[1])
+
+        self._capacity = max(1, self._max_size // self.bucket_count)
+        if not buckets or len(buckets[-1][1]) >= self._capacity \
+                or (ttl_seconds and current_time - buckets[-1][0] >= span):
+            buckets.append((current_time, set()))
+
+        if ttl_seconds:
+            # 当前桶关闭或最旧的桶过期，取较早者
+            self._next_check = min(buckets[-1][0] + span, buckets[0][0] + span + ttl_seconds)
+        else:
+            self._next_check = float('inf')
+
+    def _contains_fingerprint(self, fingerprint: int) -> bool:
+        for _, bucket in reversed(self._buckets):
+            if fingerprint in bucket:
+                return True
+        return False
+
+    def add(self, message: str) -> bool:
+        """添加消息，返回True如果是新消息"""
+        fingerprint = hash(message)  # 同 _get_fingerprint，热路径上内联
+        current_time = time.monotonic()
+        if not self._buckets:
+            self._rotate(current_time)
+        else:
+            self._maybe_rotate(current_time)
+
+        for _, bucket in reversed(self._buckets):
+            if fingerprint in bucket:
+                return False
+
+        self._buckets[-1][1].add(fingerprint)
+        self._count += 1
+        return True
+
+    def contains(self, message: str) -> bool:
+        """检查消息是否重复"""
+        if not self._buckets:
+            return False
+        self._maybe_rotate(time.monotonic())
+        return self._contains_fingerprint(self._get_fingerprint(message))
+
+    def size(self) -> int:
+        """返回当前消息数量"""
+        if self._buckets:
+            self._maybe_rotate(time.monotonic())
+        return self._count
+
+    def clear(self):
+        """清空所有消息"""
+        self._buckets.clear()
+        self._count = 0
+        self._next_check = 0.0
+
+    def get_memory_usage(self) -> int:
+        """返回实际内存使用（字节），包括桶容器、集合和其中的指纹对象"""
+        total = sys.getsizeof(self._buckets)
+        for bucket_entry in self._buckets:
+            start_time, bucket = bucket_entry
+            total += sys.getsizeof(bucket_entry) + sys.getsizeof(start_time) + sys.getsizeof(bucket)
+            total += sum(sys.getsizeof(fingerprint) for fingerprint in bucket)
+        return total
+
+
+
+class DanmuFanIn:
+    """
+    多连接弹幕汇流
+
+    同一直播间的多个 wss 连接会收到相同的消息，这里按消息自带的标识
+    (msg_id / id_str / tid) 合并，只放行每条消息的第一次到达；
+    没有标识的消息退回到正文的整数哈希。
+    同时统计每个连接的接收数、抢先数、丢失数和相对最快连接的延迟，用于调整连接数。
+    """
+
+    _IDENTITY_PATTERN = re.compile(r'\\?"(?:msg_id|id_str|tid)\\?"\s*:\s*\\?"([^"\\]+)')
+    """从原始 JSON 文本中取消息标识，兼容 DANMU_MSG extra 字段中被转义的引号"""
+    _CMD_PATTERN = re.compile(r'"cmd"\s*:\s*"([^"]*)"')
+    """从原始 JSON 文本中取命令名，避免不同命令的标识相互冲突"""
+    DEFAULT_WINDOW_SECONDS = 6
+    """默认的合并窗口（秒）"""
+
+    def __init__(self, window_seconds: Optional[float] = DEFAULT_WINDOW_SECONDS, max_size: int = 20000):
+        """
+        Args:
+            window_seconds: 合并窗口（秒），超过窗口仍未到达的连接记为丢失；None 或不大于 0 时使用默认窗口
+            max_size: 窗口内最多跟踪的消息数量，超出时最旧的消息提前结算，
+                应远大于一个窗口内的消息数，否则还没追上的连接会被误记为丢失
+        """
+        self._window_seconds = self.DEFAULT_WINDOW_SECONDS
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        """窗口内最多跟踪的消息数量"""
+        self.unique_count = 0
+        """合并后的消息总数"""
+        self._entries: OrderedDict = OrderedDict()  # {标识: [首次到达时间, 已送达连接位掩码]}
+        self._connections: Dict[int, Dict[str, Union[int, float, None]]] = {}
+
+    @property
+    def window_seconds(self) -> float:
+        """合并窗口（秒）"""
+        return self._window_seconds
+
+    @window_seconds.setter
+    def window_seconds(self, value: Optional[float]):
+        # 窗口为 0 时每条消息在下一条到达时就被结算，重复消息会全部放行，所以退回默认窗口
+        self._window_seconds = value if value and value > 0 else self.DEFAULT_WINDOW_SECONDS
+
+    @classmethod
+    def message_identity(cls, content: str) -> Hashable:
+        """
+        获取消息标识
+        Args:
+            content: 消息的原始 JSON 文本
+
+        Returns:
+            (命令名, 消息自带的标识)，没有标识时返回正文的整数哈希
+        """
+        match = cls._IDENTITY_PATTERN.search(content)
+        if match:
+            cmd = cls._CMD_PATTERN.search(content)
+            return cmd.group(1) if cmd else None, match.group(1)
+        return hash(content)
+
+    def register_connection(self, connection_id: int, now: Optional[float] = None):
+        """连接认证成功后登记，之后到达的消息才会计入该连接的丢失统计"""
+        stats = self._connections.setdefault(connection_id, {
+            "received": 0, "first": 0, "missed": 0, "lag_total": 0.0, "lag_max": 0.0, "active_since": None
+        })
+        stats["active_since"] = time.monotonic() if now is None else now
+
+    def unregister_connection(self, connection_id: int):
+        """连接断开后注销，断开期间不计丢失"""
+        if connection_id in self._connections:
+            self._connections[connection_id]["active_since"] = None
+
+    def accept(self, connection_id: int, content: str, now: Optional[float] = None) -> bool:
+        """
+        汇入一条消息
+        Args:
+            connection_id: 收到消息的连接序号
+            content: 消息的原始 JSON 文本
+            now: 到达时间（time.monotonic），默认取当前时间
+
+        Returns:
+            是否是该消息的第一次到达
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        stats = self._connections.get(connection_id)
+        if stats is None:
+            self.register_connection(connection_id, now)
+            stats = self._connections[connection_id]
+        stats["received"] += 1
+
+        identity = self.message_identity(content)
+        entry = self._entries.get(identity)
+        if entry is not None:
+            entry[1] |= 1 << connection_id
+            lag = now - entry[0]
+            stats["lag_total"] += lag
+            if lag > stats["lag_max"]:
+                stats["lag_max"] = lag
+            return False
+
+        self._entries[identity] = [now, 1 << connection_id]
+        self.unique_count += 1
+        stats["first"] += 1
+        if len(self._entries) > self.max_size:
+            self._settle(*self._entries.popitem(last=False))
+        return True
+
+    def _expire(self, now: float):
+        """结算超出窗口的消息，只从最旧的一端弹出"""
+        entries = self._entries
+        while entries:
+            identity, entry = next(iter(entries.items()))
+            if now - entry[0] <= self.window_seconds:
+                break
+            del entries[identity]
+            self._settle(identity, entry)
+
+    def _settle(self, identity: Hashable, entry: list):
+        """消息离开窗口时，为没有送达的在线连接记一次丢失"""
+        first_time, mask = entry
+        for connection_id, stats in self._connections.items():
+            active_since = stats["active_since"]
+            if active_since is not None and active_since <= first_time and not mask >> connection_id & 1:
+                stats["missed"] += 1
+
+    def settle_pending(self):
+        """结算窗口内所有还在等待的消息，用于停止接收之后、读取统计之前"""
+        entries = self._entries
+        while entries:
+            self._settle(*entries.popitem(last=False))
+
+    def get_connection_stats(self) -> Dict[int, Dict[str, Union[int, float, bool]]]:
+        """
+        返回每个连接的统计信息
+
+        Returns:
+            {连接序号: {"received": 接收数, "first": 抢先到达数, "missed": 丢失数,
+            "loss_rate": 丢失率, "avg_lag_ms": 平均落后毫秒, "max_lag_ms": 最大落后毫秒, "active": 是否在线}}
+        """
+        result = {}
+        for connection_id, stats in sorted(self._connections.items()):
+            received = stats["received"]
+            expected = received + stats["missed"]
+            result[connection_id] = {
+                "received": received,
+                "first": stats["first"],
+                "missed": stats["missed"],
+                "loss_rate": stats["missed"] / expected if expected else 0.0,
+                "avg_lag_ms": stats["lag_total"] / received * 1000 if received else 0.0,
+                "max_lag_ms": stats["lag_max"] * 1000,
+                "active": stats["active_since"] is not None,
+            }
+        return result
+
+    def size(self) -> int:
+        """返回窗口内正在跟踪的消息数量"""
+        return len(self._entries)
+
+    def clear(self):
+        """清空窗口和统计"""
+        self._entries.clear()
+        self._connections.clear()
+        self.unique_count = 0
+
+
+class BiliDanmu:
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+        self.cookie = headers['cookie']
+
+    def _get_websocket_client(self, roomid: int):
+        danmu_info = WbiSigna(self.headers).get_danmu_info(roomid)
+        log_save(obs.LOG_INFO, f"{danmu_info}")
+        token = danmu_info['data']['token']
+        host = danmu_info['data']['host_list'][-1]
+        wss_url = f"wss://{host['host']}:{host['wss_port']}/sub"
+
+        user_info = BilibiliCSRFAuthenticator(self.headers).get_user_live_info()['data']
+        cookies = Tools.parse_cookie(self.cookie)
+        auth_body = {
+            "uid": user_info["uid"],
+            "roomid": roomid,
+            "protover": DanmuProtocol.SUPPORTED_PROTOVER,
+            "buvid": cookies['buvid3'],
+            "platform": "web",
+            "type": 3,
+            "key": token
+        }
+        return wss_url, auth_body
+
+    def connect_room(self, roomid: int, num_r: int = 6, connection_interval: float = 0.6):
+        """
+        连接直播间
+        Args:
+            roomid: 直播间真实id
+            num_r: 同时连接多个弹幕减少丢包
+            connection_interval: 同时连接多个弹幕的间隔秒
+
+        Returns:
+            ws客户端实例
+        """
+        wss_url, auth_body = self._get_websocket_client(roomid)
+        return self._WebSocketClient(wss_url, auth_body, num_r, connection_interval)
+
+    class _WebSocketClient:
+
+        def __init__(self, url: str, auth_body: dict[str, Union[str, int]], num_r: int, connection_interval: float):
+            self.url = url
             self.auth_body = auth_body
             self.HEARTBEAT_INTERVAL = 20
             """心跳间隔"""
@@ -1372,8 +2655,12 @@ class BiliDanmu:
             """同时连接多个弹幕减少丢包"""
             self.connection_interval = connection_interval
             """同时连接多个弹幕的间隔秒"""
-            self.o_m_d = OptimizedMessageDeduplication()
-            """用于多弹幕返回去重的实例"""
+            self.o_m_d = TimeBucketMessageDeduplication()
+            """用于认证回复等无标识消息去重的实例"""
+            self.fan_in = DanmuFanIn()
+            """按消息标识合并多个连接的普通包，并统计各连接的丢失和延迟"""
+            self.proto_decoder = DanmuProtoDecoder()
+            """protobuf 解码器，pb2 模块在进程内共用"""
             self.replyAuthenticationPackageCallable: Callable[[str], None] = lambda a: None
             """接收认证包回复的回调函数， 参数为接收到的数据"""
             self.ordinaryBagCallable: Callable[[Dict[str, Any]], None] = lambda a: None
@@ -1409,7 +2696,7 @@ class BiliDanmu:
             self._stop_event = asyncio.Event()  # 用于等待停止信号
             self._loop = None  # 存储事件循环引用
 
-        async def connect(self):
+        async def connect(self, connection_id: int = 0):
             base_delay = 3
             retry_count = 0
             max_retries = 5
@@ -1423,12 +2710,13 @@ class BiliDanmu:
                             close_timeout=10
                     ) as ws:
                         await self.on_open(ws)
+                        self.fan_in.register_connection(connection_id)
                         retry_count = 0  # 成功连接后重置重试计数
 
                         while self.running:
                             try:
                                 message = await asyncio.wait_for(ws.recv(), timeout=10.0)
-                                await self.on_message(message)
+                                await self.on_message(message, connection_id)
                             except asyncio.TimeoutError:
                                 if not self.running:
                                     break
@@ -1438,8 +2726,10 @@ class BiliDanmu:
                                     break
                             except websockets.exceptions.ConnectionClosed:
                                 break
+                        self.fan_in.unregister_connection(connection_id)
 
                 except Exception as e:
+                    self.fan_in.unregister_connection(connection_id)
                     if not self.running:
                         break
                     retry_count += 1
@@ -1507,9 +2797,9 @@ class BiliDanmu:
         async def _heart_rate_failure_callback(self, e):
             self.heartRateFailureCallback(e)
 
-        async def on_message(self, message):
+        async def on_message(self, message, connection_id: int = 0):
             if isinstance(message, bytes):
-                await self.unpack(message)
+                await self.unpack(message, connection_id)
 
         def pack(self, content: Optional[dict], code: int) -> bytes:
             """
@@ -1535,47 +2825,32 @@ class BiliDanmu:
                      (1).to_bytes(4, 'big')
             return header + content_bytes
 
-        async def unpack(self, byte_buffer: bytes):
-            package_len = int.from_bytes(byte_buffer[0:4], 'big')
-            head_length = int.from_bytes(byte_buffer[4:6], 'big')
-            prot_ver = int.from_bytes(byte_buffer[6:8], 'big')
-            opt_code = int.from_bytes(byte_buffer[8:12], 'big')
-            sequence = int.from_bytes(byte_buffer[12:16], 'big')
-
-            content_bytes = byte_buffer[16:package_len]
-
-            if prot_ver == 0:
-                pass
-            elif prot_ver == 2:
-                content_bytes = zlib.decompress(content_bytes)
-                await self.unpack(content_bytes)
-                return
-            elif prot_ver == 3:
-                pass
-
-            content = content_bytes.decode('utf-8')
-            if not self.o_m_d.add(content):
-                return
-
-            if opt_code == 5:  # SEND_SMS_REPLY
-                try:
-                    content_dict: dict = json.loads(content)
-                    if content_dict['cmd'] == "INTERACT_WORD_V2":
-                        content_dict['data'] = DanmuProtoDecoder().decode_interact_word_v2_protobuf(
-                            content_dict['data']['pb'])
-                    elif content_dict['cmd'] == "ONLINE_RANK_V3":
-                        content_dict['data'] = DanmuProtoDecoder().decode_online_rank_v3_protobuf(
-                            content_dict['data']['pb'])
-
-                    # 异步处理回调
-                    asyncio.create_task(self._handle_opt_code5(content_dict))
-                except:
-                    pass
-            elif opt_code == 8:  # AUTH_REPLY
-                asyncio.create_task(self._handle_opt_code8(content))
+        async def unpack(self, byte_buffer: bytes, connection_id: int = 0):
+            for opt_code, sequence, body in Tools.iter_danmu_packets(byte_buffer):
+                if opt_code not in (5, 8):
+                    continue
 
-            if len(byte_buffer) > package_len:
-                await self.unpack(byte_buffer[package_len:])
+                content = str(body, 'utf-8')
+                if opt_code == 5:  # SEND_SMS_REPLY
+                    if not self.fan_in.accept(connection_id, content):
+                        continue
+                    try:
+                        content_dict: dict = json.loads(content)
+                        if content_dict['cmd'] == "INTERACT_WORD_V2":
+                            content_dict['data'] = self.proto_decoder.decode_interact_word_v2_protobuf(
+                                content_dict['data']['pb'])
+                        elif content_dict['cmd'] == "ONLINE_RANK_V3":
+                            content_dict['data'] = self.proto_decoder.decode_online_rank_v3_protobuf(
+                                content_dict['data']['pb'])
+
+                        # 异步处理回调
+                        asyncio.create_task(self._handle_opt_code5(content_dict))
+                    except:
+                        pass
+                elif opt_code == 8:  # AUTH_REPLY
+                    if not self.o_m_d.add(content):
+                        continue
+                    asyncio.create_task(self._handle_opt_code8(content))
 
         async def _handle_opt_code8(self, content: str):
             """异步处理 opt_code 8 回调"""
@@ -1596,7 +2871,7 @@ class BiliDanmu:
 
             # 创建多个连接任务
             for i in range(self.num_r):
-                task = asyncio.create_task(self.connect(), name=f"DanmuConn-{i}")
+                task = asyncio.create_task(self.connect(i), name=f"DanmuConn-{i}")
                 self.connection_tasks.append(task)
                 if i < self.num_r - 1:  # 最后一个连接不需要等待
                     await asyncio.sleep(self.connection_interval)  # 间隔连接
@@ -1608,6 +2883,15 @@ class BiliDanmu:
 
             asyncio.create_task(self._messages_stop_callback())
 
+        def get_connection_stats(self) -> Dict[int, Dict[str, Union[int, float, bool]]]:
+            """
+            返回每个连接的统计信息，用于根据实际丢包和延迟调整连接数
+
+            Returns:
+                {连接序号: {"received", "first", "missed", "loss_rate", "avg_lag_ms", "max_lag_ms", "active"}}
+            """
+            return self.fan_in.get_connection_stats()
+
         async def _multiple_messages_callback(self, num):
             self.multipleMessagesCallback(num)
 
@@ -1643,6 +2927,8 @@ class BiliDanmu:
 
             self.running = False
             self._stop_event.set()  # 触发停止信号
+            # 停止后窗口内的消息不会再到达，先结算再断开连接，否则断开的连接不再计入丢失
+            self.fan_in.settle_pending()
 
             asyncio.create_task(self._stop_connection_callback())
 
@@ -1675,136 +2961,852 @@ class BiliDanmu:
                 asyncio.run(self.stop_async())
 
 
-class WebSocketServer:
-    def __init__(self, host='0.0.0.0', port=8765):
-        self.host = host
-        self.port = port
-        self.connected_clients: Set = set()
-        self.server: Optional[websockets.WebSocketServer] = None
-        self.danmu_processor = None
-        self.running = False
-        self._server_task: Optional[asyncio.Task] = None
-        self.registerCallback: Callable = lambda clients_count: None
-        """注册新的客户端连接回调, 参数为注册用户数量"""
-        self.unregisterCallback: Callable = lambda clients_count: None
-        """客户端断开回调, 参数为注册用户数量"""
-        self.startServerCallback: Callable = lambda host, port: None
-        """服务器启动回调, 参数为注册用户数量"""
-        self.serverCancelledCallback: Callable = lambda: None
-        """服务器取消回调, 无参"""
-        self.serverErroCallback: Callable = lambda erroMessage: None
-        """服务器错误回调, 参数为错误信息"""
-        self.serverStopCallback: Callable = lambda: None
-        """服务器停止回调, 无参"""
+class DanmuAssetCache:
+    """
+    弹幕图片资源缓存
 
-    async def register(self, websocket):
-        """注册新的客户端连接"""
-        self.connected_clients.add(websocket)
-        self.registerCallback(len(self.connected_clients))
+    头像、表情、舰队徽章等图片在线程池中下载并保存到数据目录，
+    事件循环只查询内存中的 {网页路径: (宽, 高)} 索引，不再做磁盘检查、读取图片或网络请求。
+    同一图片的并发请求合并为一次加载，同时进行的加载数量有上限。
+    加载失败的图片在 failure_ttl 秒内不再重试，失效的链接不会让每条消息都重新下载一次。
+    """
 
-        # 发送欢迎消息
-        welcome_msg = {
-            "type": "system",
-            "messageData": "弹幕服务器连接成功",
-            "timestamp": time.time(),
-            "clients_count": len(self.connected_clients)
-        }
-        await websocket.send(json.dumps(welcome_msg))
+    def __init__(self, root_dir: Union[str, pathlib.Path], headers: Dict[str, str], max_concurrency: int = 4,
+                 on_ready: Optional[Callable[[str, int, int], None]] = None, failure_ttl: float = 60):
+        """
+        Args:
+            root_dir: 网页根目录，网页路径 './img/...' 相对于该目录保存
+            headers: 下载图片使用的请求头
+            max_concurrency: 同时进行的加载数量上限
+            on_ready: 图片加载完成回调，参数为网页路径、宽、高，在事件循环中调用
+            failure_ttl: 加载失败后不再重试的时间（秒）
+        """
+        self.root_dir = pathlib.Path(root_dir)
+        """网页根目录"""
+        self.headers = headers
+        """下载图片使用的请求头"""
+        self.max_concurrency = max_concurrency
+        """同时进行的加载数量上限"""
+        self.on_ready: Callable[[str, int, int], None] = on_ready or (lambda web_path, width, height: None)
+        """图片加载完成回调，参数为网页路径、宽、高"""
+        self.failure_ttl = failure_ttl
+        """加载失败后不再重试的时间"""
+        self.failed_count = 0
+        """加载失败次数"""
+        self._index: Dict[str, Tuple[int, int]] = {}  # {网页路径: (宽, 高)}
+        self._pending: Dict[str, asyncio.Future] = {}  # {网页路径: 正在进行的加载}
+        self._failed: Dict[str, float] = {}  # {网页路径: 加载失败的时间}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def file_path(self, web_path: str) -> pathlib.Path:
+        """网页路径对应的本地文件路径"""
+        return self.root_dir / web_path.replace('./', '')
+
+    def get_size(self, web_path: str) -> Optional[Tuple[int, int]]:
+        """返回已索引图片的 (宽, 高)，未索引时返回 None"""
+        return self._index.get(web_path)
+
+    def _should_load(self, web_path: str) -> bool:
+        """没有正在进行的加载，且不在失败后的等待时间内"""
+        if web_path in self._pending:
+            return False
+        failed_at = self._failed.get(web_path)
+        if failed_at is not None:
+            if time.monotonic() - failed_at < self.failure_ttl:
+                return False
+            del self._failed[web_path]
+        return True
 
-    async def unregister(self, websocket):
-        """移除断开连接的客户端"""
-        if websocket in self.connected_clients:
-            self.connected_clients.remove(websocket)
-            self.unregisterCallback(len(self.connected_clients))
+    def request(self, url: str, web_path: str) -> Optional[Tuple[int, int]]:
+        """
+        请求一张网络图片，必须在事件循环中调用
+        Args:
+            url: 图片的网络直链
+            web_path: 图片在网页中的路径，如 './img/face/xxx.jpg'
 
-    async def broadcast_message(self, message: Dict[str, Any]):
-        """向所有连接的客户端广播消息"""
-        if not self.connected_clients:
-            return
+        Returns:
+            已索引时返回 (宽, 高)；否则安排后台加载并返回 None，加载完成后调用 on_ready
+        """
+        size = self._index.get(web_path)
+        if size is None and url and self._should_load(web_path):
+            self._pending[web_path] = asyncio.ensure_future(self._load(web_path, self._load_remote, url))
+        return size
 
-        message_json = json.dumps(message, ensure_ascii=False)
+    def request_local(self, source_path: Union[str, pathlib.Path], web_path: str) -> Optional[Tuple[int, int]]:
+        """
+        请求一张本地图片的尺寸，必须在事件循环中调用
+        Args:
+            source_path: 图片的本地路径
+            web_path: 图片在网页中的路径
 
-        # 收集断开连接的客户端
-        disconnected_clients = []
+        Returns:
+            已索引时返回 (宽, 高)；否则安排后台读取并返回 None，读取完成后调用 on_ready
+        """
+        size = self._index.get(web_path)
+        if size is None and self._should_load(web_path):
+            self._pending[web_path] = asyncio.ensure_future(self._load(web_path, self._read_size, source_path))
+        return size
 
-        # 使用 asyncio.gather 并行发送消息
-        tasks = []
-        for client in self.connected_clients:
-            try:
-                task = asyncio.create_task(client.send(message_json))
-                tasks.append(task)
-            except Exception:
-                disconnected_clients.append(client)
+    async def warm_up(self, *sub_dirs: str) -> int:
+        """
+        在线程池中扫描已保存的图片，预先建立尺寸索引
+        Args:
+            *sub_dirs: 相对网页根目录的子目录，如 'img/face'
 
-        # 等待所有发送任务完成
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        Returns:
+            索引中的图片数量
+        """
+        for web_path, size in await asyncio.get_running_loop().run_in_executor(None, self._scan, sub_dirs):
+            self._index.setdefault(web_path, size)
+        return len(self._index)
+
+    def _scan(self, sub_dirs: Tuple[str, ...]):
+        found = []
+        for sub_dir in sub_dirs:
+            directory = self.root_dir / sub_dir
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                size = self._read_size(path)
+                if size is not None:
+                    found.append((f"./{path.relative_to(self.root_dir).as_posix()}", size))
+        return found
+
+    async def _load(self, web_path: str, loader: Callable, source):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            async with self._semaphore:
+                size = await asyncio.get_running_loop().run_in_executor(None, loader, source, web_path)
+        finally:
+            self._pending.pop(web_path, None)
+        if size is None:
+            self.failed_count += 1
+            self._failed[web_path] = time.monotonic()
+            return
+        self._index[web_path] = size
+        self.on_ready(web_path, *size)
 
-        # 移除断开连接的客户端
-        for client in disconnected_clients:
-            await self.unregister(client)
+    @staticmethod
+    def _read_size(path: Union[str, pathlib.Path], web_path: str = '') -> Optional[Tuple[int, int]]:
+        """只读取图片头部获得尺寸"""
+        try:
+            with Image.open(path) as img:
+                return img.size
+        except Exception:
+            return None
 
-    async def handle_client(self, websocket):
-        """处理客户端连接"""
-        await self.register(websocket)
+    def _load_remote(self, url: str, web_path: str) -> Optional[Tuple[int, int]]:
+        """已保存过的图片直接读取尺寸，否则下载后保存"""
+        path = self.file_path(web_path)
+        if path.exists():
+            return self._read_size(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        result = Tools.url2pillow_image(url, self.headers)
+        if not result or result.get("PilImg") is None:
+            return None
+        pillow_img = result["PilImg"]
         try:
-            # 保持连接，等待客户端消息
-            async for message in websocket:
-                try:
-                    data = json.loads(message)
-                    await self.handle_client_message(websocket, data)
-                except json.JSONDecodeError:
-                    error_msg = {
-                        "type": "error",
-                        "messageData": "无效的JSON格式",
-                        "timestamp": time.time()
-                    }
-                    await websocket.send(json.dumps(error_msg))
-        except websockets.exceptions.ConnectionClosed:
-            pass
-        finally:
-            await self.unregister(websocket)
+            pillow_img.save(path)
+        except Exception:
+            return None
+        return pillow_img.size
 
-    async def handle_client_message(self, websocket, data: Dict[str, Any]):
-        """处理来自客户端的消息"""
-        message_type = data.get("type")
+    def size(self) -> int:
+        """返回索引中的图片数量"""
+        return len(self._index)
 
-        if message_type == "ping":
-            # 响应 ping 消息
-            pong_msg = {
-                "type": "pong",
-                "timestamp": time.time()
-            }
-            await websocket.send(json.dumps(pong_msg))
-        elif message_type == "get_stats":
-            # 返回服务器统计信息
-            stats_msg = {
-                "type": "stats",
-                "clients_count": len(self.connected_clients),
-                "timestamp": time.time()
-            }
-            await websocket.send(json.dumps(stats_msg))
+    def clear(self):
+        """清空索引和失败记录，不删除已保存的文件"""
+        self._index.clear()
+        self._failed.clear()
 
-    async def send_danmu_message(self, danmu_data: Dict[str, Any]):
-        """发送弹幕消息（异步版本）"""
-        await self.broadcast_message(danmu_data)
 
-    def send_danmu_message_sync(self, danmu_data: Dict[str, Any]):
-        """同步方式发送弹幕消息（用于从其他线程调用）"""
-        if self.running:
-            # 如果从其他线程调用，使用 run_coroutine_threadsafe
-            asyncio.run_coroutine_threadsafe(
-                self.send_danmu_message(danmu_data),
-                asyncio.get_event_loop()
-            )
+class DanmuRoomContext:
+    """
+    弹幕会话的直播间上下文
 
-    async def start_server_async(self):
-        """异步启动 WebSocket 服务器"""
-        self.running = True
+    主播 uid 等直播间基本信息在会话开始时获取一次，之后的消息处理只读内存中的属性，
+    不再为每条消息请求接口；收到 ROOM_CHANGE / LIVE 时在线程池中刷新，刷新失败保留旧值。
+    """
+
+    def __init__(self, room_id: int, fetch_room_info: Callable[[int], Dict[str, Any]]):
+        """
+        Args:
+            room_id: 直播间ID
+            fetch_room_info: 获取直播间基本信息的函数，如 BilibiliApiGeneric.get_room_base_info
+        """
+        self.room_id = room_id
+        """直播间ID"""
+        self.fetch_room_info = fetch_room_info
+        """获取直播间基本信息的函数"""
+        self.uid: Optional[int] = None
+        """主播 uid，未获取到时为 None"""
+        self.info: Dict[str, Any] = {}
+        """最近一次获取成功的直播间基本信息"""
+        self.refresh_count = 0
+        """获取成功的次数"""
+        self._refreshing: Optional[asyncio.Future] = None
+
+    def refresh(self) -> bool:
+        """
+        同步获取直播间基本信息
+        Returns:
+            是否获取成功
+        """
+        result = self.fetch_room_info(self.room_id)
+        if not result.get("success"):
+            return False
+        self.info = result["data"]
+        self.uid = self.info.get("uid", self.uid)
+        self.refresh_count += 1
+        return True
+
+    async def refresh_async(self) -> bool:
+        """在线程池中获取直播间基本信息"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def schedule_refresh(self):
+        """在事件循环中安排一次后台刷新，上一次刷新未完成时不重复请求"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self.refresh_async())
+
+    def is_owner(self, uid: Any) -> bool:
+        """判断 uid 是否为主播"""
+        return self.uid is not None and uid == self.uid
+
+
+class GuardMembershipIndex:
+    """
+    大航海成员索引 {uid: 舰队等级}
+
+    启动时先读取上次保存的索引，立即可用；再在线程池中加载完整列表替换。
+    直播中的 USER_TOAST_MSG_V2 / GUARD_BUY 消息会增量更新索引，新上舰的用户立刻带上徽章。
+    """
+
+    def __init__(self, roomid: Union[int, str], ruid: Union[int, str],
+                 fetch_guard_list: Callable[..., Dict[str, Any]],
+                 cache_path: Optional[Union[str, pathlib.Path]] = None, save_delay: float = 30.0):
+        """
+        Args:
+            roomid: 直播间号
+            ruid: 主播UID
+            fetch_guard_list: 获取大航海列表的函数，如 BilibiliApiGeneric.get_guard_list
+            cache_path: 索引的保存路径，None 表示不保存
+            save_delay: 消息更新索引后延迟保存的秒数，期间的更新合并为一次写入
+        """
+        self.roomid = roomid
+        """直播间号"""
+        self.ruid = ruid
+        """主播UID"""
+        self.fetch_guard_list = fetch_guard_list
+        """获取大航海列表的函数"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """索引的保存路径"""
+        self.save_delay = save_delay
+        """消息更新索引后延迟保存的秒数"""
+        self.loaded_at: Optional[float] = None
+        """最近一次完整加载的时间戳，未加载时为 None"""
+        self._levels: Dict[int, int] = {}
+        self._live_updates: Dict[int, int] = {}  # 本次会话中从消息得到的更新，完整加载后重新应用
+        self._save_lock = threading.Lock()
+        self._dirty = False  # 有未保存的更新
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+
+    def __contains__(self, uid: Any) -> bool:
+        return uid in self._levels
+
+    def __getitem__(self, uid: Any) -> int:
+        return self._levels[uid]
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def get(self, uid: Any, default: Optional[int] = None) -> Optional[int]:
+        """返回 uid 的舰队等级 (1 总督, 2 提督, 3 舰长)，不是成员时返回 default"""
+        return self._levels.get(uid, default)
+
+    def load_cache(self) -> int:
+        """
+        读取上次保存的索引
+        Returns:
+            读取到的成员数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if str(data.get("ruid")) != str(self.ruid):
+            return 0
+        levels = {int(uid): level for uid, level in data.get("levels", {}).items()}
+        levels.update(self._live_updates)
+        self._levels = levels
+        self.loaded_at = data.get("loaded_at")
+        return len(levels)
+
+    def save_cache(self):
+        """保存索引，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        levels = dict(self._levels)
+        self._dirty = False
+        with self._save_lock:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"ruid": self.ruid, "loaded_at": self.loaded_at, "levels": levels}, f)
+            os.replace(temp_path, self.cache_path)
+
+    def refresh(self) -> bool:
+        """
+        同步加载完整的大航海列表并保存
+        Returns:
+            是否加载成功
+        """
+        result = self.fetch_guard_list(self.roomid, self.ruid, page=1, page_size=30, typ=5, include_total_list=True)
+        if not result.get("success"):
+            return False
+        levels = {}
+        for guard in result["data"].get("total_list", []):
+            levels[guard["uinfo"]["uid"]] = guard["uinfo"]["guard"]["level"]
+        levels.update(self._live_updates)
+        self._levels = levels
+        self.loaded_at = time.time()
+        self.save_cache()
+        return True
+
+    async def refresh_async(self) -> bool:
+        """在线程池中加载完整的大航海列表"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def save_if_dirty(self):
+        """有未保存的更新时保存索引"""
+        if self._dirty:
+            self.save_cache()
+
+    async def save_async(self):
+        """取消等待中的延迟保存，在线程池中保存未保存的更新，停止时调用"""
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        await asyncio.get_running_loop().run_in_executor(None, self.save_if_dirty)
+
+    def _schedule_save(self):
+        """在事件循环中安排一次延迟保存，没有运行中的事件循环时直接保存"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_if_dirty()
+            return
+        if self._save_handle:
+            return
+
+        def save_later():
+            self._save_handle = None
+            loop.run_in_executor(None, self.save_if_dirty)
+
+        self._save_handle = loop.call_later(self.save_delay, save_later)
+
+    def update(self, uid: int, level: int):
+        """记录一名成员的舰队等级，延迟到线程池中保存，避免上舰高峰时在事件循环中反复写文件"""
+        if not level:
+            return
+        self._live_updates[uid] = level
+        if self._levels.get(uid) != level:
+            self._levels[uid] = level
+            self._dirty = True
+            self._schedule_save()
+
+    def apply_event(self, content: Dict[str, Any]) -> Optional[int]:
+        """
+        用直播间消息更新索引
+        Args:
+            content: 直播间消息，处理 USER_TOAST_MSG_V2 和 GUARD_BUY
+
+        Returns:
+            消息中用户的舰队等级，不是上舰消息时返回 None
+        """
+        cmd = content.get('cmd')
+        data = content.get('data', {})
+        if cmd == "USER_TOAST_MSG_V2":
+            uid, level = data["sender_uinfo"]["uid"], data["guard_info"]["guard_level"]
+        elif cmd == "GUARD_BUY":
+            uid, level = data["uid"], data["guard_level"]
+        else:
+            return None
+        self.update(uid, level)
+        return level
+
+
+class DanmuTokenizer:
+    """
+    弹幕文本分词器
+
+    自定表情在会话开始时登记一次；每条弹幕自带的 emoji 表 (extra.emots) 各不相同，
+    按其名称集合缓存编译好的正则，一次 finditer 扫描就把弹幕分成 text / emoji / image 片段。
+    """
+
+    TEXT = "text"
+    """片段类型: 普通文本"""
+    EMOJI = "emoji"
+    """片段类型: 弹幕自带的 emoji (extra.emots)"""
+    IMAGE = "image"
+    """片段类型: 自定表情"""
+
+    def __init__(self, own_expressions: Iterable[str] = (), cache_size: int = 256):
+        """
+        Args:
+            own_expressions: 自定表情名称
+            cache_size: 最多缓存的 emoji 名称集合数量
+        """
+        self.own_expressions = frozenset(name for name in own_expressions if name)
+        """自定表情名称"""
+        self.cache_size = cache_size
+        """最多缓存的 emoji 名称集合数量"""
+        self._patterns: OrderedDict = OrderedDict()  # {emoji 名称集合: 编译好的正则或 None}
+
+    def _get_pattern(self, emot_names: frozenset) -> Optional[Pattern]:
+        """取出 emoji 名称集合对应的正则，没有可匹配的名称时返回 None"""
+        patterns = self._patterns
+        if emot_names in patterns:
+            patterns.move_to_end(emot_names)
+            return patterns[emot_names]
+        names = (self.own_expressions | emot_names) - {''}
+        # 长的名称放在前面，避免被它的前缀抢先匹配
+        pattern = re.compile('|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))) \
+            if names else None
+        patterns[emot_names] = pattern
+        if len(patterns) > self.cache_size:
+            patterns.popitem(last=False)
+        return pattern
+
+    def tokenize(self, text: str, emots: Optional[Dict[str, dict]] = None) -> List[Tuple[str, str]]:
+        """
+        把弹幕文本分成片段
+        Args:
+            text: 弹幕文本
+            emots: 弹幕 extra 中的 emots 字典，没有时为 None
+
+        Returns:
+            [(片段类型, 片段文本)]，片段类型为 TEXT / EMOJI / IMAGE 之一，emoji 与自定表情同名时按 emoji 处理
+
+        Examples:
+            >>> DanmuTokenizer(["打call"]).tokenize("[doge]主播打call", {"[doge]": {}})
+            [('emoji', '[doge]'), ('text', '主播'), ('image', '打call')]
+        """
+        emots = emots or {}
+        pattern = self._get_pattern(frozenset(emots))
+        if pattern is None:
+            return [(self.TEXT, text)] if text else []
+        segments = []
+        position = 0
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if start > position:
+                segments.append((self.TEXT, text[position:start]))
+            token = match.group()
+            segments.append((self.EMOJI if token in emots else self.IMAGE, token))
+            position = end
+        if position < len(text):
+            segments.append((self.TEXT, text[position:]))
+        return segments
+
+
+class ClientChannel:
+    """
+    一个客户端的发送队列和写协程
+
+    广播只把消息放进队列，由写协程逐条发送，慢客户端不会拖慢其他客户端。
+    队列满时先丢弃最早的低优先级消息；可合并的消息在队列中只保留同类型的最新一条。
+    消息可以是文本，也可以是已编码的 UTF-8 字节，字节按文本帧发送，所有客户端共用同一份编码结果。
+    客户端声明支持批量接收后，写协程把队列中的多条消息合并为一个 JSON 数组帧发送；
+    丢弃和合并仍按单条消息处理，合并只发生在发送的时候。
+    """
+
+    _text_bytes_support: Dict[type, bool] = {}  # {连接类型: send 是否支持 text=True 把字节作为文本帧发送}
+
+    def __init__(self, websocket, maxsize: int = 256):
+        """
+        Args:
+            websocket: 客户端连接
+            maxsize: 队列的最大长度
+        """
+        self.websocket = websocket
+        """客户端连接"""
+        self.maxsize = maxsize
+        """队列的最大长度"""
+        self.sent = 0
+        """已发送的消息数"""
+        self.dropped = 0
+        """队列满时丢弃的消息数"""
+        self.coalesced = 0
+        """被同类型新消息替换的消息数"""
+        self.last_lag = 0.0
+        """最近一条消息从入队到发送完成的时间（秒）"""
+        self.max_lag = 0.0
+        """消息从入队到发送完成的最长时间（秒）"""
+        self.frames = 0
+        """已发送的帧数，批量发送时一帧包含多条消息"""
+        self.batch_size = 0
+        """一帧最多合并的消息数，0 表示每条消息单独发送"""
+        self.batch_interval = 0.0
+        """批量发送时等待更多消息的时间（秒）"""
+        self._queue: deque = deque()  # [消息类型, 消息文本, 入队时间, 处理方式]
+        self._latest: Dict[str, list] = {}  # {可合并的消息类型: 队列中的那一条}
+        self._ready = asyncio.Event()
+        self._batch_full = asyncio.Event()  # 队列中的消息已够一帧
+        self._task: Optional[asyncio.Task] = None
+        self._send_text_bytes = self._supports_text_bytes(websocket)
+
+    @classmethod
+    def _supports_text_bytes(cls, websocket) -> bool:
+        """连接的 send 是否接受 text 参数（websockets 13 以上的新实现），按连接类型只检查一次"""
+        connection_type = type(websocket)
+        if connection_type not in cls._text_bytes_support:
+            try:
+                supported = "text" in inspect.signature(websocket.send).parameters
+            except (TypeError, ValueError):
+                supported = False
+            cls._text_bytes_support[connection_type] = supported
+        return cls._text_bytes_support[connection_type]
+
+    def enable_batching(self, interval: float, size: int):
+        """
+        客户端声明支持数组帧后开启批量发送
+        Args:
+            interval: 等待更多消息的时间（秒）
+            size: 一帧最多合并的消息数
+        """
+        self.batch_interval = interval
+        self.batch_size = max(1, size)
+
+    def start(self):
+        """启动写协程"""
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """停止写协程，丢弃还没发送的消息"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._queue.clear()
+        self._latest.clear()
+
+    def put(self, message_type: Optional[str], payload: Union[str, bytes], policy: Optional[str] = None) -> bool:
+        """
+        放入一条消息
+        Args:
+            message_type: 消息类型
+            payload: 已序列化的消息文本，或已编码的 UTF-8 字节
+            policy: 低优先级消息的处理方式 "coalesce" / "drop_oldest"，None 表示普通消息
+
+        Returns:
+            是否放入（或合并、丢弃）成功；队列已满且没有可丢弃的消息时返回 False
+        """
+        if policy == "coalesce" and message_type in self._latest:
+            self._latest[message_type][1] = payload
+            self.coalesced += 1
+            return True
+        if len(self._queue) >= self.maxsize:
+            victim = next((entry for entry in self._queue if entry[3]), None)
+            if victim is not None:
+                self._queue.remove(victim)
+                if self._latest.get(victim[0]) is victim:
+                    del self._latest[victim[0]]
+                self.dropped += 1
+            elif policy:
+                self.dropped += 1
+                return True
+            else:
+                return False
+        entry = [message_type, payload, time.monotonic(), policy]
+        self._queue.append(entry)
+        if policy == "coalesce":
+            self._latest[message_type] = entry
+        if self.batch_size and len(self._queue) >= self.batch_size:
+            self._batch_full.set()
+        self._ready.set()
+        return True
+
+    def _pop(self) -> list:
+        entry = self._queue.popleft()
+        if self._latest.get(entry[0]) is entry:
+            del self._latest[entry[0]]
+        return entry
+
+    async def _run(self):
+        """发送队列中的消息，批量发送时每帧最多 batch_size 条，连接断开时结束"""
+        try:
+            while True:
+                await self._ready.wait()
+                if self.batch_size and len(self._queue) < self.batch_size:
+                    # 等待攒够一帧或到达批量间隔，期间到达的低优先级消息仍可被合并或丢弃
+                    self._batch_full.clear()
+                    try:
+                        await asyncio.wait_for(self._batch_full.wait(), self.batch_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                while self._queue:
+                    if self.batch_size:
+                        entries = [self._pop() for _ in range(min(self.batch_size, len(self._queue)))]
+                        await self._send(b"[" + b",".join(
+                            entry[1] if isinstance(entry[1], bytes) else entry[1].encode("utf-8")
+                            for entry in entries) + b"]")
+                    else:
+                        entries = [self._pop()]
+                        await self._send(entries[0][1])
+                    self.frames += 1
+                    self.sent += len(entries)
+                    self.last_lag = time.monotonic() - entries[0][2]
+                    self.max_lag = max(self.max_lag, self.last_lag)
+                self._ready.clear()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _send(self, payload: Union[str, bytes]):
+        """发送一条消息，字节按文本帧发送；旧版 websockets 不支持时先解码"""
+        if isinstance(payload, bytes):
+            if self._send_text_bytes:
+                await self.websocket.send(payload, text=True)
+                return
+            payload = payload.decode("utf-8")
+        await self.websocket.send(payload)
+
+    def metrics(self) -> Dict[str, Any]:
+        """队列深度、延迟和计数"""
+        oldest = time.monotonic() - self._queue[0][2] if self._queue else 0.0
+        return {
+            "remote": str(getattr(self.websocket, "remote_address", "")),
+            "queue_depth": len(self._queue),
+            "oldest_ms": round(oldest * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "sent": self.sent,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+class WebSocketServer:
+    SEND_QUEUE_SIZE = 256
+    """每个客户端发送队列的最大长度"""
+    LOW_PRIORITY_POLICIES: Dict[str, str] = {
+        "like_update": "coalesce",
+        "watched_change": "coalesce",
+        "online_rank_count": "coalesce",
+        "interact": "drop_oldest",
+    }
+    """低优先级消息的处理方式 {消息类型: "coalesce" 只保留最新一条 / "drop_oldest" 队列满时最先丢弃}"""
+    COMPRESSION: Optional[str] = None
+    """
+    WebSocket 压缩扩展，None 表示不压缩
+    客户端是本机的浏览器源，压缩没有意义；压缩时每个连接要各自压缩同一条消息，无法共用编码好的消息
+    """
+
+    def __init__(self, host='0.0.0.0', port=8765, batch_interval_ms: int = 0, batch_size: int = 50):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口
+            batch_interval_ms: 批量发送的间隔（毫秒），0 表示每条消息单独发送；
+                只对发送 {"type": "hello", "batch": true} 声明支持数组帧的客户端生效
+            batch_size: 批量发送时一帧的最大消息数，攒够后不等间隔立即发送
+        """
+        self.host = host
+        self.port = port
+        self.batch_interval_ms = batch_interval_ms
+        """批量发送的间隔（毫秒），0 表示不批量"""
+        self.batch_size = batch_size
+        """一批的最大消息数"""
+        self.connected_clients: Set = set()
+        self.channels: Dict[Any, ClientChannel] = {}
+        """{客户端连接: 发送队列}"""
+        self.server: Optional[websockets.WebSocketServer] = None
+        self.danmu_processor = None
+        self.running = False
+        self._server_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inbox: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        """其他线程放入的待广播消息，由服务器事件循环批量取出"""
+        self._inbox_ready: Optional[asyncio.Event] = None
+        self._wakeup_scheduled = False  # 已经通知事件循环取消息，还没开始取
+        self._inbox_task: Optional[asyncio.Task] = None
+        self.registerCallback: Callable = lambda clients_count: None
+        """注册新的客户端连接回调, 参数为注册用户数量"""
+        self.unregisterCallback: Callable = lambda clients_count: None
+        """客户端断开回调, 参数为注册用户数量"""
+        self.startServerCallback: Callable = lambda host, port: None
+        """服务器启动回调, 参数为注册用户数量"""
+        self.serverCancelledCallback: Callable = lambda: None
+        """服务器取消回调, 无参"""
+        self.serverErroCallback: Callable = lambda erroMessage: None
+        """服务器错误回调, 参数为错误信息"""
+        self.serverStopCallback: Callable = lambda: None
+        """服务器停止回调, 无参"""
+        self.broadcastErrorCallback: Callable = lambda message, error: None
+        """广播 publish 放入的消息出错的回调, 参数为消息和异常；出错的消息被丢弃，之后的消息照常广播"""
+
+    async def register(self, websocket):
+        """注册新的客户端连接"""
+        channel = ClientChannel(websocket, self.SEND_QUEUE_SIZE)
+        self.channels[websocket] = channel
+        self.connected_clients.add(websocket)
+        self.registerCallback(len(self.connected_clients))
+
+        # 发送欢迎消息
+        welcome_msg = {
+            "type": "system",
+            "messageData": "弹幕服务器连接成功",
+            "timestamp": time.time(),
+            "clients_count": len(self.connected_clients)
+        }
+        channel.put("system", json.dumps(welcome_msg))
+        channel.start()
+
+    async def unregister(self, websocket):
+        """移除断开连接的客户端"""
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.stop()
+        if websocket in self.connected_clients:
+            self.connected_clients.remove(websocket)
+            self.unregisterCallback(len(self.connected_clients))
+
+    async def broadcast_message(self, message: Dict[str, Any]):
+        """
+        向所有连接的客户端广播消息
+
+        消息只序列化并编码一次，同一份字节放入各客户端的发送队列，不等待发送完成；
+        队列已满且没有可丢弃消息的客户端视为过慢，断开连接后由客户端重连。
+        批量发送由各客户端的发送队列在发送时合并，见 ClientChannel
+        """
+        if not self.channels:
+            return
+
+        message_type = message.get("type")
+        frame = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        policy = self.LOW_PRIORITY_POLICIES.get(message_type)
+
+        slow_clients = [client for client, channel in list(self.channels.items())
+                        if not channel.put(message_type, frame, policy)]
+
+        # 断开过慢的客户端
+        for client in slow_clients:
+            await self.unregister(client)
+            asyncio.create_task(client.close(code=1013, reason="send queue full"))
+
+    def client_metrics(self) -> List[Dict[str, Any]]:
+        """各客户端发送队列的深度、延迟和计数"""
+        return [channel.metrics() for channel in self.channels.values()]
+
+    async def handle_client(self, websocket):
+        """处理客户端连接"""
+        await self.register(websocket)
+        try:
+            # 保持连接，等待客户端消息
+            async for message in websocket:
+                try:
+                    data = json.loads(message)
+                    await self.handle_client_message(websocket, data)
+                except json.JSONDecodeError:
+                    error_msg = {
+                        "type": "error",
+                        "messageData": "无效的JSON格式",
+                        "timestamp": time.time()
+                    }
+                    await websocket.send(json.dumps(error_msg))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            await self.unregister(websocket)
+
+    async def handle_client_message(self, websocket, data: Dict[str, Any]):
+        """处理来自客户端的消息"""
+        message_type = data.get("type")
+
+        if message_type == "hello":
+            # 新版网页在连接后声明支持数组帧，旧版网页不发送，始终逐条接收
+            channel = self.channels.get(websocket)
+            if channel is not None and data.get("batch") and self.batch_interval_ms > 0:
+                channel.enable_batching(self.batch_interval_ms / 1000, self.batch_size)
+        elif message_type == "ping":
+            # 响应 ping 消息
+            pong_msg = {
+                "type": "pong",
+                "timestamp": time.time()
+            }
+            await websocket.send(json.dumps(pong_msg))
+        elif message_type == "get_stats":
+            # 返回服务器统计信息
+            stats_msg = {
+                "type": "stats",
+                "clients_count": len(self.connected_clients),
+                "clients": self.client_metrics(),
+                "timestamp": time.time()
+            }
+            await websocket.send(json.dumps(stats_msg))
+
+    async def send_danmu_message(self, danmu_data: Dict[str, Any]):
+        """发送弹幕消息（异步版本）"""
+        await self.broadcast_message(danmu_data)
+
+    def send_danmu_message_sync(self, danmu_data: Dict[str, Any]):
+        """同步方式发送弹幕消息（用于从其他线程调用）"""
+        self.publish(danmu_data)
+
+    def publish(self, message: Dict[str, Any]) -> bool:
+        """
+        放入一条待广播的消息，不等待发送，可以在任意线程（包括服务器事件循环）中调用
+
+        消息进入线程安全的队列，事件循环每次被唤醒时取出队列中的全部消息依次广播，
+        连续放入的消息只唤醒一次事件循环
+        Returns:
+            服务器没有运行时返回 False
+        """
+        loop = self._loop
+        if not self.running or loop is None:
+            return False
+        self._inbox.put(message)
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._inbox_ready.set)
+            except RuntimeError:  # 事件循环已经关闭
+                self._wakeup_scheduled = False
+                return False
+        return True
+
+    async def _drain_inbox(self):
+        """在服务器事件循环中取出 publish 放入的消息并广播"""
+        while True:
+            await self._inbox_ready.wait()
+            self._inbox_ready.clear()
+            self._wakeup_scheduled = False
+            while True:
+                try:
+                    message = self._inbox.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    await self.broadcast_message(message)
+                except Exception as e:  # 一条消息出错（如无法序列化）不能结束取消息的任务
+                    self.broadcastErrorCallback(message, e)
+
+    async def start_server_async(self):
+        """异步启动 WebSocket 服务器"""
+        self._loop = asyncio.get_running_loop()
+        self._inbox_ready = asyncio.Event()
+        self._wakeup_scheduled = False
+        self._inbox_task = asyncio.create_task(self._drain_inbox())
+        self.running = True
         self.server = await websockets.serve(
             self.handle_client,
             self.host,
-            self.port
+            self.port,
+            compression=self.COMPRESSION
         )
         self.startServerCallback(self.host, self.port)
 
@@ -1825,6 +3827,9 @@ class WebSocketServer:
     async def stop_server_async(self):
         """异步停止服务器"""
         self.running = False
+        self._loop = None
+        if self._inbox_task and not self._inbox_task.done():
+            self._inbox_task.cancel()
 
         # 关闭所有客户端连接
         if self.connected_clients:
@@ -1834,6 +3839,9 @@ class WebSocketServer:
             if close_tasks:
                 await asyncio.gather(*close_tasks, return_exceptions=True)
             self.connected_clients.clear()
+        for channel in self.channels.values():
+            channel.stop()
+        self.channels.clear()
 
         # 停止服务器
         if self.server:
@@ -1905,15 +3913,37 @@ class BilibiliUserConfigManager:
     # 最小必需的cookie字段（用于更新操作）
     MIN_REQUIRED_KEYS = {"DedeUserID", "SESSDATA", "bili_jct"}
 
-    def __init__(self, config_path: Union[str, pathlib.Path]):
+    def __init__(self, config_path: Union[str, pathlib.Path], flush_delay: float = 0.5,
+                 reload_check_interval: float = 1.0, retry_delay: float = 5.0):
         """
         初始化配置文件管理器
 
+        配置只在第一次使用时从文件读取，之后的查询都读内存；修改先写入内存，
+        flush_delay 秒内的多次修改合并为一次写入文件；后台写入失败时调用 flushErrorCallback，并在 retry_delay 秒后重试。
+
         Args:
             config_path: 配置文件路径
+            flush_delay: 修改后延迟写入文件的时间（秒），0 表示立即写入
+            reload_check_interval: 检查配置文件是否被外部修改的最小间隔（秒）
+            retry_delay: 后台写入失败后重试的间隔（秒）
         """
         self.config_path = pathlib.Path(config_path)
+        self.flush_delay = flush_delay
+        """修改后延迟写入文件的时间"""
+        self.reload_check_interval = reload_check_interval
+        """检查配置文件是否被外部修改的最小间隔"""
+        self.retry_delay = retry_delay
+        """后台写入失败后重试的间隔"""
+        self.flushErrorCallback: Callable[[str], None] = lambda message: None
+        """后台写入配置文件失败的回调，参数为错误信息"""
+        self._config: Optional[Dict] = None  # 内存中的配置
+        self._file_signature: Optional[Tuple[int, int]] = None  # 最近一次读写时文件的 (修改时间, 大小)
+        self._checked_at = 0.0  # 最近一次检查文件的时间
+        self._dirty = False  # 内存中有还没写入文件的修改
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
         self._ensure_config_file()
+        self.flush()
 
     def _ensure_config_file(self) -> OperationResult:
         """确保配置文件存在且结构有效"""
@@ -1949,29 +3979,98 @@ class BilibiliUserConfigManager:
         except Exception as e:
             return self._create_error_result(f"配置文件初始化失败: {str(e)}")
 
-    def _read_config(self) -> Dict:
-        """读取配置文件内容"""
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """配置文件当前的 (修改时间, 大小)，文件不存在时为 None"""
+        try:
+            stat = self.config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """从文件读取配置到内存"""
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                self._config = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             raise RuntimeError(f"配置文件损坏或格式错误: {str(e)}")
+        self._file_signature = self._stat_signature()
+        self._checked_at = time.monotonic()
 
-    def _write_config(self, config: Dict) -> OperationResult:
-        """写入配置文件"""
-        try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=4)
-            return self._create_success_result("配置文件写入成功")
-        except Exception as e:
-            return self._create_error_result(f"配置文件写入失败: {str(e)}")
+    def _read_config(self) -> Dict:
+        """
+        读取配置内容的副本
 
-    def _validate_cookies(self, cookies: Dict[str, str], required_keys: set) -> OperationResult:
-        """验证cookie字段完整性"""
-        if not isinstance(cookies, dict):
-            return self._create_error_result("cookies参数必须是字典类型")
+        只在第一次调用或配置文件被外部修改（修改时间或大小变化）时读取文件；
+        内存中有还没写入的修改时以内存为准。
+        """
+        with self._lock:
+            if self._config is None:
+                self._load()
+            elif not self._dirty and time.monotonic() - self._checked_at >= self.reload_check_interval:
+                self._checked_at = time.monotonic()
+                if self._stat_signature() != self._file_signature:
+                    self._load()
+            return copy.deepcopy(self._config)
 
-        missing_keys = required_keys - cookies.keys()
+    def _write_config(self, config: Dict) -> OperationResult:
+        """写入配置，先更新内存，再在 flush_delay 秒后写入文件"""
+        with self._lock:
+            self._config = config
+            self._dirty = True
+            if self.flush_delay <= 0:
+                return self.flush()
+            if self._flush_timer is None:
+                self._schedule_flush(self.flush_delay)
+        return self._create_success_result(f"配置已更新，将在 {self.flush_delay} 秒后写入文件")
+
+    def _schedule_flush(self, delay: float):
+        """安排后台写入，调用时需持有锁"""
+        self._flush_timer = threading.Timer(delay, self._flush_in_background)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_in_background(self):
+        """定时器线程中写入文件，失败时报告错误并安排重试，修改不会留在内存中无人写入"""
+        result = self.flush()
+        if result["success"]:
+            return
+        self.flushErrorCallback(result["message"])
+        with self._lock:
+            if self._dirty and self._flush_timer is None:
+                self._schedule_flush(self.retry_delay)
+
+    def flush(self) -> OperationResult:
+        """
+        把内存中的修改写入配置文件，先写临时文件再替换，避免中途退出留下损坏的文件
+
+        Returns:
+            操作结果字典
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return self._create_success_result("配置文件没有需要写入的修改")
+            try:
+                temp_path = self.config_path.with_suffix(self.config_path.suffix + '.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._config, f, ensure_ascii=False, indent=4)
+                os.replace(temp_path, self.config_path)
+            except Exception as e:
+                return self._create_error_result(f"配置文件写入失败: {str(e)}")
+            self._dirty = False
+            self._file_signature = self._stat_signature()
+            self._checked_at = time.monotonic()
+            return self._create_success_result("配置文件写入成功")
+
+    def _validate_cookies(self, cookies: Dict[str, str], required_keys: set) -> OperationResult:
+        """验证cookie字段完整性"""
+        if not isinstance(cookies, dict):
+            return self._create_error_result("cookies参数必须是字典类型")
+
+        missing_keys = required_keys - cookies.keys()
         if missing_keys:
             return self._create_error_result(f"缺少必要字段: {', '.join(missing_keys)}")
 
@@ -2451,35 +4550,74 @@ class CommonDataManager:
     - 支持增删改查操作
     - 自动创建不存在的目录和文件
     - 自动转换旧格式数据到新格式
+    - 先写临时文件再替换，写入中途退出不会损坏文件
+    - batch() 中的多次修改只保存一次
+    - 可选 SQLite 存储，只写入修改过的用户
 
     参数:
         directory: 文件存放目录
         default_data_type: 默认数据类型（用于向后兼容）
     """
 
-    def __init__(self, filepath: Union[str, Path], default_data_type: str = "title"):
+    SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+    """默认使用 SQLite 存储的文件后缀"""
+
+    def __init__(self, filepath: Union[str, Path], default_data_type: str = "title", backend: Optional[str] = None):
         """
         初始化CommonDataManager
 
         Args:
             filepath: 文件路径
             default_data_type: 默认数据类型（用于处理旧格式数据）
-            maximum_quantity_of_elements: 保留的最大元素数
+            backend: 存储方式，"json" 或 "sqlite"，None 表示按文件后缀判断；
+                SQLite 文件第一次创建时，如果同名的 .json 文件存在则导入其中的数据
         """
         self.filepath = Path(filepath)
         self.default_data_type = default_data_type
+        self.backend = backend or ("sqlite" if self.filepath.suffix.lower() in self.SQLITE_SUFFIXES else "json")
+        """存储方式"""
         self.data: Dict[str, Dict[str, List[str]]] = {}
+        self._batch_depth = 0  # batch() 的嵌套层数
+        self._pending_users: Set[str] = set()  # batch() 中修改过的用户
+        self._pending_all = False  # batch() 中需要保存全部数据
+        self._db: Optional[sqlite3.Connection] = None
 
         # 确保目录存在
         self.filepath.parent.mkdir(parents=True, exist_ok=True)
 
+        if self.backend == "sqlite":
+            self._open_sqlite()
         # 如果文件不存在则创建
-        if not self.filepath.exists():
+        elif not self.filepath.exists():
             self._save_data()
         else:
             self._load_data()
             self._convert_old_format()
 
+    def _open_sqlite(self) -> None:
+        """打开 SQLite 文件并读取数据，新建时导入同名 .json 文件"""
+        is_new = not self.filepath.exists()
+        self._db = sqlite3.connect(str(self.filepath), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS common_data ("
+                "user_id TEXT NOT NULL, data_type TEXT NOT NULL, items TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, data_type))"
+            )
+        json_path = self.filepath.with_suffix(".json")
+        if is_new and json_path.exists():
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                self.data = {}
+            with self.batch():
+                self._convert_old_format()
+                self._save_data()
+            return
+        for user_id, data_type, items in self._db.execute("SELECT user_id, data_type, items FROM common_data"):
+            self.data.setdefault(user_id, {})[data_type] = json.loads(items)
+
     def _load_data(self) -> None:
         """从文件加载数据"""
         try:
@@ -2490,10 +4628,72 @@ class CommonDataManager:
             self.data = {}
             self._save_data()
 
-    def _save_data(self) -> None:
-        """保存数据到文件"""
-        with open(self.filepath, 'w', encoding='utf-8') as f:
+    def _save_data(self, *user_ids: str) -> None:
+        """
+        保存数据，在 batch() 中时推迟到 batch() 结束
+
+        Args:
+            *user_ids: 修改过的用户，不指定表示全部
+        """
+        if self._batch_depth:
+            self._pending_users.update(user_ids)
+            self._pending_all = self._pending_all or not user_ids
+            return
+        if self.backend == "sqlite":
+            self._write_sqlite(user_ids)
+        else:
+            self._write_json()
+
+    def _write_json(self) -> None:
+        """保存数据到文件，先写临时文件并同步到磁盘，再替换原文件"""
+        temp_path = self.filepath.with_suffix(self.filepath.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.filepath)
+
+    def _write_sqlite(self, user_ids: Iterable[str] = ()) -> None:
+        """在一个事务中重写这些用户的行，不指定用户时重写全部"""
+        user_ids = list(user_ids)
+        with self._db:
+            if user_ids:
+                self._db.executemany("DELETE FROM common_data WHERE user_id = ?", [(u,) for u in user_ids])
+            else:
+                self._db.execute("DELETE FROM common_data")
+                user_ids = list(self.data)
+            self._db.executemany(
+                "INSERT INTO common_data (user_id, data_type, items) VALUES (?, ?, ?)",
+                [(user_id, data_type, json.dumps(items, ensure_ascii=False))
+                 for user_id in user_ids for data_type, items in self.data.get(user_id, {}).items()]
+            )
+
+    @contextmanager
+    def batch(self):
+        """
+        合并多次修改，只在最外层 batch() 结束时保存一次
+
+        示例:
+            with manager.batch():
+                manager.add_data("143474500", "title", "标题1")
+                manager.add_data("143474500", "danmuRoomid", "123", 99)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and (self._pending_all or self._pending_users):
+                user_ids = () if self._pending_all else tuple(self._pending_users)
+                self._pending_users.clear()
+                self._pending_all = False
+                self._save_data(*user_ids)
+
+    def close(self) -> None:
+        """关闭 SQLite 连接，JSON 存储无需关闭"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
 
     def _convert_old_format(self) -> None:
         """将旧格式数据转换为新格式"""
@@ -2540,6 +4740,11 @@ class CommonDataManager:
             data_type: 数据类型
             item: 要添加的数据项
         """
+        # 已经在最前面且数量没有超出时不需要修改
+        current = self.data.get(user_id, {}).get(data_type, [])
+        if current[:1] == [item] and len(current) <= maximum:
+            return
+
         # 确保用户数据存在
         if user_id not in self.data:
             self.data[user_id] = {}
@@ -2563,7 +4768,7 @@ class CommonDataManager:
 
         # 更新数据并保存
         self.data[user_id][data_type] = items
-        self._save_data()
+        self._save_data(user_id)
 
     def remove_data(self, user_id: str, data_type: str, item: str) -> bool:
         """
@@ -2591,7 +4796,7 @@ class CommonDataManager:
                 # 如果用户数据为空，则删除用户条目
                 if not self.data[user_id]:
                     del self.data[user_id]
-            self._save_data()
+            self._save_data(user_id)
             return True
         return False
 
@@ -2619,7 +4824,7 @@ class CommonDataManager:
             index = items.index(old_item)
             items.pop(index)
             items.insert(0, new_item)
-            self._save_data()
+            self._save_data(user_id)
             return True
         return False
 
@@ -2644,7 +4849,7 @@ class CommonDataManager:
             if not self.data[user_id]:
                 del self.data[user_id]
 
-        self._save_data()
+        self._save_data(user_id)
 
     def get_all_users(self) -> List[str]:
         """
@@ -2685,14 +4890,105 @@ class CommonDataManager:
 
 
 class WbiSigna:
-    def __init__(self, headers: dict, verify_ssl: bool = True):
+    MIXIN_KEY_ENC_TAB = [
+        46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+        33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+        61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+        36, 20, 34, 44, 52
+    ]
+    """mixin key 的字符重排表"""
+    WBI_KEY_TTL_SECONDS = 3600
+    """WBI 密钥的缓存时间（秒），B站大约每天更换一次密钥"""
+    WBI_KEY_REFRESH_AHEAD_SECONDS = 300
+    """距离过期不到该时间（秒）时在后台提前刷新，签名不等待网络"""
+    WBI_SIGNATURE_ERROR_CODES = (-352, -403)
+    """签名失效时接口返回的错误码，收到后丢弃缓存的密钥"""
+
+    _mixin_key: Optional[str] = None
+    _mixin_key_fetched_at = 0.0
+    _mixin_key_lock = threading.Lock()
+    _mixin_key_refreshing = False
+
+    def __init__(self, headers: dict, verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """
         wbi签名的api
         @param headers: 包含Cookie和User-Agent的请求头字典
         @param verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+        @param session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
         """
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+
+    @classmethod
+    def get_mixin_key(cls, orig: str) -> str:
+        """对 imgKey 和 subKey 进行字符顺序打乱编码"""
+        return ''.join([orig[i] for i in cls.MIXIN_KEY_ENC_TAB])[:32]
+
+    def fetch_mixin_key(self) -> str:
+        """请求 nav 接口获取最新的 img_key 和 sub_key，返回 mixin key"""
+        resp = self.session.get('https://api.bilibili.com/x/web-interface/nav', headers=self.headers)
+        resp.raise_for_status()
+        json_content = resp.json()
+        img_url: str = json_content['data']['wbi_img']['img_url']
+        sub_url: str = json_content['data']['wbi_img']['sub_url']
+        img_key = img_url.rsplit('/', 1)[1].split('.')[0]
+        sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
+        return self.get_mixin_key(img_key + sub_key)
+
+    def _refresh_mixin_key(self):
+        """重新获取 mixin key 并写入所有实例共享的缓存"""
+        mixin_key = self.fetch_mixin_key()
+        with WbiSigna._mixin_key_lock:
+            WbiSigna._mixin_key = mixin_key
+            WbiSigna._mixin_key_fetched_at = time.monotonic()
+
+    def _background_refresh_mixin_key(self):
+        try:
+            self._refresh_mixin_key()
+        except Exception:
+            pass  # 旧密钥仍在有效期内，下次签名时再试
+        finally:
+            WbiSigna._mixin_key_refreshing = False
+
+    def get_cached_mixin_key(self) -> str:
+        """
+        取缓存的 mixin key，所有实例共享
+        没有缓存或已过期时同步获取；快要过期时在后台线程刷新，本次仍使用旧密钥
+        """
+        age = time.monotonic() - WbiSigna._mixin_key_fetched_at
+        if WbiSigna._mixin_key is None or age >= self.WBI_KEY_TTL_SECONDS:
+            with WbiSigna._mixin_key_lock:
+                age = time.monotonic() - WbiSigna._mixin_key_fetched_at
+                if WbiSigna._mixin_key is None or age >= self.WBI_KEY_TTL_SECONDS:
+                    mixin_key = self.fetch_mixin_key()
+                    WbiSigna._mixin_key = mixin_key
+                    WbiSigna._mixin_key_fetched_at = time.monotonic()
+                return WbiSigna._mixin_key
+        if age >= self.WBI_KEY_TTL_SECONDS - self.WBI_KEY_REFRESH_AHEAD_SECONDS \
+                and not WbiSigna._mixin_key_refreshing:
+            WbiSigna._mixin_key_refreshing = True
+            threading.Thread(target=self._background_refresh_mixin_key, daemon=True).start()
+        return WbiSigna._mixin_key
+
+    @classmethod
+    def invalidate_mixin_key(cls):
+        """丢弃缓存的 mixin key，下次签名时重新获取"""
+        with WbiSigna._mixin_key_lock:
+            WbiSigna._mixin_key = None
+
+    def check_wbi_signature(self, api_code: Any) -> bool:
+        """
+        检查接口错误码，签名失效时丢弃缓存的 mixin key
+        @param api_code: 接口返回的 code
+        @return: 是否为签名失效
+        @rtype: bool
+        """
+        if api_code in self.WBI_SIGNATURE_ERROR_CODES:
+            self.invalidate_mixin_key()
+            return True
+        return False
 
     def wbi(self, data: dict):
         """
@@ -2701,53 +4997,21 @@ class WbiSigna:
         @return: requests的 params 参数
         @rtype: dict
         """
-        mixinKeyEncTab = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
-
-        def getMixinKey(orig: str):
-            """对 imgKey 和 subKey 进行字符顺序打乱编码"""
-            return reduce(lambda s, i: s + orig[i], mixinKeyEncTab, '')[:32]
-
-        def encWbi(params: dict, img_key: str, sub_key: str):
-            """为请求参数进行 wbi 签名"""
-            mixin_key = getMixinKey(img_key + sub_key)
-            curr_time = round(time.time())
-            params['wts'] = curr_time  # 添加 wts 字段
-            params = dict(sorted(params.items()))  # 按照 key 重排参数
-            # 过滤 value 中的 "!'()*" 字符
-            params: Dict[str, str] = {
-                k: ''.join(filter(lambda chr: chr not in "!'()*", str(v)))
-                for k, v
-                in params.items()
-            }
-            query = urllib.parse.urlencode(params)  # 序列化参数
-            wbi_sign = hashlib.md5((query + mixin_key).encode()).hexdigest()  # 计算 w_rid
-            params['w_rid'] = wbi_sign
-            return params
-
-        def getWbiKeys() -> tuple[str, str]:
-            """获取最新的 img_key 和 sub_key"""
-            resp = requests.get('https://api.bilibili.com/x/web-interface/nav', headers=self.headers)
-            resp.raise_for_status()
-            json_content = resp.json()
-            img_url: str = json_content['data']['wbi_img']['img_url']
-            sub_url: str = json_content['data']['wbi_img']['sub_url']
-            img_key = img_url.rsplit('/', 1)[1].split('.')[0]
-            sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
-            return img_key, sub_key
-
-        img_key, sub_key = getWbiKeys()
-
-        signed_params = encWbi(
-            params=data,
-            img_key=img_key,
-            sub_key=sub_key
-        )
-        return signed_params
+        mixin_key = self.get_cached_mixin_key()
+        curr_time = round(time.time())
+        params = dict(data)
+        params['wts'] = curr_time  # 添加 wts 字段
+        params = dict(sorted(params.items()))  # 按照 key 重排参数
+        # 过滤 value 中的 "!'()*" 字符
+        params: Dict[str, str] = {
+            k: ''.join(filter(lambda chr: chr not in "!'()*", str(v)))
+            for k, v
+            in params.items()
+        }
+        query = urllib.parse.urlencode(params)  # 序列化参数
+        wbi_sign = hashlib.md5((query + mixin_key).encode()).hexdigest()  # 计算 w_rid
+        params['w_rid'] = wbi_sign
+        return params
 
     def get_contribution_rank(self, ruid: int, room_id: int,
                               rank_type: Literal["online_rank", "daily_rank", "weekly_rank", "monthly_rank"],
@@ -2832,7 +5096,7 @@ class WbiSigna:
             signed_params = self.wbi(params)
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=signed_params,
@@ -2852,6 +5116,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -2937,7 +5202,7 @@ class WbiSigna:
             signed_params = self.wbi(params)
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=url,
                 headers=self.headers,
                 params=signed_params,
@@ -2958,6 +5223,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -3054,7 +5320,7 @@ class WbiSigna:
             params = self.wbi({"mid": mid})
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -3075,6 +5341,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -3240,7 +5507,7 @@ class WbiSigna:
                 form_data["emoticonOptions"] = "[object Object]"
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 params=signed_url_params,
@@ -3261,6 +5528,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             api_code = result.get("code")
@@ -3346,16 +5614,19 @@ class BilibiliLogInRegister:
     B站登录注册相关API
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """
         初始化登录注册管理器
 
         Args:
             headers: 请求头字典
             verify_ssl: 是否验证SSL证书
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
         """
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
 
     def generate(self) -> Dict[str, Any]:
         """
@@ -3374,7 +5645,7 @@ class BilibiliLogInRegister:
             api = 'https://passport.bilibili.com/x/passport-login/web/qrcode/generate'
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -3517,7 +5788,7 @@ class BilibiliLogInRegister:
             api = f'https://passport.bilibili.com/x/passport-login/web/qrcode/poll?qrcode_key={qrcode_key}'
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -3676,10 +5947,12 @@ class BilibiliLogInRegister:
 
 
 class ImproveCookies:
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """完善浏览器headers"""
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
 
     def fetch_buvid3_and_bnut(self) -> Dict[str, Any]:
         """
@@ -3694,7 +5967,7 @@ class ImproveCookies:
                 'Connection': 'keep-alive',
             }
             # 发送 HEAD 请求，与 curl -I 一致
-            response = requests.head(
+            response = self.session.head(
                 'https://www.bilibili.com/',
                 headers=headers,
                 verify=False,  # 忽略证书验证
@@ -3767,7 +6040,7 @@ class ImproveCookies:
         """
         try:
             # 发送API请求获取buvid3
-            response = requests.get(
+            response = self.session.get(
                 url='https://api.bilibili.com/x/web-frontend/getbuvid',
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -3848,7 +6121,7 @@ class ImproveCookies:
 
     def get_buvid_info(self) -> Dict[str, Any]:
         try:
-            response = requests.get(
+            response = self.session.get(
                 url="https://api.bilibili.com/x/frontend/finger/spi",
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -3902,10 +6175,16 @@ class BilibiliApiGeneric:
     不登录也能用的B站API
     """
 
-    def __init__(self, headers, verify_ssl: bool = True):
+    def __init__(self, headers, verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """只读接口的响应缓存，设为 None 时每次都请求"""
 
+    @ResponseCache.cached("area_obj_list")
     def get_area_obj_list(self) -> Dict[str, Any]:
         """
         获取B站直播分区信息
@@ -3923,7 +6202,7 @@ class BilibiliApiGeneric:
             api_url = "https://api.live.bilibili.com/room/v1/Area/getList"
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 timeout=10,
@@ -4009,6 +6288,7 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
+    @ResponseCache.cached("bilibili_user_card")
     def get_bilibili_user_card(self, mid: Union[int, str], photo: bool = False) -> Dict[str, Any]:
         """
         获取Bilibili用户名片信息
@@ -4047,7 +6327,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送GET请求
-            response = requests.get(
+            response = self.session.get(
                 url,
                 params=params,
                 headers=self.headers,
@@ -4187,7 +6467,7 @@ class BilibiliApiGeneric:
                 params["typ"] = typ
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -4305,22 +6585,23 @@ class BilibiliApiGeneric:
             }
 
     def _get_complete_guard_list(self, roomid: Union[int, str], ruid: Union[int, str],
-                                 typ: Optional[int] = None) -> List[Dict[str, Any]]:
+                                 typ: Optional[int] = None, max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的大航海成员列表（内部方法）
 
+        第一页确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             roomid: 直播间号
             ruid: 主播UID
             typ: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的大航海成员列表
         """
-        complete_list = []
-        page = 1
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "roomid": str(roomid),
@@ -4332,43 +6613,53 @@ class BilibiliApiGeneric:
             if typ in [3, 4, 5]:
                 params["typ"] = typ
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
-
-                if response.status_code != 200:
-                    break
+            # 发送API请求
+            response = self.session.get(
+                "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
 
-                result = response.json()
-                if result.get("code") != 0:
-                    break
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
 
-                data = result["data"]
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
 
-                # 如果是第一页，包含top3
-                if page == 1:
-                    complete_list.extend(data.get("top3", []))
+            return result["data"]
 
-                # 添加当前页列表
-                current_list = data.get("list", [])
-                complete_list.extend(current_list)
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
 
-                # 检查是否还有更多页
-                info = data.get("info", {})
-                total_pages = info.get("page", 0)
-                if page >= total_pages or not current_list:
-                    break
+        # 第一页包含top3
+        complete_list = first_page.get("top3", []) + first_page.get("list", [])
 
-                page += 1
+        # 检查是否还有更多页
+        total_pages = first_page.get("info", {}).get("page", 0)
+        if total_pages <= 1 or not first_page.get("list"):
+            return complete_list
 
-            except Exception:
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("list"):
                 break
+            complete_list.extend(data["list"])
 
         return complete_list
 
@@ -4405,7 +6696,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -4482,6 +6773,7 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
+    @ResponseCache.cached("anchor_common_areas")
     def get_anchor_common_areas(self, room_id: Union[str, int]) -> Dict[str, Any]:
         """
         获取主播常用分区信息
@@ -4514,7 +6806,7 @@ class BilibiliApiGeneric:
             params = {"roomid": str(room_id)}
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -4659,7 +6951,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -4789,7 +7081,7 @@ class BilibiliApiGeneric:
             params = {"mid": mid}
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 params=params,
@@ -4965,7 +7257,7 @@ class BilibiliApiGeneric:
                     params["ts"] = int(time.time() * 1000)  # 13位时间戳
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -5082,65 +7374,85 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
-    def _get_complete_fans_list(self, ruid: Union[int, str],
-                                rank_type: Optional[int] = None) -> List[Dict[str, Any]]:
+    def _get_complete_fans_list(self, ruid: Union[int, str], rank_type: Optional[int] = None,
+                                max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的粉丝团成员列表（内部方法）
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             ruid: 主播UID
             rank_type: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的粉丝团成员列表
         """
-        complete_list = []
-        page = 1
+        page_size = 30  # 使用最大页大小
+        # 按没上过舰的成员排序时，所有页使用同一个时间戳，保证分页一致
+        ts = int(time.time() * 1000)
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "ruid": str(ruid),
                 "page": page,
-                "page_size": 30  # 使用最大页大小
+                "page_size": page_size
             }
 
             # 添加排序参数
             if rank_type in [1, 2]:
                 params["rank_type"] = rank_type
                 if rank_type == 2:
-                    params["ts"] = int(time.time() * 1000)
+                    params["ts"] = ts
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
+            # 发送API请求
+            response = self.session.get(
+                "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
 
-                if response.status_code != 200:
-                    break
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
 
-                result = response.json()
-                if result.get("code") != 0:
-                    break
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
 
-                data = result["data"]
-                current_list = data.get("item", [])
-                complete_list.extend(current_list)
+            return result["data"]
 
-                # 检查是否还有更多页
-                total_members = data.get("num", 0)
-                if not current_list or len(complete_list) >= total_members:
-                    break
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
 
-                page += 1
+        complete_list = list(first_page.get("item", []))
 
-            except Exception:
+        # 检查是否还有更多页
+        total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+        if total_pages <= 1 or not complete_list:
+            return complete_list
+
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("item"):
                 break
+            complete_list.extend(data["item"])
 
         return complete_list
 
@@ -5180,7 +7492,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -5302,16 +7614,23 @@ class BilibiliSpecialApiManager:
     - 统一的错误处理和响应格式
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         初始化管理器
 
         Args:
             headers: 包含Cookie等认证信息的请求头字典
             verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
+            response_cache: 只读接口的响应缓存，默认 None 不缓存，可传入 ResponseCache.shared()
         """
         self.headers = headers.copy()  # 避免修改原始headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """只读接口的响应缓存，设为 None 时每次都请求"""
         self.initialization_result = self._initialize_manager()
 
     def _initialize_manager(self) -> Dict[str, Any]:
@@ -5399,7 +7718,7 @@ class BilibiliSpecialApiManager:
             params = {"room_id": room_id}
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -5503,7 +7822,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.bilibili.com/x/web-interface/nav"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -5606,7 +7925,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/GetReserveList"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -5707,7 +8026,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.live.bilibili.com/xlive/app-blink/v1/highlight/getRoomHighlightState"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -5830,7 +8149,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -5908,6 +8227,7 @@ class BilibiliSpecialApiManager:
                 "status_code": None
             }
 
+    @ResponseCache.cached("medal_wall")
     def get_medal_wall(self, target_id: int) -> Dict[str, Any]:
         """
         获取指定用户的所有粉丝勋章信息（最多200个）
@@ -5949,7 +8269,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -6078,7 +8398,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -6221,7 +8541,7 @@ class BilibiliSpecialApiManager:
                 params['target_id'] = target_id
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -6316,15 +8636,20 @@ class BilibiliSpecialApiManager:
             }
 
     def _get_all_pages_medal_data(self, initial_data: Dict[str, Any], room_id: Optional[int] = None,
-                                  target_id: Optional[int] = None, page_size: int = 10) -> Dict[str, Any]:
+                                  target_id: Optional[int] = None, page_size: int = 10,
+                                  max_workers: int = 4, min_interval: float = 0.2) -> Dict[str, Any]:
         """
         获取所有页的勋章数据
 
+        第二页起由 ConcurrentPaginator 并发请求，相邻请求的开始间隔不小于 min_interval，结果按页序合并
+
         Args:
             initial_data: 第一页的数据
             room_id: 房间ID
             target_id: 目标用户ID
             page_size: 每页数量
+            max_workers: 并发请求的最大线程数
+            min_interval: 相邻两次请求开始的最小间隔（秒），避免请求过快
 
         Returns:
             包含所有页数据的字典
@@ -6332,7 +8657,6 @@ class BilibiliSpecialApiManager:
         try:
             page_info = initial_data.get("page_info", {})
             total_pages = page_info.get("total_page", 1)
-            current_page = page_info.get("current_page", 1)
 
             # 如果只有一页，直接返回
             if total_pages <= 1:
@@ -6345,9 +8669,7 @@ class BilibiliSpecialApiManager:
             all_list_data = initial_data.get("list", [])
             all_special_list_data = initial_data.get("special_list", [])
 
-            # 从第二页开始获取
-            for page in range(2, total_pages + 1):
-
+            def fetch_page(page: int) -> Dict[str, Any]:
                 # 构建API请求
                 api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v1/fansMedal/panel"
                 params = {
@@ -6362,7 +8684,7 @@ class BilibiliSpecialApiManager:
                     params['target_id'] = target_id
 
                 # 发送请求
-                response = requests.get(
+                response = self.session.get(
                     url=api_url,
                     headers=self.headers,
                     params=params,
@@ -6372,37 +8694,39 @@ class BilibiliSpecialApiManager:
 
                 # 检查HTTP状态码
                 if response.status_code != 200:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": f"HTTP错误: {response.status_code}",
                         "status_code": response.status_code
-                    }
+                    })
 
                 # 解析响应
                 result = response.json()
 
                 # 检查B站API返回状态
                 if result.get("code") != 0:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": result.get("message", "未知错误"),
                         "status_code": response.status_code,
                         "api_code": result.get("code")
-                    }
-
-                page_data = result.get("data", {})
+                    })
 
-                # 合并数据
-                all_list_data.extend(page_data.get("list", []))
-                # 特殊列表通常只有第一页有，但为了完整性也合并
-                if page == 2:  # 只在第二页合并特殊列表，避免重复
-                    all_special_list_data.extend(page_data.get("special_list", []))
+                return result.get("data", {})
 
-                # 添加小延迟，避免请求过快
-                import time
-                time.sleep(0.5)
+            # 从第二页开始并发获取
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, min_interval=min_interval)
+            try:
+                for page, page_data in paginator.iter_pages(2, total_pages):
+                    # 合并数据
+                    all_list_data.extend(page_data.get("list", []))
+                    # 特殊列表通常只有第一页有，但为了完整性也合并
+                    if page == 2:  # 只在第二页合并特殊列表，避免重复
+                        all_special_list_data.extend(page_data.get("special_list", []))
+            except ConcurrentPaginator.PageError as e:
+                return e.result
 
             # 更新数据
             initial_data["list"] = all_list_data
@@ -6434,6 +8758,7 @@ class BilibiliSpecialApiManager:
                 "error": str(e)
             }
 
+    @ResponseCache.cached("room_emoticons")
     def get_room_emoticons(self, room_id: int, platform: str = "pc") -> Dict[str, Any]:
         """
         获取直播间表情包信息
@@ -6487,7 +8812,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -6586,13 +8911,17 @@ class BilibiliCSRFAuthenticator:
     - 统一的错误处理和响应格式
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         初始化CSRF认证管理器
 
         Args:
             headers: 包含Cookie等认证信息的请求头字典
             verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
+            response_cache: 写操作成功后需要失效的响应缓存，默认 None
 
         Returns:
             包含操作结果的字典，包含以下键：
@@ -6603,6 +8932,9 @@ class BilibiliCSRFAuthenticator:
         """
         self.headers = headers.copy()  # 避免修改原始headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """写操作成功后需要失效的响应缓存"""
         self.initialization_result = self._initialize_authenticator()
 
     def _initialize_authenticator(self) -> Dict[str, Any]:
@@ -6771,7 +9103,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 url="https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/CancelReserve",
                 headers=self.headers,
                 data=payload,
@@ -6852,6 +9184,7 @@ class BilibiliCSRFAuthenticator:
                 "data": None
             }
 
+    @ResponseCache.invalidates("anchor_common_areas")
     def change_room_area(self, room_id: int, area_id: int) -> Dict[str, Any]:
         """
         更改直播分区
@@ -6894,7 +9227,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api,
                 headers=headers,
                 params=params,
@@ -7026,7 +9359,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 verify=self.verify_ssl,
                 url=api,
                 headers=headers,
@@ -7154,7 +9487,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=data,
@@ -7276,7 +9609,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 data=data,
                 headers=self.headers,
@@ -7433,7 +9766,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/CreateReserve"
 
-            response = requests.post(
+            response = self.session.post(
                 verify=self.verify_ssl,
                 url=api_url,
                 headers=self.headers,
@@ -7567,7 +9900,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -7617,7 +9950,7 @@ class BilibiliCSRFAuthenticator:
                     params["offset"] = result["data"].get("offset", "")
 
                     # 发送分页请求
-                    response = requests.get(
+                    response = self.session.get(
                         url=api_url,
                         headers=self.headers,
                         params=params,
@@ -7724,7 +10057,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -7802,12 +10135,16 @@ class BilibiliCSRFAuthenticator:
                 "status_code": None
             }
 
-    def get_fans_members_rank(self, uid: int) -> Dict[str, Any]:
+    def get_fans_members_rank(self, uid: int, max_workers: int = 4) -> Dict[str, Any]:
         """
         获取指定用户的粉丝团成员列表
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求；
+        网络错误和非 200 状态码按 1、2 秒退避重试，最多 3 次
+
         Args:
             uid: 要查询的B站用户UID
+            max_workers: 并发请求的最大线程数
 
         Returns:
             包含查询结果的字典：
@@ -7839,86 +10176,76 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank"
             headers = self.headers
-            page = 1
-            fans_members = []
-            has_more_data = True
+            page_size = 30
             max_retries = 3
 
-            while has_more_data:
+            def fetch_page(page: int) -> Dict[str, Any]:
                 params = {
                     "ruid": uid,
                     "page": page,
-                    "page_size": 30,
+                    "page_size": page_size,
                 }
+                response = self.session.get(
+                    api_url,
+                    headers=headers,
+                    params=params,
+                    verify=self.verify_ssl,
+                    timeout=30
+                )
 
-                # 添加重试机制
-                for attempt in range(max_retries):
-                    try:
-                        response = requests.get(
-                            api_url,
-                            headers=headers,
-                            params=params,
-                            verify=self.verify_ssl,
-                            timeout=30
-                        )
-
-                        # 检查HTTP状态码
-                        if response.status_code != 200:
-                            if attempt < max_retries - 1:
-                                time.sleep(2)  # 等待后重试
-                                continue
-                            else:
-                                return {
-                                    "success": False,
-                                    "message": "获取粉丝团成员列表失败",
-                                    "error": f"HTTP错误: {response.status_code}",
-                                    "status_code": response.status_code
-                                }
-
-                        result = response.json()
+                # 检查HTTP状态码，非 200 时作为网络错误重试
+                if response.status_code != 200:
+                    raise requests.exceptions.HTTPError(f"HTTP错误: {response.status_code}", response=response)
 
-                        # 检查API返回状态
-                        if result.get("code") != 0:
-                            return {
-                                "success": False,
-                                "message": "B站API返回错误",
-                                "error": result.get("message", "未知错误"),
-                                "status_code": response.status_code,
-                                "api_code": result.get("code")
-                            }
+                result = response.json()
 
-                        # 处理数据
-                        current_page_items = result["data"].get("item", [])
-                        if current_page_items:
-                            fans_members.extend(current_page_items)
-                            page += 1
-                        else:
-                            has_more_data = False
+                # 检查API返回状态，不重试
+                if result.get("code") != 0:
+                    raise ConcurrentPaginator.PageError({
+                        "success": False,
+                        "message": "B站API返回错误",
+                        "error": result.get("message", "未知错误"),
+                        "status_code": response.status_code,
+                        "api_code": result.get("code")
+                    })
 
-                        break  # 成功获取数据，跳出重试循环
+                return result["data"]
 
-                    except requests.exceptions.Timeout:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 超时后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": "请求超时",
-                                "status_code": None
-                            }
-                    except requests.exceptions.RequestException as e:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 网络错误后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": f"网络请求异常: {str(e)}",
-                                "status_code": None
-                            }
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, max_retries=max_retries - 1,
+                                            retry_backoff=1.0, retry_on=(requests.exceptions.RequestException,))
+            try:
+                first_page = paginator.fetch(1)
+                fans_members = list(first_page.get("item", []))
+                total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+                if fans_members:
+                    for page, data in paginator.iter_pages(2, total_pages):
+                        current_page_items = data.get("item", [])
+                        if not current_page_items:
+                            break
+                        fans_members.extend(current_page_items)
+            except ConcurrentPaginator.PageError as e:
+                return e.result
+            except requests.exceptions.HTTPError as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": str(e),
+                    "status_code": e.response.status_code if e.response is not None else None
+                }
+            except requests.exceptions.Timeout:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": "请求超时",
+                    "status_code": None
+                }
+            except requests.exceptions.RequestException as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": f"网络请求异常: {str(e)}",
+                    "status_code": None
+                }
 
             # 成功返回
             return {
@@ -7963,7 +10290,7 @@ class BilibiliCSRFAuthenticator:
             api_url = "https://api.bilibili.com/x/web-interface/nav"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -8066,7 +10393,7 @@ class BilibiliCSRFAuthenticator:
             api_url = "https://api.live.bilibili.com/xlive/web-ucenter/user/get_user_info"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -8192,7 +10519,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 api_url,
                 headers=headers,
                 data=params,
@@ -8368,7 +10695,7 @@ class BilibiliCSRFAuthenticator:
             startLivedata["sign"] = md5_sign
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api,
                 headers=headers,
                 params=startLivedata,
@@ -8493,7 +10820,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=data,
@@ -8622,7 +10949,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 api_url,
                 headers=self.headers,
                 data=update_cover_data,
@@ -8766,7 +11093,7 @@ class BilibiliCSRFAuthenticator:
                     body += part
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=body,
@@ -8949,7 +11276,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/msg/send"
 
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 data=payload,
@@ -9144,7 +11471,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v1/fansMedal/wear"
 
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 data=payload,
@@ -9239,93 +11566,378 @@ class BilibiliCSRFAuthenticator:
             }
 
 
-@lru_cache(maxsize=None)
-def get_w_s_a():
-    if get_b_u_c_m().get_default_user_id():
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
-            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
-        }
-        w_s_a = WbiSigna(headers, GlobalVariableOfData.sslVerification)
-    else:
-        w_s_a = None
-    return w_s_a
+class AsyncApiClient:
+    """
+    B站 API 客户端的 asyncio 接口
 
+    包装 BilibiliApiGeneric / BilibiliSpecialApiManager / BilibiliCSRFAuthenticator / WbiSigna 等同步客户端：
+    公开方法调用后返回协程，请求在 API 专用线程池中通过共享长连接池发出，返回值仍是原来的结果字典。
+    事件循环不会被网络请求阻塞，多个调用可以用 asyncio.gather 并发执行。
+    """
 
-@lru_cache(maxsize=None)
-def get_b_u_c_m():
-    b_u_c_m = BilibiliUserConfigManager(config_path=GlobalVariableOfData.scriptsUsersConfigFilepath)
-    return b_u_c_m
+    MAX_WORKERS = 8
+    """API 专用线程池的线程数，也是同时进行的请求数上限"""
 
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
 
-@lru_cache(maxsize=None)
-def get_b_l_i_r():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
+    def __init__(self, client: Any):
+        """
+        Args:
+            client: 同步 API 客户端实例，如 BilibiliApiGeneric(headers)
+        """
+        self.client = client
+        """被包装的同步客户端"""
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """所有异步客户端共用的 API 线程池，第一次调用时创建"""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix="bili-api")
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """关闭 API 线程池，不等待正在进行的请求"""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    async def call(self, method: Callable[..., Dict[str, Any]], *args, **kwargs) -> Dict[str, Any]:
+        """
+        在 API 线程池中执行一个同步方法
+        Args:
+            method: 同步客户端的方法
+            *args: 位置参数
+            **kwargs: 关键字参数
 
-    # 初始化API对象
-    b_l_i_r = BilibiliLogInRegister(headers, GlobalVariableOfData.sslVerification)
-    return b_l_i_r
+        Returns:
+            方法的返回值
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor(), functools.partial(method, *args, **kwargs))
 
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
 
-@lru_cache(maxsize=None)
-def get_i_c():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.call(attr, *args, **kwargs)
 
-    # 初始化API对象
-    i_c = ImproveCookies(headers, GlobalVariableOfData.sslVerification)
-    return i_c
+        # 缓存生成的协程函数，下次直接命中实例属性
+        setattr(self, name, method)
+        return method
 
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.client!r})"
 
-@lru_cache(maxsize=None)
-def get_b_a_g():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
 
-    # 初始化API对象
-    b_a_g = BilibiliApiGeneric(headers, GlobalVariableOfData.sslVerification)
-    return b_a_g
+class CacheDependencyGraph:
+    """
+    带依赖关系的函数缓存
 
+    每个缓存函数声明它依赖的其他缓存函数（按函数名）或外部状态（如 "default_user"、"room_info"），
+    失效时只清除受影响的函数和依赖它们的下游函数，其余结果继续使用。
+    读取远端状态的函数可以设置有效期，过期后下次调用重新计算，依赖它的下游结果同时过期。
+    """
 
-@lru_cache(maxsize=None)
-def get_b_s_a_m():
-    if get_b_u_c_m().get_default_user_id():
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
-            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
-        }
+    def __init__(self):
+        self.compute_count = 0
+        """缓存函数实际计算的累计次数"""
+        self._nodes: Dict[str, Callable] = {}  # {函数名: 缓存函数}
+        self._depends_on: Dict[str, Tuple[str, ...]] = {}  # {函数名: 它依赖的名称}
+        self._dependents: Dict[str, Set[str]] = {}  # {名称: 直接依赖它的函数名}
+        self._ttl: Dict[str, float] = {}  # {函数名: 有效期}
+        self._expires_at: Dict[str, float] = {}  # {函数名: 过期时间}
+        self._versions: Dict[str, int] = {}  # {名称: 失效次数}
+
+    def node(self, *depends_on: str, ttl: Optional[float] = None):
+        """
+        把函数注册为缓存节点，代替 @lru_cache(maxsize=None)
+        Args:
+            *depends_on: 依赖的缓存函数名或外部状态名
+            ttl: 有效期（秒），None 表示只在失效时重新计算
+        """
 
-        b_r_m = BilibiliSpecialApiManager(headers, GlobalVariableOfData.sslVerification)
-    else:
-        b_r_m = None
-    return b_r_m
+        def decorator(func: Callable):
+            name = func.__name__
 
+            def compute(*args, **kwargs):
+                result = func(*args, **kwargs)
+                self.compute_count += 1
+                self._mark_computed(name)
+                return result
 
-@lru_cache(maxsize=None)
-def get_b_l_d_m():
-    if get_b_u_c_m().get_default_user_id():
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
-            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
-        }
-        dm = BiliDanmu(headers)
-    else:
-        dm = None
-    return dm
+            cached = functools.lru_cache(maxsize=None)(compute)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self._expires_at.get(name, math.inf) <= time.monotonic():
+                    self.invalidate(name)
+                return cached(*args, **kwargs)
+
+            wrapper.cache_clear = cached.cache_clear
+            wrapper.cache_info = cached.cache_info
+            self._nodes[name] = wrapper
+            self._depends_on[name] = depends_on
+            if ttl is not None:
+                self._ttl[name] = ttl
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(name)
+            return wrapper
+
+        return decorator
+
+    def _mark_computed(self, name: str):
+        """记录节点的过期时间：自己的有效期和所依赖节点的过期时间中较早的一个"""
+        expires_at = time.monotonic() + self._ttl[name] if name in self._ttl else math.inf
+        for dependency in self._depends_on[name]:
+            expires_at = min(expires_at, self._expires_at.get(dependency, math.inf))
+        if expires_at == math.inf:
+            self._expires_at.pop(name, None)
+        else:
+            self._expires_at[name] = expires_at
+
+    def affected(self, *names: str) -> Set[str]:
+        """返回这些名称变化时需要失效的缓存函数名，包括所有下游函数"""
+        result = set()
+        seen = set()
+        queue = deque(names)
+        while queue:
+            name = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in self._nodes:
+                result.add(name)
+            queue.extend(self._dependents.get(name, ()))
+        return result
 
+    def invalidate(self, *names: str) -> Set[str]:
+        """
+        使缓存失效
+        Args:
+            *names: 发生变化的缓存函数名或外部状态名
 
-@lru_cache(maxsize=None)
-def get_b_csrf_a():
+        Returns:
+            被清除的缓存函数名
+        """
+        cleared = self.affected(*names)
+        for name in cleared:
+            self._nodes[name].cache_clear()
+            self._expires_at.pop(name, None)
+        for name in cleared.union(names):
+            self._versions[name] = self._versions.get(name, 0) + 1
+        return cleared
+
+    def invalidate_all(self):
+        """清除所有缓存"""
+        for node in self._nodes.values():
+            node.cache_clear()
+        self._expires_at.clear()
+        for name in self._nodes.keys() | self._dependents.keys():
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def expire_due(self) -> Set[str]:
+        """
+        使已经过期的缓存失效，不等到下次调用
+        Returns:
+            被清除的缓存函数名
+        """
+        now = time.monotonic()
+        expired = [name for name, expires_at in self._expires_at.items() if expires_at <= now]
+        return self.invalidate(*expired) if expired else set()
+
+    def version(self, name: str) -> int:
+        """缓存函数名或外部状态名的版本号，每次失效加一，用于判断结果是否可能已经变化"""
+        return self._versions.get(name, 0)
+
+    def dependencies(self, name: str) -> Tuple[str, ...]:
+        """返回缓存函数声明的依赖"""
+        return self._depends_on.get(name, ())
+
+
+class WidgetStateEngine:
+    """
+    声明式的控件状态
+
+    每个控件注册一条规则，规则声明它读取的输入（缓存函数名或外部状态名），并设置控件的可见、可用和值。
+    刷新时按缓存依赖图中各输入的版本号判断，只重新计算从未计算过或输入失效过的规则；
+    重新计算过的控件记为待推送，由界面更新函数取出后推送到 OBS。
+    """
+
+    def __init__(self, graph: Any):
+        """
+        Args:
+            graph: 缓存依赖图，需要提供 version(name) 和 expire_due()
+        """
+        self.graph = graph
+        """缓存依赖图"""
+        self.last_evaluated = 0
+        """最近一次刷新重新计算的规则数"""
+        self._rules: Dict[str, Tuple[Callable[[Any], None], Tuple[str, ...]]] = {}  # {控件路径: (规则, 输入)}
+        self._versions: Dict[str, Tuple[int, ...]] = {}  # {控件路径: 上次计算后各输入的版本号}
+        self._pending: Dict[str, Any] = {}  # {控件名: 控件} 重新计算后还没推送的控件
+
+    def rule(self, path: str, *inputs: str):
+        """
+        注册控件规则的装饰器，规则函数的参数为控件对象
+        Args:
+            path: 控件在控件表单中的路径，如 "Button.login"
+            *inputs: 规则读取的缓存函数名或外部状态名
+        """
+
+        def decorator(func: Callable[[Any], None]):
+            self._rules[path] = (func, inputs)
+            return func
+
+        return decorator
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def inputs(self, path: str) -> Tuple[str, ...]:
+        """返回控件规则声明的输入"""
+        return self._rules[path][1]
+
+    def _snapshot(self, inputs: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self.graph.version(name) for name in inputs)
+
+    def render(self, root: Any, names: Optional[Set[str]] = None) -> int:
+        """
+        重新计算输入发生变化的规则
+        Args:
+            root: 控件表单，按规则的路径取出控件
+            names: 本次允许更新的控件名，None 表示全部；范围外的控件保持原状，下次在范围内时再计算
+
+        Returns:
+            重新计算的规则数
+        """
+        self.graph.expire_due()
+        evaluated = 0
+        for path, (func, inputs) in self._rules.items():
+            control = operator.attrgetter(path)(root)
+            if names is not None and control.Name not in names:
+                continue
+            if self._versions.get(path) == self._snapshot(inputs):
+                continue
+            func(control)
+            # 计算过程中过期的缓存在调用时才失效，所以记录计算之后的版本号
+            self._versions[path] = self._snapshot(inputs)
+            self._pending[control.Name] = control
+            evaluated += 1
+        self.last_evaluated = evaluated
+        return evaluated
+
+    def mark_all(self, root: Any):
+        """把所有规则的控件记为待推送但不重新计算，用于 OBS 重新创建控件之后"""
+        for path in self._rules:
+            control = operator.attrgetter(path)(root)
+            self._pending[control.Name] = control
+
+    def take_pending(self) -> List[Any]:
+        """取出并清空待推送的控件"""
+        pending, self._pending = list(self._pending.values()), {}
+        return pending
+
+    def reset(self):
+        """清除所有计算记录，下次刷新时重新计算全部规则"""
+        self._versions.clear()
+
+
+cache_graph = CacheDependencyGraph()
+"""下面各 get_ 函数的缓存依赖关系，数据变化时用 cache_graph.invalidate 只清除受影响的结果"""
+widget_state = WidgetStateEngine(cache_graph)
+"""各控件的状态规则，规则写在 script_defaults 之前，script_defaults 只重新计算输入变化过的控件"""
+
+
+@cache_graph.node()
+def get_h_s_p():
+    # 所有 API 对象共用的长连接池
+    h_s_p = HttpSessionPool.shared()
+    return h_s_p
+
+
+@cache_graph.node()
+def get_n_h_m():
+    # 网络连接与 SSL 状态监视器，在后台定期检查
+    n_h_m = NetworkHealthMonitor(Tools.check_network_connection, Tools.check_ssl_verification)
+    n_h_m.start()
+    return n_h_m
+
+
+@cache_graph.node()
+def get_r_c():
+    # 只读接口的响应缓存，读取上次保存的结果，卸载脚本时保存
+    r_c = ResponseCache(cache_path=Path(GlobalVariableOfData.scriptsCacheDir) / "api_response_cache.json")
+    r_c.load()
+    return r_c
+
+
+@cache_graph.node("default_user", "ssl_verification")
+def get_w_s_a():
+    if get_b_u_c_m().get_default_user_id():
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
+        }
+        w_s_a = WbiSigna(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session)
+    else:
+        w_s_a = None
+    return w_s_a
+
+
+@cache_graph.node()
+def get_b_u_c_m():
+    b_u_c_m = BilibiliUserConfigManager(config_path=GlobalVariableOfData.scriptsUsersConfigFilepath)
+    b_u_c_m.flushErrorCallback = lambda message: log_save(obs.LOG_WARNING, f"后台{message}，稍后重试")
+    return b_u_c_m
+
+
+@cache_graph.node("ssl_verification")
+def get_b_l_i_r():
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+
+    # 初始化API对象
+    b_l_i_r = BilibiliLogInRegister(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session)
+    return b_l_i_r
+
+
+@cache_graph.node("ssl_verification")
+def get_i_c():
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+
+    # 初始化API对象
+    i_c = ImproveCookies(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session)
+    return i_c
+
+
+@cache_graph.node("ssl_verification")
+def get_b_a_g():
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    }
+
+    # 初始化API对象
+    b_a_g = BilibiliApiGeneric(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session, get_r_c())
+    return b_a_g
+
+
+@cache_graph.node("default_user", "ssl_verification")
+def get_b_s_a_m():
     if get_b_u_c_m().get_default_user_id():
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
@@ -9333,48 +11945,145 @@ def get_b_csrf_a():
             'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
         }
 
-        b_csrf_a = BilibiliCSRFAuthenticator(headers, GlobalVariableOfData.sslVerification)
+        b_r_m = BilibiliSpecialApiManager(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session,
+                                          get_r_c())
+    else:
+        b_r_m = None
+    return b_r_m
+
+
+@cache_graph.node("default_user")
+def get_b_l_d_m():
+    if get_b_u_c_m().get_default_user_id():
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
+        }
+        dm = BiliDanmu(headers)
+    else:
+        dm = None
+    return dm
+
+
+@cache_graph.node("default_user", "ssl_verification")
+def get_b_csrf_a():
+    if get_b_u_c_m().get_default_user_id():
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
+        }
+
+        b_csrf_a = BilibiliCSRFAuthenticator(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session,
+                                              get_r_c())
     else:
         b_csrf_a = None
     return b_csrf_a
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node()
 def get_c_d_m():
     # 创建用户常用数据实例
     c_d_m = CommonDataManager(Path(GlobalVariableOfData.scriptsDataDirpath) / "commonData.json")
     return c_d_m
 
 
-@lru_cache(maxsize=None)
+def check_account_status(uid: str) -> Dict[str, Any]:
+    """
+    检查一个已保存账号的 Cookie 是否有效，在账号状态服务的线程池中执行
+    Args:
+        uid: 账号 uid
+
+    Returns:
+        {"valid": Cookie 是否有效, "nickname": 昵称}；网络错误无法确认时抛出 ConnectionError
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+        'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies(int(uid))["data"])
+    }
+    nav_info = BilibiliSpecialApiManager(headers, GlobalVariableOfData.sslVerification, get_h_s_p().session).get_nav_info()
+    if nav_info["success"]:
+        return {"valid": True, "nickname": nav_info["data"].get("uname") or uid}
+    if nav_info.get("status_code") is None:
+        raise ConnectionError(nav_info.get("error"))
+    user_card = get_b_a_g().get_bilibili_user_card(uid)
+    nickname = user_card['data']['data']['card']['name'] if user_card.get("success") else uid
+    return {"valid": False, "nickname": nickname}
+
+
+@cache_graph.node()
+def get_a_s_s():
+    # 账号状态服务，读取上次保存的账号状态
+    a_s_s = AccountStatusService(check_account_status, Path(GlobalVariableOfData.scriptsCacheDir) / "account_status.json")
+    a_s_s.load_cache()
+    return a_s_s
+
+
+@cache_graph.node("accounts", ttl=600)
 def get_uid_nickname_dict():
-    # 获取 用户数据文件中保存的用户，并在用户过期后删除用户
+    # 获取 用户数据文件中保存的用户，先用上次检查的账号状态，过期的账号在后台重新检查，并在用户过期后删除用户
     uid_nickname_dict = {}
     """账号字典"""
-    for uid_dict in get_b_u_c_m().get_all_users()["data"]["users"]:
-        uid = uid_dict["user_id"]
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
-            'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies(int(uid))["data"])
-        }
-        nav_info = BilibiliSpecialApiManager(headers, GlobalVariableOfData.sslVerification).get_nav_info()
-        print(nav_info)
-        is_login = nav_info["success"]
-        if is_login:
-            uid_nickname_dict[get_b_a_g().get_bilibili_user_card(uid)['data']['data']['card']['name']] = uid
+    uids = [uid_dict["user_id"] for uid_dict in get_b_u_c_m().get_all_users()["data"]["users"]]
+    statuses = get_a_s_s().statuses(uids)
+    remaining_uids = []
+    """没有因过期被删除的账号，只在后台检查这些账号"""
+    for uid in uids:
+        status = statuses[str(uid)]
+        if status is None:
+            # 从未检查过且这次也无法确认，先按 uid 显示
+            uid_nickname_dict[str(uid)] = uid
+        elif status["valid"]:
+            uid_nickname_dict[status["nickname"]] = uid
         else:
-            log_save(obs.LOG_INFO, f"❌{get_b_a_g().get_bilibili_user_card(uid)['data']['data']['card']['name']}过期")
+            log_save(obs.LOG_INFO, f"❌{status['nickname']}过期")
             if get_b_u_c_m().get_default_user_id() == uid:
                 get_b_u_c_m().clear_default_user()
             get_b_u_c_m().delete_user(int(uid))
+            get_a_s_s().forget(uid)
+            continue
+        remaining_uids.append(uid)
+    if get_a_s_s().refresh(remaining_uids):
+        watch_account_status()
     if not get_b_u_c_m().get_user_cookies()["success"]:
         uid_nickname_dict['添加或选择一个账号登录'] = '-1'
     log_save(obs.LOG_INFO, f"║║载入账号字典：{uid_nickname_dict}")
     return uid_nickname_dict
 
 
-@lru_cache(maxsize=None)
+def watch_account_status():
+    """后台检查账号期间每 500 ms 查看一次，全部完成且有账号状态变化时刷新账号控件"""
+    if GlobalVariableOfData.accountStatusWatching:
+        return
+    GlobalVariableOfData.accountStatusWatching = True
+
+    def check_poll():
+        if get_a_s_s().busy():
+            return
+        obs.remove_current_callback()
+        GlobalVariableOfData.accountStatusWatching = False
+        if not get_a_s_s().take_changes():
+            return
+        log_save(obs.LOG_INFO, f"账号状态已更新，刷新账号列表")
+        cache_graph.invalidate("accounts")
+        GlobalVariableOfData.update_widget_for_props_dict = {
+            "account_props": widget.props_Collection["account_props"]
+        }
+        default_status = get_a_s_s().get(get_b_u_c_m().get_default_user_id())
+        if default_status and not default_status["valid"]:
+            # 登录账号过期会被删除，所有控件都要刷新
+            cache_graph.invalidate("default_user")
+            GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
+        script_defaults(GlobalVariableOfData.script_settings)
+        update_ui_interface_data()
+        GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
+
+    obs.timer_add(check_poll, 500)
+
+
+@cache_graph.node("get_uid_nickname_dict", "default_user")
 def get_default_user_nickname():
     # 获取 '登录用户' 的昵称
     if get_b_u_c_m().get_default_user_id():
@@ -9389,7 +12098,7 @@ def get_default_user_nickname():
     return default_user_nickname
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "room", ttl=60)
 def get_room_info_old():
     # 获取 '登录用户' 对应的直播间基础信息
     if get_b_u_c_m().get_default_user_id():
@@ -9403,7 +12112,7 @@ def get_room_info_old():
     return room_info_old
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_info_old")
 def get_room_status():
     # 获取 '登录用户' 的 直播间状态
     if get_b_u_c_m().get_default_user_id():
@@ -9420,7 +12129,7 @@ def get_room_status():
     return room_status
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_info_old")
 def get_room_id():
     # 获取 '登录用户' 的 直播间id
     if get_b_u_c_m().get_default_user_id():
@@ -9439,7 +12148,7 @@ def get_room_id():
     return room_id
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_id", "room_info", ttl=60)
 def get_room_base_info():
     # 获取 '登录用户' 直播间基本信息
     if get_b_u_c_m().get_default_user_id():
@@ -9458,7 +12167,7 @@ def get_room_base_info():
     return room_base_info
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_base_info")
 def get_room_title():
     # 获取 '登录用户' 直播间标题
     if get_b_u_c_m().get_default_user_id():
@@ -9477,7 +12186,7 @@ def get_room_title():
     return room_title
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_title", "common_titles")
 def get_common_title4number():
     # 添加当前直播间标题 到 常用直播间标 题配置文件
     common_title4number = {}
@@ -9495,7 +12204,7 @@ def get_common_title4number():
     return common_title4number
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_status", "room_news", ttl=60)
 def get_room_news():
     # 获取 直播间公告
     if get_b_u_c_m().get_default_user_id():
@@ -9516,7 +12225,7 @@ def get_room_news():
     return room_news
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_base_info")
 def get_area():
     # 获取 '登录用户' 直播间的分区
     if get_b_u_c_m().get_default_user_id():
@@ -9540,7 +12249,7 @@ def get_area():
     return area
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_id", "room_info", ttl=300)
 def get_common_areas():
     # 获取 '登录用户' 直播间 常用分区信息
     if get_b_u_c_m().get_default_user_id():
@@ -9559,7 +12268,7 @@ def get_common_areas():
     return common_areas
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_common_areas")
 def get_common_area_id_dict_str4common_area_name_dict_str():
     # 获取 '登录用户' 常用直播间分区字典
     common_area_id_dict_str4common_area_name_dict_str = {}
@@ -9584,7 +12293,7 @@ def get_common_area_id_dict_str4common_area_name_dict_str():
     return common_area_id_dict_str4common_area_name_dict_str
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user")
 def get_area_obj_data_list():
     # 获取 B站直播分区信息
     if get_b_u_c_m().get_default_user_id():
@@ -9598,7 +12307,7 @@ def get_area_obj_data_list():
     return area_obj_data_list
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_area_obj_data_list", "get_area", "get_room_status")
 def get_parent_live_area_name4parent_live_area_id():
     # 获取 直播间父分区数据
     parent_live_area_name4parent_live_area_id = {}
@@ -9619,7 +12328,7 @@ def get_parent_live_area_name4parent_live_area_id():
     return parent_live_area_name4parent_live_area_id
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_area_obj_data_list", "get_area", "get_room_status")
 def get_sub_live_area_name4sub_live_area_id():
     # 获取 登录账户 的 直播间父分区 对应的 直播间子分区数据
     sub_live_area_name4sub_live_area_id = {}
@@ -9642,7 +12351,7 @@ def get_sub_live_area_name4sub_live_area_id():
     return sub_live_area_name4sub_live_area_id
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_info_old")
 def get_live_status():
     # 获取 '登录用户' 的 直播状态
     if get_b_u_c_m().get_default_user_id():
@@ -9664,7 +12373,7 @@ def get_live_status():
     return live_status
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_room_status", "reserve", ttl=60)
 def get_reserve_list():
     # 登录用户的直播预约列表信息
     if get_b_u_c_m().get_default_user_id():
@@ -9683,7 +12392,7 @@ def get_reserve_list():
     return reserve_list
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_reserve_list")
 def get_reserve_name4reserve_sid():
     # 登录用户的直播预约字典
     reserve_name4reserve_sid = {}
@@ -9708,7 +12417,7 @@ def get_reserve_name4reserve_sid():
     return reserve_name4reserve_sid
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "danmu_setting")
 def get_common_danmu_setting():
     """
     弹幕客户端创建数/弹幕客户端创建间隔/是否显示进房消息/是否显示粉丝徽章/是否显示其他的粉丝徽章/是否显示未点亮的粉丝徽章/换行显示/是否标记管理员，is_admin不受影响/是否显示时间/防重复的缓存条数/防重复的缓存时长/头像大小/粉丝勋章文字大小/内容文字大小/时间文字大小
@@ -9724,7 +12433,7 @@ def get_common_danmu_setting():
     return danmu_setting_list
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "danmu_roomid", "get_room_id")
 def get_common_danmu_roomid_dict():
     danmu_roomid_uname_dict = {}
     if get_b_u_c_m().get_default_user_id():
@@ -9741,7 +12450,7 @@ def get_common_danmu_roomid_dict():
     return danmu_roomid_uname_dict
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "danmu_wss_port")
 def get_common_danmu_web_socket_server_prot():
     danmu_web_socket_server_prot = get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "danmuWssProt")
     if not danmu_web_socket_server_prot:
@@ -9749,7 +12458,7 @@ def get_common_danmu_web_socket_server_prot():
     return get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "danmuWssProt")[0]
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", ttl=60)
 def get_common_danmu_own_big_expression():
     danmu_own_big_expression_dict = {}
     own_big_expression = Path(GlobalVariableOfData.scriptsDataDirpath / "img/own")
@@ -9763,7 +12472,7 @@ def get_common_danmu_own_big_expression():
     return json.loads(get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "danmuOwnImg")[0])
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "danmu_css")
 def get_common_danmu_web_css():
     danmu_web_css = get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "danmuWebCss")
     if not danmu_web_css:
@@ -9776,7 +12485,7 @@ def get_common_danmu_web_css():
     return get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "danmuWebCss")[0]
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("get_common_danmu_roomid_dict", "get_b_s_a_m")
 def get_common_danmu_emoticons():
     danmu_emoticons_dict = {}
     for emoji in \
@@ -9786,7 +12495,7 @@ def get_common_danmu_emoticons():
     return danmu_emoticons_dict
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "script_setting")
 def get_common_script_setting():
     """
     是否联动推流和开播/是否联动推流和停播/是否自动填写推流服务器/是否每次重置弹幕源
@@ -9801,7 +12510,7 @@ def get_common_script_setting():
     return script_setting_list
 
 
-@lru_cache(maxsize=None)
+@cache_graph.node("default_user", "widget_visibility")
 def get_common_widget_visibility() -> dict[str, int]:
     widget_visibility_dict = {}
     widget_visibility_setting = get_c_d_m().get_data(get_b_u_c_m().get_default_user_id(), "widgetVisibility")
@@ -9814,42 +12523,15 @@ def get_common_widget_visibility() -> dict[str, int]:
     return widget_visibility_dict
 
 
-def clear_cache():
-    # 清除函数缓存
-    get_w_s_a.cache_clear()
-    get_b_u_c_m.cache_clear()
-    get_b_a_g.cache_clear()
-    get_b_l_i_r.cache_clear()
-    get_i_c.cache_clear()
-    get_b_l_d_m.cache_clear()
-    get_b_s_a_m.cache_clear()
-    get_c_d_m.cache_clear()
-    get_uid_nickname_dict.cache_clear()
-    get_default_user_nickname.cache_clear()
-    get_room_info_old.cache_clear()
-    get_room_status.cache_clear()
-    get_room_id.cache_clear()
-    get_room_base_info.cache_clear()
-    get_room_title.cache_clear()
-    get_common_title4number.cache_clear()
-    get_room_news.cache_clear()
-    get_area.cache_clear()
-    get_common_areas.cache_clear()
-    get_common_area_id_dict_str4common_area_name_dict_str.cache_clear()
-    get_area_obj_data_list.cache_clear()
-    get_parent_live_area_name4parent_live_area_id.cache_clear()
-    get_sub_live_area_name4sub_live_area_id.cache_clear()
-    get_live_status.cache_clear()
-    get_reserve_list.cache_clear()
-    get_reserve_name4reserve_sid.cache_clear()
-    get_common_danmu_setting.cache_clear()
-    get_common_danmu_roomid_dict.cache_clear()
-    get_common_danmu_web_socket_server_prot.cache_clear()
-    get_common_danmu_own_big_expression.cache_clear()
-    get_common_danmu_web_css.cache_clear()
-    get_common_danmu_emoticons.cache_clear()
-    get_common_script_setting.cache_clear()
-    get_common_widget_visibility.cache_clear()
+@cache_graph.node("get_common_widget_visibility")
+def get_hidden_widget_names() -> frozenset:
+    """关闭显示的分组框中所有控件的名称"""
+    hidden_names = set()
+    for psg in get_common_widget_visibility():
+        if not bool(get_common_widget_visibility().get(psg, True)):
+            hidden_names |= widget.props_Collection[psg]
+    log_save(obs.LOG_INFO, f"关闭显示：{hidden_names}")
+    return frozenset(hidden_names)
 
 
 # ====================================================================================================================
@@ -9882,8 +12564,8 @@ class GlobalVariableOfData:
     script_settings: bool = None  # #脚本的所有设定属性集
     """脚本的所有设定属性集"""
 
-    logRecording: str = ""  # #日志记录的文本
-    """日志记录的文本"""
+    logRecorder: LogRecorder = LogRecorder()  # #日志记录器
+    """日志记录器，内存中保留最近的日志，并在后台写入日志文件夹"""
     networkConnectionStatus: bool = False  # #网络连接状态
     """网络连接状态"""
     sslVerification: bool = True
@@ -9916,10 +12598,16 @@ class GlobalVariableOfData:
     """弹幕运行标志"""
     danmu_run_status = False
     """弹幕运行状态"""
-    danmuLog: str = ''
-    """弹幕日志"""
+    danmuLogRecorder: Optional[LogRecorder] = None
+    """弹幕日志记录器"""
     danmuLogDir: Optional[Path] = None
     """日志文件文件夹"""
+    danmuBatchIntervalMs: int = 0
+    """弹幕转发服务器合并发送的间隔（毫秒），0 表示每条消息单独发送；只对声明支持数组帧的网页生效"""
+    danmuBatchSize: int = 50
+    """弹幕转发服务器一次合并发送的最大消息数"""
+    accountStatusWatching: bool = False
+    """是否正在等待后台账号检查完成"""
 
 
 class ExplanatoryDictionary:
@@ -10033,7 +12721,7 @@ def log_save(log_level, log_str: str) -> None:
     formatted: str = now.strftime("%Y/%m/%d %H:%M:%S")
     log_text: str = f"{script_version} 【{formatted}】【{ExplanatoryDictionary.log_type[log_level]}】 \t{log_str}"
     obs.script_log(log_level, log_str)
-    GlobalVariableOfData.logRecording += log_text + "\n"
+    GlobalVariableOfData.logRecorder.append(log_text)
 
 
 @dataclass
@@ -10078,9 +12766,10 @@ class Widget:
                 type_name = "未知类复选框"
                 return f"<CheckBoxP Name='{self.Name}' Number={self.Number} Type='{type_name}' Bool={self.Bool}>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.CheckBoxPs.CheckBoxP] = {}
             self._loading_order: List[Widget.CheckBoxPs.CheckBoxP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> CheckBoxP:
             """添加复选框控件"""
@@ -10090,6 +12779,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.CheckBoxPs.CheckBoxP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10103,6 +12794,8 @@ class Widget:
             """移除复选框控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10151,9 +12844,10 @@ class Widget:
                 type_name = "滑块数字框" if self.Type == "ThereIsASlider" else "普通数字框"
                 return f"<DigitalDisplayP Name='{self.Name}' Number={self.Number} Type='{type_name}' Min={self.Min} Max={self.Max}>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.DigitalDisplayPs.DigitalDisplayP] = {}
             self._loading_order: List[Widget.DigitalDisplayPs.DigitalDisplayP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> DigitalDisplayP:
             """添加数字框控件"""
@@ -10163,6 +12857,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.DigitalDisplayPs.DigitalDisplayP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10176,6 +12872,8 @@ class Widget:
             """移除数字框控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10231,9 +12929,10 @@ class Widget:
                     type_name = "只读信息文本"
                 return f"<TextBoxP Name='{self.Name}' Number={self.Number} Type='{type_name}' Text='{self.Text}'>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.TextBoxPs.TextBoxP] = {}
             self._loading_order: List[Widget.TextBoxPs.TextBoxP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> TextBoxP:
             """添加文本框控件"""
@@ -10243,6 +12942,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.TextBoxPs.TextBoxP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10256,6 +12957,8 @@ class Widget:
             """移除文本框控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10302,9 +13005,10 @@ class Widget:
                     type_name = "打开 URL 的按钮"
                 return f"<ButtonP Name='{self.Name}' Number={self.Number} Type='{type_name}' Callback={self.Callback is not None}>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.ButtonPs.ButtonP] = {}
             self._loading_order: List[Widget.ButtonPs.ButtonP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> ButtonP:
             """添加按钮控件"""
@@ -10314,6 +13018,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.ButtonPs.ButtonP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10327,6 +13033,8 @@ class Widget:
             """移除按钮控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10379,9 +13087,10 @@ class Widget:
                     type_name = "不可编辑。显示为单选按钮"
                 return f"<ComboBoxP Name='{self.Name}' Number={self.Number} Type='{type_name}' Text='{self.Text}'>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.ComboBoxPs.ComboBoxP] = {}
             self._loading_order: List[Widget.ComboBoxPs.ComboBoxP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> ComboBoxP:
             """添加组合框控件"""
@@ -10391,6 +13100,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.ComboBoxPs.ComboBoxP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10404,6 +13115,8 @@ class Widget:
             """移除组合框控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10454,9 +13167,10 @@ class Widget:
                     type_name = "文件夹对话框"
                 return f"<PathBoxP Name='{self.Name}' Number={self.Number} Type='{type_name}' Text='{self.Text}'>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._controls: Dict[str, Widget.PathBoxPs.PathBoxP] = {}
             self._loading_order: List[Widget.PathBoxPs.PathBoxP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> PathBoxP:
             """添加路径对话框控件"""
@@ -10466,6 +13180,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             control = Widget.PathBoxPs.PathBoxP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(control)
             self._controls[name] = control
             self._loading_order.append(control)
             setattr(self, name, control)
@@ -10479,6 +13195,8 @@ class Widget:
             """移除路径对话框控件"""
             if name in self._controls:
                 control = self._controls.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(control)
                 if hasattr(self, name):
                     delattr(self, name)
                 if control in self._loading_order:
@@ -10528,9 +13246,10 @@ class Widget:
                     type_name = "具有复选框、名称和内容的可选组"
                 return f"<GroupP Name='{self.Name}' Number={self.Number} Type='{type_name}'>"
 
-        def __init__(self):
+        def __init__(self, registry: Optional["Widget"] = None):
             self._groups: Dict[str, Widget.GroupPs.GroupP] = {}
             self._loading_order: List[Widget.GroupPs.GroupP] = []
+            self._registry = registry  # 登记控件索引的表单，None 表示不登记
 
         def add(self, name: str, **kwargs) -> GroupP:
             """添加分组框控件"""
@@ -10540,6 +13259,8 @@ class Widget:
             if "Name" not in kwargs:
                 kwargs["Name"] = name
             group = Widget.GroupPs.GroupP(**kwargs)
+            if self._registry is not None:
+                self._registry._register(group)
             self._groups[name] = group
             self._loading_order.append(group)
             setattr(self, name, group)
@@ -10553,6 +13274,8 @@ class Widget:
             """移除分组框控件"""
             if name in self._groups:
                 group = self._groups.pop(name)
+                if self._registry is not None:
+                    self._registry._unregister(group)
                 if hasattr(self, name):
                     delattr(self, name)
                 if group in self._loading_order:
@@ -10578,19 +13301,19 @@ class Widget:
 
     def __init__(self):
         """初始化表单管理器"""
-        self.CheckBox = Widget.CheckBoxPs()
+        self.CheckBox = Widget.CheckBoxPs(self)
         """复选框"""
-        self.DigitalDisplay = Widget.DigitalDisplayPs()
+        self.DigitalDisplay = Widget.DigitalDisplayPs(self)
         """数字框"""
-        self.TextBox = Widget.TextBoxPs()
+        self.TextBox = Widget.TextBoxPs(self)
         """文本框"""
-        self.Button = Widget.ButtonPs()
+        self.Button = Widget.ButtonPs(self)
         """按钮"""
-        self.ComboBox = Widget.ComboBoxPs()
+        self.ComboBox = Widget.ComboBoxPs(self)
         """组合框"""
-        self.PathBox = Widget.PathBoxPs()
+        self.PathBox = Widget.PathBoxPs(self)
         """路径对话框"""
-        self.Group = Widget.GroupPs()
+        self.Group = Widget.GroupPs(self)
         """分组框"""
         self.widget_Button_dict: Dict[str, Dict[str, Dict[str, str]]] = {}
         """按钮控件名称列表【属性集ps】【控件在自己类中的对象名】【"Name"|"Description"】【控件唯一名|控件用户层介绍】"""
@@ -10611,7 +13334,11 @@ class Widget:
         self.props_Collection: dict[str, set[str]] = {}
         """一个用于记录控件属性集名称的集合"""
         self._all_controls: List[Any] = []
-        self._loading_dict: Dict[int, Any] = {}
+        self._name_index: Dict[str, Any] = {}  # {控件唯一名: 控件}
+        self._number_index: Dict[int, Any] = {}  # {载入次序: 控件}
+        self._version = 0  # 每次登记或移除控件加一
+        self._sorted_controls: List[Any] = []  # 按载入次序排序的控件
+        self._sorted_version = -1  # _sorted_controls 对应的 _version
 
     @property
     def widget_dict_all(self) -> dict[
@@ -10631,7 +13358,7 @@ class Widget:
     @property
     def verification_number_controls(self):
         """和排序列表进行控件数量验证"""
-        return len(self.widget_list) == len(self.get_sorted_controls())
+        return len(self.widget_list) == len(self._number_index)
 
     def _update_all_controls(self):
         """更新所有控件列表"""
@@ -10645,69 +13372,75 @@ class Widget:
         self._all_controls.extend(self.PathBox)
         self._all_controls.extend(self.Group)
 
+    def _register(self, control: Any):
+        """登记新添加的控件，名称或载入次序与已登记的控件冲突时抛出 ValueError"""
+        existing_control = self._name_index.get(control.Name)
+        if existing_control is not None:
+            raise ValueError(
+                f"控件名称冲突: 控件 '{control.Name}' "
+                f"(类型: {type(control).__name__}, 载入次序: {control.Number}) 与 "
+                f"'{existing_control.Name}' "
+                f"(类型: {type(existing_control).__name__}, 载入次序: {existing_control.Number}) 重名"
+            )
+        existing_control = self._number_index.get(control.Number)
+        if existing_control is not None:
+            raise ValueError(
+                f"载入次序冲突: 控件 '{control.Name}' (类型: {type(control).__name__}) 和 "
+                f"'{existing_control.Name}' (类型: {type(existing_control).__name__}) "
+                f"使用相同的Number值 {control.Number}"
+            )
+        self._name_index[control.Name] = control
+        self._number_index[control.Number] = control
+        self._version += 1
+
+    def _unregister(self, control: Any):
+        """移除控件的登记"""
+        if self._name_index.get(control.Name) is control:
+            del self._name_index[control.Name]
+        if self._number_index.get(control.Number) is control:
+            del self._number_index[control.Number]
+        self._version += 1
+
     def loading(self):
-        """按载入次序排序所有控件"""
+        """按载入次序重新登记所有控件，用于添加控件后又直接修改了它的 Name 或 Number"""
         self._update_all_controls()
-        # 按Number属性排序
-        sorted_controls = sorted(self._all_controls, key=lambda c: c.Number)
-        name_dict = {}  # 用于检测名称冲突
-
-        # 创建载入次序字典
-        self._loading_dict = {}
-        for control in sorted_controls:
-            # 检查名称冲突
-            if control.Name in name_dict:
-                existing_control = name_dict[control.Name]
-                raise ValueError(
-                    f"控件名称冲突: 控件 '{control.Name}' "
-                    f"(类型: {type(control).__name__}, 载入次序: {control.Number}) 与 "
-                    f"'{existing_control.Name}' "
-                    f"(类型: {type(existing_control).__name__}, 载入次序: {existing_control.Number}) 重名"
-                )
-            else:
-                name_dict[control.Name] = control
-            if control.Number in self._loading_dict:
-                existing_control = self._loading_dict[control.Number]
-                raise ValueError(
-                    f"载入次序冲突: 控件 '{control.Name}' (类型: {type(control).__name__}) 和 "
-                    f"'{existing_control.Name}' (类型: {type(existing_control).__name__}) "
-                    f"使用相同的Number值 {control.Number}"
-                )
-            self._loading_dict[control.Number] = control
+        self._name_index = {}
+        self._number_index = {}
+        self._version += 1
+        for control in sorted(self._all_controls, key=lambda c: c.Number):
+            self._register(control)
 
     def get_control_by_number(self, number: int) -> Optional[Any]:
         """通过载入次序获取控件"""
-        self.loading()  # 确保已排序
-        return self._loading_dict.get(number)
+        return self._number_index.get(number)
 
     def get_control_by_name(self, name: str) -> Optional[Any]:
         """通过名称获取控件"""
-        # 在顶级控件中查找
-        for manager in [self.CheckBox, self.DigitalDisplay, self.TextBox,
-                        self.Button, self.ComboBox, self.PathBox, self.Group]:
-            if name in manager:
-                return manager.get(name)
-        return None
+        return self._name_index.get(name)
 
     def get_sorted_controls(self) -> List[Any]:
-        """获取按载入次序排序的所有控件列表"""
-        self.loading()
-        return list(self._loading_dict.values())
+        """获取按载入次序排序的所有控件列表，控件没有增减时使用上次排序的结果"""
+        if self._sorted_version != self._version:
+            self._sorted_controls = sorted(self._number_index.values(), key=lambda c: c.Number)
+            self._sorted_version = self._version
+        return list(self._sorted_controls)
 
     def clean(self):
         """清除所有控件并重置表单"""
         # 重置所有控件管理器
-        self.CheckBox = Widget.CheckBoxPs()
-        self.DigitalDisplay = Widget.DigitalDisplayPs()
-        self.TextBox = Widget.TextBoxPs()
-        self.Button = Widget.ButtonPs()
-        self.ComboBox = Widget.ComboBoxPs()
-        self.PathBox = Widget.PathBoxPs()
-        self.Group = Widget.GroupPs()
+        self.CheckBox = Widget.CheckBoxPs(self)
+        self.DigitalDisplay = Widget.DigitalDisplayPs(self)
+        self.TextBox = Widget.TextBoxPs(self)
+        self.Button = Widget.ButtonPs(self)
+        self.ComboBox = Widget.ComboBoxPs(self)
+        self.PathBox = Widget.PathBoxPs(self)
+        self.Group = Widget.GroupPs(self)
 
         # 清空内部存储
         self._all_controls = []
-        self._loading_dict = {}
+        self._name_index = {}
+        self._number_index = {}
+        self._version += 1
 
         return self  # 支持链式调用
 
@@ -10723,10 +13456,11 @@ class Widget:
                 log_save(obs.LOG_INFO, f"\t{Ps}")
                 for name in self.widget_dict_all[basic_types_controls][Ps]:
                     widget_types_controls = getattr(self, basic_types_controls)
-                    widget_types_controls.add(name)
+                    # 添加时就给出唯一名和载入次序，表单按这两项登记控件索引
+                    control_name = self.widget_dict_all[basic_types_controls][Ps][name]["Name"]
+                    obj = widget_types_controls.add(
+                        name, Name=control_name, Number=self.widget_list.index(control_name))
                     log_save(obs.LOG_INFO, f"\t\t添加 {name}")
-                    obj = getattr(widget_types_controls, name)
-                    obj.Name = self.widget_dict_all[basic_types_controls][Ps][name]["Name"]
                     self.props_Collection[Ps].add(obj.Name)
                     if obj.ControlType in ["DigitalDisplay", "TextBox", "Button", "ComboBox", "PathBox", "Group"]:
                         obj.Type = self.widget_dict_all[basic_types_controls][Ps][name]["Type"]
@@ -10744,107 +13478,983 @@ class Widget:
                     if obj.ControlType in ["PathBox"]:
                         obj.Filter = self.widget_dict_all[basic_types_controls][Ps][name]["Filter"]
                         obj.StartPath = self.widget_dict_all[basic_types_controls][Ps][name]["StartPath"]
-                    obj.Number = self.widget_list.index(obj.Name)
                     obj.ModifiedIs = self.widget_dict_all[basic_types_controls][Ps][name]["ModifiedIs"]
                     obj.Description = self.widget_dict_all[basic_types_controls][Ps][name]["Description"]
                     obj.Props = Ps
 
-    def __repr__(self) -> str:
-        """返回表单的可读表示形式"""
-        self._update_all_controls()
-        return f"<Widget controls={len(self._all_controls)}>"
+    def __repr__(self) -> str:
+        """返回表单的可读表示形式"""
+        return f"<Widget controls={len(self._name_index)}>"
+
+
+def trigger_frontend_event(event):
+    """
+    处理前端事件
+    Args:
+        event: obs前端事件
+
+    Returns:
+
+    """
+    log_save(obs.LOG_INFO, f"监测到obs前端事件: {ExplanatoryDictionary.information4frontend_event[event]}")
+
+    if GlobalVariableOfData.causeOfTheFrontDeskIncident:
+        log_save(obs.LOG_INFO, f"此次 事件 由【{GlobalVariableOfData.causeOfTheFrontDeskIncident}】引起")
+
+    if event == obs.OBS_FRONTEND_EVENT_STREAMING_STARTED:
+        if not GlobalVariableOfData.causeOfTheFrontDeskIncident:
+            log_save(obs.LOG_INFO, "此次 推流已开始 事件 由前台按钮【开始直播】引起")
+
+        if widget.CheckBox.linkStreamLiveStart.Bool:
+            if not get_live_status():
+                log_save(obs.LOG_INFO, "未开播，此次 推流已开始 事件 发送 直播申请")
+                ButtonFunction.button_function_start_live()
+            else:
+                log_save(obs.LOG_INFO, "正在直播，此次 推流已开始 事件 不发送 直播申请")
+        GlobalVariableOfData.causeOfTheFrontDeskIncident = ""
+    elif event == obs.OBS_FRONTEND_EVENT_STREAMING_STOPPED:
+        if not GlobalVariableOfData.causeOfTheFrontDeskIncident:
+            log_save(obs.LOG_INFO, "此次 推流已结束 事件 由前台按钮【停止直播】引起")
+
+        if widget.CheckBox.linkStreamLiveStop.Bool:
+            if GlobalVariableOfData.causeOfTheFrontDeskIncident == "开始直播并复制推流码":
+                log_save(obs.LOG_INFO, "此次 推流已结束 事件 不发送 撤销直播申请")
+            else:
+                if get_live_status():
+                    log_save(obs.LOG_INFO, "正在直播，此次 推流已结束 事件 发送 撤销直播申请")
+                    ButtonFunction.button_function_stop_live()
+        GlobalVariableOfData.causeOfTheFrontDeskIncident = ""
+    elif event == obs.OBS_FRONTEND_EVENT_FINISHED_LOADING:
+        # 尝试关闭弹幕web
+        if widget.CheckBox.resetDanmuSource.Bool:
+            log_save(obs.LOG_INFO, "此次 OBS 完成加载 事件 清除哔哩哔哩弹幕浏览器源")
+            ButtonFunction.button_function_remove_danmu_browser()
+    elif event == obs.OBS_FRONTEND_EVENT_SCRIPTING_SHUTDOWN:
+        if get_live_status():
+            log_save(obs.LOG_INFO, "正在直播，此次 脚本关闭中 事件 发送 撤销直播申请")
+            ButtonFunction.button_function_stop_live()
+    return True
+
+
+def property_modified(t: str) -> bool:
+    """
+    控件变动拉钩
+    Args:
+        t: 控件全局唯一名
+
+    Returns:
+
+    """
+    log_save(obs.LOG_INFO, f"检测到控件【{t}】变动事件")
+    if t == "bottom_button":  # 这个按钮用来标记脚本开始构造控件
+        log_save(obs.LOG_INFO, f"检测到脚本构造控件体开始，断开控件事件钩子")
+        GlobalVariableOfData.isScript_propertiesIs = True
+    if t == "top_button":
+        log_save(obs.LOG_INFO, f"检测到脚本构造控件体结束，启动控件事件钩子")
+        GlobalVariableOfData.isScript_propertiesIs = False
+    if not GlobalVariableOfData.isScript_propertiesIs:
+        if t == "room_parentArea_comboBox":
+            return ButtonFunction.button_function_start_parent_area()
+        elif t == "room_cover_fileDialogBox":
+            return ButtonFunction.button_function_update_room_cover()
+        elif t == "room_commonAreas_comboBox":
+            return ButtonFunction.button_function_true_live_room_common_area()
+        elif t == "live_bookings_day_digitalSlider":
+            return ButtonFunction.button_function_true_live_appointment_day()
+        elif t == "live_bookings_hour_digitalSlider":
+            return ButtonFunction.button_function_true_live_appointment_hour()
+        elif t == "live_bookings_minute_digitalSlider":
+            return ButtonFunction.button_function_true_live_appointment_minute()
+        elif t == "enter_room_display_checkBox":
+            return ButtonFunction.button_function_setting_danmu_data()
+        elif t in [group_info["Name"] for category in widget.widget_Group_dict.values() for group_info in
+                   category.values() if "Name" in group_info]:
+            return ButtonFunction.button_function_set_widget_visibility()
+        else:
+            log_save(obs.LOG_INFO, t)
+    else:
+        log_save(obs.LOG_INFO, f"控件事件钩子已断开")
+        return False
+    return False
+
+
+# 控件状态规则
+# 每条规则声明它读取的缓存函数名或外部状态名，script_defaults 只重新计算这些输入失效过的控件
+# 外部状态 "danmu_running" 对应 GlobalVariableOfData.danmu_running，改变它之后要 cache_graph.invalidate("danmu_running")
+# =================================================================================================================
+@widget_state.rule("Button.top", "get_hidden_widget_names")
+def top_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.startScript")
+def start_script_button_state(widget_specific_object):
+    # 脚本自动启动，不显示启动按钮
+    widget_specific_object.Visible = False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Group.account", "get_hidden_widget_names", "get_live_status", "get_common_widget_visibility")
+def account_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = not bool(get_live_status())
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.room", "get_hidden_widget_names", "get_common_widget_visibility")
+def room_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.liveBroadcastCover", "get_hidden_widget_names", "get_common_widget_visibility")
+def live_broadcast_cover_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.liveBroadcastTitle", "get_hidden_widget_names", "get_common_widget_visibility")
+def live_broadcast_title_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.liveBroadcastAnnouncement", "get_hidden_widget_names", "get_common_widget_visibility")
+def live_broadcast_announcement_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.liveStreamingSection", "get_hidden_widget_names", "get_common_widget_visibility")
+def live_streaming_section_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.live", "get_hidden_widget_names", "get_room_status", "get_common_widget_visibility")
+def live_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.bookingSend", "get_hidden_widget_names", "get_room_status", "get_common_widget_visibility")
+def booking_send_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.booking", "get_hidden_widget_names", "get_room_status", "get_common_widget_visibility")
+def booking_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.danmu", "get_hidden_widget_names", "default_user", "get_common_widget_visibility")
+def danmu_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.danmuDisplayOptions", "get_hidden_widget_names", "default_user",
+                   "get_common_widget_visibility")
+def danmu_display_options_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.danmuOnOff", "get_hidden_widget_names", "default_user", "get_common_widget_visibility")
+def danmu_on_off_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.danmuSend", "get_hidden_widget_names", "get_common_danmu_roomid_dict",
+                   "get_common_widget_visibility")
+def danmu_send_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.scriptSet", "get_hidden_widget_names", "get_common_widget_visibility")
+def script_set_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.scriptLiveSet", "get_hidden_widget_names", "get_common_widget_visibility")
+def script_live_set_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Group.scriptDanmuSet", "get_hidden_widget_names", "get_common_widget_visibility")
+def script_danmu_set_group_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
+
+
+@widget_state.rule("Button.setWidgetVisibility", "get_hidden_widget_names")
+def set_widget_visibility_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.bottom", "get_hidden_widget_names")
+def bottom_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+# 分组框【账号】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("TextBox.loginStatus", "get_hidden_widget_names", "default_user", "get_default_user_nickname")
+def login_status_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    if get_b_u_c_m().get_default_user_id():
+        widget_specific_object.Text = f'{get_default_user_nickname()} 已登录'
+    else:
+        widget_specific_object.Text = '未登录，请登录后点击【更新账号列表】'
+    if get_b_u_c_m().get_default_user_id():
+        widget_specific_object.InfoType = obs.OBS_TEXT_INFO_NORMAL
+    else:
+        widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
+
+
+@widget_state.rule("ComboBox.uid", "get_hidden_widget_names", "get_default_user_nickname", "default_user",
+                   "get_uid_nickname_dict")
+def uid_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    widget_specific_object.Text = get_default_user_nickname() if get_b_u_c_m().get_default_user_id() else '添加或选择一个账号登录'
+    widget_specific_object.Value = get_b_u_c_m().get_default_user_id() if get_b_u_c_m().get_default_user_id() else '-1'
+    widget_specific_object.Dictionary = get_uid_nickname_dict()
+
+
+@widget_state.rule("Button.login", "get_hidden_widget_names", "get_uid_nickname_dict")
+def login_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_uid_nickname_dict() != {
+        '添加或选择一个账号登录': '-1'} else False
+    widget_specific_object.Enabled = True if get_uid_nickname_dict() != {'添加或选择一个账号登录': '-1'} else False
+
+
+@widget_state.rule("Button.accountListUpdate", "get_hidden_widget_names")
+def account_list_update_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+
+
+@widget_state.rule("Button.qrAddAccount", "get_hidden_widget_names")
+def qr_add_account_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+
+
+@widget_state.rule("Button.qrPictureDisplay", "get_hidden_widget_names")
+def qr_picture_display_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.accountDelete", "get_hidden_widget_names", "get_uid_nickname_dict")
+def account_delete_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_uid_nickname_dict() != {
+        '添加或选择一个账号登录': '-1'} else False
+    widget_specific_object.Enabled = True if get_uid_nickname_dict() != {'添加或选择一个账号登录': '-1'} else False
+
+
+@widget_state.rule("Button.accountBackup", "get_hidden_widget_names")
+def account_backup_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.accountRestore", "get_hidden_widget_names")
+def account_restore_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.logout", "get_hidden_widget_names", "default_user")
+def logout_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+# 分组框【直播间】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("TextBox.roomStatus", "get_hidden_widget_names", "default_user", "get_room_status",
+                   "get_live_status", "get_room_id")
+def room_status_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True
+    widget_specific_object.Enabled = True
+    if get_b_u_c_m().get_default_user_id():
+        if get_room_status():
+            if get_live_status():
+                widget_specific_object.Text = f"{str(get_room_id())}直播中"
+            else:
+                widget_specific_object.Text = f"{str(get_room_id())}未开播"
+        else:
+            widget_specific_object.Text = "无直播间"
+    else:
+        widget_specific_object.Text = "未登录"
+    if get_b_u_c_m().get_default_user_id():
+        if get_room_status():
+            if get_live_status():
+                widget_specific_object.InfoType = obs.OBS_TEXT_INFO_NORMAL
+            else:
+                widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
+        else:
+            widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
+    else:
+        widget_specific_object.InfoType = obs.OBS_TEXT_INFO_ERROR
+
+
+@widget_state.rule("Button.roomOpened", "get_hidden_widget_names", "get_room_status", "default_user")
+def room_opened_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else (
+        not bool(get_room_status())) if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = (not bool(get_room_status())) if get_b_u_c_m().get_default_user_id() else False
+
+
+@widget_state.rule("Button.realNameAuthentication", "get_hidden_widget_names")
+def real_name_authentication_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("Button.roomCoverView", "get_hidden_widget_names", "get_room_status")
+def room_cover_view_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("PathBox.roomCover", "get_hidden_widget_names", "get_room_status", "room_info")
+def room_cover_path_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = ""
+
+
+@widget_state.rule("Button.roomCoverUpdate", "get_hidden_widget_names")
+def room_cover_update_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("ComboBox.roomCommonTitles", "get_hidden_widget_names", "get_room_status", "get_room_title",
+                   "get_common_title4number")
+def room_common_titles_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = get_room_title() if bool(get_room_status()) else ""
+    widget_specific_object.Value = "0"
+    widget_specific_object.Dictionary = get_common_title4number()
+
+
+@widget_state.rule("Button.roomTitleChange", "get_hidden_widget_names", "get_room_status")
+def room_title_change_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("TextBox.roomNews", "get_hidden_widget_names", "get_room_status", "get_room_news")
+def room_news_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = get_room_news() if bool(get_room_status()) else ""
+
+
+@widget_state.rule("Button.roomNewsChange", "get_hidden_widget_names", "get_room_status")
+def room_news_change_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("ComboBox.roomCommonAreas", "get_hidden_widget_names", "get_room_status", "get_common_areas",
+                   "get_common_area_id_dict_str4common_area_name_dict_str")
+def room_common_areas_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    if get_common_areas():
+        common_areas_text = list(get_common_area_id_dict_str4common_area_name_dict_str().keys())[0]
+        widget_specific_object.Text = common_areas_text
+    else:
+        widget_specific_object.Text = "无常用分区"
+    if get_common_areas():
+        common_areas_value = list(get_common_area_id_dict_str4common_area_name_dict_str().values())[0]
+        widget_specific_object.Value = common_areas_value
+    else:
+        widget_specific_object.Value = "-1"
+    widget_specific_object.Dictionary = get_common_area_id_dict_str4common_area_name_dict_str()
+
+
+@widget_state.rule("Button.roomCommonAreasTrue", "get_hidden_widget_names")
+def room_common_areas_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("ComboBox.roomParentArea", "get_hidden_widget_names", "get_room_status", "get_area",
+                   "get_parent_live_area_name4parent_live_area_id")
+def room_parent_area_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = str(get_area()["parent_area_name"]) if bool(get_area()) else "请选择一级分区"
+    widget_specific_object.Value = str(get_area()["parent_area_id"]) if bool(get_area()) else "-1"
+    widget_specific_object.Dictionary = get_parent_live_area_name4parent_live_area_id()
+
+
+@widget_state.rule("Button.roomParentAreaTrue", "get_hidden_widget_names")
+def room_parent_area_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("ComboBox.roomSubArea", "get_hidden_widget_names", "get_room_status", "get_area",
+                   "get_sub_live_area_name4sub_live_area_id")
+def room_sub_area_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = str(get_area()["area_name"]) if bool(get_area()) else "请确认一级分区"
+    widget_specific_object.Value = str(get_area()["area_id"]) if bool(get_area()) else "-1"
+    widget_specific_object.Dictionary = get_sub_live_area_name4sub_live_area_id()
+
+
+@widget_state.rule("Button.roomSubAreaTrue", "get_hidden_widget_names", "get_room_status")
+def room_sub_area_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("Button.bliveWebJump", "get_hidden_widget_names", "default_user")
+def blive_web_jump_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+# 分组框【直播】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("Button.liveFaceAuth", "get_hidden_widget_names", "get_room_status")
+def live_face_auth_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("ComboBox.liveStreamingPlatform", "get_hidden_widget_names", "get_room_status", "get_live_status")
+def live_streaming_platform_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = not bool(get_live_status())
+    if not bool(widget_specific_object.Text):
+        widget_specific_object.Text = "直播姬（pc）"
+    if not bool(widget_specific_object.Value):
+        widget_specific_object.Value = "pc_link"
+    widget_specific_object.Dictionary = {
+        "直播姬（pc）": "pc_link", "web在线直播": "web_link", "bililink": "android_link"
+    }
+
+
+@widget_state.rule("Button.liveStart", "get_hidden_widget_names", "get_live_status", "get_room_status")
+def live_start_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if (
+                (not get_live_status()) and get_room_status()) else False
+    widget_specific_object.Enabled = True if ((not get_live_status()) and get_room_status()) else False
+
+
+@widget_state.rule("Button.liveRtmpAddressCopy", "get_hidden_widget_names", "get_live_status", "get_room_status")
+def live_rtmp_address_copy_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if (
+                get_live_status() and get_room_status()) else False
+    widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
+
+
+@widget_state.rule("Button.liveRtmpCodeCopy", "get_hidden_widget_names", "get_live_status", "get_room_status")
+def live_rtmp_code_copy_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if (
+                get_live_status() and get_room_status()) else False
+    widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
+
+
+@widget_state.rule("Button.liveStop", "get_hidden_widget_names", "get_live_status", "get_room_status")
+def live_stop_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if (
+                get_live_status() and get_room_status()) else False
+    widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
+
+
+# 分组框【直播预约】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("DigitalDisplay.liveBookingsDay", "get_hidden_widget_names", "get_room_status", "reserve")
+def live_bookings_day_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Value = 0
+    widget_specific_object.Min = 0
+    widget_specific_object.Max = 180
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("Button.liveBookingsDayTrue", "get_hidden_widget_names")
+def live_bookings_day_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("DigitalDisplay.liveBookingsHour", "get_hidden_widget_names", "get_room_status", "reserve")
+def live_bookings_hour_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Value = 0
+    widget_specific_object.Min = 0
+    widget_specific_object.Max = 23
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("Button.liveBookingsHourTrue", "get_hidden_widget_names")
+def live_bookings_hour_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("DigitalDisplay.liveBookingsMinute", "get_hidden_widget_names", "get_room_status", "reserve")
+def live_bookings_minute_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Value = 6
+    widget_specific_object.Min = 5
+    widget_specific_object.Max = 59
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("Button.liveBookingsMinuteTrue", "get_hidden_widget_names")
+def live_bookings_minute_true_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
+
+@widget_state.rule("CheckBox.liveBookingsDynamic", "get_hidden_widget_names", "get_room_status", "reserve")
+def live_bookings_dynamic_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Bool = False
+
+
+@widget_state.rule("TextBox.liveBookingsTitle", "get_hidden_widget_names", "get_room_status", "reserve")
+def live_bookings_title_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = ""
+
+
+@widget_state.rule("Button.liveBookingsCreate", "get_hidden_widget_names", "get_room_status")
+def live_bookings_create_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+@widget_state.rule("ComboBox.liveBookings", "get_hidden_widget_names", "get_room_status", "default_user",
+                   "get_reserve_list", "get_reserve_name4reserve_sid")
+def live_bookings_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+    widget_specific_object.Text = "无直播预约"
+    if get_b_u_c_m().get_default_user_id():
+        if get_room_status():
+            if get_reserve_list():
+                for reserve in get_reserve_list():
+                    reserve_name = reserve['reserve_info']['name']
+                    reserve_time = datetime.fromtimestamp(reserve['reserve_info']['live_plan_start_time'])
+                    widget_specific_object.Text = f"{reserve_name}|{reserve_time}"
+            else:
+                widget_specific_object.Text = "无直播预约"
+        else:
+            widget_specific_object.Text = '⚠️无直播间'
+    else:
+        widget_specific_object.Text = "⚠️未登录账号"
+    if get_b_u_c_m().get_default_user_id():
+        if get_room_status():
+            if get_reserve_list():
+                for reserve in get_reserve_list():
+                    widget_specific_object.Value = str(reserve['reserve_info']['sid'])
+            else:
+                widget_specific_object.Value = "-1"
+        else:
+            widget_specific_object.Value = "-1"
+    else:
+        widget_specific_object.Value = "-1"
+    widget_specific_object.Dictionary = get_reserve_name4reserve_sid()
+
+
+@widget_state.rule("Button.liveBookingsCancel", "get_hidden_widget_names", "get_room_status")
+def live_bookings_cancel_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else bool(
+        get_room_status())
+    widget_specific_object.Enabled = bool(get_room_status())
+
+
+# 分组框【弹幕】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("DigitalDisplay.danmuNumCommentsClient", "get_hidden_widget_names", "default_user", "danmu_running",
+                   "get_common_danmu_setting")
+def danmu_num_comments_client_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    if get_b_u_c_m().get_default_user_id():
+        if not GlobalVariableOfData.danmu_running:
+            widget_specific_object.Enabled = True
+        else:
+            widget_specific_object.Enabled = False
+    else:
+        widget_specific_object.Enabled = False
+    widget_specific_object.Value = int(get_common_danmu_setting()[0]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 50
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuIntervalNumCommentsClient", "get_hidden_widget_names", "default_user",
+                   "danmu_running", "get_common_danmu_setting")
+def danmu_interval_num_comments_client_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    if get_b_u_c_m().get_default_user_id():
+        if not GlobalVariableOfData.danmu_running:
+            widget_specific_object.Enabled = True
+        else:
+            widget_specific_object.Enabled = False
+    else:
+        widget_specific_object.Enabled = False
+    widget_specific_object.Value = int(get_common_danmu_setting()[1]) if get_common_danmu_setting() else 0
+    widget_specific_object.Min = 0
+    widget_specific_object.Max = 3000
+    widget_specific_object.Step = 100
+
+
+@widget_state.rule("CheckBox.enterRoomDisplay", "get_hidden_widget_names", "default_user", "get_common_danmu_setting")
+def enter_room_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[2]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.medalDisplay", "get_hidden_widget_names", "default_user", "get_common_danmu_setting")
+def medal_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[3]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.medalOtherDisplay", "get_hidden_widget_names", "default_user", "get_common_danmu_setting")
+def medal_other_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[4]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.medalUnLightDisplay", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def medal_un_light_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[5]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.lineBreakDisplay", "get_hidden_widget_names", "default_user", "get_common_danmu_setting")
+def line_break_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[6]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.tagAdministratorDisplay", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def tag_administrator_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[7]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("CheckBox.timestampDisplay", "get_hidden_widget_names", "default_user", "get_common_danmu_setting")
+def timestamp_display_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_danmu_setting()[8]) if get_common_danmu_setting() else False
+
+
+@widget_state.rule("DigitalDisplay.danmuNumCacheEntries", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_num_cache_entries_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[9]) if get_common_danmu_setting() else 2
+    widget_specific_object.Min = 2
+    widget_specific_object.Max = 30
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuCacheDuration", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_cache_duration_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[10]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 10
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuFacePictureSize", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_face_picture_size_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[11]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 100
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuFanMedalTextSize", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_fan_medal_text_size_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[12]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 100
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuMessageTextSize", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_message_text_size_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[13]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 100
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("DigitalDisplay.danmuTimeTextSize", "get_hidden_widget_names", "default_user",
+                   "get_common_danmu_setting")
+def danmu_time_text_size_digital_display_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Value = int(get_common_danmu_setting()[14]) if get_common_danmu_setting() else 1
+    widget_specific_object.Min = 1
+    widget_specific_object.Max = 100
+    widget_specific_object.Step = 1
+
+
+@widget_state.rule("Button.settingDanmuData", "get_hidden_widget_names", "default_user")
+def setting_danmu_data_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+@widget_state.rule("TextBox.danmuWebCss", "get_hidden_widget_names", "default_user", "get_common_danmu_web_css")
+def danmu_web_css_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Text = get_common_danmu_web_css()
+
+
+@widget_state.rule("Button.applyDanmuCss", "get_hidden_widget_names", "default_user")
+def apply_danmu_css_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+@widget_state.rule("TextBox.danmuWssProt", "get_hidden_widget_names", "default_user", "danmu_running",
+                   "get_common_danmu_web_socket_server_prot")
+def danmu_wss_prot_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    if get_b_u_c_m().get_default_user_id():
+        if not GlobalVariableOfData.danmu_running:
+            widget_specific_object.Enabled = True
+        else:
+            widget_specific_object.Enabled = False
+    else:
+        widget_specific_object.Enabled = False
+    widget_specific_object.Text = get_common_danmu_web_socket_server_prot()
+
+
+@widget_state.rule("Button.confirmDanmuWssPort", "get_hidden_widget_names", "default_user")
+def confirm_danmu_wss_port_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+@widget_state.rule("ComboBox.danmuRoom", "get_hidden_widget_names", "default_user", "get_common_danmu_roomid_dict")
+def danmu_room_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Text = str(
+        list(get_common_danmu_roomid_dict().keys())[0]) if get_common_danmu_roomid_dict() else ""
+    widget_specific_object.Value = str(
+        list(get_common_danmu_roomid_dict().values())[0]) if get_common_danmu_roomid_dict() else ""
+    widget_specific_object.Dictionary = get_common_danmu_roomid_dict()
+
+
+@widget_state.rule("Button.addDanmuRoomid", "get_hidden_widget_names", "default_user")
+def add_danmu_roomid_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+@widget_state.rule("Button.delDanmuRoomid", "get_hidden_widget_names", "default_user")
+def del_danmu_roomid_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+
+
+# 分组框【弹幕启动】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("Button.startDanmuForwardingService", "get_hidden_widget_names")
+def start_danmu_forwarding_service_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
+
 
+@widget_state.rule("Button.addDanmuBrowser", "get_hidden_widget_names", "default_user")
+def add_danmu_browser_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
 
-def trigger_frontend_event(event):
-    """
-    处理前端事件
-    Args:
-        event: obs前端事件
 
-    Returns:
+@widget_state.rule("Button.startDanmu", "get_hidden_widget_names", "default_user")
+def start_danmu_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
 
-    """
-    log_save(obs.LOG_INFO, f"监测到obs前端事件: {ExplanatoryDictionary.information4frontend_event[event]}")
 
-    if GlobalVariableOfData.causeOfTheFrontDeskIncident:
-        log_save(obs.LOG_INFO, f"此次 事件 由【{GlobalVariableOfData.causeOfTheFrontDeskIncident}】引起")
+@widget_state.rule("Button.stopDanmuForwardingService", "get_hidden_widget_names", "default_user")
+def stop_danmu_forwarding_service_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
 
-    if event == obs.OBS_FRONTEND_EVENT_STREAMING_STARTED:
-        if not GlobalVariableOfData.causeOfTheFrontDeskIncident:
-            log_save(obs.LOG_INFO, "此次 推流已开始 事件 由前台按钮【开始直播】引起")
 
-        if widget.CheckBox.linkStreamLiveStart.Bool:
-            if not get_live_status():
-                log_save(obs.LOG_INFO, "未开播，此次 推流已开始 事件 发送 直播申请")
-                ButtonFunction.button_function_start_live()
-            else:
-                log_save(obs.LOG_INFO, "正在直播，此次 推流已开始 事件 不发送 直播申请")
-        GlobalVariableOfData.causeOfTheFrontDeskIncident = ""
-    elif event == obs.OBS_FRONTEND_EVENT_STREAMING_STOPPED:
-        if not GlobalVariableOfData.causeOfTheFrontDeskIncident:
-            log_save(obs.LOG_INFO, "此次 推流已结束 事件 由前台按钮【停止直播】引起")
+@widget_state.rule("Button.removeDanmuBrowser", "get_hidden_widget_names", "default_user")
+def remove_danmu_browser_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
 
-        if widget.CheckBox.linkStreamLiveStop.Bool:
-            if GlobalVariableOfData.causeOfTheFrontDeskIncident == "开始直播并复制推流码":
-                log_save(obs.LOG_INFO, "此次 推流已结束 事件 不发送 撤销直播申请")
-            else:
-                if get_live_status():
-                    log_save(obs.LOG_INFO, "正在直播，此次 推流已结束 事件 发送 撤销直播申请")
-                    ButtonFunction.button_function_stop_live()
-        GlobalVariableOfData.causeOfTheFrontDeskIncident = ""
-    elif event == obs.OBS_FRONTEND_EVENT_FINISHED_LOADING:
-        # 尝试关闭弹幕web
-        if widget.CheckBox.resetDanmuSource.Bool:
-            log_save(obs.LOG_INFO, "此次 OBS 完成加载 事件 清除哔哩哔哩弹幕浏览器源")
-            ButtonFunction.button_function_remove_danmu_browser()
-    elif event == obs.OBS_FRONTEND_EVENT_SCRIPTING_SHUTDOWN:
-        if get_live_status():
-            log_save(obs.LOG_INFO, "正在直播，此次 脚本关闭中 事件 发送 撤销直播申请")
-            ButtonFunction.button_function_stop_live()
-    clear_cache()
-    return True
 
+@widget_state.rule("Button.stopDanmu", "get_hidden_widget_names")
+def stop_danmu_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else False
+    widget_specific_object.Enabled = False
 
-def property_modified(t: str) -> bool:
-    """
-    控件变动拉钩
-    Args:
-        t: 控件全局唯一名
 
-    Returns:
+# 分组框【弹幕发送】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("ComboBox.danmuEmoticons", "get_hidden_widget_names", "get_common_danmu_roomid_dict",
+                   "get_common_danmu_emoticons")
+def danmu_emoticons_combo_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Text = ""
+    widget_specific_object.Value = ""
+    widget_specific_object.Dictionary = get_common_danmu_emoticons() if get_common_danmu_roomid_dict() else {}
+
+
+@widget_state.rule("Button.mergeEmoticons", "get_hidden_widget_names", "get_common_danmu_roomid_dict")
+def merge_emoticons_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
+
+
+@widget_state.rule("TextBox.danmuSendText", "get_hidden_widget_names", "get_common_danmu_roomid_dict")
+def danmu_send_text_text_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Text = ""
+
+
+@widget_state.rule("Button.danmuSend", "get_hidden_widget_names", "get_common_danmu_roomid_dict")
+def danmu_send_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
+
+
+# 分组框【脚本设置】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+# 分组框【直播设置】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("CheckBox.linkStreamLiveStart", "get_hidden_widget_names", "default_user",
+                   "get_common_script_setting")
+def link_stream_live_start_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_script_setting()[0]) if get_common_script_setting() else False
+
+
+@widget_state.rule("CheckBox.linkStreamLiveStop", "get_hidden_widget_names", "default_user",
+                   "get_common_script_setting")
+def link_stream_live_stop_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_script_setting()[1]) if get_common_script_setting() else False
+
+
+@widget_state.rule("CheckBox.autoFillStreamServer", "get_hidden_widget_names", "default_user",
+                   "get_common_script_setting")
+def auto_fill_stream_server_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_script_setting()[2]) if get_common_script_setting() else False
+
+
+# 分组框【弹幕设置】
+# -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+@widget_state.rule("CheckBox.resetDanmuSource", "get_hidden_widget_names", "default_user", "get_common_script_setting")
+def reset_danmu_source_check_box_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
+    widget_specific_object.Bool = bool(get_common_script_setting()[3]) if get_common_script_setting() else False
 
-    """
-    log_save(obs.LOG_INFO, f"检测到控件【{t}】变动事件")
-    if t == "bottom_button":  # 这个按钮用来标记脚本开始构造控件
-        log_save(obs.LOG_INFO, f"检测到脚本构造控件体开始，断开控件事件钩子")
-        GlobalVariableOfData.isScript_propertiesIs = True
-    if t == "top_button":
-        log_save(obs.LOG_INFO, f"检测到脚本构造控件体结束，启动控件事件钩子")
-        GlobalVariableOfData.isScript_propertiesIs = False
-    if not GlobalVariableOfData.isScript_propertiesIs:
-        if t == "room_parentArea_comboBox":
-            return ButtonFunction.button_function_start_parent_area()
-        elif t == "room_cover_fileDialogBox":
-            return ButtonFunction.button_function_update_room_cover()
-        elif t == "room_commonAreas_comboBox":
-            return ButtonFunction.button_function_true_live_room_common_area()
-        elif t == "live_bookings_day_digitalSlider":
-            return ButtonFunction.button_function_true_live_appointment_day()
-        elif t == "live_bookings_hour_digitalSlider":
-            return ButtonFunction.button_function_true_live_appointment_hour()
-        elif t == "live_bookings_minute_digitalSlider":
-            return ButtonFunction.button_function_true_live_appointment_minute()
-        elif t == "enter_room_display_checkBox":
-            return ButtonFunction.button_function_setting_danmu_data()
-        elif t in [group_info["Name"] for category in widget.widget_Group_dict.values() for group_info in
-                   category.values() if "Name" in group_info]:
-            return ButtonFunction.button_function_set_widget_visibility()
-        else:
-            log_save(obs.LOG_INFO, t)
-    else:
-        log_save(obs.LOG_INFO, f"控件事件钩子已断开")
-        return False
-    return False
+
+@widget_state.rule("Button.updateScriptSet", "get_hidden_widget_names", "get_common_danmu_roomid_dict")
+def update_script_set_button_state(widget_specific_object):
+    widget_specific_object.Visible = False if widget_specific_object.Name in get_hidden_widget_names() else True if get_common_danmu_roomid_dict() else False
+    widget_specific_object.Enabled = True
 
 
 # --- 设置默认值
@@ -10855,21 +14465,33 @@ def script_defaults(settings):  # 设置其默认值
     """
     # =================================================================================================================
     # 设置脚本属性=======================================================================================================
+    if settings is not GlobalVariableOfData.script_settings:
+        # OBS 传入新的设置对象（载入脚本、恢复默认值）时，所有控件都要重新计算
+        widget_state.reset()
     GlobalVariableOfData.script_settings = settings
 
     if not widget.verification_number_controls:
         return None
-    # 检查网络连接
-    network_connection_info = Tools.check_network_connection()
-    GlobalVariableOfData.networkConnectionStatus = network_connection_info["connected"]
+    rebuild_started_at = time.perf_counter()
+    compute_count = cache_graph.compute_count
+    # 读取后台监视器保存的网络连接状态，只在还没有检查结果时同步检查一次
+    network_health = get_n_h_m()
+    if network_health.checked_at is None:
+        network_health.check_now()
+    network_connection_info = network_health.network
+    GlobalVariableOfData.networkConnectionStatus = network_health.connected
     if GlobalVariableOfData.networkConnectionStatus:
-        log_save(obs.LOG_INFO, f"⭐检查网络连接: {network_connection_info['message']}⭐")
+        log_save(obs.LOG_INFO, f"⭐检查网络连接: {network_connection_info['message']}"
+                               f"（{network_health.age():.0f} 秒前）⭐")
     else:
         log_save(obs.LOG_ERROR, f"⚠️检查网络连接: {network_connection_info['message']}")
         log_save(obs.LOG_ERROR, f"❌{network_connection_info.get('error', '')}")
+        network_health.request_check()
         return None
-    ssl_verification_info = Tools.check_ssl_verification()
-    GlobalVariableOfData.sslVerification = ssl_verification_info['success']
+    ssl_verification_info = network_health.ssl
+    if GlobalVariableOfData.sslVerification != network_health.ssl_verified:
+        cache_graph.invalidate("ssl_verification")
+    GlobalVariableOfData.sslVerification = network_health.ssl_verified
     log_save(obs.LOG_DEBUG, f"🥓[SSL] {ssl_verification_info['message']}")
 
     # 设置控件属性参数
@@ -10882,6 +14504,7 @@ def script_defaults(settings):  # 设置其默认值
     log_save(obs.LOG_INFO, f"║║脚本临时文件夹路径：{GlobalVariableOfData.scriptsTempDir}")
     GlobalVariableOfData.scriptsLogDir = Path(GlobalVariableOfData.scriptsDataDirpath) / "log"
     os.makedirs(GlobalVariableOfData.scriptsLogDir, exist_ok=True)
+    GlobalVariableOfData.logRecorder.set_directory(GlobalVariableOfData.scriptsLogDir)
     log_save(obs.LOG_INFO, f"║║脚本日志文件夹路径：{GlobalVariableOfData.scriptsLogDir}")
     GlobalVariableOfData.danmuLogDir = Path(GlobalVariableOfData.scriptsDataDirpath) / "danmu"
     os.makedirs(GlobalVariableOfData.danmuLogDir, exist_ok=True)
@@ -10892,12 +14515,6 @@ def script_defaults(settings):  # 设置其默认值
 
     # =================================================================================================================
     # 设置属性集合=======================================================================================================
-    psg_unv_name = set()
-    for psg in get_common_widget_visibility():
-        if not bool(get_common_widget_visibility().get(psg, True)):
-            psg_unv_name |= widget.props_Collection[psg]
-    log_save(obs.LOG_INFO, f"关闭显示：{psg_unv_name}")
-
     if not GlobalVariableOfData.update_widget_for_props_dict:
         GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
     log_save(obs.LOG_INFO, f"║║💫更新属性集为{GlobalVariableOfData.update_widget_for_props_dict}的控件")
@@ -10913,750 +14530,11 @@ def script_defaults(settings):  # 设置其默认值
         update_widget_for_props_name |= GlobalVariableOfData.update_widget_for_props_dict[props_name]
     # =================================================================================================================
     # 设置控件属性=======================================================================================================
-    widget_specific_object = widget.Button.top
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Group.account
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = not bool(get_live_status())
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.room
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.liveBroadcastCover
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.liveBroadcastTitle
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.liveBroadcastAnnouncement
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.liveStreamingSection
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.live
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.bookingSend
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.booking
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.danmu
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.danmuDisplayOptions
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.danmuOnOff
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.danmuSend
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.scriptSet
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.scriptLiveSet
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Group.scriptDanmuSet
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Bool = bool(get_common_widget_visibility().get(widget_specific_object.GroupProps, True))
-
-    widget_specific_object = widget.Button.setWidgetVisibility
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.bottom
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    # 分组框【账号】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.TextBox.loginStatus
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        if get_b_u_c_m().get_default_user_id():
-            widget_specific_object.Text = f'{get_default_user_nickname()} 已登录'
-        else:
-            widget_specific_object.Text = '未登录，请登录后点击【更新账号列表】'
-        if get_b_u_c_m().get_default_user_id():
-            widget_specific_object.InfoType = obs.OBS_TEXT_INFO_NORMAL
-        else:
-            widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
-
-    widget_specific_object = widget.ComboBox.uid
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        widget_specific_object.Text = get_default_user_nickname() if get_b_u_c_m().get_default_user_id() else '添加或选择一个账号登录'
-        widget_specific_object.Value = get_b_u_c_m().get_default_user_id() if get_b_u_c_m().get_default_user_id() else '-1'
-        widget_specific_object.Dictionary = get_uid_nickname_dict()
-
-    widget_specific_object = widget.Button.login
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_uid_nickname_dict() != {
-            '添加或选择一个账号登录': '-1'} else False
-        widget_specific_object.Enabled = True if get_uid_nickname_dict() != {'添加或选择一个账号登录': '-1'} else False
-
-    widget_specific_object = widget.Button.accountListUpdate
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-
-    widget_specific_object = widget.Button.qrAddAccount
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-
-    widget_specific_object = widget.Button.qrPictureDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.accountDelete
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_uid_nickname_dict() != {
-            '添加或选择一个账号登录': '-1'} else False
-        widget_specific_object.Enabled = True if get_uid_nickname_dict() != {'添加或选择一个账号登录': '-1'} else False
-
-    widget_specific_object = widget.Button.accountBackup
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.accountRestore
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.logout
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    # 分组框【直播间】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.TextBox.roomStatus
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True
-        widget_specific_object.Enabled = True
-        if get_b_u_c_m().get_default_user_id():
-            if get_room_status():
-                if get_live_status():
-                    widget_specific_object.Text = f"{str(get_room_id())}直播中"
-                else:
-                    widget_specific_object.Text = f"{str(get_room_id())}未开播"
-            else:
-                widget_specific_object.Text = "无直播间"
-        else:
-            widget_specific_object.Text = "未登录"
-        if get_b_u_c_m().get_default_user_id():
-            if get_room_status():
-                if get_live_status():
-                    widget_specific_object.InfoType = obs.OBS_TEXT_INFO_NORMAL
-                else:
-                    widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
-            else:
-                widget_specific_object.InfoType = obs.OBS_TEXT_INFO_WARNING
-        else:
-            widget_specific_object.InfoType = obs.OBS_TEXT_INFO_ERROR
-
-    widget_specific_object = widget.Button.roomOpened
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else (
-            not bool(get_room_status())) if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = (not bool(get_room_status())) if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.realNameAuthentication
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.roomCoverView
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.PathBox.roomCover
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = ""
-
-    widget_specific_object = widget.Button.roomCoverUpdate
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.ComboBox.roomCommonTitles
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = get_room_title() if bool(get_room_status()) else ""
-        widget_specific_object.Value = "0"
-        widget_specific_object.Dictionary = get_common_title4number()
-
-    widget_specific_object = widget.Button.roomTitleChange
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.TextBox.roomNews
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = get_room_news() if bool(get_room_status()) else ""
-
-    widget_specific_object = widget.Button.roomNewsChange
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.ComboBox.roomCommonAreas
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        if get_common_areas():
-            common_areas_text = list(get_common_area_id_dict_str4common_area_name_dict_str().keys())[0]
-            widget_specific_object.Text = common_areas_text
-        else:
-            widget_specific_object.Text = "无常用分区"
-        if get_common_areas():
-            common_areas_value = list(get_common_area_id_dict_str4common_area_name_dict_str().values())[0]
-            widget_specific_object.Value = common_areas_value
-        else:
-            widget_specific_object.Value = "-1"
-        widget_specific_object.Dictionary = get_common_area_id_dict_str4common_area_name_dict_str()
-
-    widget_specific_object = widget.Button.roomCommonAreasTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.ComboBox.roomParentArea
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = str(get_area()["parent_area_name"]) if bool(get_area()) else "请选择一级分区"
-        widget_specific_object.Value = str(get_area()["parent_area_id"]) if bool(get_area()) else "-1"
-        widget_specific_object.Dictionary = get_parent_live_area_name4parent_live_area_id()
-
-    widget_specific_object = widget.Button.roomParentAreaTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.ComboBox.roomSubArea
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = str(get_area()["area_name"]) if bool(get_area()) else "请确认一级分区"
-        widget_specific_object.Value = str(get_area()["area_id"]) if bool(get_area()) else "-1"
-        widget_specific_object.Dictionary = get_sub_live_area_name4sub_live_area_id()
-
-    widget_specific_object = widget.Button.roomSubAreaTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.Button.bliveWebJump
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    # 分组框【直播】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.Button.liveFaceAuth
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.ComboBox.liveStreamingPlatform
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = not bool(get_live_status())
-        if not bool(widget_specific_object.Text):
-            widget_specific_object.Text = "直播姬（pc）"
-        if not bool(widget_specific_object.Value):
-            widget_specific_object.Value = "pc_link"
-        widget_specific_object.Dictionary = {
-            "直播姬（pc）": "pc_link", "web在线直播": "web_link", "bililink": "android_link"
-        }
-
-    widget_specific_object = widget.Button.liveStart
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if (
-                    (not get_live_status()) and get_room_status()) else False
-        widget_specific_object.Enabled = True if ((not get_live_status()) and get_room_status()) else False
-
-    widget_specific_object = widget.Button.liveRtmpAddressCopy
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if (
-                    get_live_status() and get_room_status()) else False
-        widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
-
-    widget_specific_object = widget.Button.liveRtmpCodeCopy
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if (
-                    get_live_status() and get_room_status()) else False
-        widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
-
-    widget_specific_object = widget.Button.liveStop
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if (
-                    get_live_status() and get_room_status()) else False
-        widget_specific_object.Enabled = True if (get_live_status() and get_room_status()) else False
-
-    # 分组框【直播预约】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.DigitalDisplay.liveBookingsDay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Value = 0
-        widget_specific_object.Min = 0
-        widget_specific_object.Max = 180
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.Button.liveBookingsDayTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.DigitalDisplay.liveBookingsHour
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Value = 0
-        widget_specific_object.Min = 0
-        widget_specific_object.Max = 23
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.Button.liveBookingsHourTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.DigitalDisplay.liveBookingsMinute
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Value = 6
-        widget_specific_object.Min = 5
-        widget_specific_object.Max = 59
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.Button.liveBookingsMinuteTrue
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.CheckBox.liveBookingsDynamic
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Bool = False
-
-    widget_specific_object = widget.TextBox.liveBookingsTitle
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = ""
-
-    widget_specific_object = widget.Button.liveBookingsCreate
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    widget_specific_object = widget.ComboBox.liveBookings
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-        widget_specific_object.Text = "无直播预约"
-        if get_b_u_c_m().get_default_user_id():
-            if get_room_status():
-                if get_reserve_list():
-                    for reserve in get_reserve_list():
-                        reserve_name = reserve['reserve_info']['name']
-                        reserve_time = datetime.fromtimestamp(reserve['reserve_info']['live_plan_start_time'])
-                        widget_specific_object.Text = f"{reserve_name}|{reserve_time}"
-                else:
-                    widget_specific_object.Text = "无直播预约"
-            else:
-                widget_specific_object.Text = '⚠️无直播间'
-        else:
-            widget_specific_object.Text = "⚠️未登录账号"
-        if get_b_u_c_m().get_default_user_id():
-            if get_room_status():
-                if get_reserve_list():
-                    for reserve in get_reserve_list():
-                        widget_specific_object.Value = str(reserve['reserve_info']['sid'])
-                else:
-                    widget_specific_object.Value = "-1"
-            else:
-                widget_specific_object.Value = "-1"
-        else:
-            widget_specific_object.Value = "-1"
-        widget_specific_object.Dictionary = get_reserve_name4reserve_sid()
-
-    widget_specific_object = widget.Button.liveBookingsCancel
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else bool(
-            get_room_status())
-        widget_specific_object.Enabled = bool(get_room_status())
-
-    # 分组框【弹幕】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.DigitalDisplay.danmuNumCommentsClient
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        if get_b_u_c_m().get_default_user_id():
-            if not GlobalVariableOfData.danmu_running:
-                widget_specific_object.Enabled = True
-            else:
-                widget_specific_object.Enabled = False
-        else:
-            widget_specific_object.Enabled = False
-        widget_specific_object.Value = int(get_common_danmu_setting()[0]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 50
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuIntervalNumCommentsClient
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        if get_b_u_c_m().get_default_user_id():
-            if not GlobalVariableOfData.danmu_running:
-                widget_specific_object.Enabled = True
-            else:
-                widget_specific_object.Enabled = False
-        else:
-            widget_specific_object.Enabled = False
-        widget_specific_object.Value = int(get_common_danmu_setting()[1]) if get_common_danmu_setting() else 0
-        widget_specific_object.Min = 0
-        widget_specific_object.Max = 3000
-        widget_specific_object.Step = 100
-
-    widget_specific_object = widget.CheckBox.enterRoomDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[2]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.medalDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[3]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.medalOtherDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[4]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.medalUnLightDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[5]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.lineBreakDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[6]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.tagAdministratorDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[7]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.CheckBox.timestampDisplay
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_danmu_setting()[8]) if get_common_danmu_setting() else False
-
-    widget_specific_object = widget.DigitalDisplay.danmuNumCacheEntries
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[9]) if get_common_danmu_setting() else 2
-        widget_specific_object.Min = 2
-        widget_specific_object.Max = 30
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuCacheDuration
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[10]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 10
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuFacePictureSize
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[11]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 100
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuFanMedalTextSize
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[12]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 100
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuMessageTextSize
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[13]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 100
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.DigitalDisplay.danmuTimeTextSize
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Value = int(get_common_danmu_setting()[14]) if get_common_danmu_setting() else 1
-        widget_specific_object.Min = 1
-        widget_specific_object.Max = 100
-        widget_specific_object.Step = 1
-
-    widget_specific_object = widget.Button.settingDanmuData
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.TextBox.danmuWebCss
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Text = get_common_danmu_web_css()
-
-    widget_specific_object = widget.Button.applyDanmuCss
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.TextBox.danmuWssProt
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        if get_b_u_c_m().get_default_user_id():
-            if not GlobalVariableOfData.danmu_running:
-                widget_specific_object.Enabled = True
-            else:
-                widget_specific_object.Enabled = False
-        else:
-            widget_specific_object.Enabled = False
-        widget_specific_object.Text = get_common_danmu_web_socket_server_prot()
-
-    widget_specific_object = widget.Button.confirmDanmuWssPort
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.ComboBox.danmuRoom
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Text = str(
-            list(get_common_danmu_roomid_dict().keys())[0]) if get_common_danmu_roomid_dict() else ""
-        widget_specific_object.Value = str(
-            list(get_common_danmu_roomid_dict().values())[0]) if get_common_danmu_roomid_dict() else ""
-        widget_specific_object.Dictionary = get_common_danmu_roomid_dict()
-
-    widget_specific_object = widget.Button.addDanmuRoomid
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.delDanmuRoomid
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    # 分组框【弹幕启动】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.Button.startDanmuForwardingService
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    widget_specific_object = widget.Button.addDanmuBrowser
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.startDanmu
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.stopDanmuForwardingService
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.removeDanmuBrowser
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-
-    widget_specific_object = widget.Button.stopDanmu
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else False
-        widget_specific_object.Enabled = False
-
-    # 分组框【弹幕发送】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.ComboBox.danmuEmoticons
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Text = ""
-        widget_specific_object.Value = ""
-        widget_specific_object.Dictionary = get_common_danmu_emoticons() if get_common_danmu_roomid_dict() else {}
-
-    widget_specific_object = widget.Button.mergeEmoticons
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
-
-    widget_specific_object = widget.TextBox.danmuSendText
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Text = ""
-
-    widget_specific_object = widget.Button.danmuSend
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True if get_common_danmu_roomid_dict() else False
-
-    # 分组框【脚本设置】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    # 分组框【直播设置】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.CheckBox.linkStreamLiveStart
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_script_setting()[0]) if get_common_script_setting() else False
-
-    widget_specific_object = widget.CheckBox.linkStreamLiveStop
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_script_setting()[1]) if get_common_script_setting() else False
-
-    widget_specific_object = widget.CheckBox.autoFillStreamServer
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_script_setting()[2]) if get_common_script_setting() else False
-
-    # 分组框【弹幕设置】
-    # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
-    widget_specific_object = widget.CheckBox.resetDanmuSource
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Enabled = True if get_b_u_c_m().get_default_user_id() else False
-        widget_specific_object.Bool = bool(get_common_script_setting()[3]) if get_common_script_setting() else False
-
-    widget_specific_object = widget.Button.updateScriptSet
-    if widget_specific_object.Name in update_widget_for_props_name:
-        widget_specific_object.Visible = False if widget_specific_object.Name in psg_unv_name else True if get_common_danmu_roomid_dict() else False
-        widget_specific_object.Enabled = True
-
-    clear_cache()
+    # 控件的规则见上方 widget_state.rule，只重新计算输入变化过的控件
+    evaluated = widget_state.render(widget, update_widget_for_props_name)
+    log_save(obs.LOG_INFO, f"控件数据刷新耗时 {(time.perf_counter() - rebuild_started_at) * 1000:.1f} ms，"
+                           f"重新计算 {evaluated}/{len(widget_state)} 个控件、"
+                           f"{cache_graph.compute_count - compute_count} 项缓存")
     return True
 
 
@@ -11831,6 +14709,8 @@ def script_properties():  # 建立控件
             obs.obs_property_set_modified_callback(w.Obj, lambda ps, p, st, name=w.Name: property_modified(name))
 
     GlobalVariableOfData.props_dict = props_dict
+    # 控件都是新建的，所有控件的状态都要推送
+    widget_state.mark_all(widget)
     # 更新UI界面数据#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*#*
     update_ui_interface_data()
     log_save(obs.LOG_INFO, f"╚{'═' * 20}构造控件体 结束{'═' * 20}╝")
@@ -11840,68 +14720,70 @@ def script_properties():  # 建立控件
 
 def update_ui_interface_data():
     """
-    更新UI界面数据
+    更新UI界面数据，只推送 script_defaults 重新计算过的控件
     Returns:
     """
-    for w in widget.get_sorted_controls():
-        if w.Props in GlobalVariableOfData.update_widget_for_props_dict:
-            if w.Name in GlobalVariableOfData.update_widget_for_props_dict[w.Props]:
-                if obs.obs_property_visible(w.Obj) != w.Visible:
-                    obs.obs_property_set_visible(w.Obj, w.Visible)
-                if obs.obs_property_enabled(w.Obj) != w.Enabled:
-                    obs.obs_property_set_enabled(w.Obj, w.Enabled)
-
-                if w.ControlType == "CheckBox":
-                    if obs.obs_data_get_bool(GlobalVariableOfData.script_settings, w.Name) != w.Bool:
-                        obs.obs_data_set_bool(GlobalVariableOfData.script_settings, w.Name, w.Bool)
-                elif w.ControlType == "DigitalDisplay":
-                    if w.Min != obs.obs_property_int_min(w.Obj) or w.Max != obs.obs_property_int_max(
-                            w.Obj) or w.Step != obs.obs_property_int_step(w.Obj):
-                        obs.obs_property_int_set_limits(w.Obj, w.Min, w.Max, w.Step)
-                    if obs.obs_data_get_int(GlobalVariableOfData.script_settings, w.Name) != w.Value:
-                        obs.obs_data_set_int(GlobalVariableOfData.script_settings, w.Name, w.Value)
-                elif w.ControlType == "TextBox":
-                    if w.Type == obs.OBS_TEXT_INFO:
-                        if obs.obs_property_text_info_type(w.Obj) != w.InfoType:
-                            obs.obs_property_text_set_info_type(w.Obj, w.InfoType)
-                    if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
-                        obs.obs_data_set_string(GlobalVariableOfData.script_settings, w.Name, w.Text)
-                elif w.ControlType == "Button":
-                    pass
-                elif w.ControlType == "ComboBox":
-                    combo_box_option_dictionary = {}
-                    for idx in range(obs.obs_property_list_item_count(w.Obj)):
-                        combo_box_option_dictionary_key = obs.obs_property_list_item_name(w.Obj, idx)
-                        combo_box_option_dictionary_value = obs.obs_property_list_item_string(w.Obj, idx)
-                        combo_box_option_dictionary[combo_box_option_dictionary_key] = combo_box_option_dictionary_value
-                    if w.Dictionary != combo_box_option_dictionary:
-                        obs.obs_property_list_clear(w.Obj)
-                        for dict_key in w.Dictionary:
-                            if dict_key != w.Text:
-                                obs.obs_property_list_add_string(
-                                    w.Obj, dict_key, w.Dictionary[dict_key]
-                                )
-                            else:
-                                obs.obs_property_list_insert_string(w.Obj, 0, w.Text, w.Value)
-                    if w.Type == obs.OBS_COMBO_TYPE_EDITABLE:
-                        if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
-                            obs.obs_data_set_string(
-                                GlobalVariableOfData.script_settings, w.Name, obs.obs_property_list_item_name(w.Obj, 0)
-                            )
-                    elif w.Type == obs.OBS_COMBO_TYPE_LIST:
-                        if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Value:
-                            obs.obs_data_set_string(
-                                GlobalVariableOfData.script_settings, w.Name,
-                                obs.obs_property_list_item_string(w.Obj, 0)
-                            )
-                elif w.ControlType == "PathBox":
-                    if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
-                        obs.obs_data_set_string(GlobalVariableOfData.script_settings, w.Name, w.Text)
-                elif w.ControlType == "Group":
-                    if w.Type == obs.OBS_GROUP_CHECKABLE:
-                        if obs.obs_data_get_bool(GlobalVariableOfData.script_settings, w.Name) != w.Bool:
-                            obs.obs_data_set_bool(GlobalVariableOfData.script_settings, w.Name, w.Bool)
-                        pass
+    push_started_at = time.perf_counter()
+    pending_controls = widget_state.take_pending()
+    for w in pending_controls:
+        if obs.obs_property_visible(w.Obj) != w.Visible:
+            obs.obs_property_set_visible(w.Obj, w.Visible)
+        if obs.obs_property_enabled(w.Obj) != w.Enabled:
+            obs.obs_property_set_enabled(w.Obj, w.Enabled)
+
+        if w.ControlType == "CheckBox":
+            if obs.obs_data_get_bool(GlobalVariableOfData.script_settings, w.Name) != w.Bool:
+                obs.obs_data_set_bool(GlobalVariableOfData.script_settings, w.Name, w.Bool)
+        elif w.ControlType == "DigitalDisplay":
+            if w.Min != obs.obs_property_int_min(w.Obj) or w.Max != obs.obs_property_int_max(
+                    w.Obj) or w.Step != obs.obs_property_int_step(w.Obj):
+                obs.obs_property_int_set_limits(w.Obj, w.Min, w.Max, w.Step)
+            if obs.obs_data_get_int(GlobalVariableOfData.script_settings, w.Name) != w.Value:
+                obs.obs_data_set_int(GlobalVariableOfData.script_settings, w.Name, w.Value)
+        elif w.ControlType == "TextBox":
+            if w.Type == obs.OBS_TEXT_INFO:
+                if obs.obs_property_text_info_type(w.Obj) != w.InfoType:
+                    obs.obs_property_text_set_info_type(w.Obj, w.InfoType)
+            if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
+                obs.obs_data_set_string(GlobalVariableOfData.script_settings, w.Name, w.Text)
+        elif w.ControlType == "Button":
+            pass
+        elif w.ControlType == "ComboBox":
+            combo_box_option_dictionary = {}
+            for idx in range(obs.obs_property_list_item_count(w.Obj)):
+                combo_box_option_dictionary_key = obs.obs_property_list_item_name(w.Obj, idx)
+                combo_box_option_dictionary_value = obs.obs_property_list_item_string(w.Obj, idx)
+                combo_box_option_dictionary[combo_box_option_dictionary_key] = combo_box_option_dictionary_value
+            if w.Dictionary != combo_box_option_dictionary:
+                obs.obs_property_list_clear(w.Obj)
+                for dict_key in w.Dictionary:
+                    if dict_key != w.Text:
+                        obs.obs_property_list_add_string(
+                            w.Obj, dict_key, w.Dictionary[dict_key]
+                        )
+                    else:
+                        obs.obs_property_list_insert_string(w.Obj, 0, w.Text, w.Value)
+            if w.Type == obs.OBS_COMBO_TYPE_EDITABLE:
+                if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
+                    obs.obs_data_set_string(
+                        GlobalVariableOfData.script_settings, w.Name, obs.obs_property_list_item_name(w.Obj, 0)
+                    )
+            elif w.Type == obs.OBS_COMBO_TYPE_LIST:
+                if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Value:
+                    obs.obs_data_set_string(
+                        GlobalVariableOfData.script_settings, w.Name,
+                        obs.obs_property_list_item_string(w.Obj, 0)
+                    )
+        elif w.ControlType == "PathBox":
+            if obs.obs_data_get_string(GlobalVariableOfData.script_settings, w.Name) != w.Text:
+                obs.obs_data_set_string(GlobalVariableOfData.script_settings, w.Name, w.Text)
+        elif w.ControlType == "Group":
+            if w.Type == obs.OBS_GROUP_CHECKABLE:
+                if obs.obs_data_get_bool(GlobalVariableOfData.script_settings, w.Name) != w.Bool:
+                    obs.obs_data_set_bool(GlobalVariableOfData.script_settings, w.Name, w.Bool)
+                pass
+    log_save(obs.LOG_INFO, f"推送 {len(pending_controls)} 个控件到界面，"
+                           f"耗时 {(time.perf_counter() - push_started_at) * 1000:.1f} ms")
     return True
 
 
@@ -11914,37 +14796,19 @@ def script_unload():
     log_save(obs.LOG_INFO, "│  停止监视obs事件  │")
     log_save(obs.LOG_INFO, "└——停止监视obs事件——┘")
     obs.obs_frontend_remove_event_callback(trigger_frontend_event)
+    AsyncApiClient.shutdown()
+    get_n_h_m().stop()
+    get_a_s_s().shutdown()
+    get_b_u_c_m().flush()
+    get_r_c().save()
     log_save(obs.LOG_INFO, "╔══已卸载: bilibili-live══╗")
     log_save(obs.LOG_INFO, "║  已卸载: bilibili-live  ║")
     log_save(obs.LOG_INFO, "╚══已卸载: bilibili-live══╝")
     # """保存日志文件"""
     log_save(obs.LOG_INFO, "==保存日志文件==")
     log_save(obs.LOG_INFO, f"{'═' * 120}\n")
-    # 创建日志目录路径对象
-    log_dir = Path(GlobalVariableOfData.scriptsLogDir)
-
-    # 生成新的日志文件名
-    new_log_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    new_log_path = log_dir / new_log_filename
-
-    # 写入新的日志文件
-    with open(new_log_path, "w", encoding="utf-8") as f:
-        f.write(str(GlobalVariableOfData.logRecording))
-
-    log_num_max = 100
-
-    # 获取所有.log文件并按修改时间排序（最新的在前）
-    log_files = sorted(
-        [f for f in log_dir.iterdir() if f.is_file() and f.suffix.lower() == '.log'],
-        key=lambda x: x.stat().st_mtime,
-        reverse=True
-    )
-
-    # 如果文件数量超过100，删除最旧的文件
-    if len(log_files) > log_num_max:
-        files_to_delete = log_files[log_num_max:]
-        for old_file in files_to_delete:
-            old_file.unlink()  # 删除文件
+    # 写入剩余的日志并关闭日志文件，日志文件的轮换和旧文件清理由记录器完成
+    GlobalVariableOfData.logRecorder.close()
 
 
 class ButtonFunction:
@@ -11959,7 +14823,8 @@ class ButtonFunction:
             settings = args[2]
         GlobalVariableOfData.script_loading_is = True
 
-        # 更新脚本控制台中的控件
+        # 更新脚本控制台中的控件，重新计算所有控件
+        widget_state.reset()
         GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
         log_save(obs.LOG_INFO, f"更新控件配置信息")
         script_defaults(GlobalVariableOfData.script_settings)
@@ -12001,7 +14866,7 @@ class ButtonFunction:
             log_save(obs.LOG_WARNING, f"登录过程异常: {str(e)}")
             raise RuntimeError("登录服务暂时不可用") from e
 
-        clear_cache()
+        cache_graph.invalidate("default_user")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
@@ -12030,6 +14895,10 @@ class ButtonFunction:
         }
         if widget.ComboBox.uid.Dictionary == {'添加或选择一个账号登录': '-1'}:
             GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
+        # 先显示上次的账号状态，所有账号在后台重新检查，完成后再刷新一次
+        cache_graph.invalidate("accounts")
+        if get_a_s_s().refresh([u["user_id"] for u in get_b_u_c_m().get_all_users()["data"]["users"]], force=True):
+            watch_account_status()
         log_save(obs.LOG_INFO, f"更新控件配置信息")
         script_defaults(GlobalVariableOfData.script_settings)
         # 更新脚本用户小部件
@@ -12116,6 +14985,7 @@ class ButtonFunction:
                                 log_save(obs.LOG_ERROR, "无法获取用户ID")
                                 return
                             all_users = [u["user_id"] for u in get_b_u_c_m().get_all_users()["data"]["users"]]
+                            get_a_s_s().forget(uid)
                             if str(uid) in all_users:
                                 get_b_u_c_m().update_user(cookies, False)
                             else:
@@ -12127,7 +14997,7 @@ class ButtonFunction:
                     else:
                         log_save(obs.LOG_INFO,
                                  f"扫码状态: {ExplanatoryDictionary.information4login_qr_return_code.get(new_code, '未知')}")
-                    clear_cache()
+                    cache_graph.invalidate("accounts", "default_user")
                     should_stop = True
                     return
 
@@ -12140,7 +15010,6 @@ class ButtonFunction:
 
         # 4. 启动定时器（每秒轮询一次）
         obs.timer_add(check_poll, 1000)
-        clear_cache()
         return True
 
     @staticmethod
@@ -12182,8 +15051,9 @@ class ButtonFunction:
         if get_b_u_c_m().get_default_user_id() == uid:
             get_b_u_c_m().clear_default_user()
         get_b_u_c_m().delete_user(uid)
+        get_a_s_s().forget(uid)
 
-        clear_cache()
+        cache_graph.invalidate("accounts", "default_user")
 
         # 更新脚本控制台中的控件
         if get_b_u_c_m().get_default_user_id() == uid:
@@ -12245,7 +15115,7 @@ class ButtonFunction:
         log_save(obs.LOG_INFO, f"即将登出的账号：{uid}")
         clear_default_user_result = get_b_u_c_m().clear_default_user()
         log_save(obs.LOG_INFO, f"{clear_default_user_result['message']}")
-        clear_cache()
+        cache_graph.invalidate("default_user")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = widget.props_Collection
@@ -12287,7 +15157,7 @@ class ButtonFunction:
             # 其他错误
             log_save(obs.LOG_INFO, f"开通直播间失败: {message} (代码: {code})")
 
-        clear_cache()
+        cache_graph.invalidate("room")
         return True
 
     @staticmethod
@@ -12310,8 +15180,6 @@ class ButtonFunction:
             qr['img'].show()
         else:
             log_save(obs.LOG_ERROR, f"未登录")
-
-        clear_cache()
         return False
 
     @staticmethod
@@ -12343,8 +15211,6 @@ class ButtonFunction:
         # log_save(obs.LOG_INFO, f"展示4:3图片")
         # log_save(obs.LOG_INFO, f"格式: {room_cover_pillow_img0403.format}，尺寸: {room_cover_pillow_img0403.size}")
         # room_cover_pillow_img0403.show()
-
-        clear_cache()
         return False
 
     @staticmethod
@@ -12407,7 +15273,7 @@ class ButtonFunction:
             log_save(obs.LOG_WARNING, "未获取到图片")
             return False
 
-        clear_cache()
+        cache_graph.invalidate("room_info")
         return True
 
     @staticmethod
@@ -12430,8 +15296,6 @@ class ButtonFunction:
             qr['img'].show()
         else:
             log_save(obs.LOG_ERROR, f"未登录")
-
-        clear_cache()
         return False
 
     @staticmethod
@@ -12461,7 +15325,7 @@ class ButtonFunction:
             return False
         get_c_d_m().add_data(get_b_u_c_m().get_default_user_id(), "title", room_title)
 
-        clear_cache()
+        cache_graph.invalidate("room_info", "common_titles")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -12511,7 +15375,7 @@ class ButtonFunction:
 
         widget.TextBox.roomNews.Text = room_news_textbox_t
 
-        clear_cache()
+        cache_graph.invalidate("room_news")
         return True
 
     @staticmethod
@@ -12599,8 +15463,6 @@ class ButtonFunction:
             widget.ComboBox.roomSubArea.Name,
             obs.obs_property_list_item_string(widget.ComboBox.roomSubArea.Obj, 0)
         )
-
-        clear_cache()
         return True
 
     @staticmethod
@@ -12632,6 +15494,8 @@ class ButtonFunction:
             log_save(obs.LOG_WARNING, f"直播间分区更改失败：{change_room_area_return['message']}")
             return False
 
+        cache_graph.invalidate("room_info")
+
         # 更改默认常用直播间分区
         common_areas_text = list(get_common_area_id_dict_str4common_area_name_dict_str().keys())[0]
         widget.ComboBox.roomCommonAreas.Text = common_areas_text
@@ -12646,8 +15510,6 @@ class ButtonFunction:
         widget.ComboBox.roomSubArea.Value = get_sub_live_area_name4sub_live_area_id()[str(get_area()["area_name"])]
         widget.ComboBox.roomSubArea.Dictionary = get_sub_live_area_name4sub_live_area_id()
 
-        clear_cache()
-
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
             "live_streaming_section_props": widget.props_Collection["live_streaming_section_props"],
@@ -12782,7 +15644,7 @@ class ButtonFunction:
         # 保存到配置文件
         obs.obs_frontend_save_streaming_service()
 
-        clear_cache()
+        cache_graph.invalidate("room")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -12817,8 +15679,6 @@ class ButtonFunction:
             log_save(obs.LOG_INFO, f"已将 直播服务器 复制到剪贴板")
         else:
             log_save(obs.LOG_ERROR, f"获取直播服务器失败：{stream_addr['error']}")
-
-        clear_cache()
         return True
 
     @staticmethod
@@ -12841,8 +15701,6 @@ class ButtonFunction:
         else:
             log_save(obs.LOG_ERROR, f"获取直播推流码失败：{stream_addr['message']}")
             return False
-
-        clear_cache()
         return True
 
     @staticmethod
@@ -12878,7 +15736,7 @@ class ButtonFunction:
             log_save(obs.LOG_ERROR, f"停播失败：【{stop_live['message']}】。")
             return False
 
-        clear_cache()
+        cache_graph.invalidate("room")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13024,7 +15882,7 @@ class ButtonFunction:
                 log_save(obs.LOG_ERROR, f"直播预约标题错误: 【{live_bookings_title}】")
             return False
 
-        clear_cache()
+        cache_graph.invalidate("reserve")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13063,7 +15921,7 @@ class ButtonFunction:
             log_save(obs.LOG_ERROR, f"取消直播预约失败: {cancel_reserve_return['error']}")
             return False
 
-        clear_cache()
+        cache_graph.invalidate("reserve")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13178,7 +16036,7 @@ class ButtonFunction:
         ])
         get_c_d_m().add_data(get_b_u_c_m().get_default_user_id(), "danmuSetting", setting, 1)
         log_save(obs.LOG_INFO, f"弹幕默认值更改：{setting}")
-        clear_cache()
+        cache_graph.invalidate("danmu_setting")
         return False
 
     @staticmethod
@@ -13198,7 +16056,7 @@ class ButtonFunction:
             1
         )
 
-        clear_cache()
+        cache_graph.invalidate("danmu_css")
         # -----------------------------------------------------------------------------------------------------------
         # 更新脚本控制台中的控件-----------------------------------------------------------------------------------------
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13229,7 +16087,7 @@ class ButtonFunction:
             return False
         get_c_d_m().add_data(get_b_u_c_m().get_default_user_id(), "danmuWssProt", server_prot, 1)
 
-        clear_cache()
+        cache_graph.invalidate("danmu_wss_port")
         # -----------------------------------------------------------------------------------------------------------
         # 更新脚本控制台中的控件-----------------------------------------------------------------------------------------
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13266,7 +16124,7 @@ class ButtonFunction:
         else:
             return False
 
-        clear_cache()
+        cache_graph.invalidate("danmu_roomid")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13304,7 +16162,7 @@ class ButtonFunction:
         log_save(obs.LOG_INFO,
                  str(get_c_d_m().remove_data(get_b_u_c_m().get_default_user_id(), "danmuRoomid", str(room))))
 
-        clear_cache()
+        cache_graph.invalidate("danmu_roomid")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {
@@ -13344,6 +16202,24 @@ class ButtonFunction:
                 'cookie': Tools.dict_to_cookie_string(get_b_u_c_m().get_user_cookies()['data'])
             }
 
+            def when_asset_ready(web_path: str, width: int, height: int):
+                """图片在后台加载完成后通知网页刷新引用它的元素"""
+                ws_server.publish({
+                    "type": "asset_ready",
+                    "src": web_path,
+                    "width": width,
+                    "height": height,
+                    "timestamp": time.time(),
+                })
+
+            asset_cache = DanmuAssetCache(GlobalVariableOfData.scriptsDataDirpath, url2pillow_image_headers,
+                                          on_ready=when_asset_ready)
+            """弹幕图片资源缓存，消息处理中不再同步下载和读取图片"""
+            own_big_expressions = get_common_danmu_own_big_expression()
+            """自定表情 {名称: 本地路径}"""
+            danmu_tokenizer = DanmuTokenizer(own_big_expressions)
+            """弹幕分词器，自定表情只在会话开始时登记一次"""
+
             def get_color_by_amount(amount):
                 """
                 根据金额获取对应的颜色信息
@@ -13457,14 +16333,8 @@ class ButtonFunction:
                 if GlobalVariableOfData.danmu_running:
                     return
                 log_save(obs.LOG_INFO, "关闭弹幕转发和弹幕")
-                # 创建日志目录路径对象
-                log_dir = Path(GlobalVariableOfData.danmuLogDir)
-                # 生成新的日志文件名
-                new_log_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-                new_log_path = log_dir / new_log_filename
-                # 写入新的日志文件
-                with open(new_log_path, "w", encoding="utf-8") as f:
-                    f.write(str(GlobalVariableOfData.danmuLog))
+                # 写入剩余的弹幕日志并关闭文件
+                GlobalVariableOfData.danmuLogRecorder.close()
                 ws_server.stop_server()
                 cdm.stop()
                 GlobalVariableOfData.danmu_run_status = False
@@ -13477,6 +16347,14 @@ class ButtonFunction:
                 log_save(obs.LOG_INFO, "所有弹幕连接已启动，等待停止信号...")
                 GlobalVariableOfData.danmu_run_status = 2
 
+            toast_tasks: Set[asyncio.Task] = set()
+            """正在处理的舰长消息任务，保存引用以免任务在完成前被回收"""
+
+            def when_toast_task_done(task: asyncio.Task):
+                toast_tasks.discard(task)
+                if not task.cancelled() and task.exception() is not None:
+                    log_save(obs.LOG_WARNING, f"舰长消息处理失败: {task.exception()!r}")
+
             def danmu_processing(content: dict):
                 """
 
@@ -13486,7 +16364,11 @@ class ButtonFunction:
                 Returns:
 
                 """
-                GlobalVariableOfData.danmuLog += f"{json.dumps(content, ensure_ascii=False)}\n"
+                GlobalVariableOfData.danmuLogRecorder.append(json.dumps(content, ensure_ascii=False))
+                if content['cmd'] in ("ROOM_CHANGE", "LIVE"):
+                    room_context.schedule_refresh()
+                elif content['cmd'] in ("USER_TOAST_MSG_V2", "GUARD_BUY"):
+                    guard_index.apply_event(content)
 
                 def LIVE():
                     # 直播开始 (LIVE)
@@ -13497,14 +16379,14 @@ class ButtonFunction:
                         live_platform = contentdata['live_platform']
 
                         # 转发到 WebSocket
-                        asyncio.create_task(ws_server.send_danmu_message({
+                        ws_server.publish({
                             "type": "live_start",
                             "messageData": f'🔴直播开始：房间{roomid} 平台[{live_platform}]',
                             "roomid": roomid,
                             "live_time": live_time,
                             "live_platform": live_platform,
                             "timestamp": live_time
-                        }))
+                        })
 
                 def DANMU_MSG():
                     user_name = ''  # 昵称
@@ -13554,35 +16436,19 @@ class ButtonFunction:
                     user_name = content_info[0][15]["user"]['base']["name"]
 
                     user_face_picture = f'./img/face/{re.split("/", content_info[0][15]["user"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(content_info[0][15]["user"]["base"]["face"],
-                                                        url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', ''))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', ''))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(content_info[0][15]["user"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
                     user_id = content_info[0][15]["user"]["uid"]
 
-                    if user_id in guard_dict:
+                    if user_id in guard_index:
                         identity_title = "member"  # 舰长
-                        privilege_level = guard_dict[user_id]
+                        privilege_level = guard_index[user_id]
                         fleet_title = {'1': '总督', '2': '提督', '3': '舰长'}[
                             str(privilege_level)]  # if is_medal_other_display:
                         fleet_badge = f'https://blc.huixinghao.cn/static/img/icons/guard-level-{privilege_level}.png'
-                    if user_id == get_b_a_g().get_room_base_info(int(widget.ComboBox.danmuRoom.Value))["data"]["uid"]:
+                    if room_context.is_owner(user_id):
                         identity_title = "owner"  # 房主
                     elif content_info[2][2]:
                         if widget.CheckBox.tagAdministratorDisplay.Bool:
@@ -13594,8 +16460,7 @@ class ButtonFunction:
                         # 检查点亮条件
                         light_ok = widget.CheckBox.medalUnLightDisplay.Bool or medal.get("is_light", False)
                         # 检查归属条件
-                        owner_ok = widget.CheckBox.medalOtherDisplay.Bool or medal.get("ruid") == \
-                                   get_b_a_g().get_room_base_info(int(widget.ComboBox.danmuRoom.Value))["data"]["uid"]
+                        owner_ok = widget.CheckBox.medalOtherDisplay.Bool or room_context.is_owner(medal.get("ruid"))
                         # 同时满足两个条件才显示
                         if light_ok and owner_ok:
                             fan_medal_name = medal["name"]
@@ -13614,16 +16479,7 @@ class ButtonFunction:
                             """粉丝勋章等级颜色"""
                             if fleet_title:
                                 fleet_badge_path = f"./img/fleet/{fleet_title}.png"
-                                if not os.path.exists(pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./', ''))):
-                                    pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./',
-                                                                                                           '')).parent.mkdir(
-                                        parents=True, exist_ok=True)
-                                    pillow_img = Tools.url2pillow_image(medal['guard_icon'], url2pillow_image_headers)[
-                                        "PilImg"]
-                                    pillow_img.save(pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./', '')))
+                                asset_cache.request(medal['guard_icon'], fleet_badge_path)
                                 fleet_badge = fleet_badge_path
                                 """舰长勋章图标url"""
 
@@ -13639,19 +16495,10 @@ class ButtonFunction:
                     """表情信息，没有时为‘{}’"""
                     if image_information != "{}":  # 大表情
                         image_information_path = f"./img/image_information/{image_information['emoticon_unique']}.png"
-                        if not os.path.exists(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / image_information_path.replace('./', ''))):
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / image_information_path.replace('./',
-                                                                                                                  '')).parent.mkdir(
-                                parents=True, exist_ok=True)
-                            pillow_img = Tools.url2pillow_image(image_information["url"], url2pillow_image_headers)[
-                                "PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / image_information_path.replace('./', '')))
-                        else:
-                            pillow_img = Image.open(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / image_information_path.replace('./', '')))
-                        image_information_path_width, image_information_path_height = pillow_img.size
+                        # 未缓存时先用表情信息中的尺寸占位，下载完成后由 asset_ready 消息更新
+                        image_information_path_width, image_information_path_height = asset_cache.request(
+                            image_information["url"], image_information_path) or (
+                            image_information.get("width", 120), image_information.get("height", 120))
                         message_data.append({
                             'type': 'image',
                             'alt': danmu_extra['content'],
@@ -13662,61 +16509,36 @@ class ButtonFunction:
                     else:
                         damu_text = content_info[1]
                         """弹幕文本"""
-                        pattern = r'(\[.*?\])'
-                        emoji_name_text_separation_list = re.split(pattern, damu_text)
-                        """分离的带‘[]’的表情名称和普通文本"""
-                        pattern = r'(' + '|'.join([re.escape(sep) for sep in
-                                                   list(get_common_danmu_own_big_expression().keys()) + list(
-                                                       danmu_extra['emots'] if danmu_extra['emots'] else [])]) + ')'
-                        emoji_text_own_separation_list = re.split(pattern, damu_text)
-                        for damu_split in emoji_text_own_separation_list:
-                            if not damu_split:
-                                continue
+                        for segment_type, damu_split in danmu_tokenizer.tokenize(damu_text, danmu_extra['emots']):
                             # emoji
-                            if danmu_extra['emots']:
-                                if damu_split in danmu_extra['emots']:
-                                    file_path = f"./img/emoji/{danmu_extra['emots'][damu_split]['emoticon_unique']}.png"
-                                    if not os.path.exists(pathlib.Path(
-                                            GlobalVariableOfData.scriptsDataDirpath / file_path.replace('./', ''))):
-                                        pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / file_path.replace('./',
-                                                                                                                 '')).parent.mkdir(
-                                            parents=True, exist_ok=True)
-                                        pillow_img = \
-                                            Tools.url2pillow_image(danmu_extra['emots'][damu_split]['url'],
-                                                                   url2pillow_image_headers)[
-                                                "PilImg"]
-                                        pillow_img.save(pathlib.Path(
-                                            GlobalVariableOfData.scriptsDataDirpath / file_path.replace('./', '')))
-                                    message_data.append({
-                                        'type': 'emoji',
-                                        'alt': damu_split,
-                                        'src': file_path
-                                    })
-                                    continue
+                            if segment_type == DanmuTokenizer.EMOJI:
+                                file_path = f"./img/emoji/{danmu_extra['emots'][damu_split]['emoticon_unique']}.png"
+                                asset_cache.request(danmu_extra['emots'][damu_split]['url'], file_path)
+                                message_data.append({
+                                    'type': 'emoji',
+                                    'alt': damu_split,
+                                    'src': file_path
+                                })
                             # 自定表情
-                            if get_common_danmu_own_big_expression():
-                                if damu_split in get_common_danmu_own_big_expression():
-                                    own_big_expression_path = Path(get_common_danmu_own_big_expression()[damu_split])
-                                    _own_big_expression_path = str(own_big_expression_path).replace('\\', '/')
-                                    img_path_in_web = f"./img/own/{re.split('/', _own_big_expression_path)[-1]}"
-                                    Path(GlobalVariableOfData.scriptsDataDirpath / img_path_in_web.replace('./',
-                                                                                                           '')).parent.mkdir(
-                                        parents=True, exist_ok=True)
-                                    img_c = Image.open(own_big_expression_path)
-                                    width, height = img_c.size
-                                    message_data.append({
-                                        'type': 'image',
-                                        'alt': damu_split,
-                                        'height': f'{height}px',
-                                        'width': f'{width}px',
-                                        'src': img_path_in_web
-                                    })
-                                    continue
+                            elif segment_type == DanmuTokenizer.IMAGE:
+                                own_big_expression_path = Path(own_big_expressions[damu_split])
+                                _own_big_expression_path = str(own_big_expression_path).replace('\\', '/')
+                                img_path_in_web = f"./img/own/{re.split('/', _own_big_expression_path)[-1]}"
+                                width, height = asset_cache.request_local(own_big_expression_path,
+                                                                          img_path_in_web) or (120, 120)
+                                message_data.append({
+                                    'type': 'image',
+                                    'alt': damu_split,
+                                    'height': f'{height}px',
+                                    'width': f'{width}px',
+                                    'src': img_path_in_web
+                                })
                             # 普通文本
-                            message_data.append({
-                                'type': 'text',
-                                'text': damu_split
-                            })
+                            else:
+                                message_data.append({
+                                    'type': 'text',
+                                    'text': damu_split
+                                })
 
                     timestamp = content_info[9]['ts']
 
@@ -13726,7 +16548,7 @@ class ButtonFunction:
                         is_fan_group = True
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "danmu",
                         "uName": user_name,
                         "facePicture": user_face_picture,
@@ -13759,7 +16581,7 @@ class ButtonFunction:
                         "wealth": f'[{content_info[16][0]}]' if content_info[16][0] else None,
                         "content": content_info[1],
                         "reply_to": f"{'@' if danmu_extra['reply_uname'] else None}{(danmu_extra['reply_uname'] if danmu_extra['reply_uname'] else None)}",
-                    }))
+                    })
 
                 def SUPER_CHAT_MESSAGE():
                     u_name = ""
@@ -13780,23 +16602,7 @@ class ButtonFunction:
                     u_id = content['data']['uid']
 
                     user_face_picture = f'./img/face/{re.split("/", content["data"]["uinfo"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(content["data"]["uinfo"]["base"]["face"],
-                                                        url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(content["data"]["uinfo"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
@@ -13829,7 +16635,7 @@ class ButtonFunction:
                         mfo = f"【{medal_info['medal_name']}|{medal_info['medal_level']}】"
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "super_chat",
                         "uName": u_name,
                         "uId": u_id,
@@ -13849,7 +16655,7 @@ class ButtonFunction:
                         "medal": mfo,
                         "message": message,
                         "duration": duration,
-                    }))
+                    })
 
                 def SUPER_CHAT_MESSAGE_JPN():
                     u_name = ""
@@ -13870,23 +16676,7 @@ class ButtonFunction:
                     u_id = content['data']['uid']
 
                     user_face_picture = f'./img/face/{re.split("/", content["data"]["uinfo"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(content["data"]["uinfo"]["base"]["face"],
-                                                        url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(content["data"]["uinfo"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
@@ -13920,7 +16710,7 @@ class ButtonFunction:
                         mfo = f"【{medal_info['medal_name']}|{medal_info['medal_level']}】"
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "super_chat_jpn",
                         "uName": u_name,
                         "uId": u_id,
@@ -13940,7 +16730,7 @@ class ButtonFunction:
                         "medal": mfo,
                         "message": message,
                         "duration": duration,
-                    }))
+                    })
 
                 def SEND_GIFT():
                     u_name = ""
@@ -13963,23 +16753,7 @@ class ButtonFunction:
                     u_id = contentdata['uid']
 
                     user_face_picture = f'./img/face/{re.split("/", contentdata["sender_uinfo"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(contentdata["sender_uinfo"]["base"]["face"],
-                                                        url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(contentdata["sender_uinfo"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
@@ -14033,7 +16807,7 @@ class ButtonFunction:
                         tfo += f"{contentdata['num']}个《{contentdata['batch_combo_send']['gift_name']}》\t{coin}"
                     else:
                         tfo += f"{contentdata['action']}{contentdata['num']}个《{contentdata['giftName']}》"
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "gift",
                         "uName": u_name,
                         "uId": u_id,
@@ -14055,9 +16829,9 @@ class ButtonFunction:
                         "gift_count": contentdata['num'],
                         "total_coin": contentdata['total_coin'],
                         "message": tfo
-                    }))
+                    })
 
-                def USER_TOAST_MSG_V2():
+                async def USER_TOAST_MSG_V2():
                     u_name = ""
                     u_id = ""
                     user_face_picture = ""
@@ -14074,43 +16848,20 @@ class ButtonFunction:
                     contentdata = content['data']
                     u_name = contentdata["sender_uinfo"]["base"]["name"]
                     u_id = contentdata["sender_uinfo"]["uid"]
-                    user_card = get_b_a_g().get_bilibili_user_card(u_id, True)["data"]
+                    user_card = (await async_b_a_g.get_bilibili_user_card(u_id, True))["data"]
                     user_face_picture = f'./img/face/{re.split("/", user_card["data"]["card"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(user_card["data"]["card"]["face"], url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(user_card["data"]["card"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
                     timestamp = content["send_time"]
                     message_data = contentdata["toast_msg"]
                     privilege_level = contentdata["guard_info"]["guard_level"]
-                    guard_dict[u_id] = privilege_level
                     identity_title = "member"  # 舰长
                     fleet_title = {'1': '总督', '2': '提督', '3': '舰长'}[str(privilege_level)]
                     if widget.CheckBox.medalOtherDisplay.Bool:
                         fleet_badge = f'https://blc.huixinghao.cn/static/img/icons/guard-level-{privilege_level}.png'
                     fleet_badge_path = f"./img/fleet/{fleet_title}.png"
-                    if not os.path.exists(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace("./", ''))):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace("./", '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        pillow_img = Tools.url2pillow_image(fleet_badge, url2pillow_image_headers)["PilImg"]
-                        pillow_img.save(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace("./", '')))
+                    asset_cache.request(fleet_badge, fleet_badge_path)
                     fleet_badge = fleet_badge_path
                     membership_header_color = contentdata["option"]["color"]
 
@@ -14127,7 +16878,7 @@ class ButtonFunction:
                     guard_name = guard_map.get(guard_level, f"未知({guard_level})")
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "user_toast_v2",
                         "uName": u_name,
                         "uId": u_id,
@@ -14149,7 +16900,7 @@ class ButtonFunction:
                         "price": price,
                         "unit": unit,
                         "message": f"{username}开通{guard_name} {price}元/{unit}",
-                    }))
+                    })
 
                 def POPULARITY_RED_POCKET_V2_NEW():
                     u_name = ""
@@ -14170,23 +16921,7 @@ class ButtonFunction:
                     u_id = content['data']['uid']
 
                     user_face_picture = f'./img/face/{re.split("/", content["data"]["sender_info"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(content["data"]["sender_info"]["base"]["face"],
-                                                        url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(content["data"]["sender_info"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
@@ -14218,7 +16953,7 @@ class ButtonFunction:
                     coin = contentdata['price'] / 10
                     tfo += f"\t{coin}"
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "red_pocket_v2",
                         "uName": u_name,
                         "uId": u_id,
@@ -14237,30 +16972,15 @@ class ButtonFunction:
                         "medal": mfo,
                         "wealth": wfo,
                         "action": contentdata['action'],
-                    }))
+                    })
 
                 def POPULARITY_RED_POCKET_V2_START():
                     u_name = content['data']['sender_name']
                     u_id = ""
                     user_face_picture = f'./img/face/{re.split("/", r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp")[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(
-                            r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp",
-                            url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(
+                        r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp",
+                        user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
                     timestamp = content['data']['start_time']
@@ -14271,7 +16991,7 @@ class ButtonFunction:
                     message_data = f"{content['data']['danmu']}"
                     show_only_header = False
                     countdown_duration = content['data']['last_time'] * 1000
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "red_pocket_v2_start",
                         "uName": u_name,
                         "uId": u_id,
@@ -14286,7 +17006,7 @@ class ButtonFunction:
                         "messageData": message_data,
                         "showOnlyHeader": show_only_header,
                         "countdownDuration": countdown_duration
-                    }))
+                    })
 
                 def POPULARITY_RED_POCKET_V2_WINNER_LIST():
                     user_name = ""  # 昵称
@@ -14333,25 +17053,9 @@ class ButtonFunction:
                     user_name = "红包中奖"
 
                     user_face_picture = f'./img/face/{re.split("/", r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp")[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(
-                            r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp",
-                            url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(pathlib.Path(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                            face_picture_x, face_picture_y = pillow_img.size
-
-                    else:
-                        pillow_img = Image.open(
-                            pathlib.Path(GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(
+                        r"https://s1.hdslb.com/bfs/live/2b3de8fa9eddebfab4d62b3a953a90da2a4ab81c.png@100w_100h.webp",
+                        user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
@@ -14446,7 +17150,7 @@ class ButtonFunction:
                     winners_str = "、".join(display_winners)
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "red_pocket_winners",
                         "uName": user_name,
                         "facePicture": user_face_picture,
@@ -14478,7 +17182,7 @@ class ButtonFunction:
                         "total_num": total_num,
                         "winners": winner_list,
                         "message": f"红包{lot_id} 共{total_num}个礼物 {winners_str}",
-                    }))
+                    })
 
                 def INTERACT_WORD_V2():
                     if not widget.CheckBox.enterRoomDisplay.Bool:
@@ -14530,36 +17234,19 @@ class ButtonFunction:
                     user_name = contentdata['uname']
 
                     user_face_picture = f'./img/face/{re.split("/", contentdata["uinfo"]["base"]["face"])[-1]}'
-                    if not os.path.exists(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')):
-                        pathlib.Path(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', '')).parent.mkdir(
-                            parents=True, exist_ok=True)
-                        # 先检查返回值
-                        result = Tools.url2pillow_image(contentdata["uinfo"]["base"]["face"], url2pillow_image_headers)
-                        if result and "PilImg" in result and result["PilImg"] is not None:
-                            pillow_img = result["PilImg"]
-                            pillow_img.save(
-                                GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', ''))
-                            face_picture_x, face_picture_y = pillow_img.size
-                        else:
-                            log_save(obs.LOG_INFO, f"无法获取图片: {result['Message']}")
-                    else:
-                        pillow_img = Image.open(
-                            GlobalVariableOfData.scriptsDataDirpath / user_face_picture.replace('./', ''))
-                        face_picture_x, face_picture_y = pillow_img.size
+                    asset_cache.request(contentdata["uinfo"]["base"]["face"], user_face_picture)
                     face_picture_x, face_picture_y = (widget.DigitalDisplay.danmuFacePictureSize.Value,
                                                       widget.DigitalDisplay.danmuFacePictureSize.Value)
 
                     user_id = contentdata["uinfo"]["uid"]
 
-                    if user_id in guard_dict:
+                    if user_id in guard_index:
                         identity_title = "member"  # 舰长
-                        privilege_level = guard_dict[user_id]
+                        privilege_level = guard_index[user_id]
                         fleet_title = {'1': '总督', '2': '提督', '3': '舰长'}[
                             str(privilege_level)]  # if is_medal_other_display:
                         #     fleet_badge = f'https://blc.huixinghao.cn/static/img/icons/guard-level-{privilege_level}.png'
-                    if user_id == get_b_a_g().get_room_base_info(int(widget.ComboBox.danmuRoom.Value))["data"]["uid"]:
+                    if room_context.is_owner(user_id):
                         identity_title = "owner"  # 房主
 
                     medal = contentdata["uinfo"]["medal"]
@@ -14567,8 +17254,7 @@ class ButtonFunction:
                         # 检查点亮条件
                         light_ok = widget.CheckBox.medalUnLightDisplay.Bool or medal.get("is_light", False)
                         # 检查归属条件
-                        owner_ok = widget.CheckBox.medalOtherDisplay.Bool or medal.get("ruid") == \
-                                   get_b_a_g().get_room_base_info(int(widget.ComboBox.danmuRoom.Value))["data"]["uid"]
+                        owner_ok = widget.CheckBox.medalOtherDisplay.Bool or room_context.is_owner(medal.get("ruid"))
                         # 同时满足两个条件才显示
                         if light_ok and owner_ok:
                             fan_medal_name = medal["name"]
@@ -14587,16 +17273,7 @@ class ButtonFunction:
                             """粉丝勋章等级颜色"""
                             if fleet_title:
                                 fleet_badge_path = f"./img/fleet/{fleet_title}.png"
-                                if not os.path.exists(pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./', ''))):
-                                    pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./',
-                                                                                                           '')).parent.mkdir(
-                                        parents=True, exist_ok=True)
-                                    pillow_img = Tools.url2pillow_image(medal['guard_icon'], url2pillow_image_headers)[
-                                        "PilImg"]
-                                    pillow_img.save(pathlib.Path(
-                                        GlobalVariableOfData.scriptsDataDirpath / fleet_badge_path.replace('./', '')))
+                                asset_cache.request(medal['guard_icon'], fleet_badge_path)
                                 fleet_badge = fleet_badge_path
                                 """舰长勋章图标url"""
 
@@ -14642,7 +17319,7 @@ class ButtonFunction:
                         is_fan_group = True
 
                     # 转发到 WebSocket
-                    asyncio.create_task(ws_server.send_danmu_message({
+                    ws_server.publish({
                         "type": "interact",
                         "uName": user_name,
                         "facePicture": user_face_picture,
@@ -14669,7 +17346,7 @@ class ButtonFunction:
                         "isFanGroup": is_fan_group,
                         "lineBreakDisplay": widget.CheckBox.lineBreakDisplay.Bool,
                         "isTimestampDisplay": widget.CheckBox.timestampDisplay.Bool,
-                    }))
+                    })
 
                 if content['cmd'] == "LIVE":
                     LIVE()
@@ -14687,7 +17364,9 @@ class ButtonFunction:
                     SEND_GIFT()
 
                 elif content['cmd'] == "USER_TOAST_MSG_V2":
-                    USER_TOAST_MSG_V2()
+                    toast_task = asyncio.create_task(USER_TOAST_MSG_V2())
+                    toast_tasks.add(toast_task)
+                    toast_task.add_done_callback(when_toast_task_done)
 
                 elif content['cmd'] == "POPULARITY_RED_POCKET_V2_NEW":
                     POPULARITY_RED_POCKET_V2_NEW()
@@ -14701,23 +17380,30 @@ class ButtonFunction:
                 elif content['cmd'] == "INTERACT_WORD_V2":
                     INTERACT_WORD_V2()
 
-            result = get_b_a_g().get_guard_list(
-                widget.ComboBox.danmuRoom.Value,
-                get_b_a_g().get_room_base_info(int(widget.ComboBox.danmuRoom.Value))["data"]["uid"],
-                page=1,
-                page_size=20,
-                typ=5,
-                include_total_list=True
-            )
-            guard_dict = {}
-            if result["success"]:
-                total_list = result["data"].get("total_list", [])
-                for guard in total_list:
-                    uid = guard["uinfo"]["uid"]
-                    guard_level = guard["uinfo"]["guard"]["level"]
-                    guard_dict[uid] = guard_level
-
-            ws_server = WebSocketServer(port=int(widget.TextBox.danmuWssProt.Text))
+            async_b_a_g = AsyncApiClient(get_b_a_g())
+            """不登录也能用的B站API的 asyncio 接口，消息处理中的请求不阻塞事件循环"""
+            room_context = DanmuRoomContext(int(widget.ComboBox.danmuRoom.Value), get_b_a_g().get_room_base_info)
+            """直播间上下文，主播 uid 只在这里和直播间变更时获取"""
+            if not await room_context.refresh_async():
+                log_save(obs.LOG_INFO, f"获取直播间 {room_context.room_id} 基本信息失败")
+
+            guard_index = GuardMembershipIndex(
+                widget.ComboBox.danmuRoom.Value, room_context.uid, get_b_a_g().get_guard_list,
+                Path(GlobalVariableOfData.scriptsCacheDir) / f"guard_{room_context.room_id}.json")
+            """大航海成员索引，先用上次保存的结果，完整列表在后台加载"""
+            log_save(obs.LOG_INFO, f"读取已保存的大航海成员 {guard_index.load_cache()} 人")
+
+            async def load_guard_index():
+                if await guard_index.refresh_async():
+                    log_save(obs.LOG_INFO, f"大航海成员加载完成: {len(guard_index)} 人")
+                else:
+                    log_save(obs.LOG_INFO, "大航海成员加载失败，继续使用已保存的结果")
+
+            asyncio.create_task(load_guard_index())
+
+            ws_server = WebSocketServer(port=int(widget.TextBox.danmuWssProt.Text),
+                                        batch_interval_ms=GlobalVariableOfData.danmuBatchIntervalMs,
+                                        batch_size=GlobalVariableOfData.danmuBatchSize)
             ws_server.registerCallback = lambda clients_count: log_save(obs.LOG_INFO,
                                                                         f"新的网页客户端连接，当前连接数: {clients_count}")
             ws_server.unregisterCallback = lambda clients_count: log_save(obs.LOG_INFO,
@@ -14727,6 +17413,8 @@ class ButtonFunction:
             ws_server.serverCancelledCallback = lambda: log_save(obs.LOG_INFO, "WebSocket 服务器被取消")
             ws_server.serverErroCallback = lambda ero: log_save(obs.LOG_INFO, f"WebSocket 服务器错误: {ero}")
             ws_server.serverStopCallback = lambda: log_save(obs.LOG_INFO, "WebSocket 服务器已停止")
+            ws_server.broadcastErrorCallback = lambda message, e: log_save(
+                obs.LOG_WARNING, f"弹幕消息转发失败: {e!r}, 消息类型: {message.get('type')}")
 
             cdm = get_b_l_d_m().connect_room(int(widget.ComboBox.danmuRoom.Value),
                                              widget.DigitalDisplay.danmuNumCommentsClient.Value,
@@ -14749,9 +17437,18 @@ class ButtonFunction:
             cdm.interruptStartupCallback = lambda: log_save(obs.LOG_INFO, "收到中断信号")
             cdm.abnormalStartupCallback = lambda e: log_save(obs.LOG_INFO, f"启动异常: {e}")
             cdm.stopConnectionCallback = lambda: log_save(obs.LOG_INFO, "正在停止弹幕连接...")
-            cdm.connectionStoppedCallback = lambda: log_save(obs.LOG_INFO, "弹幕连接已停止")
+
+            def when_danmu_stopped():
+                log_save(obs.LOG_INFO, "弹幕连接已停止")
+                for connection_id, stats in cdm.get_connection_stats().items():
+                    log_save(obs.LOG_INFO, f"弹幕连接 {connection_id}: 接收 {stats['received']} 条，"
+                                           f"最先到达 {stats['first']} 条，丢失 {stats['missed']} 条 "
+                                           f"({stats['loss_rate']:.1%})，平均落后 {stats['avg_lag_ms']:.1f}ms")
+
+            cdm.connectionStoppedCallback = when_danmu_stopped
 
             server_task = asyncio.create_task(ws_server.run_forever())
+            asyncio.create_task(asset_cache.warm_up("img/face", "img/fleet", "img/emoji", "img/image_information"))
             await asyncio.sleep(1)  # 等待服务器启动
             log_save(obs.LOG_INFO, "WebSocket 服务器启动完成")
             try:
@@ -14765,13 +17462,17 @@ class ButtonFunction:
             finally:
                 await ws_server.stop_server_async()
                 await cdm.stop_async()
+                await guard_index.save_async()
 
         if not GlobalVariableOfData.danmu_run_status:
             log_save(obs.LOG_INFO, f"开启弹幕服务")
             GlobalVariableOfData.danmu_running = True
+            cache_graph.invalidate("danmu_running")
 
             def start():
-                GlobalVariableOfData.danmuLog = ''
+                # 弹幕日志由用户自行管理，不删除旧文件
+                GlobalVariableOfData.danmuLogRecorder = LogRecorder(GlobalVariableOfData.danmuLogDir, capacity=200,
+                                                                    keep_files=None)
                 asyncio.run(show_danmu())
 
             show_danmu_thread = threading.Thread(target=start)
@@ -29869,6 +32570,10 @@ class ButtonFunction:
                             this.reconnectInterval = 3000; // 3秒
                             this.reconnectTimer = null;
                             this.maxMessages = 200; // 默认最大保留消息数
+                            this.pendingMessages = []; // 等待下一帧渲染的消息
+                            this.renderScheduled = false;
+                            this.itemFragment = null; // 渲染一批消息时先放入的文档片段
+                            this.tickerFragment = null;
 
                             // 页面加载后自动连接
                             setTimeout(() => {
@@ -29911,6 +32616,8 @@ class ButtonFunction:
 
                                 this.socket.onopen = () => {
                                     this.reconnectAttempts = 0;
+                                    // 声明支持数组帧，服务器开启批量发送时才会把多条消息合并发送
+                                    this.socket.send(JSON.stringify({type: 'hello', batch: true}));
                                     this.addDanmuMessage({
                                         type: 'system',
                                         messageData: '成功连接到弹幕服务器',
@@ -29921,7 +32628,8 @@ class ButtonFunction:
                                 this.socket.onmessage = (event) => {
                                     try {
                                         const data = JSON.parse(event.data);
-                                        this.handleMessage(data);
+                                        // 服务器批量发送时一帧是一个消息数组
+                                        this.enqueueMessages(Array.isArray(data) ? data : [data]);
                                     } catch (error) {
                                         console.error('解析消息错误:', error);
                                         this.addDanmuMessage({
@@ -29986,11 +32694,57 @@ class ButtonFunction:
                             }, delay);
                         }
 
+                        // 收到的消息先排队，在下一帧统一渲染
+                        enqueueMessages(messages) {
+                            this.pendingMessages.push(...messages);
+                            if (!this.renderScheduled) {
+                                this.renderScheduled = true;
+                                requestAnimationFrame(() => this.renderPendingMessages());
+                            }
+                        }
+
+                        // 把排队的消息一次性插入页面：先放进文档片段，再各插入一次，最后清理和滚动一次
+                        renderPendingMessages() {
+                            const messages = this.pendingMessages;
+                            this.pendingMessages = [];
+                            this.renderScheduled = false;
+                            this.itemFragment = document.createDocumentFragment();
+                            this.tickerFragment = document.createDocumentFragment();
+                            this.cleanupRequest = null;
+                            this.readyAssets = [];
+                            try {
+                                messages.forEach(data => {
+                                    try {
+                                        this.handleMessage(data);
+                                    } catch (error) {
+                                        console.error('渲染消息错误:', error, data);
+                                    }
+                                });
+                                itemContainer.appendChild(this.itemFragment);
+                                tickerContainer.appendChild(this.tickerFragment);
+                            } finally {
+                                this.itemFragment = null;
+                                this.tickerFragment = null;
+                            }
+                            // 图片可能属于这一批刚插入的消息
+                            this.readyAssets.forEach(data => this.refreshAsset(data));
+                            if (this.cleanupRequest) {
+                                this.cleanupOldMessages(this.cleanupRequest.maxCount);
+                            } else if (itemContainer.children.length > this.maxMessages * 1.2) {
+                                this.cleanupOldMessages();
+                            }
+                            this.scrollToBottom();
+                        }
+
                         handleMessage(data) {
                             // 根据消息类型处理
                             switch (data.type) {
-                                case 'cleanup': // 添加清理消息类型
-                                    this.cleanupOldMessages(data.maxCount);
+                                case 'cleanup': // 添加清理消息类型，插入这一批消息后执行
+                                    this.cleanupRequest = data;
+                                    break;
+
+                                case 'asset_ready': // 后台加载完成的图片，插入这一批消息后刷新
+                                    this.readyAssets.push(data);
                                     break;
 
                                 case 'user_toast_v2':
@@ -30011,10 +32765,6 @@ class ButtonFunction:
                                 case 'danmu':
                                 case 'system':
                                     this.addDanmuMessage(data);
-                                    // 每次添加新消息后检查是否超过限制
-                                    if (itemContainer.children.length > this.maxMessages * 1.2) {
-                                        this.cleanupOldMessages();
-                                    }
                                     break;
 
                                 default:
@@ -30022,6 +32772,22 @@ class ButtonFunction:
                             }
                         }
 
+                        // 图片加载完成后，重新加载页面中（消息列表、礼物横条等）还没有显示出来的同一图片
+                        refreshAsset(data) {
+                            // 按去掉查询参数的路径比较，之前刷新时加上的 ?t= 不影响匹配
+                            const assetPath = data.src.split('?')[0];
+                            document.querySelectorAll('img').forEach(img => {
+                                if ((img.getAttribute('src') || '').split('?')[0] !== assetPath) return;
+                                const frame = img.parentElement;
+                                if (frame && frame.classList.contains('content-img')) {
+                                    frame.style.width = `${data.width}px`;
+                                }
+                                if (!img.complete || !img.naturalWidth) {
+                                    img.src = `${assetPath}?t=${Date.now()}`;
+                                }
+                            });
+                        }
+
                         // 弹幕消息
                         addDanmuMessage(data) {
                             const time = new Date(data.timestamp * 1000).toLocaleTimeString();
@@ -30080,7 +32846,7 @@ class ButtonFunction:
                                     console.log('消息:', danmuMessageInfo);
                                     break;
                             }
-                            itemContainer.appendChild(textMessage);
+                            (this.itemFragment || itemContainer).appendChild(textMessage);
                             this.scrollToBottom();
                         }
 
@@ -30113,8 +32879,8 @@ class ButtonFunction:
                                     }
                                     console.log('礼物消息:', giftMessageInfo);
                                     // 创建付费消息
-                                    itemContainer.appendChild(chatBuilder.createPaidMessage(giftMessageInfo));
-                                    tickerContainer.appendChild(manager.createTicker(giftMessageInfo).getElement());
+                                    (this.itemFragment || itemContainer).appendChild(chatBuilder.createPaidMessage(giftMessageInfo));
+                                    (this.tickerFragment || tickerContainer).appendChild(manager.createTicker(giftMessageInfo).getElement());
                                     break;
                             }
                             this.scrollToBottom();
@@ -30146,11 +32912,12 @@ class ButtonFunction:
                                     console.log('舰长消息:', membershipMessageInfo);
                                     break;
                             }
-                            itemContainer.appendChild(membershipMessage);
+                            (this.itemFragment || itemContainer).appendChild(membershipMessage);
                             this.scrollToBottom();
                         }
 
                         scrollToBottom() {
+                            if (this.itemFragment) return; // 批量渲染时在插入页面后统一滚动
                             scrollableContainer.scrollTop = scrollableContainer.scrollHeight;
                         }
                     }
@@ -30247,6 +33014,7 @@ class ButtonFunction:
         # 停止弹幕转发-------------------------------------------------------------------------------------------------
         if GlobalVariableOfData.danmu_run_status == 2:
             GlobalVariableOfData.danmu_running = False
+            cache_graph.invalidate("danmu_running")
             log_save(obs.LOG_INFO, "尝试关闭弹幕服务")
         elif GlobalVariableOfData.danmu_run_status == 1:
             log_save(obs.LOG_INFO, "弹幕服务关闭失败，弹幕服务正在启动中")
@@ -30471,7 +33239,6 @@ class ButtonFunction:
                         return False
                 else:
                     log_save(obs.LOG_INFO, f"{send_danmaku_return['message']}{send_danmaku_return['error']}")
-            clear_cache()
 
         ds = threading.Thread(target=run)
         ds.daemon = True
@@ -30514,7 +33281,7 @@ class ButtonFunction:
         ])
         get_c_d_m().add_data("system", "scriptSetting", setting, 1)
         log_save(obs.LOG_INFO, f"弹幕默认值更改：{setting}")
-        clear_cache()
+        cache_graph.invalidate("script_setting")
         return False
 
     @staticmethod
@@ -30538,7 +33305,7 @@ class ButtonFunction:
                           key in widget_visibility_old_dict and widget_visibility_dict[key] !=
                           widget_visibility_old_dict[key]]
 
-        clear_cache()
+        cache_graph.invalidate("widget_visibility")
 
         # 更新脚本控制台中的控件
         GlobalVariableOfData.update_widget_for_props_dict = {}
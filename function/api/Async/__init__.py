@@ -0,0 +1,76 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class AsyncApiClient:
+    """
+    B站 API 客户端的 asyncio 接口
+
+    包装 BilibiliApiGeneric / BilibiliSpecialApiManager / BilibiliCSRFAuthenticator / WbiSigna 等同步客户端：
+    公开方法调用后返回协程，请求在 API 专用线程池中通过共享长连接池发出，返回值仍是原来的结果字典。
+    事件循环不会被网络请求阻塞，多个调用可以用 asyncio.gather 并发执行。
+    """
+
+    MAX_WORKERS = 8
+    """API 专用线程池的线程数，也是同时进行的请求数上限"""
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, client: Any):
+        """
+        Args:
+            client: 同步 API 客户端实例，如 BilibiliApiGeneric(headers)
+        """
+        self.client = client
+        """被包装的同步客户端"""
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """所有异步客户端共用的 API 线程池，第一次调用时创建"""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix="bili-api")
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """关闭 API 线程池，不等待正在进行的请求"""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    async def call(self, method: Callable[..., Dict[str, Any]], *args, **kwargs) -> Dict[str, Any]:
+        """
+        在 API 线程池中执行一个同步方法
+        Args:
+            method: 同步客户端的方法
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            方法的返回值
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor(), functools.partial(method, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.call(attr, *args, **kwargs)
+
+        # 缓存生成的协程函数，下次直接命中实例属性
+        setattr(self, name, method)
+        return method
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.client!r})"
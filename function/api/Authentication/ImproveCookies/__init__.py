@@ -1,13 +1,17 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import requests
 
+from function.tools.HttpSessionPool import HttpSessionPool
+
 
 class ImproveCookies:
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """完善浏览器headers"""
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
 
     def fetch_buvid3_and_bnut(self) -> Dict[str, Any]:
         """
@@ -22,7 +26,7 @@ class ImproveCookies:
             - status_code: HTTP状态码（如果有）
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 url='https://www.bilibili.com/',
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -107,7 +111,7 @@ class ImproveCookies:
         """
         try:
             # 发送API请求获取buvid3
-            response = requests.get(
+            response = self.session.get(
                 url='https://api.bilibili.com/x/web-frontend/getbuvid',
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -200,7 +204,7 @@ class ImproveCookies:
         """
         try:
             # 发送API请求获取buvid信息
-            response = requests.get(
+            response = self.session.get(
                 url="https://api.bilibili.com/x/frontend/finger/spi",
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -1,23 +1,28 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import requests
 
+from function.tools.HttpSessionPool import HttpSessionPool
+
 
 class BilibiliLogInRegister:
     """
     B站登录注册相关API
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """
         初始化登录注册管理器
 
         Args:
             headers: 请求头字典
             verify_ssl: 是否验证SSL证书
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
         """
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
 
     def generate(self) -> Dict[str, Any]:
         """
@@ -36,7 +41,7 @@ class BilibiliLogInRegister:
             api = 'https://passport.bilibili.com/x/passport-login/web/qrcode/generate'
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -179,7 +184,7 @@ class BilibiliLogInRegister:
             api = f'https://passport.bilibili.com/x/passport-login/web/qrcode/poll?qrcode_key={qrcode_key}'
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 verify=self.verify_ssl,
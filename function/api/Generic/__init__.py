@@ -2,16 +2,26 @@ from typing import Dict, Any, Union, Optional, List
 
 import requests
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
+from function.tools.HttpSessionPool import HttpSessionPool
+from function.tools.ResponseCache import ResponseCache
+
 
 class BilibiliApiGeneric:
     """
     不登录也能用的B站API
     """
 
-    def __init__(self, headers, verify_ssl: bool = True):
+    def __init__(self, headers, verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """只读接口的响应缓存，设为 None 时每次都请求"""
 
+    @ResponseCache.cached("area_obj_list")
     def get_area_obj_list(self) -> Dict[str, Any]:
         """
         获取B站直播分区信息
@@ -29,7 +39,7 @@ class BilibiliApiGeneric:
             api_url = "https://api.live.bilibili.com/room/v1/Area/getList"
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 timeout=10,
@@ -115,6 +125,7 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
+    @ResponseCache.cached("bilibili_user_card")
     def get_bilibili_user_card(self, mid: Union[int, str], photo: bool = False) -> Dict[str, Any]:
         """
         获取Bilibili用户名片信息
@@ -153,7 +164,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送GET请求
-            response = requests.get(
+            response = self.session.get(
                 url,
                 params=params,
                 headers=self.headers,
@@ -293,7 +304,7 @@ class BilibiliApiGeneric:
                 params["typ"] = typ
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -411,22 +422,23 @@ class BilibiliApiGeneric:
             }
 
     def _get_complete_guard_list(self, roomid: Union[int, str], ruid: Union[int, str],
-                                 typ: Optional[int] = None) -> List[Dict[str, Any]]:
+                                 typ: Optional[int] = None, max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的大航海成员列表（内部方法）
 
+        第一页确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             roomid: 直播间号
             ruid: 主播UID
             typ: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的大航海成员列表
         """
-        complete_list = []
-        page = 1
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "roomid": str(roomid),
@@ -438,43 +450,53 @@ class BilibiliApiGeneric:
             if typ in [3, 4, 5]:
                 params["typ"] = typ
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
-
-                if response.status_code != 200:
-                    break
+            # 发送API请求
+            response = self.session.get(
+                "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
 
-                result = response.json()
-                if result.get("code") != 0:
-                    break
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
 
-                data = result["data"]
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
 
-                # 如果是第一页，包含top3
-                if page == 1:
-                    complete_list.extend(data.get("top3", []))
+            return result["data"]
 
-                # 添加当前页列表
-                current_list = data.get("list", [])
-                complete_list.extend(current_list)
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
 
-                # 检查是否还有更多页
-                info = data.get("info", {})
-                total_pages = info.get("page", 0)
-                if page >= total_pages or not current_list:
-                    break
+        # 第一页包含top3
+        complete_list = first_page.get("top3", []) + first_page.get("list", [])
 
-                page += 1
+        # 检查是否还有更多页
+        total_pages = first_page.get("info", {}).get("page", 0)
+        if total_pages <= 1 or not first_page.get("list"):
+            return complete_list
 
-            except Exception:
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("list"):
                 break
+            complete_list.extend(data["list"])
 
         return complete_list
 
@@ -511,7 +533,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -588,6 +610,7 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
+    @ResponseCache.cached("anchor_common_areas")
     def get_anchor_common_areas(self, room_id: Union[str, int]) -> Dict[str, Any]:
         """
         获取主播常用分区信息
@@ -620,7 +643,7 @@ class BilibiliApiGeneric:
             params = {"roomid": str(room_id)}
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -765,7 +788,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -895,7 +918,7 @@ class BilibiliApiGeneric:
             params = {"mid": mid}
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api,
                 headers=self.headers,
                 params=params,
@@ -1071,7 +1094,7 @@ class BilibiliApiGeneric:
                     params["ts"] = int(time.time() * 1000)  # 13位时间戳
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -1188,65 +1211,85 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
-    def _get_complete_fans_list(self, ruid: Union[int, str],
-                                rank_type: Optional[int] = None) -> List[Dict[str, Any]]:
+    def _get_complete_fans_list(self, ruid: Union[int, str], rank_type: Optional[int] = None,
+                                max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的粉丝团成员列表（内部方法）
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             ruid: 主播UID
             rank_type: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的粉丝团成员列表
         """
-        complete_list = []
-        page = 1
+        page_size = 30  # 使用最大页大小
+        # 按没上过舰的成员排序时，所有页使用同一个时间戳，保证分页一致
+        ts = int(time.time() * 1000)
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "ruid": str(ruid),
                 "page": page,
-                "page_size": 30  # 使用最大页大小
+                "page_size": page_size
             }
 
             # 添加排序参数
             if rank_type in [1, 2]:
                 params["rank_type"] = rank_type
                 if rank_type == 2:
-                    params["ts"] = int(time.time() * 1000)
+                    params["ts"] = ts
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
-
-                if response.status_code != 200:
-                    break
-
-                result = response.json()
-                if result.get("code") != 0:
-                    break
-
-                data = result["data"]
-                current_list = data.get("item", [])
-                complete_list.extend(current_list)
-
-                # 检查是否还有更多页
-                total_members = data.get("num", 0)
-                if not current_list or len(complete_list) >= total_members:
-                    break
-
-                page += 1
-
-            except Exception:
+            # 发送API请求
+            response = self.session.get(
+                "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
+
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
+
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
+
+            return result["data"]
+
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
+
+        complete_list = list(first_page.get("item", []))
+
+        # 检查是否还有更多页
+        total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+        if total_pages <= 1 or not complete_list:
+            return complete_list
+
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("item"):
                 break
+            complete_list.extend(data["item"])
 
         return complete_list
 
@@ -1286,7 +1329,7 @@ class BilibiliApiGeneric:
             }
 
             # 发送API请求
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 headers=self.headers,
                 params=params,
@@ -3,6 +3,8 @@ import requests
 import time
 from typing import Dict, Any, List, Union, Optional
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
+
 
 class BilibiliApiGeneric:
     """
@@ -196,65 +198,85 @@ class BilibiliApiGeneric:
                 "api_code": None
             }
 
-    def _get_complete_fans_list(self, ruid: Union[int, str],
-                                rank_type: Optional[int] = None) -> List[Dict[str, Any]]:
+    def _get_complete_fans_list(self, ruid: Union[int, str], rank_type: Optional[int] = None,
+                                max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的粉丝团成员列表（内部方法）
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             ruid: 主播UID
             rank_type: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的粉丝团成员列表
         """
-        complete_list = []
-        page = 1
+        page_size = 30  # 使用最大页大小
+        # 按没上过舰的成员排序时，所有页使用同一个时间戳，保证分页一致
+        ts = int(time.time() * 1000)
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "ruid": str(ruid),
                 "page": page,
-                "page_size": 30  # 使用最大页大小
+                "page_size": page_size
             }
 
             # 添加排序参数
             if rank_type in [1, 2]:
                 params["rank_type"] = rank_type
                 if rank_type == 2:
-                    params["ts"] = int(time.time() * 1000)
+                    params["ts"] = ts
+
+            # 发送API请求
+            response = requests.get(
+                "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
 
-                if response.status_code != 200:
-                    break
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页粉丝团成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
 
-                result = response.json()
-                if result.get("code") != 0:
-                    break
+            return result["data"]
 
-                data = result["data"]
-                current_list = data.get("item", [])
-                complete_list.extend(current_list)
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
 
-                # 检查是否还有更多页
-                total_members = data.get("num", 0)
-                if not current_list or len(complete_list) >= total_members:
-                    break
+        complete_list = list(first_page.get("item", []))
 
-                page += 1
+        # 检查是否还有更多页
+        total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+        if total_pages <= 1 or not complete_list:
+            return complete_list
 
-            except Exception:
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("item"):
                 break
+            complete_list.extend(data["item"])
 
         return complete_list
 
@@ -2,6 +2,8 @@ import json
 import requests
 from typing import Dict, Any, List, Union, Optional
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
+
 
 class BilibiliApiGeneric:
     """
@@ -195,22 +197,23 @@ class BilibiliApiGeneric:
             }
 
     def _get_complete_guard_list(self, roomid: Union[int, str], ruid: Union[int, str],
-                                 typ: Optional[int] = None) -> List[Dict[str, Any]]:
+                                 typ: Optional[int] = None, max_workers: int = 4) -> List[Dict[str, Any]]:
         """
         获取完整的大航海成员列表（内部方法）
 
+        第一页确定总页数后，其余页由 ConcurrentPaginator 并发请求，结果按页序合并；某一页失败时只保留它之前的页
+
         Args:
             roomid: 直播间号
             ruid: 主播UID
             typ: 排序方式
+            max_workers: 并发请求的最大线程数
 
         Returns:
             完整的大航海成员列表
         """
-        complete_list = []
-        page = 1
 
-        while True:
+        def fetch_page(page: int) -> Dict[str, Any]:
             # 构建请求参数
             params = {
                 "roomid": str(roomid),
@@ -222,43 +225,53 @@ class BilibiliApiGeneric:
             if typ in [3, 4, 5]:
                 params["typ"] = typ
 
-            try:
-                # 发送API请求
-                response = requests.get(
-                    "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10,
-                    verify=self.verify_ssl
-                )
-
-                if response.status_code != 200:
-                    break
+            # 发送API请求
+            response = requests.get(
+                "https://api.live.bilibili.com/xlive/app-room/v2/guardTab/topListNew",
+                headers=self.headers,
+                params=params,
+                timeout=10,
+                verify=self.verify_ssl
+            )
 
-                result = response.json()
-                if result.get("code") != 0:
-                    break
+            if response.status_code != 200:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": f"HTTP错误: {response.status_code}",
+                    "status_code": response.status_code
+                })
 
-                data = result["data"]
+            result = response.json()
+            if result.get("code") != 0:
+                raise ConcurrentPaginator.PageError({
+                    "success": False,
+                    "message": f"获取第 {page} 页大航海成员失败",
+                    "error": result.get("message", "未知错误"),
+                    "status_code": response.status_code,
+                    "api_code": result.get("code")
+                })
 
-                # 如果是第一页，包含top3
-                if page == 1:
-                    complete_list.extend(data.get("top3", []))
+            return result["data"]
 
-                # 添加当前页列表
-                current_list = data.get("list", [])
-                complete_list.extend(current_list)
+        try:
+            first_page = fetch_page(1)
+        except Exception:
+            return []
 
-                # 检查是否还有更多页
-                info = data.get("info", {})
-                total_pages = info.get("page", 0)
-                if page >= total_pages or not current_list:
-                    break
+        # 第一页包含top3
+        complete_list = first_page.get("top3", []) + first_page.get("list", [])
 
-                page += 1
+        # 检查是否还有更多页
+        total_pages = first_page.get("info", {}).get("page", 0)
+        if total_pages <= 1 or not first_page.get("list"):
+            return complete_list
 
-            except Exception:
+        paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers)
+        for data in paginator.fetch_pages(2, total_pages):
+            if not data.get("list"):
                 break
+            complete_list.extend(data["list"])
 
         return complete_list
 
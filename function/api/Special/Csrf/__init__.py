@@ -4,11 +4,14 @@ import random
 import string
 import time
 from pathlib import Path
-from typing import Dict, Any, Literal
+from typing import Dict, Any, Literal, Optional
 
 import requests
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
+from function.tools.HttpSessionPool import HttpSessionPool
+from function.tools.ResponseCache import ResponseCache
 
 
 class BilibiliCSRFAuthenticator:
@@ -26,13 +29,17 @@ class BilibiliCSRFAuthenticator:
     - 统一的错误处理和响应格式
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         初始化CSRF认证管理器
 
         Args:
             headers: 包含Cookie等认证信息的请求头字典
             verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
+            response_cache: 写操作成功后需要失效的响应缓存，默认 None
 
         Returns:
             包含操作结果的字典，包含以下键：
@@ -43,6 +50,9 @@ class BilibiliCSRFAuthenticator:
         """
         self.headers = headers.copy()  # 避免修改原始headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """写操作成功后需要失效的响应缓存"""
         self.initialization_result = self._initialize_authenticator()
 
     def _initialize_authenticator(self) -> Dict[str, Any]:
@@ -211,7 +221,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 url="https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/CancelReserve",
                 headers=self.headers,
                 data=payload,
@@ -292,6 +302,7 @@ class BilibiliCSRFAuthenticator:
                 "data": None
             }
 
+    @ResponseCache.invalidates("anchor_common_areas")
     def change_room_area(self, room_id: int, area_id: int) -> Dict[str, Any]:
         """
         更改直播分区
@@ -334,7 +345,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api,
                 headers=headers,
                 params=params,
@@ -466,7 +477,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 verify=self.verify_ssl,
                 url=api,
                 headers=headers,
@@ -594,7 +605,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=data,
@@ -716,7 +727,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 data=data,
                 headers=self.headers,
@@ -873,7 +884,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/CreateReserve"
 
-            response = requests.post(
+            response = self.session.post(
                 verify=self.verify_ssl,
                 url=api_url,
                 headers=self.headers,
@@ -1007,7 +1018,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -1057,7 +1068,7 @@ class BilibiliCSRFAuthenticator:
                     params["offset"] = result["data"].get("offset", "")
 
                     # 发送分页请求
-                    response = requests.get(
+                    response = self.session.get(
                         url=api_url,
                         headers=self.headers,
                         params=params,
@@ -1164,7 +1175,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -1242,12 +1253,16 @@ class BilibiliCSRFAuthenticator:
                 "status_code": None
             }
 
-    def get_fans_members_rank(self, uid: int) -> Dict[str, Any]:
+    def get_fans_members_rank(self, uid: int, max_workers: int = 4) -> Dict[str, Any]:
         """
         获取指定用户的粉丝团成员列表
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求；
+        网络错误和非 200 状态码按 1、2 秒退避重试，最多 3 次
+
         Args:
             uid: 要查询的B站用户UID
+            max_workers: 并发请求的最大线程数
 
         Returns:
             包含查询结果的字典：
@@ -1279,86 +1294,76 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank"
             headers = self.headers
-            page = 1
-            fans_members = []
-            has_more_data = True
+            page_size = 30
             max_retries = 3
 
-            while has_more_data:
+            def fetch_page(page: int) -> Dict[str, Any]:
                 params = {
                     "ruid": uid,
                     "page": page,
-                    "page_size": 30,
-                }
-
-                # 添加重试机制
-                for attempt in range(max_retries):
-                    try:
-                        response = requests.get(
-                            api_url,
-                            headers=headers,
-                            params=params,
-                            verify=self.verify_ssl,
-                            timeout=30
-                        )
-
-                        # 检查HTTP状态码
-                        if response.status_code != 200:
-                            if attempt < max_retries - 1:
-                                time.sleep(2)  # 等待后重试
-                                continue
-                            else:
-                                return {
-                                    "success": False,
-                                    "message": "获取粉丝团成员列表失败",
-                                    "error": f"HTTP错误: {response.status_code}",
-                                    "status_code": response.status_code
-                                }
-
-                        result = response.json()
-
-                        # 检查API返回状态
-                        if result.get("code") != 0:
-                            return {
-                                "success": False,
-                                "message": "B站API返回错误",
-                                "error": result.get("message", "未知错误"),
-                                "status_code": response.status_code,
-                                "api_code": result.get("code")
-                            }
-
-                        # 处理数据
-                        current_page_items = result["data"].get("item", [])
-                        if current_page_items:
-                            fans_members.extend(current_page_items)
-                            page += 1
-                        else:
-                            has_more_data = False
-
-                        break  # 成功获取数据，跳出重试循环
-
-                    except requests.exceptions.Timeout:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 超时后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": "请求超时",
-                                "status_code": None
-                            }
-                    except requests.exceptions.RequestException as e:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 网络错误后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": f"网络请求异常: {str(e)}",
-                                "status_code": None
-                            }
+                    "page_size": page_size,
+                }
+                response = self.session.get(
+                    api_url,
+                    headers=headers,
+                    params=params,
+                    verify=self.verify_ssl,
+                    timeout=30
+                )
+
+                # 检查HTTP状态码，非 200 时作为网络错误重试
+                if response.status_code != 200:
+                    raise requests.exceptions.HTTPError(f"HTTP错误: {response.status_code}", response=response)
+
+                result = response.json()
+
+                # 检查API返回状态，不重试
+                if result.get("code") != 0:
+                    raise ConcurrentPaginator.PageError({
+                        "success": False,
+                        "message": "B站API返回错误",
+                        "error": result.get("message", "未知错误"),
+                        "status_code": response.status_code,
+                        "api_code": result.get("code")
+                    })
+
+                return result["data"]
+
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, max_retries=max_retries - 1,
+                                            retry_backoff=1.0, retry_on=(requests.exceptions.RequestException,))
+            try:
+                first_page = paginator.fetch(1)
+                fans_members = list(first_page.get("item", []))
+                total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+                if fans_members:
+                    for page, data in paginator.iter_pages(2, total_pages):
+                        current_page_items = data.get("item", [])
+                        if not current_page_items:
+                            break
+                        fans_members.extend(current_page_items)
+            except ConcurrentPaginator.PageError as e:
+                return e.result
+            except requests.exceptions.HTTPError as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": str(e),
+                    "status_code": e.response.status_code if e.response is not None else None
+                }
+            except requests.exceptions.Timeout:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": "请求超时",
+                    "status_code": None
+                }
+            except requests.exceptions.RequestException as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": f"网络请求异常: {str(e)}",
+                    "status_code": None
+                }
 
             # 成功返回
             return {
@@ -1403,7 +1408,7 @@ class BilibiliCSRFAuthenticator:
             api_url = "https://api.bilibili.com/x/web-interface/nav"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -1506,7 +1511,7 @@ class BilibiliCSRFAuthenticator:
             api_url = "https://api.live.bilibili.com/xlive/web-ucenter/user/get_user_info"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -1632,7 +1637,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送POST请求
-            response = requests.post(
+            response = self.session.post(
                 api_url,
                 headers=headers,
                 data=params,
@@ -1808,7 +1813,7 @@ class BilibiliCSRFAuthenticator:
             startLivedata["sign"] = md5_sign
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api,
                 headers=headers,
                 params=startLivedata,
@@ -1933,7 +1938,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=data,
@@ -2062,7 +2067,7 @@ class BilibiliCSRFAuthenticator:
             }
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 api_url,
                 headers=self.headers,
                 data=update_cover_data,
@@ -2206,7 +2211,7 @@ class BilibiliCSRFAuthenticator:
                     body += part
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=headers,
                 data=body,
@@ -2389,7 +2394,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/msg/send"
 
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 data=payload,
@@ -2584,7 +2589,7 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v1/fansMedal/wear"
 
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 data=payload,
@@ -1,9 +1,9 @@
-import time
 from pathlib import Path
 from typing import Dict, Any
 
 import requests
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
 
 
@@ -143,12 +143,16 @@ class BilibiliCSRFAuthenticator:
             "message": "用户信息获取成功"
         }
 
-    def get_fans_members_rank(self, uid: int) -> Dict[str, Any]:
+    def get_fans_members_rank(self, uid: int, max_workers: int = 4) -> Dict[str, Any]:
         """
         获取指定用户的粉丝团成员列表
 
+        第一页的成员总数确定总页数后，其余页由 ConcurrentPaginator 并发请求；
+        网络错误和非 200 状态码按 1、2 秒退避重试，最多 3 次
+
         Args:
             uid: 要查询的B站用户UID
+            max_workers: 并发请求的最大线程数
 
         Returns:
             包含查询结果的字典：
@@ -180,86 +184,76 @@ class BilibiliCSRFAuthenticator:
 
             api_url = "https://api.live.bilibili.com/xlive/general-interface/v1/rank/getFansMembersRank"
             headers = self.headers
-            page = 1
-            fans_members = []
-            has_more_data = True
+            page_size = 30
             max_retries = 3
 
-            while has_more_data:
+            def fetch_page(page: int) -> Dict[str, Any]:
                 params = {
                     "ruid": uid,
                     "page": page,
-                    "page_size": 30,
+                    "page_size": page_size,
+                }
+                response = requests.get(
+                    api_url,
+                    headers=headers,
+                    params=params,
+                    verify=self.verify_ssl,
+                    timeout=30
+                )
+
+                # 检查HTTP状态码，非 200 时作为网络错误重试
+                if response.status_code != 200:
+                    raise requests.exceptions.HTTPError(f"HTTP错误: {response.status_code}", response=response)
+
+                result = response.json()
+
+                # 检查API返回状态，不重试
+                if result.get("code") != 0:
+                    raise ConcurrentPaginator.PageError({
+                        "success": False,
+                        "message": "B站API返回错误",
+                        "error": result.get("message", "未知错误"),
+                        "status_code": response.status_code,
+                        "api_code": result.get("code")
+                    })
+
+                return result["data"]
+
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, max_retries=max_retries - 1,
+                                            retry_backoff=1.0, retry_on=(requests.exceptions.RequestException,))
+            try:
+                first_page = paginator.fetch(1)
+                fans_members = list(first_page.get("item", []))
+                total_pages = ConcurrentPaginator.page_count(first_page.get("num", 0), page_size)
+                if fans_members:
+                    for page, data in paginator.iter_pages(2, total_pages):
+                        current_page_items = data.get("item", [])
+                        if not current_page_items:
+                            break
+                        fans_members.extend(current_page_items)
+            except ConcurrentPaginator.PageError as e:
+                return e.result
+            except requests.exceptions.HTTPError as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": str(e),
+                    "status_code": e.response.status_code if e.response is not None else None
+                }
+            except requests.exceptions.Timeout:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": "请求超时",
+                    "status_code": None
+                }
+            except requests.exceptions.RequestException as e:
+                return {
+                    "success": False,
+                    "message": "获取粉丝团成员列表失败",
+                    "error": f"网络请求异常: {str(e)}",
+                    "status_code": None
                 }
-
-                # 添加重试机制
-                for attempt in range(max_retries):
-                    try:
-                        response = requests.get(
-                            api_url,
-                            headers=headers,
-                            params=params,
-                            verify=self.verify_ssl,
-                            timeout=30
-                        )
-
-                        # 检查HTTP状态码
-                        if response.status_code != 200:
-                            if attempt < max_retries - 1:
-                                time.sleep(2)  # 等待后重试
-                                continue
-                            else:
-                                return {
-                                    "success": False,
-                                    "message": "获取粉丝团成员列表失败",
-                                    "error": f"HTTP错误: {response.status_code}",
-                                    "status_code": response.status_code
-                                }
-
-                        result = response.json()
-
-                        # 检查API返回状态
-                        if result.get("code") != 0:
-                            return {
-                                "success": False,
-                                "message": "B站API返回错误",
-                                "error": result.get("message", "未知错误"),
-                                "status_code": response.status_code,
-                                "api_code": result.get("code")
-                            }
-
-                        # 处理数据
-                        current_page_items = result["data"].get("item", [])
-                        if current_page_items:
-                            fans_members.extend(current_page_items)
-                            page += 1
-                        else:
-                            has_more_data = False
-
-                        break  # 成功获取数据，跳出重试循环
-
-                    except requests.exceptions.Timeout:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 超时后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": "请求超时",
-                                "status_code": None
-                            }
-                    except requests.exceptions.RequestException as e:
-                        if attempt < max_retries - 1:
-                            time.sleep(5)  # 网络错误后等待5秒重试
-                            continue
-                        else:
-                            return {
-                                "success": False,
-                                "message": "获取粉丝团成员列表失败",
-                                "error": f"网络请求异常: {str(e)}",
-                                "status_code": None
-                            }
 
             # 成功返回
             return {
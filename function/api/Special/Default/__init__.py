@@ -2,7 +2,10 @@ from typing import Dict, Any, Optional
 
 import requests
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
+from function.tools.HttpSessionPool import HttpSessionPool
+from function.tools.ResponseCache import ResponseCache
 
 
 class BilibiliSpecialApiManager:
@@ -16,16 +19,23 @@ class BilibiliSpecialApiManager:
     - 统一的错误处理和响应格式
     """
 
-    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True):
+    def __init__(self, headers: Dict[str, str], verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None,
+                 response_cache: Optional[ResponseCache] = None):
         """
         初始化管理器
 
         Args:
             headers: 包含Cookie等认证信息的请求头字典
             verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+            session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
+            response_cache: 只读接口的响应缓存，默认 None 不缓存，可传入 ResponseCache.shared()
         """
         self.headers = headers.copy()  # 避免修改原始headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+        self.response_cache: Optional[ResponseCache] = response_cache
+        """只读接口的响应缓存，设为 None 时每次都请求"""
         self.initialization_result = self._initialize_manager()
 
     def _initialize_manager(self) -> Dict[str, Any]:
@@ -113,7 +123,7 @@ class BilibiliSpecialApiManager:
             params = {"room_id": room_id}
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -217,7 +227,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.bilibili.com/x/web-interface/nav"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -320,7 +330,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v2/schedule/GetReserveList"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -421,7 +431,7 @@ class BilibiliSpecialApiManager:
             api_url = "https://api.live.bilibili.com/xlive/app-blink/v1/highlight/getRoomHighlightState"
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 verify=self.verify_ssl,
@@ -544,7 +554,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -622,6 +632,7 @@ class BilibiliSpecialApiManager:
                 "status_code": None
             }
 
+    @ResponseCache.cached("medal_wall")
     def get_medal_wall(self, target_id: int) -> Dict[str, Any]:
         """
         获取指定用户的所有粉丝勋章信息（最多200个）
@@ -663,7 +674,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -792,7 +803,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -935,7 +946,7 @@ class BilibiliSpecialApiManager:
                 params['target_id'] = target_id
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -1030,15 +1041,20 @@ class BilibiliSpecialApiManager:
             }
 
     def _get_all_pages_medal_data(self, initial_data: Dict[str, Any], room_id: Optional[int] = None,
-                                  target_id: Optional[int] = None, page_size: int = 10) -> Dict[str, Any]:
+                                  target_id: Optional[int] = None, page_size: int = 10,
+                                  max_workers: int = 4, min_interval: float = 0.2) -> Dict[str, Any]:
         """
         获取所有页的勋章数据
 
+        第二页起由 ConcurrentPaginator 并发请求，相邻请求的开始间隔不小于 min_interval，结果按页序合并
+
         Args:
             initial_data: 第一页的数据
             room_id: 房间ID
             target_id: 目标用户ID
             page_size: 每页数量
+            max_workers: 并发请求的最大线程数
+            min_interval: 相邻两次请求开始的最小间隔（秒），避免请求过快
 
         Returns:
             包含所有页数据的字典
@@ -1046,7 +1062,6 @@ class BilibiliSpecialApiManager:
         try:
             page_info = initial_data.get("page_info", {})
             total_pages = page_info.get("total_page", 1)
-            current_page = page_info.get("current_page", 1)
 
             # 如果只有一页，直接返回
             if total_pages <= 1:
@@ -1056,13 +1071,10 @@ class BilibiliSpecialApiManager:
                     "data": initial_data
                 }
 
-
             all_list_data = initial_data.get("list", [])
             all_special_list_data = initial_data.get("special_list", [])
 
-            # 从第二页开始获取
-            for page in range(2, total_pages + 1):
-
+            def fetch_page(page: int) -> Dict[str, Any]:
                 # 构建API请求
                 api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v1/fansMedal/panel"
                 params = {
@@ -1077,7 +1089,7 @@ class BilibiliSpecialApiManager:
                     params['target_id'] = target_id
 
                 # 发送请求
-                response = requests.get(
+                response = self.session.get(
                     url=api_url,
                     headers=self.headers,
                     params=params,
@@ -1087,37 +1099,39 @@ class BilibiliSpecialApiManager:
 
                 # 检查HTTP状态码
                 if response.status_code != 200:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": f"HTTP错误: {response.status_code}",
                         "status_code": response.status_code
-                    }
+                    })
 
                 # 解析响应
                 result = response.json()
 
                 # 检查B站API返回状态
                 if result.get("code") != 0:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": result.get("message", "未知错误"),
                         "status_code": response.status_code,
                         "api_code": result.get("code")
-                    }
-
-                page_data = result.get("data", {})
-
-                # 合并数据
-                all_list_data.extend(page_data.get("list", []))
-                # 特殊列表通常只有第一页有，但为了完整性也合并
-                if page == 2:  # 只在第二页合并特殊列表，避免重复
-                    all_special_list_data.extend(page_data.get("special_list", []))
-
-                # 添加小延迟，避免请求过快
-                import time
-                time.sleep(0.5)
+                    })
+
+                return result.get("data", {})
+
+            # 从第二页开始并发获取
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, min_interval=min_interval)
+            try:
+                for page, page_data in paginator.iter_pages(2, total_pages):
+                    # 合并数据
+                    all_list_data.extend(page_data.get("list", []))
+                    # 特殊列表通常只有第一页有，但为了完整性也合并
+                    if page == 2:  # 只在第二页合并特殊列表，避免重复
+                        all_special_list_data.extend(page_data.get("special_list", []))
+            except ConcurrentPaginator.PageError as e:
+                return e.result
 
             # 更新数据
             initial_data["list"] = all_list_data
@@ -1149,6 +1163,7 @@ class BilibiliSpecialApiManager:
                 "error": str(e)
             }
 
+    @ResponseCache.cached("room_emoticons")
     def get_room_emoticons(self, room_id: int, platform: str = "pc") -> Dict[str, Any]:
         """
         获取直播间表情包信息
@@ -1202,7 +1217,7 @@ class BilibiliSpecialApiManager:
             }
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -3,6 +3,7 @@ from typing import Dict, Any, Optional
 
 import requests
 
+from function.tools.ConcurrentPaginator import ConcurrentPaginator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
 
 
@@ -235,15 +236,20 @@ class BilibiliSpecialApiManager:
             }
 
     def _get_all_pages_medal_data(self, initial_data: Dict[str, Any], room_id: Optional[int] = None,
-                                  target_id: Optional[int] = None, page_size: int = 10) -> Dict[str, Any]:
+                                  target_id: Optional[int] = None, page_size: int = 10,
+                                  max_workers: int = 4, min_interval: float = 0.2) -> Dict[str, Any]:
         """
         获取所有页的勋章数据
 
+        第二页起由 ConcurrentPaginator 并发请求，相邻请求的开始间隔不小于 min_interval，结果按页序合并
+
         Args:
             initial_data: 第一页的数据
             room_id: 房间ID
             target_id: 目标用户ID
             page_size: 每页数量
+            max_workers: 并发请求的最大线程数
+            min_interval: 相邻两次请求开始的最小间隔（秒），避免请求过快
 
         Returns:
             包含所有页数据的字典
@@ -251,7 +257,6 @@ class BilibiliSpecialApiManager:
         try:
             page_info = initial_data.get("page_info", {})
             total_pages = page_info.get("total_page", 1)
-            current_page = page_info.get("current_page", 1)
 
             # 如果只有一页，直接返回
             if total_pages <= 1:
@@ -261,13 +266,10 @@ class BilibiliSpecialApiManager:
                     "data": initial_data
                 }
 
-
             all_list_data = initial_data.get("list", [])
             all_special_list_data = initial_data.get("special_list", [])
 
-            # 从第二页开始获取
-            for page in range(2, total_pages + 1):
-
+            def fetch_page(page: int) -> Dict[str, Any]:
                 # 构建API请求
                 api_url = "https://api.live.bilibili.com/xlive/app-ucenter/v1/fansMedal/panel"
                 params = {
@@ -292,37 +294,39 @@ class BilibiliSpecialApiManager:
 
                 # 检查HTTP状态码
                 if response.status_code != 200:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": f"HTTP错误: {response.status_code}",
                         "status_code": response.status_code
-                    }
+                    })
 
                 # 解析响应
                 result = response.json()
 
                 # 检查B站API返回状态
                 if result.get("code") != 0:
-                    return {
+                    raise ConcurrentPaginator.PageError({
                         "success": False,
                         "message": f"获取第 {page} 页数据失败",
                         "error": result.get("message", "未知错误"),
                         "status_code": response.status_code,
                         "api_code": result.get("code")
-                    }
-
-                page_data = result.get("data", {})
-
-                # 合并数据
-                all_list_data.extend(page_data.get("list", []))
-                # 特殊列表通常只有第一页有，但为了完整性也合并
-                if page == 2:  # 只在第二页合并特殊列表，避免重复
-                    all_special_list_data.extend(page_data.get("special_list", []))
-
-                # 添加小延迟，避免请求过快
-                import time
-                time.sleep(0.5)
+                    })
+
+                return result.get("data", {})
+
+            # 从第二页开始并发获取
+            paginator = ConcurrentPaginator(fetch_page, max_workers=max_workers, min_interval=min_interval)
+            try:
+                for page, page_data in paginator.iter_pages(2, total_pages):
+                    # 合并数据
+                    all_list_data.extend(page_data.get("list", []))
+                    # 特殊列表通常只有第一页有，但为了完整性也合并
+                    if page == 2:  # 只在第二页合并特殊列表，避免重复
+                        all_special_list_data.extend(page_data.get("special_list", []))
+            except ConcurrentPaginator.PageError as e:
+                return e.result
 
             # 更新数据
             initial_data["list"] = all_list_data
@@ -1,26 +1,118 @@
 from pathlib import Path
-from typing import Literal, Dict, Any
+from typing import Literal, Dict, Any, Optional
 from urllib.parse import quote
-from functools import reduce
 from hashlib import md5
 import urllib.parse
+import threading
 import time
 
 import requests
 
 from function.tools.EncodingConversion.dict_to_cookie_string import dict_to_cookie_string
 from function.tools.ConfigControl.BilibiliUserConfigManager import BilibiliUserConfigManager
+from function.tools.HttpSessionPool import HttpSessionPool
 
 
 class WbiSigna:
-    def __init__(self, headers: dict, verify_ssl: bool = True):
+    MIXIN_KEY_ENC_TAB = [
+        46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+        33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+        61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+        36, 20, 34, 44, 52
+    ]
+    """mixin key 的字符重排表"""
+    WBI_KEY_TTL_SECONDS = 3600
+    """WBI 密钥的缓存时间（秒），B站大约每天更换一次密钥"""
+    WBI_KEY_REFRESH_AHEAD_SECONDS = 300
+    """距离过期不到该时间（秒）时在后台提前刷新，签名不等待网络"""
+    WBI_SIGNATURE_ERROR_CODES = (-352, -403)
+    """签名失效时接口返回的错误码，收到后丢弃缓存的密钥"""
+
+    _mixin_key: Optional[str] = None
+    _mixin_key_fetched_at = 0.0
+    _mixin_key_lock = threading.Lock()
+    _mixin_key_refreshing = False
+
+    def __init__(self, headers: dict, verify_ssl: bool = True,
+                 session: Optional[requests.Session] = None):
         """
         wbi签名的api
         @param headers: 包含Cookie和User-Agent的请求头字典
         @param verify_ssl: 是否验证SSL证书（默认True，生产环境建议开启）
+        @param session: 共享的 requests.Session，默认使用 HttpSessionPool.shared() 的长连接池
         """
         self.headers = headers
         self.verify_ssl = verify_ssl
+        self.session = session if session is not None else HttpSessionPool.shared().session
+
+    @classmethod
+    def get_mixin_key(cls, orig: str) -> str:
+        """对 imgKey 和 subKey 进行字符顺序打乱编码"""
+        return ''.join([orig[i] for i in cls.MIXIN_KEY_ENC_TAB])[:32]
+
+    def fetch_mixin_key(self) -> str:
+        """请求 nav 接口获取最新的 img_key 和 sub_key，返回 mixin key"""
+        resp = self.session.get('https://api.bilibili.com/x/web-interface/nav', headers=self.headers)
+        resp.raise_for_status()
+        json_content = resp.json()
+        img_url: str = json_content['data']['wbi_img']['img_url']
+        sub_url: str = json_content['data']['wbi_img']['sub_url']
+        img_key = img_url.rsplit('/', 1)[1].split('.')[0]
+        sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
+        return self.get_mixin_key(img_key + sub_key)
+
+    def _refresh_mixin_key(self):
+        """重新获取 mixin key 并写入所有实例共享的缓存"""
+        mixin_key = self.fetch_mixin_key()
+        with WbiSigna._mixin_key_lock:
+            WbiSigna._mixin_key = mixin_key
+            WbiSigna._mixin_key_fetched_at = time.monotonic()
+
+    def _background_refresh_mixin_key(self):
+        try:
+            self._refresh_mixin_key()
+        except Exception:
+            pass  # 旧密钥仍在有效期内，下次签名时再试
+        finally:
+            WbiSigna._mixin_key_refreshing = False
+
+    def get_cached_mixin_key(self) -> str:
+        """
+        取缓存的 mixin key，所有实例共享
+        没有缓存或已过期时同步获取；快要过期时在后台线程刷新，本次仍使用旧密钥
+        """
+        age = time.monotonic() - WbiSigna._mixin_key_fetched_at
+        if WbiSigna._mixin_key is None or age >= self.WBI_KEY_TTL_SECONDS:
+            with WbiSigna._mixin_key_lock:
+                age = time.monotonic() - WbiSigna._mixin_key_fetched_at
+                if WbiSigna._mixin_key is None or age >= self.WBI_KEY_TTL_SECONDS:
+                    mixin_key = self.fetch_mixin_key()
+                    WbiSigna._mixin_key = mixin_key
+                    WbiSigna._mixin_key_fetched_at = time.monotonic()
+                return WbiSigna._mixin_key
+        if age >= self.WBI_KEY_TTL_SECONDS - self.WBI_KEY_REFRESH_AHEAD_SECONDS \
+                and not WbiSigna._mixin_key_refreshing:
+            WbiSigna._mixin_key_refreshing = True
+            threading.Thread(target=self._background_refresh_mixin_key, daemon=True).start()
+        return WbiSigna._mixin_key
+
+    @classmethod
+    def invalidate_mixin_key(cls):
+        """丢弃缓存的 mixin key，下次签名时重新获取"""
+        with WbiSigna._mixin_key_lock:
+            WbiSigna._mixin_key = None
+
+    def check_wbi_signature(self, api_code: Any) -> bool:
+        """
+        检查接口错误码，签名失效时丢弃缓存的 mixin key
+        @param api_code: 接口返回的 code
+        @return: 是否为签名失效
+        @rtype: bool
+        """
+        if api_code in self.WBI_SIGNATURE_ERROR_CODES:
+            self.invalidate_mixin_key()
+            return True
+        return False
 
     def wbi(self, data: dict):
         """
@@ -29,53 +121,21 @@ class WbiSigna:
         @return: requests的 params 参数
         @rtype: dict
         """
-        mixinKeyEncTab = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
-
-        def getMixinKey(orig: str):
-            """对 imgKey 和 subKey 进行字符顺序打乱编码"""
-            return reduce(lambda s, i: s + orig[i], mixinKeyEncTab, '')[:32]
-
-        def encWbi(params: dict, img_key: str, sub_key: str):
-            """为请求参数进行 wbi 签名"""
-            mixin_key = getMixinKey(img_key + sub_key)
-            curr_time = round(time.time())
-            params['wts'] = curr_time  # 添加 wts 字段
-            params = dict(sorted(params.items()))  # 按照 key 重排参数
-            # 过滤 value 中的 "!'()*" 字符
-            params = {
-                k: ''.join(filter(lambda chr: chr not in "!'()*", str(v)))
-                for k, v
-                in params.items()
-            }
-            query = urllib.parse.urlencode(params)  # 序列化参数
-            wbi_sign = md5((query + mixin_key).encode()).hexdigest()  # 计算 w_rid
-            params['w_rid'] = wbi_sign
-            return params
-
-        def getWbiKeys() -> tuple[str, str]:
-            """获取最新的 img_key 和 sub_key"""
-            resp = requests.get('https://api.bilibili.com/x/web-interface/nav', headers=self.headers)
-            resp.raise_for_status()
-            json_content = resp.json()
-            img_url: str = json_content['data']['wbi_img']['img_url']
-            sub_url: str = json_content['data']['wbi_img']['sub_url']
-            img_key = img_url.rsplit('/', 1)[1].split('.')[0]
-            sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
-            return img_key, sub_key
-
-        img_key, sub_key = getWbiKeys()
-
-        signed_params = encWbi(
-            params=data,
-            img_key=img_key,
-            sub_key=sub_key
-        )
-        return signed_params
+        mixin_key = self.get_cached_mixin_key()
+        curr_time = round(time.time())
+        params = dict(data)
+        params['wts'] = curr_time  # 添加 wts 字段
+        params = dict(sorted(params.items()))  # 按照 key 重排参数
+        # 过滤 value 中的 "!'()*" 字符
+        params: Dict[str, str] = {
+            k: ''.join(filter(lambda chr: chr not in "!'()*", str(v)))
+            for k, v
+            in params.items()
+        }
+        query = urllib.parse.urlencode(params)  # 序列化参数
+        wbi_sign = md5((query + mixin_key).encode()).hexdigest()  # 计算 w_rid
+        params['w_rid'] = wbi_sign
+        return params
 
     def get_contribution_rank(self, ruid: int, room_id: int,
                               rank_type: Literal["online_rank", "daily_rank", "weekly_rank", "monthly_rank"],
@@ -160,7 +220,7 @@ class WbiSigna:
             signed_params = self.wbi(params)
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=signed_params,
@@ -180,6 +240,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -265,7 +326,7 @@ class WbiSigna:
             signed_params = self.wbi(params)
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=url,
                 headers=self.headers,
                 params=signed_params,
@@ -286,6 +347,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -382,7 +444,7 @@ class WbiSigna:
             params = self.wbi({"mid": mid})
 
             # 发送请求
-            response = requests.get(
+            response = self.session.get(
                 url=api_url,
                 headers=self.headers,
                 params=params,
@@ -403,6 +465,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             if result.get("code") != 0:
@@ -568,7 +631,7 @@ class WbiSigna:
                 form_data["emoticonOptions"] = "[object Object]"
 
             # 发送请求
-            response = requests.post(
+            response = self.session.post(
                 url=api_url,
                 headers=self.headers,
                 params=signed_url_params,
@@ -589,6 +652,7 @@ class WbiSigna:
 
             # 解析响应
             result = response.json()
+            self.check_wbi_signature(result.get("code"))
 
             # 检查B站API返回状态
             api_code = result.get("code")
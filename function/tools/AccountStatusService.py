@@ -0,0 +1,173 @@
+import json
+import os
+import pathlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Union
+
+
+class AccountStatusService:
+    """
+    账号状态服务 {uid: {"nickname": 昵称, "valid": Cookie 是否有效, "checked_at": 检查时间}}
+
+    所有账号在线程池中并发检查，结果带检查时间保存，超过有效期才重新检查。
+    控制台先用上次的结果立即显示，过期的账号在后台检查，检查完成后由调用方刷新界面。
+    检查时网络出错的账号保留上次的结果，不会被当作过期账号。
+    """
+
+    def __init__(self, check_account: Callable[[str], Dict[str, Any]],
+                 cache_path: Optional[Union[str, pathlib.Path]] = None, ttl: float = 600, max_workers: int = 4):
+        """
+        Args:
+            check_account: 检查一个账号的函数，参数为 uid，返回 {"valid": 是否有效, "nickname": 昵称}，
+                无法确认状态（如网络错误）时抛出异常
+            cache_path: 状态的保存路径，None 表示不保存
+            ttl: 状态的有效期（秒）
+            max_workers: 同时检查的最大账号数
+        """
+        self.check_account = check_account
+        """检查一个账号的函数"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """状态的保存路径"""
+        self.ttl = ttl
+        """状态的有效期"""
+        self.max_workers = max_workers
+        """同时检查的最大账号数"""
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Future] = {}  # 正在后台检查的账号
+        self._changed: Set[str] = set()  # 后台检查后状态发生变化的账号
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def get(self, uid: Any) -> Optional[Dict[str, Any]]:
+        """返回账号上次检查的状态，没有检查过时返回 None"""
+        status = self._statuses.get(str(uid))
+        return dict(status) if status else None
+
+    def is_stale(self, uid: Any) -> bool:
+        """账号没有检查过或状态已超过有效期"""
+        status = self._statuses.get(str(uid))
+        return status is None or time.time() - status["checked_at"] >= self.ttl
+
+    def busy(self) -> bool:
+        """是否还有账号在后台检查"""
+        with self._lock:
+            return bool(self._pending)
+
+    def take_changes(self) -> bool:
+        """返回后台检查后是否有状态变化，并清除这个标记"""
+        with self._lock:
+            changed, self._changed = bool(self._changed), set()
+        return changed
+
+    def forget(self, uid: Any):
+        """删除账号的状态，用于账号被删除后"""
+        with self._lock:
+            removed = self._statuses.pop(str(uid), None)
+        if removed:
+            self.save_cache()
+
+    def _executor_or_new(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="account-status")
+        return self._executor
+
+    def _check(self, uid: str):
+        """线程池中执行，检查一个账号并记录结果"""
+        try:
+            result = self.check_account(uid)
+        except Exception:
+            result = None
+        with self._lock:
+            if result is not None:
+                status = {"nickname": result.get("nickname") or uid, "valid": bool(result.get("valid")),
+                          "checked_at": time.time()}
+                previous = self._statuses.get(uid)
+                self._statuses[uid] = status
+                if not previous or (previous["nickname"], previous["valid"]) != (status["nickname"], status["valid"]):
+                    self._changed.add(uid)
+            self._pending.pop(uid, None)
+        if result is not None:
+            self.save_cache()
+
+    def _submit(self, uids: Iterable[Any], force: bool = False) -> Dict[str, Future]:
+        """提交需要检查的账号，正在检查的账号不重复提交，返回本次涉及的 {uid: Future}"""
+        futures = {}
+        with self._lock:
+            for uid in map(str, uids):
+                if uid in self._pending:
+                    futures[uid] = self._pending[uid]
+                elif force or self.is_stale(uid):
+                    futures[uid] = self._pending[uid] = self._executor_or_new().submit(self._check, uid)
+        return futures
+
+    def statuses(self, uids: Iterable[Any], timeout: Optional[float] = 15) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        返回各账号的状态，用于立即显示
+        Args:
+            uids: 账号 uid
+            timeout: 等待从未检查过的账号的最长时间（秒）
+
+        Returns:
+            {uid: 状态}；有上次结果的账号直接返回上次结果，从未检查过的账号并发检查后返回，
+            仍无法确认的为 None
+        """
+        uids = [str(uid) for uid in uids]
+        unknown = [uid for uid in uids if uid not in self._statuses]
+        if unknown:
+            wait(self._submit(unknown).values(), timeout=timeout)
+            with self._lock:
+                # 这些结果已经直接用于显示，不需要再通知界面刷新
+                self._changed.difference_update(self._statuses.keys() & set(unknown))
+        return {uid: self.get(uid) for uid in uids}
+
+    def refresh(self, uids: Iterable[Any], force: bool = False) -> int:
+        """
+        在后台并发检查过期的账号
+        Args:
+            uids: 账号 uid
+            force: 是否忽略有效期检查所有账号
+
+        Returns:
+            正在后台检查的账号数
+        """
+        return len(self._submit(uids, force))
+
+    def load_cache(self) -> int:
+        """
+        读取上次保存的状态
+        Returns:
+            读取到的账号数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                statuses = json.load(f).get("statuses", {})
+        except (OSError, ValueError, AttributeError):
+            return 0
+        with self._lock:
+            for uid, status in statuses.items():
+                self._statuses.setdefault(str(uid), status)
+        return len(statuses)
+
+    def save_cache(self):
+        """保存状态，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            statuses = {uid: dict(status) for uid, status in self._statuses.items()}
+        with self._save_lock:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"statuses": statuses}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+
+    def shutdown(self):
+        """关闭检查线程池，不等待正在进行的检查"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,130 @@
+import functools
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Set, Tuple
+
+
+class CacheDependencyGraph:
+    """
+    带依赖关系的函数缓存
+
+    每个缓存函数声明它依赖的其他缓存函数（按函数名）或外部状态（如 "default_user"、"room_info"），
+    失效时只清除受影响的函数和依赖它们的下游函数，其余结果继续使用。
+    读取远端状态的函数可以设置有效期，过期后下次调用重新计算，依赖它的下游结果同时过期。
+    """
+
+    def __init__(self):
+        self.compute_count = 0
+        """缓存函数实际计算的累计次数"""
+        self._nodes: Dict[str, Callable] = {}  # {函数名: 缓存函数}
+        self._depends_on: Dict[str, Tuple[str, ...]] = {}  # {函数名: 它依赖的名称}
+        self._dependents: Dict[str, Set[str]] = {}  # {名称: 直接依赖它的函数名}
+        self._ttl: Dict[str, float] = {}  # {函数名: 有效期}
+        self._expires_at: Dict[str, float] = {}  # {函数名: 过期时间}
+        self._versions: Dict[str, int] = {}  # {名称: 失效次数}
+
+    def node(self, *depends_on: str, ttl: Optional[float] = None):
+        """
+        把函数注册为缓存节点，代替 @lru_cache(maxsize=None)
+        Args:
+            *depends_on: 依赖的缓存函数名或外部状态名
+            ttl: 有效期（秒），None 表示只在失效时重新计算
+        """
+
+        def decorator(func: Callable):
+            name = func.__name__
+
+            def compute(*args, **kwargs):
+                result = func(*args, **kwargs)
+                self.compute_count += 1
+                self._mark_computed(name)
+                return result
+
+            cached = functools.lru_cache(maxsize=None)(compute)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self._expires_at.get(name, math.inf) <= time.monotonic():
+                    self.invalidate(name)
+                return cached(*args, **kwargs)
+
+            wrapper.cache_clear = cached.cache_clear
+            wrapper.cache_info = cached.cache_info
+            self._nodes[name] = wrapper
+            self._depends_on[name] = depends_on
+            if ttl is not None:
+                self._ttl[name] = ttl
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(name)
+            return wrapper
+
+        return decorator
+
+    def _mark_computed(self, name: str):
+        """记录节点的过期时间：自己的有效期和所依赖节点的过期时间中较早的一个"""
+        expires_at = time.monotonic() + self._ttl[name] if name in self._ttl else math.inf
+        for dependency in self._depends_on[name]:
+            expires_at = min(expires_at, self._expires_at.get(dependency, math.inf))
+        if expires_at == math.inf:
+            self._expires_at.pop(name, None)
+        else:
+            self._expires_at[name] = expires_at
+
+    def affected(self, *names: str) -> Set[str]:
+        """返回这些名称变化时需要失效的缓存函数名，包括所有下游函数"""
+        result = set()
+        seen = set()
+        queue = deque(names)
+        while queue:
+            name = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in self._nodes:
+                result.add(name)
+            queue.extend(self._dependents.get(name, ()))
+        return result
+
+    def invalidate(self, *names: str) -> Set[str]:
+        """
+        使缓存失效
+        Args:
+            *names: 发生变化的缓存函数名或外部状态名
+
+        Returns:
+            被清除的缓存函数名
+        """
+        cleared = self.affected(*names)
+        for name in cleared:
+            self._nodes[name].cache_clear()
+            self._expires_at.pop(name, None)
+        for name in cleared.union(names):
+            self._versions[name] = self._versions.get(name, 0) + 1
+        return cleared
+
+    def invalidate_all(self):
+        """清除所有缓存"""
+        for node in self._nodes.values():
+            node.cache_clear()
+        self._expires_at.clear()
+        for name in self._nodes.keys() | self._dependents.keys():
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def expire_due(self) -> Set[str]:
+        """
+        使已经过期的缓存失效，不等到下次调用
+        Returns:
+            被清除的缓存函数名
+        """
+        now = time.monotonic()
+        expired = [name for name, expires_at in self._expires_at.items() if expires_at <= now]
+        return self.invalidate(*expired) if expired else set()
+
+    def version(self, name: str) -> int:
+        """缓存函数名或外部状态名的版本号，每次失效加一，用于判断结果是否可能已经变化"""
+        return self._versions.get(name, 0)
+
+    def dependencies(self, name: str) -> Tuple[str, ...]:
+        """返回缓存函数声明的依赖"""
+        return self._depends_on.get(name, ())
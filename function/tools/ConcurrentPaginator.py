@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+
+class ConcurrentPaginator:
+    """
+    并发分页获取器
+
+    调用方先请求第一页得到总页数，其余页交给本类在线程池中并发请求，按页序逐页产出。
+    相邻两次请求开始的间隔不小于 min_interval；失败的页按指数退避重试，
+    仍然失败时停止产出，并取消还没开始的页。
+    """
+
+    class PageError(Exception):
+        """某一页请求失败，result 为 {"success": False, ...} 形式的失败结果"""
+
+        def __init__(self, result: Dict[str, Any]):
+            self.result = result
+            """失败结果"""
+            super().__init__(result.get("error") or result.get("message"))
+
+    def __init__(self, fetch_page: Callable[[int], Any], max_workers: int = 4, min_interval: float = 0.0,
+                 max_retries: int = 0, retry_backoff: float = 0.5,
+                 retry_on: Tuple[Type[BaseException], ...] = (Exception,)):
+        """
+        Args:
+            fetch_page: 请求一页的函数，参数为页码，返回该页数据，失败时抛出异常
+            max_workers: 同时请求的最大页数
+            min_interval: 相邻两次请求开始的最小间隔（秒）
+            max_retries: 每页失败后的最大重试次数
+            retry_backoff: 第一次重试前的等待时间（秒），之后每次翻倍
+            retry_on: 需要重试的异常类型，其他异常直接视为失败
+        """
+        self.fetch_page = fetch_page
+        """请求一页的函数"""
+        self.max_workers = max_workers
+        """同时请求的最大页数"""
+        self.min_interval = min_interval
+        """相邻两次请求开始的最小间隔"""
+        self.max_retries = max_retries
+        """每页失败后的最大重试次数"""
+        self.retry_backoff = retry_backoff
+        """第一次重试前的等待时间"""
+        self.retry_on = retry_on
+        """需要重试的异常类型"""
+        self.error: Optional[BaseException] = None
+        """最近一次 fetch_pages 停止时的异常，全部成功时为 None"""
+        self.failed_page: Optional[int] = None
+        """最近一次 fetch_pages 失败的页码，全部成功时为 None"""
+        self._next_start = 0.0
+        self._rate_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def page_count(total_items: int, page_size: int) -> int:
+        """由总条数和每页数量计算总页数"""
+        return math.ceil(total_items / page_size) if total_items > 0 and page_size > 0 else 0
+
+    def _wait_turn(self):
+        """按 min_interval 排队，等到本次请求可以开始"""
+        if self.min_interval <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def fetch(self, page: int) -> Any:
+        """
+        请求一页，遇到 retry_on 中的异常时退避重试
+        Args:
+            page: 页码
+
+        Returns:
+            该页数据；重试用完仍失败时抛出最后一次的异常
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn()
+            try:
+                return self.fetch_page(page)
+            except self.retry_on:
+                if attempt >= self.max_retries:
+                    raise
+            time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _fetch_unless_stopped(self, page: int) -> Any:
+        """线程池中执行，迭代已经停止时不再请求"""
+        return None if self._stopped.is_set() else self.fetch(page)
+
+    def iter_pages(self, first_page: int, last_page: int) -> Iterator[Tuple[int, Any]]:
+        """
+        并发请求 first_page 到 last_page（含）的各页，按页序产出
+        Args:
+            first_page: 起始页码，通常为 2
+            last_page: 结束页码
+
+        Returns:
+            (页码, 该页数据) 的迭代器；某页最终失败时抛出它的异常。提前停止迭代会取消还没开始的页
+        """
+        if last_page < first_page:
+            return
+        pages = range(first_page, last_page + 1)
+        self._stopped.clear()
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pages))))
+        futures = [executor.submit(self._fetch_unless_stopped, page) for page in pages]
+        try:
+            for page, future in zip(pages, futures):
+                yield page, future.result()
+        finally:
+            self._stopped.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_pages(self, first_page: int, last_page: int) -> List[Any]:
+        """
+        并发请求 first_page 到 last_page（含）的各页
+        Returns:
+            按页序排列的各页数据；某页失败时只返回它之前的页，并记录 error 和 failed_page
+        """
+        self.error = None
+        self.failed_page = None
+        pages = []
+        try:
+            for page, data in self.iter_pages(first_page, last_page):
+                pages.append(data)
+        except Exception as e:
+            self.error = e
+            self.failed_page = first_page + len(pages)
+        return pages
@@ -1,6 +1,10 @@
+import copy
+import os
 import pathlib
 import json
-from typing import Dict, Optional, List, Union, TypedDict
+import threading
+import time
+from typing import Callable, Dict, Optional, List, Tuple, Union, TypedDict
 from datetime import datetime
 
 
@@ -49,15 +53,37 @@ class BilibiliUserConfigManager:
     # 最小必需的cookie字段（用于更新操作）
     MIN_REQUIRED_KEYS = {"DedeUserID", "SESSDATA", "bili_jct"}
 
-    def __init__(self, config_path: Union[str, pathlib.Path]):
+    def __init__(self, config_path: Union[str, pathlib.Path], flush_delay: float = 0.5,
+                 reload_check_interval: float = 1.0, retry_delay: float = 5.0):
         """
         初始化配置文件管理器
 
+        配置只在第一次使用时从文件读取，之后的查询都读内存；修改先写入内存，
+        flush_delay 秒内的多次修改合并为一次写入文件；后台写入失败时调用 flushErrorCallback，并在 retry_delay 秒后重试。
+
         Args:
             config_path: 配置文件路径
+            flush_delay: 修改后延迟写入文件的时间（秒），0 表示立即写入
+            reload_check_interval: 检查配置文件是否被外部修改的最小间隔（秒）
+            retry_delay: 后台写入失败后重试的间隔（秒）
         """
         self.config_path = pathlib.Path(config_path)
+        self.flush_delay = flush_delay
+        """修改后延迟写入文件的时间"""
+        self.reload_check_interval = reload_check_interval
+        """检查配置文件是否被外部修改的最小间隔"""
+        self.retry_delay = retry_delay
+        """后台写入失败后重试的间隔"""
+        self.flushErrorCallback: Callable[[str], None] = lambda message: None
+        """后台写入配置文件失败的回调，参数为错误信息"""
+        self._config: Optional[Dict] = None  # 内存中的配置
+        self._file_signature: Optional[Tuple[int, int]] = None  # 最近一次读写时文件的 (修改时间, 大小)
+        self._checked_at = 0.0  # 最近一次检查文件的时间
+        self._dirty = False  # 内存中有还没写入文件的修改
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
         self._ensure_config_file()
+        self.flush()
 
     def _ensure_config_file(self) -> OperationResult:
         """确保配置文件存在且结构有效"""
@@ -93,22 +119,91 @@ class BilibiliUserConfigManager:
         except Exception as e:
             return self._create_error_result(f"配置文件初始化失败: {str(e)}")
 
-    def _read_config(self) -> Dict:
-        """读取配置文件内容"""
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """配置文件当前的 (修改时间, 大小)，文件不存在时为 None"""
+        try:
+            stat = self.config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """从文件读取配置到内存"""
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                self._config = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             raise RuntimeError(f"配置文件损坏或格式错误: {str(e)}")
+        self._file_signature = self._stat_signature()
+        self._checked_at = time.monotonic()
+
+    def _read_config(self) -> Dict:
+        """
+        读取配置内容的副本
+
+        只在第一次调用或配置文件被外部修改（修改时间或大小变化）时读取文件；
+        内存中有还没写入的修改时以内存为准。
+        """
+        with self._lock:
+            if self._config is None:
+                self._load()
+            elif not self._dirty and time.monotonic() - self._checked_at >= self.reload_check_interval:
+                self._checked_at = time.monotonic()
+                if self._stat_signature() != self._file_signature:
+                    self._load()
+            return copy.deepcopy(self._config)
 
     def _write_config(self, config: Dict) -> OperationResult:
-        """写入配置文件"""
-        try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=4)
+        """写入配置，先更新内存，再在 flush_delay 秒后写入文件"""
+        with self._lock:
+            self._config = config
+            self._dirty = True
+            if self.flush_delay <= 0:
+                return self.flush()
+            if self._flush_timer is None:
+                self._schedule_flush(self.flush_delay)
+        return self._create_success_result(f"配置已更新，将在 {self.flush_delay} 秒后写入文件")
+
+    def _schedule_flush(self, delay: float):
+        """安排后台写入，调用时需持有锁"""
+        self._flush_timer = threading.Timer(delay, self._flush_in_background)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_in_background(self):
+        """定时器线程中写入文件，失败时报告错误并安排重试，修改不会留在内存中无人写入"""
+        result = self.flush()
+        if result["success"]:
+            return
+        self.flushErrorCallback(result["message"])
+        with self._lock:
+            if self._dirty and self._flush_timer is None:
+                self._schedule_flush(self.retry_delay)
+
+    def flush(self) -> OperationResult:
+        """
+        把内存中的修改写入配置文件，先写临时文件再替换，避免中途退出留下损坏的文件
+
+        Returns:
+            操作结果字典
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return self._create_success_result("配置文件没有需要写入的修改")
+            try:
+                temp_path = self.config_path.with_suffix(self.config_path.suffix + '.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._config, f, ensure_ascii=False, indent=4)
+                os.replace(temp_path, self.config_path)
+            except Exception as e:
+                return self._create_error_result(f"配置文件写入失败: {str(e)}")
+            self._dirty = False
+            self._file_signature = self._stat_signature()
+            self._checked_at = time.monotonic()
             return self._create_success_result("配置文件写入成功")
-        except Exception as e:
-            return self._create_error_result(f"配置文件写入失败: {str(e)}")
 
     def _validate_cookies(self, cookies: Dict[str, str], required_keys: set) -> OperationResult:
         """验证cookie字段完整性"""
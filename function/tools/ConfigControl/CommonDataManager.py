@@ -162,8 +162,10 @@ CommonDataManager 是一个用于管理用户多种类型常用数据的 Python
 """
 import json
 import os
+import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Union, Optional, Any
+from typing import Dict, Iterable, List, Set, Union, Optional, Any
 
 
 class CommonDataManager:
@@ -176,35 +178,74 @@ class CommonDataManager:
     - 支持增删改查操作
     - 自动创建不存在的目录和文件
     - 自动转换旧格式数据到新格式
+    - 先写临时文件再替换，写入中途退出不会损坏文件
+    - batch() 中的多次修改只保存一次
+    - 可选 SQLite 存储，只写入修改过的用户
 
     参数:
         directory: 文件存放目录
         default_data_type: 默认数据类型（用于向后兼容）
     """
 
-    def __init__(self, filepath: Union[str, Path], default_data_type: str = "title"):
+    SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+    """默认使用 SQLite 存储的文件后缀"""
+
+    def __init__(self, filepath: Union[str, Path], default_data_type: str = "title", backend: Optional[str] = None):
         """
         初始化CommonDataManager
 
         Args:
             filepath: 文件路径
             default_data_type: 默认数据类型（用于处理旧格式数据）
-            maximum_quantity_of_elements: 保留的最大元素数
+            backend: 存储方式，"json" 或 "sqlite"，None 表示按文件后缀判断；
+                SQLite 文件第一次创建时，如果同名的 .json 文件存在则导入其中的数据
         """
         self.filepath = Path(filepath)
         self.default_data_type = default_data_type
+        self.backend = backend or ("sqlite" if self.filepath.suffix.lower() in self.SQLITE_SUFFIXES else "json")
+        """存储方式"""
         self.data: Dict[str, Dict[str, List[str]]] = {}
+        self._batch_depth = 0  # batch() 的嵌套层数
+        self._pending_users: Set[str] = set()  # batch() 中修改过的用户
+        self._pending_all = False  # batch() 中需要保存全部数据
+        self._db: Optional[sqlite3.Connection] = None
 
         # 确保目录存在
         self.filepath.parent.mkdir(parents=True, exist_ok=True)
 
+        if self.backend == "sqlite":
+            self._open_sqlite()
         # 如果文件不存在则创建
-        if not self.filepath.exists():
+        elif not self.filepath.exists():
             self._save_data()
         else:
             self._load_data()
             self._convert_old_format()
 
+    def _open_sqlite(self) -> None:
+        """打开 SQLite 文件并读取数据，新建时导入同名 .json 文件"""
+        is_new = not self.filepath.exists()
+        self._db = sqlite3.connect(str(self.filepath), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS common_data ("
+                "user_id TEXT NOT NULL, data_type TEXT NOT NULL, items TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, data_type))"
+            )
+        json_path = self.filepath.with_suffix(".json")
+        if is_new and json_path.exists():
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                self.data = {}
+            with self.batch():
+                self._convert_old_format()
+                self._save_data()
+            return
+        for user_id, data_type, items in self._db.execute("SELECT user_id, data_type, items FROM common_data"):
+            self.data.setdefault(user_id, {})[data_type] = json.loads(items)
+
     def _load_data(self) -> None:
         """从文件加载数据"""
         try:
@@ -215,10 +256,72 @@ class CommonDataManager:
             self.data = {}
             self._save_data()
 
-    def _save_data(self) -> None:
-        """保存数据到文件"""
-        with open(self.filepath, 'w', encoding='utf-8') as f:
+    def _save_data(self, *user_ids: str) -> None:
+        """
+        保存数据，在 batch() 中时推迟到 batch() 结束
+
+        Args:
+            *user_ids: 修改过的用户，不指定表示全部
+        """
+        if self._batch_depth:
+            self._pending_users.update(user_ids)
+            self._pending_all = self._pending_all or not user_ids
+            return
+        if self.backend == "sqlite":
+            self._write_sqlite(user_ids)
+        else:
+            self._write_json()
+
+    def _write_json(self) -> None:
+        """保存数据到文件，先写临时文件并同步到磁盘，再替换原文件"""
+        temp_path = self.filepath.with_suffix(self.filepath.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(self.data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.filepath)
+
+    def _write_sqlite(self, user_ids: Iterable[str] = ()) -> None:
+        """在一个事务中重写这些用户的行，不指定用户时重写全部"""
+        user_ids = list(user_ids)
+        with self._db:
+            if user_ids:
+                self._db.executemany("DELETE FROM common_data WHERE user_id = ?", [(u,) for u in user_ids])
+            else:
+                self._db.execute("DELETE FROM common_data")
+                user_ids = list(self.data)
+            self._db.executemany(
+                "INSERT INTO common_data (user_id, data_type, items) VALUES (?, ?, ?)",
+                [(user_id, data_type, json.dumps(items, ensure_ascii=False))
+                 for user_id in user_ids for data_type, items in self.data.get(user_id, {}).items()]
+            )
+
+    @contextmanager
+    def batch(self):
+        """
+        合并多次修改，只在最外层 batch() 结束时保存一次
+
+        示例:
+            with manager.batch():
+                manager.add_data("143474500", "title", "标题1")
+                manager.add_data("143474500", "danmuRoomid", "123", 99)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and (self._pending_all or self._pending_users):
+                user_ids = () if self._pending_all else tuple(self._pending_users)
+                self._pending_users.clear()
+                self._pending_all = False
+                self._save_data(*user_ids)
+
+    def close(self) -> None:
+        """关闭 SQLite 连接，JSON 存储无需关闭"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
 
     def _convert_old_format(self) -> None:
         """将旧格式数据转换为新格式"""
@@ -265,6 +368,11 @@ class CommonDataManager:
             data_type: 数据类型
             item: 要添加的数据项
         """
+        # 已经在最前面且数量没有超出时不需要修改
+        current = self.data.get(user_id, {}).get(data_type, [])
+        if current[:1] == [item] and len(current) <= maximum:
+            return
+
         # 确保用户数据存在
         if user_id not in self.data:
             self.data[user_id] = {}
@@ -288,7 +396,7 @@ class CommonDataManager:
 
         # 更新数据并保存
         self.data[user_id][data_type] = items
-        self._save_data()
+        self._save_data(user_id)
 
     def remove_data(self, user_id: str, data_type: str, item: str) -> bool:
         """
@@ -316,7 +424,7 @@ class CommonDataManager:
                 # 如果用户数据为空，则删除用户条目
                 if not self.data[user_id]:
                     del self.data[user_id]
-            self._save_data()
+            self._save_data(user_id)
             return True
         return False
 
@@ -344,7 +452,7 @@ class CommonDataManager:
             index = items.index(old_item)
             items.pop(index)
             items.insert(0, new_item)
-            self._save_data()
+            self._save_data(user_id)
             return True
         return False
 
@@ -369,7 +477,7 @@ class CommonDataManager:
             if not self.data[user_id]:
                 del self.data[user_id]
 
-        self._save_data()
+        self._save_data(user_id)
 
     def get_all_users(self) -> List[str]:
         """
@@ -0,0 +1,169 @@
+import asyncio
+import pathlib
+import time
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from PIL import Image
+
+from function.tools.EncodingConversion.url2pillow_image import url2pillow_image
+
+
+class DanmuAssetCache:
+    """
+    弹幕图片资源缓存
+
+    头像、表情、舰队徽章等图片在线程池中下载并保存到数据目录，
+    事件循环只查询内存中的 {网页路径: (宽, 高)} 索引，不再做磁盘检查、读取图片或网络请求。
+    同一图片的并发请求合并为一次加载，同时进行的加载数量有上限。
+    加载失败的图片在 failure_ttl 秒内不再重试，失效的链接不会让每条消息都重新下载一次。
+    """
+
+    def __init__(self, root_dir: Union[str, pathlib.Path], headers: Dict[str, str], max_concurrency: int = 4,
+                 on_ready: Optional[Callable[[str, int, int], None]] = None, failure_ttl: float = 60):
+        """
+        Args:
+            root_dir: 网页根目录，网页路径 './img/...' 相对于该目录保存
+            headers: 下载图片使用的请求头
+            max_concurrency: 同时进行的加载数量上限
+            on_ready: 图片加载完成回调，参数为网页路径、宽、高，在事件循环中调用
+            failure_ttl: 加载失败后不再重试的时间（秒）
+        """
+        self.root_dir = pathlib.Path(root_dir)
+        """网页根目录"""
+        self.headers = headers
+        """下载图片使用的请求头"""
+        self.max_concurrency = max_concurrency
+        """同时进行的加载数量上限"""
+        self.on_ready: Callable[[str, int, int], None] = on_ready or (lambda web_path, width, height: None)
+        """图片加载完成回调，参数为网页路径、宽、高"""
+        self.failure_ttl = failure_ttl
+        """加载失败后不再重试的时间"""
+        self.failed_count = 0
+        """加载失败次数"""
+        self._index: Dict[str, Tuple[int, int]] = {}  # {网页路径: (宽, 高)}
+        self._pending: Dict[str, asyncio.Future] = {}  # {网页路径: 正在进行的加载}
+        self._failed: Dict[str, float] = {}  # {网页路径: 加载失败的时间}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def file_path(self, web_path: str) -> pathlib.Path:
+        """网页路径对应的本地文件路径"""
+        return self.root_dir / web_path.replace('./', '')
+
+    def get_size(self, web_path: str) -> Optional[Tuple[int, int]]:
+        """返回已索引图片的 (宽, 高)，未索引时返回 None"""
+        return self._index.get(web_path)
+
+    def _should_load(self, web_path: str) -> bool:
+        """没有正在进行的加载，且不在失败后的等待时间内"""
+        if web_path in self._pending:
+            return False
+        failed_at = self._failed.get(web_path)
+        if failed_at is not None:
+            if time.monotonic() - failed_at < self.failure_ttl:
+                return False
+            del self._failed[web_path]
+        return True
+
+    def request(self, url: str, web_path: str) -> Optional[Tuple[int, int]]:
+        """
+        请求一张网络图片，必须在事件循环中调用
+        Args:
+            url: 图片的网络直链
+            web_path: 图片在网页中的路径，如 './img/face/xxx.jpg'
+
+        Returns:
+            已索引时返回 (宽, 高)；否则安排后台加载并返回 None，加载完成后调用 on_ready
+        """
+        size = self._index.get(web_path)
+        if size is None and url and self._should_load(web_path):
+            self._pending[web_path] = asyncio.ensure_future(self._load(web_path, self._load_remote, url))
+        return size
+
+    def request_local(self, source_path: Union[str, pathlib.Path], web_path: str) -> Optional[Tuple[int, int]]:
+        """
+        请求一张本地图片的尺寸，必须在事件循环中调用
+        Args:
+            source_path: 图片的本地路径
+            web_path: 图片在网页中的路径
+
+        Returns:
+            已索引时返回 (宽, 高)；否则安排后台读取并返回 None，读取完成后调用 on_ready
+        """
+        size = self._index.get(web_path)
+        if size is None and self._should_load(web_path):
+            self._pending[web_path] = asyncio.ensure_future(self._load(web_path, self._read_size, source_path))
+        return size
+
+    async def warm_up(self, *sub_dirs: str) -> int:
+        """
+        在线程池中扫描已保存的图片，预先建立尺寸索引
+        Args:
+            *sub_dirs: 相对网页根目录的子目录，如 'img/face'
+
+        Returns:
+            索引中的图片数量
+        """
+        for web_path, size in await asyncio.get_running_loop().run_in_executor(None, self._scan, sub_dirs):
+            self._index.setdefault(web_path, size)
+        return len(self._index)
+
+    def _scan(self, sub_dirs: Tuple[str, ...]):
+        found = []
+        for sub_dir in sub_dirs:
+            directory = self.root_dir / sub_dir
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                size = self._read_size(path)
+                if size is not None:
+                    found.append((f"./{path.relative_to(self.root_dir).as_posix()}", size))
+        return found
+
+    async def _load(self, web_path: str, loader: Callable, source):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            async with self._semaphore:
+                size = await asyncio.get_running_loop().run_in_executor(None, loader, source, web_path)
+        finally:
+            self._pending.pop(web_path, None)
+        if size is None:
+            self.failed_count += 1
+            self._failed[web_path] = time.monotonic()
+            return
+        self._index[web_path] = size
+        self.on_ready(web_path, *size)
+
+    @staticmethod
+    def _read_size(path: Union[str, pathlib.Path], web_path: str = '') -> Optional[Tuple[int, int]]:
+        """只读取图片头部获得尺寸"""
+        try:
+            with Image.open(path) as img:
+                return img.size
+        except Exception:
+            return None
+
+    def _load_remote(self, url: str, web_path: str) -> Optional[Tuple[int, int]]:
+        """已保存过的图片直接读取尺寸，否则下载后保存"""
+        path = self.file_path(web_path)
+        if path.exists():
+            return self._read_size(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        result = url2pillow_image(url, self.headers)
+        if not result or result.get("PilImg") is None:
+            return None
+        pillow_img = result["PilImg"]
+        try:
+            pillow_img.save(path)
+        except Exception:
+            return None
+        return pillow_img.size
+
+    def size(self) -> int:
+        """返回索引中的图片数量"""
+        return len(self._index)
+
+    def clear(self):
+        """清空索引和失败记录，不删除已保存的文件"""
+        self._index.clear()
+        self._failed.clear()
@@ -0,0 +1,191 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Union
+
+
+class DanmuFanIn:
+    """
+    多连接弹幕汇流
+
+    同一直播间的多个 wss 连接会收到相同的消息，这里按消息自带的标识
+    (msg_id / id_str / tid) 合并，只放行每条消息的第一次到达；
+    没有标识的消息退回到正文的整数哈希。
+    同时统计每个连接的接收数、抢先数、丢失数和相对最快连接的延迟，用于调整连接数。
+    """
+
+    _IDENTITY_PATTERN = re.compile(r'\\?"(?:msg_id|id_str|tid)\\?"\s*:\s*\\?"([^"\\]+)')
+    """从原始 JSON 文本中取消息标识，兼容 DANMU_MSG extra 字段中被转义的引号"""
+    _CMD_PATTERN = re.compile(r'"cmd"\s*:\s*"([^"]*)"')
+    """从原始 JSON 文本中取命令名，避免不同命令的标识相互冲突"""
+    DEFAULT_WINDOW_SECONDS = 6
+    """默认的合并窗口（秒）"""
+
+    def __init__(self, window_seconds: Optional[float] = DEFAULT_WINDOW_SECONDS, max_size: int = 20000):
+        """
+        Args:
+            window_seconds: 合并窗口（秒），超过窗口仍未到达的连接记为丢失；None 或不大于 0 时使用默认窗口
+            max_size: 窗口内最多跟踪的消息数量，超出时最旧的消息提前结算，
+                应远大于一个窗口内的消息数，否则还没追上的连接会被误记为丢失
+        """
+        self._window_seconds = self.DEFAULT_WINDOW_SECONDS
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        """窗口内最多跟踪的消息数量"""
+        self.unique_count = 0
+        """合并后的消息总数"""
+        self._entries: OrderedDict = OrderedDict()  # {标识: [首次到达时间, 已送达连接位掩码]}
+        self._connections: Dict[int, Dict[str, Union[int, float, None]]] = {}
+
+    @property
+    def window_seconds(self) -> float:
+        """合并窗口（秒）"""
+        return self._window_seconds
+
+    @window_seconds.setter
+    def window_seconds(self, value: Optional[float]):
+        # 窗口为 0 时每条消息在下一条到达时就被结算，重复消息会全部放行，所以退回默认窗口
+        self._window_seconds = value if value and value > 0 else self.DEFAULT_WINDOW_SECONDS
+
+    @classmethod
+    def message_identity(cls, content: str) -> Hashable:
+        """
+        获取消息标识
+        Args:
+            content: 消息的原始 JSON 文本
+
+        Returns:
+            (命令名, 消息自带的标识)，没有标识时返回正文的整数哈希
+        """
+        match = cls._IDENTITY_PATTERN.search(content)
+        if match:
+            cmd = cls._CMD_PATTERN.search(content)
+            return cmd.group(1) if cmd else None, match.group(1)
+        return hash(content)
+
+    def register_connection(self, connection_id: int, now: Optional[float] = None):
+        """连接认证成功后登记，之后到达的消息才会计入该连接的丢失统计"""
+        stats = self._connections.setdefault(connection_id, {
+            "received": 0, "first": 0, "missed": 0, "lag_total": 0.0, "lag_max": 0.0, "active_since": None
+        })
+        stats["active_since"] = time.monotonic() if now is None else now
+
+    def unregister_connection(self, connection_id: int):
+        """连接断开后注销，断开期间不计丢失"""
+        if connection_id in self._connections:
+            self._connections[connection_id]["active_since"] = None
+
+    def accept(self, connection_id: int, content: str, now: Optional[float] = None) -> bool:
+        """
+        汇入一条消息
+        Args:
+            connection_id: 收到消息的连接序号
+            content: 消息的原始 JSON 文本
+            now: 到达时间（time.monotonic），默认取当前时间
+
+        Returns:
+            是否是该消息的第一次到达
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        stats = self._connections.get(connection_id)
+        if stats is None:
+            self.register_connection(connection_id, now)
+            stats = self._connections[connection_id]
+        stats["received"] += 1
+
+        identity = self.message_identity(content)
+        entry = self._entries.get(identity)
+        if entry is not None:
+            entry[1] |= 1 << connection_id
+            lag = now - entry[0]
+            stats["lag_total"] += lag
+            if lag > stats["lag_max"]:
+                stats["lag_max"] = lag
+            return False
+
+        self._entries[identity] = [now, 1 << connection_id]
+        self.unique_count += 1
+        stats["first"] += 1
+        if len(self._entries) > self.max_size:
+            self._settle(*self._entries.popitem(last=False))
+        return True
+
+    def _expire(self, now: float):
+        """结算超出窗口的消息，只从最旧的一端弹出"""
+        entries = self._entries
+        while entries:
+            identity, entry = next(iter(entries.items()))
+            if now - entry[0] <= self.window_seconds:
+                break
+            del entries[identity]
+            self._settle(identity, entry)
+
+    def _settle(self, identity: Hashable, entry: list):
+        """消息离开窗口时，为没有送达的在线连接记一次丢失"""
+        first_time, mask = entry
+        for connection_id, stats in self._connections.items():
+            active_since = stats["active_since"]
+            if active_since is not None and active_since <= first_time and not mask >> connection_id & 1:
+                stats["missed"] += 1
+
+    def settle_pending(self):
+        """结算窗口内所有还在等待的消息，用于停止接收之后、读取统计之前"""
+        entries = self._entries
+        while entries:
+            self._settle(*entries.popitem(last=False))
+
+    def get_connection_stats(self) -> Dict[int, Dict[str, Union[int, float, bool]]]:
+        """
+        返回每个连接的统计信息
+
+        Returns:
+            {连接序号: {"received": 接收数, "first": 抢先到达数, "missed": 丢失数,
+            "loss_rate": 丢失率, "avg_lag_ms": 平均落后毫秒, "max_lag_ms": 最大落后毫秒, "active": 是否在线}}
+        """
+        result = {}
+        for connection_id, stats in sorted(self._connections.items()):
+            received = stats["received"]
+            expected = received + stats["missed"]
+            result[connection_id] = {
+                "received": received,
+                "first": stats["first"],
+                "missed": stats["missed"],
+                "loss_rate": stats["missed"] / expected if expected else 0.0,
+                "avg_lag_ms": stats["lag_total"] / received * 1000 if received else 0.0,
+                "max_lag_ms": stats["lag_max"] * 1000,
+                "active": stats["active_since"] is not None,
+            }
+        return result
+
+    def size(self) -> int:
+        """返回窗口内正在跟踪的消息数量"""
+        return len(self._entries)
+
+    def clear(self):
+        """清空窗口和统计"""
+        self._entries.clear()
+        self._connections.clear()
+        self.unique_count = 0
+
+
+if __name__ == '__main__':
+    import json
+    import random
+
+    fan_in = DanmuFanIn(window_seconds=2)
+    for connection_id in range(6):
+        fan_in.register_connection(connection_id, 0.0)
+
+    delivered = 0
+    for i in range(10000):
+        extra = json.dumps({"id_str": f"id-{i}", "content": "测试"})
+        content = json.dumps({"cmd": "DANMU_MSG", "info": [[0, 1, 25, 16777215, 0, 0, 0, "", 0, 0, 0, "", 0, "{}", "{}",
+                                                             {"extra": extra}]]})
+        for connection_id in range(6):
+            if connection_id == 5 and random.random() < 0.1:
+                continue  # 模拟第 6 个连接丢包
+            delivered += fan_in.accept(connection_id, content, i * 0.001 + connection_id * 0.002)
+    print(f"放行 {delivered} 条")
+    for connection_id, stats in fan_in.get_connection_stats().items():
+        print(connection_id, stats)
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+
+class DanmuRoomContext:
+    """
+    弹幕会话的直播间上下文
+
+    主播 uid 等直播间基本信息在会话开始时获取一次，之后的消息处理只读内存中的属性，
+    不再为每条消息请求接口；收到 ROOM_CHANGE / LIVE 时在线程池中刷新，刷新失败保留旧值。
+    """
+
+    def __init__(self, room_id: int, fetch_room_info: Callable[[int], Dict[str, Any]]):
+        """
+        Args:
+            room_id: 直播间ID
+            fetch_room_info: 获取直播间基本信息的函数，如 BilibiliApiGeneric.get_room_base_info
+        """
+        self.room_id = room_id
+        """直播间ID"""
+        self.fetch_room_info = fetch_room_info
+        """获取直播间基本信息的函数"""
+        self.uid: Optional[int] = None
+        """主播 uid，未获取到时为 None"""
+        self.info: Dict[str, Any] = {}
+        """最近一次获取成功的直播间基本信息"""
+        self.refresh_count = 0
+        """获取成功的次数"""
+        self._refreshing: Optional[asyncio.Future] = None
+
+    def refresh(self) -> bool:
+        """
+        同步获取直播间基本信息
+        Returns:
+            是否获取成功
+        """
+        result = self.fetch_room_info(self.room_id)
+        if not result.get("success"):
+            return False
+        self.info = result["data"]
+        self.uid = self.info.get("uid", self.uid)
+        self.refresh_count += 1
+        return True
+
+    async def refresh_async(self) -> bool:
+        """在线程池中获取直播间基本信息"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def schedule_refresh(self):
+        """在事件循环中安排一次后台刷新，上一次刷新未完成时不重复请求"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self.refresh_async())
+
+    def is_owner(self, uid: Any) -> bool:
+        """判断 uid 是否为主播"""
+        return self.uid is not None and uid == self.uid
@@ -1,8 +1,20 @@
 import base64
 import json
+import threading
+import time
+import types
+from typing import Dict, Tuple
+
 from function.tools.EncodingConversion.str_to_module import str_to_module
 
 class DanmuProtoDecoder:
+    _compiled_modules: Dict[str, types.ModuleType] = {}
+    """进程级 pb2 模块注册表 {模块名: 模块}，每个模块只编译一次，所有连接共用"""
+    _compile_lock = threading.Lock()
+    """编译 pb2 模块时的锁，避免多个连接同时 exec 同一份源码"""
+    _field_plans: Dict[str, Tuple[Tuple[str, bool, bool], ...]] = {}
+    """消息字段遍历计划缓存 {消息全名: ((字段名, 是否重复字段, 是否消息字段), ...)}"""
+
     def __init__(self):
         self.online_rank_v3_pb2 = """
 from google.protobuf import descriptor as _descriptor
@@ -173,13 +185,31 @@ if not _descriptor._USE_C_DESCRIPTORS:
 # @@protoc_insertion_point(module_scope)
 """
 
+    def get_pb2_module(self, module_name: str) -> types.ModuleType:
+        """
+        获取已编译的 pb2 模块，首次调用时编译并登记到进程级注册表
+        Args:
+            module_name: 模块名，同时也是保存 pb2 源码的属性名，如 "interact_word_v2_pb2"
+
+        Returns:
+            编译后的 pb2 模块
+        """
+        module = DanmuProtoDecoder._compiled_modules.get(module_name)
+        if module is None:
+            with DanmuProtoDecoder._compile_lock:
+                module = DanmuProtoDecoder._compiled_modules.get(module_name)
+                if module is None:
+                    module = str_to_module(module_name, getattr(self, module_name))
+                    DanmuProtoDecoder._compiled_modules[module_name] = module
+        return module
+
     # 更完整的解决方案：使用protobuf库编译proto文件
     def decode_online_rank_v3_protobuf(self, base64_string):
         """
-        使用protobuf库完整解码（需要先编译proto文件）
+        使用protobuf库完整解码（pb2 模块只在首次调用时编译）
         """
-        # 导入编译后的模块
-        online_rank_v3_pb2 = str_to_module("online_rank_v3_pb2", self.online_rank_v3_pb2)
+        # 获取编译后的模块
+        online_rank_v3_pb2 = self.get_pb2_module("online_rank_v3_pb2")
         # 解码
         pb_data = base64.b64decode(base64_string)
         message = online_rank_v3_pb2.GoldRankBroadcast()
@@ -190,10 +220,10 @@ if not _descriptor._USE_C_DESCRIPTORS:
 
     def decode_interact_word_v2_protobuf(self, base64_string):
         """
-        使用protobuf库完整解码（需要先编译proto文件）
+        使用protobuf库完整解码（pb2 模块只在首次调用时编译）
         """
-        # 导入编译后的模块
-        interact_word_v2_pb2 = str_to_module("interact_word_v2_pb2", self.interact_word_v2_pb2)
+        # 获取编译后的模块
+        interact_word_v2_pb2 = self.get_pb2_module("interact_word_v2_pb2")
         # 解码
         pb_data = base64.b64decode(base64_string)
         message = interact_word_v2_pb2.InteractWord()
@@ -202,19 +232,32 @@ if not _descriptor._USE_C_DESCRIPTORS:
         # 转换为字典
         return self.protobuf_to_dict(message)
 
+    def _get_field_plan(self, descriptor) -> Tuple[Tuple[str, bool, bool], ...]:
+        """获取消息的字段遍历计划，按消息全名缓存"""
+        plan = DanmuProtoDecoder._field_plans.get(descriptor.full_name)
+        if plan is None:
+            # 新版 protobuf 移除了 FieldDescriptor.label，改用 is_repeated
+            plan = tuple(
+                (field.name,
+                 field.is_repeated if hasattr(field, 'is_repeated') else field.label == field.LABEL_REPEATED,
+                 field.type == field.TYPE_MESSAGE)
+                for field in descriptor.fields
+            )
+            DanmuProtoDecoder._field_plans[descriptor.full_name] = plan
+        return plan
+
     def protobuf_to_dict(self, obj):
         """将protobuf对象转换为字典"""
         result = {}
 
-        for field in obj.DESCRIPTOR.fields:
-            field_name = field.name
+        for field_name, is_repeated, is_message in self._get_field_plan(obj.DESCRIPTOR):
             value = getattr(obj, field_name)
 
-            if field.label == field.LABEL_REPEATED:
+            if is_repeated:
                 # 重复字段
                 result[field_name] = [self.protobuf_to_dict(item) if hasattr(item, 'DESCRIPTOR') else item
                                       for item in value]
-            elif field.type == field.TYPE_MESSAGE:
+            elif is_message:
                 # 消息类型字段
                 if hasattr(value, 'DESCRIPTOR'):
                     result[field_name] = self.protobuf_to_dict(value)
@@ -227,6 +270,40 @@ if not _descriptor._USE_C_DESCRIPTORS:
         return result
 
 
+def benchmark_decode(number: int = 2000) -> Dict[str, float]:
+    """
+    对比每条消息都重新编译 pb2 模块与使用注册表的解码耗时
+    Args:
+        number: 解码的消息条数
+
+    Returns:
+        每条消息的平均耗时（微秒）{"legacy_us": ..., "registry_us": ...}
+    """
+    decoder = DanmuProtoDecoder()
+    interact_word_v2_pb2 = decoder.get_pb2_module("interact_word_v2_pb2")
+    message = interact_word_v2_pb2.InteractWord(uid=123456, uname="测试用户", msg_type=1, roomid=1000,
+                                                timestamp=int(time.time()))
+    message.fans_medal.medal_name = "粉丝团"
+    message.fans_medal.medal_level = 21
+    base64_string = base64.b64encode(message.SerializeToString()).decode()
+
+    legacy_number = max(1, number // 20)
+    start = time.perf_counter()
+    for _ in range(legacy_number):
+        legacy_module = str_to_module("interact_word_v2_pb2", decoder.interact_word_v2_pb2)
+        legacy_message = legacy_module.InteractWord()
+        legacy_message.ParseFromString(base64.b64decode(base64_string))
+        decoder.protobuf_to_dict(legacy_message)
+    legacy_us = (time.perf_counter() - start) / legacy_number * 1e6
+
+    start = time.perf_counter()
+    for _ in range(number):
+        DanmuProtoDecoder().decode_interact_word_v2_protobuf(base64_string)
+    registry_us = (time.perf_counter() - start) / number * 1e6
+
+    return {"legacy_us": legacy_us, "registry_us": registry_us}
+
+
 # 使用示例
 if __name__ == "__main__":
     from _Input.Proto_base64.Proto_base64_str import online_rank_v3_base64_str, interact_word_v2_base64_str
@@ -239,3 +316,7 @@ if __name__ == "__main__":
     result2 = DanmuProtoDecoder().decode_interact_word_v2_protobuf(interact_word_v2_base64_str)
     if result2:
         print(json.dumps(result2, indent=2, ensure_ascii=False))
+
+    print("\n=== 解码耗时对比 ===")
+    cost = benchmark_decode()
+    print(f"每条重新编译: {cost['legacy_us']:.1f} μs/条, 注册表: {cost['registry_us']:.1f} μs/条")
@@ -38,6 +38,8 @@ import requests
 from PIL import Image
 from io import BytesIO
 
+from function.tools.HttpSessionPool import HttpSessionPool
+
 # 自定义错误码
 NETWORK_ERROR = 0  # 表示没有HTTP响应的网络错误
 IMAGE_PROCESSING_ERROR = 1000  # 图像处理错误
@@ -59,7 +61,8 @@ def url2pillow_image(url: str, headers: Dict[str, str], verify_ssl: bool = True)
         - 'Message': 成功时为"Success"，失败时为错误信息
     """
     try:
-        with requests.get(url, headers=headers, stream=True, verify=verify_ssl) as response:
+        with HttpSessionPool.shared().session.get(url, headers=headers, stream=True,
+                                                  verify=verify_ssl) as response:
             response.raise_for_status()
             image_data = BytesIO()
             for chunk in response.iter_content(chunk_size=8192):
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+
+class GuardMembershipIndex:
+    """
+    大航海成员索引 {uid: 舰队等级}
+
+    启动时先读取上次保存的索引，立即可用；再在线程池中加载完整列表替换。
+    直播中的 USER_TOAST_MSG_V2 / GUARD_BUY 消息会增量更新索引，新上舰的用户立刻带上徽章。
+    """
+
+    def __init__(self, roomid: Union[int, str], ruid: Union[int, str],
+                 fetch_guard_list: Callable[..., Dict[str, Any]],
+                 cache_path: Optional[Union[str, pathlib.Path]] = None, save_delay: float = 30.0):
+        """
+        Args:
+            roomid: 直播间号
+            ruid: 主播UID
+            fetch_guard_list: 获取大航海列表的函数，如 BilibiliApiGeneric.get_guard_list
+            cache_path: 索引的保存路径，None 表示不保存
+            save_delay: 消息更新索引后延迟保存的秒数，期间的更新合并为一次写入
+        """
+        self.roomid = roomid
+        """直播间号"""
+        self.ruid = ruid
+        """主播UID"""
+        self.fetch_guard_list = fetch_guard_list
+        """获取大航海列表的函数"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """索引的保存路径"""
+        self.save_delay = save_delay
+        """消息更新索引后延迟保存的秒数"""
+        self.loaded_at: Optional[float] = None
+        """最近一次完整加载的时间戳，未加载时为 None"""
+        self._levels: Dict[int, int] = {}
+        self._live_updates: Dict[int, int] = {}  # 本次会话中从消息得到的更新，完整加载后重新应用
+        self._save_lock = threading.Lock()
+        self._dirty = False  # 有未保存的更新
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+
+    def __contains__(self, uid: Any) -> bool:
+        return uid in self._levels
+
+    def __getitem__(self, uid: Any) -> int:
+        return self._levels[uid]
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def get(self, uid: Any, default: Optional[int] = None) -> Optional[int]:
+        """返回 uid 的舰队等级 (1 总督, 2 提督, 3 舰长)，不是成员时返回 default"""
+        return self._levels.get(uid, default)
+
+    def load_cache(self) -> int:
+        """
+        读取上次保存的索引
+        Returns:
+            读取到的成员数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if str(data.get("ruid")) != str(self.ruid):
+            return 0
+        levels = {int(uid): level for uid, level in data.get("levels", {}).items()}
+        levels.update(self._live_updates)
+        self._levels = levels
+        self.loaded_at = data.get("loaded_at")
+        return len(levels)
+
+    def save_cache(self):
+        """保存索引，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        levels = dict(self._levels)
+        self._dirty = False
+        with self._save_lock:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"ruid": self.ruid, "loaded_at": self.loaded_at, "levels": levels}, f)
+            os.replace(temp_path, self.cache_path)
+
+    def refresh(self) -> bool:
+        """
+        同步加载完整的大航海列表并保存
+        Returns:
+            是否加载成功
+        """
+        result = self.fetch_guard_list(self.roomid, self.ruid, page=1, page_size=30, typ=5, include_total_list=True)
+        if not result.get("success"):
+            return False
+        levels = {}
+        for guard in result["data"].get("total_list", []):
+            levels[guard["uinfo"]["uid"]] = guard["uinfo"]["guard"]["level"]
+        levels.update(self._live_updates)
+        self._levels = levels
+        self.loaded_at = time.time()
+        self.save_cache()
+        return True
+
+    async def refresh_async(self) -> bool:
+        """在线程池中加载完整的大航海列表"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def save_if_dirty(self):
+        """有未保存的更新时保存索引"""
+        if self._dirty:
+            self.save_cache()
+
+    async def save_async(self):
+        """取消等待中的延迟保存，在线程池中保存未保存的更新，停止时调用"""
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        await asyncio.get_running_loop().run_in_executor(None, self.save_if_dirty)
+
+    def _schedule_save(self):
+        """在事件循环中安排一次延迟保存，没有运行中的事件循环时直接保存"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_if_dirty()
+            return
+        if self._save_handle:
+            return
+
+        def save_later():
+            self._save_handle = None
+            loop.run_in_executor(None, self.save_if_dirty)
+
+        self._save_handle = loop.call_later(self.save_delay, save_later)
+
+    def update(self, uid: int, level: int):
+        """记录一名成员的舰队等级，延迟到线程池中保存，避免上舰高峰时在事件循环中反复写文件"""
+        if not level:
+            return
+        self._live_updates[uid] = level
+        if self._levels.get(uid) != level:
+            self._levels[uid] = level
+            self._dirty = True
+            self._schedule_save()
+
+    def apply_event(self, content: Dict[str, Any]) -> Optional[int]:
+        """
+        用直播间消息更新索引
+        Args:
+            content: 直播间消息，处理 USER_TOAST_MSG_V2 和 GUARD_BUY
+
+        Returns:
+            消息中用户的舰队等级，不是上舰消息时返回 None
+        """
+        cmd = content.get('cmd')
+        data = content.get('data', {})
+        if cmd == "USER_TOAST_MSG_V2":
+            uid, level = data["sender_uinfo"]["uid"], data["guard_info"]["guard_level"]
+        elif cmd == "GUARD_BUY":
+            uid, level = data["uid"], data["guard_level"]
+        else:
+            return None
+        self.update(uid, level)
+        return level
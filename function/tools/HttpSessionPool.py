@@ -0,0 +1,149 @@
+import http.cookiejar
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class HttpSessionPool:
+    """
+    共享的 HTTP 长连接池
+
+    所有 B站 API 客户端共用一个 requests.Session，按主机分配连接池大小和默认超时，
+    同一主机的请求复用已建立的 TCP/TLS 连接，不再每次请求都重新握手。
+    Session 不保存响应中的 Cookie，各账号的 Cookie 仍由请求头传入，不会互相串用。
+    """
+
+    DEFAULT_HOST_POOL_SIZES: Dict[str, int] = {
+        "api.bilibili.com": 8,
+        "api.live.bilibili.com": 8,
+        "passport.bilibili.com": 2,
+        "member.bilibili.com": 2,
+        "www.bilibili.com": 2,
+    }
+    """各主机的连接池大小"""
+
+    _shared: Optional["HttpSessionPool"] = None
+    _shared_lock = threading.Lock()
+
+    class TimeoutHTTPAdapter(HTTPAdapter):
+        """请求没有指定 timeout 时使用默认超时的适配器"""
+
+        def __init__(self, timeout: Timeout, *args, **kwargs):
+            self.timeout = timeout
+            """默认超时 (连接超时, 读取超时)"""
+            super().__init__(*args, **kwargs)
+
+        def send(self, request, **kwargs):
+            if kwargs.get("timeout") is None:
+                kwargs["timeout"] = self.timeout
+            return super().send(request, **kwargs)
+
+    def __init__(self, host_pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = 4,
+                 timeout: Timeout = (5, 30), host_timeouts: Optional[Dict[str, Timeout]] = None):
+        """
+        Args:
+            host_pool_sizes: 各主机的连接池大小，默认 DEFAULT_HOST_POOL_SIZES
+            default_pool_size: 其他主机的连接池大小
+            timeout: 请求没有指定 timeout 时的默认超时 (连接超时, 读取超时)
+            host_timeouts: 各主机单独的默认超时
+        """
+        self.host_pool_sizes = dict(self.DEFAULT_HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+        """各主机的连接池大小"""
+        self.timeout = timeout
+        """默认超时"""
+        self.host_timeouts = dict(host_timeouts or {})
+        """各主机单独的默认超时"""
+        self.session = requests.Session()
+        """共享的会话，线程间共用"""
+        # 拒绝保存任何 Cookie，避免一个账号的响应 Cookie 被带到其他账号的请求里
+        self.session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        for scheme in ("https://", "http://"):
+            self.session.mount(scheme, self.TimeoutHTTPAdapter(
+                timeout, pool_connections=default_pool_size, pool_maxsize=default_pool_size))
+        for host, pool_size in self.host_pool_sizes.items():
+            self.session.mount(f"https://{host}/", self.TimeoutHTTPAdapter(
+                self.host_timeouts.get(host, timeout), pool_connections=1, pool_maxsize=pool_size))
+
+    @classmethod
+    def shared(cls) -> "HttpSessionPool":
+        """进程内共享的连接池，第一次调用时创建"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+def benchmark_session_pool(calls: int = 50) -> Dict[str, float]:
+    """
+    在本机启动自签名证书的 HTTPS 服务，对比每次新建连接与共享连接池的单次请求耗时
+    Args:
+        calls: 每种方式的请求次数
+
+    Returns:
+        {"per_call_ms": 每次新建连接的平均耗时, "pooled_ms": 共享连接池的平均耗时}
+    """
+    import os
+    import ssl
+    import subprocess
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    import urllib3
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            body = b'{"code":0,"data":{}}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cert_path = os.path.join(temp_dir, "cert.pem")
+        key_path = os.path.join(temp_dir, "key.pem")
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=127.0.0.1", "-keyout", key_path, "-out", cert_path],
+                       check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"https://127.0.0.1:{server.server_address[1]}/x/web-interface/nav"
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    pool = HttpSessionPool()
+    result = {}
+    try:
+        for name, get in (("per_call_ms", requests.get), ("pooled_ms", pool.session.get)):
+            get(url, verify=False, timeout=5)  # 预热
+            start = time.perf_counter()
+            for _ in range(calls):
+                get(url, verify=False, timeout=5).json()
+            result[name] = (time.perf_counter() - start) / calls * 1000
+    finally:
+        pool.close()
+        server.shutdown()
+    return result
+
+
+if __name__ == '__main__':
+    cost = benchmark_session_pool()
+    print(f"每次新建连接 {cost['per_call_ms']:.2f} ms/次, 共享连接池 {cost['pooled_ms']:.2f} ms/次")
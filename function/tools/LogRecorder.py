@@ -0,0 +1,164 @@
+import pathlib
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, TextIO, Union
+
+
+class LogRecorder:
+    """
+    日志记录器
+
+    内存中只保留最近 capacity 行，供界面显示；每一行同时放入队列，由后台线程每 flush_interval 秒批量写入文件。
+    当前文件超过 max_bytes 字节或已写入 max_age 秒时换一个新文件，目录中只保留最新的 keep_files 个 .log 文件。
+    设置目录之前记录的行先留在队列中，设置目录后一起写入；写入失败的行保留下来，下次写入时放在最前面。
+    """
+
+    def __init__(self, directory: Optional[Union[str, pathlib.Path]] = None, capacity: int = 2000,
+                 flush_interval: float = 1.0, max_bytes: int = 5 * 1024 * 1024, max_age: float = 86400,
+                 keep_files: Optional[int] = 100):
+        """
+        Args:
+            directory: 日志文件夹，None 表示稍后用 set_directory 设置
+            capacity: 内存中保留的最大行数
+            flush_interval: 后台线程写入文件的间隔（秒）
+            max_bytes: 单个日志文件的最大字节数
+            max_age: 单个日志文件的最长写入时间（秒）
+            keep_files: 文件夹中保留的日志文件数，None 表示不删除旧文件
+        """
+        self.capacity = capacity
+        """内存中保留的最大行数"""
+        self.flush_interval = flush_interval
+        """后台线程写入文件的间隔"""
+        self.max_bytes = max_bytes
+        """单个日志文件的最大字节数"""
+        self.max_age = max_age
+        """单个日志文件的最长写入时间"""
+        self.keep_files = keep_files
+        """文件夹中保留的日志文件数，None 表示不删除旧文件"""
+        self.directory: Optional[pathlib.Path] = None
+        """日志文件夹"""
+        self.current_path: Optional[pathlib.Path] = None
+        """正在写入的日志文件"""
+        self._recent: deque = deque(maxlen=capacity)
+        self._queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._unwritten: List[str] = []  # 已从队列取出但写入失败的行
+        self._file: Optional[TextIO] = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if directory is not None:
+            self.set_directory(directory)
+
+    def append(self, line: str):
+        """记录一行日志，不含换行符"""
+        self._recent.append(line)
+        self._queue.put(line)
+
+    def lines(self) -> List[str]:
+        """内存中保留的最近几行"""
+        return list(self._recent)
+
+    def text(self) -> str:
+        """内存中保留的最近几行，每行以换行符结尾"""
+        return "".join(line + "\n" for line in self.lines())
+
+    def set_directory(self, directory: Union[str, pathlib.Path]):
+        """设置日志文件夹并启动后台写入线程，文件夹改变时换新文件"""
+        directory = pathlib.Path(directory)
+        with self._write_lock:
+            if directory != self.directory:
+                self._close_file()
+                self.directory = directory
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="log-recorder", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass  # 磁盘错误时 flush 已保留没写入的行，下次再写
+
+    def _drain(self) -> List[str]:
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                return lines
+
+    def flush(self):
+        """把队列中的行写入当前日志文件，需要时换新文件"""
+        with self._write_lock:
+            if self.directory is None:
+                return
+            lines = self._unwritten + self._drain()
+            self._unwritten = []
+            if not lines:
+                return
+            try:
+                if self._file is not None and (self._file_bytes >= self.max_bytes
+                                               or time.time() - self._file_opened_at >= self.max_age):
+                    self._close_file()
+                if self._file is None:
+                    self._open_file()
+                data = "".join(line + "\n" for line in lines)
+                self._file.write(data)
+                self._file.flush()
+            except OSError:
+                self._unwritten = lines
+                self._close_file()  # 下次写入时重新打开文件
+                raise
+            self._file_bytes += len(data.encode("utf-8"))
+
+    def _open_file(self):
+        """打开一个以当前时间命名的新文件，并删除多余的旧文件"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = self.directory / f"{stem}.log"
+        index = 1
+        while path.exists():
+            path = self.directory / f"{stem}_{index}.log"
+            index += 1
+        self._file = open(path, "w", encoding="utf-8")
+        self.current_path = path
+        self._file_bytes = 0
+        self._file_opened_at = time.time()
+        self._prune()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _prune(self):
+        """按修改时间只保留最新的 keep_files 个 .log 文件"""
+        if self.keep_files is None:
+            return
+        log_files = sorted(
+            (f for f in self.directory.iterdir() if f.is_file() and f.suffix.lower() == '.log'),
+            key=lambda f: f.stat().st_mtime,
+            reverse=True
+        )
+        for old_file in log_files[self.keep_files:]:
+            if old_file != self.current_path:
+                old_file.unlink(missing_ok=True)
+
+    def close(self):
+        """停止后台线程，写入剩余的行并关闭文件"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self._thread = None
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                self._close_file()
@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class NetworkHealthMonitor:
+    """
+    网络连接与 SSL 证书验证的状态监视器
+
+    后台线程定期执行网络连接检查，连通时再检查 SSL 证书验证，保存最近一次的结果和检查时间；
+    读取状态不会发出任何请求。检查失败后按较短的间隔重试，恢复后回到正常间隔。
+    """
+
+    def __init__(self, check_network: Callable[[], Dict[str, Any]], check_ssl: Callable[[], Dict[str, Any]],
+                 interval: float = 60.0, retry_interval: float = 10.0):
+        """
+        Args:
+            check_network: 网络连接检查函数，如 Tools.check_network_connection，返回值含 'connected'
+            check_ssl: SSL 证书验证检查函数，如 Tools.check_ssl_verification，返回值含 'success'
+            interval: 网络正常时的检查间隔（秒）
+            retry_interval: 网络异常时的检查间隔（秒）
+        """
+        self.check_network = check_network
+        """网络连接检查函数"""
+        self.check_ssl = check_ssl
+        """SSL 证书验证检查函数"""
+        self.interval = interval
+        """网络正常时的检查间隔"""
+        self.retry_interval = retry_interval
+        """网络异常时的检查间隔"""
+        self.network: Optional[Dict[str, Any]] = None
+        """最近一次网络连接检查的结果，没有检查过时为 None"""
+        self.ssl: Optional[Dict[str, Any]] = None
+        """最近一次 SSL 证书验证检查的结果，没有检查过时为 None"""
+        self.checked_at: Optional[float] = None
+        """最近一次检查完成的时间戳，没有检查过时为 None"""
+        self._check_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        """最近一次检查时网络是否连通"""
+        return bool(self.network and self.network.get("connected"))
+
+    @property
+    def ssl_verified(self) -> bool:
+        """最近一次检查时 SSL 证书验证是否可用，没有检查过时按可用处理"""
+        return self.ssl is None or bool(self.ssl.get("success"))
+
+    def age(self) -> Optional[float]:
+        """距离最近一次检查完成的秒数，没有检查过时为 None"""
+        return None if self.checked_at is None else time.time() - self.checked_at
+
+    def check_now(self):
+        """立即检查一次，正在检查时等待那次检查完成"""
+        if not self._check_lock.acquire(blocking=False):
+            with self._check_lock:
+                return
+        try:
+            network = self.check_network()
+            ssl_result = self.check_ssl() if network.get("connected") else self.ssl
+            self.network, self.ssl = network, ssl_result
+            self.checked_at = time.time()
+        finally:
+            self._check_lock.release()
+
+    def request_check(self):
+        """让后台线程尽快检查一次，不等待结果"""
+        self._wake.set()
+
+    def start(self):
+        """启动后台检查线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="network-health", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval if self.connected else self.retry_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.check_now()
+            except Exception:
+                pass  # 检查函数本身出错时保留上次的结果
+
+    def stop(self):
+        """停止后台检查线程"""
+        self._stop.set()
+        self._wake.set()
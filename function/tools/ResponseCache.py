@@ -0,0 +1,255 @@
+import copy
+import functools
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+
+class ResponseCache:
+    """
+    只读 API 的响应缓存
+
+    按 (接口名, 参数) 缓存成功的结果字典，每个接口有自己的有效期 (ttl) 和过期后可继续使用的时长 (max_stale)：
+    有效期内直接返回；过期但仍可使用时先返回旧结果，同时在后台重新请求；超过可用时长才同步请求。
+    条目数超过上限时淘汰最久未使用的结果，可以保存到文件，下次启动时读取。
+    """
+
+    DEFAULT_POLICIES: Dict[str, Tuple[float, float]] = {
+        "area_obj_list": (86400, 7 * 86400),
+        "anchor_common_areas": (600, 3600),
+        "bilibili_user_card": (600, 86400),
+        "room_emoticons": (3600, 86400),
+        "medal_wall": (300, 3600),
+    }
+    """各接口的 (有效期, 过期后可继续使用的时长)，单位秒"""
+
+    _shared: Optional["ResponseCache"] = None
+    _shared_lock = threading.Lock()
+    _revalidate_executor: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, max_entries: int = 512, default_policy: Tuple[float, float] = (60, 0),
+                 policies: Optional[Dict[str, Tuple[float, float]]] = None,
+                 cache_path: Optional[Union[str, pathlib.Path]] = None):
+        """
+        Args:
+            max_entries: 最多缓存的结果数量
+            default_policy: 没有单独设置的接口使用的 (有效期, 过期后可继续使用的时长)
+            policies: 各接口的 (有效期, 过期后可继续使用的时长)，默认 DEFAULT_POLICIES
+            cache_path: 保存缓存的文件路径，None 表示不保存
+        """
+        self.max_entries = max_entries
+        """最多缓存的结果数量"""
+        self.default_policy = default_policy
+        """没有单独设置的接口使用的策略"""
+        self.policies = dict(self.DEFAULT_POLICIES if policies is None else policies)
+        """各接口的策略"""
+        self.cache_path = pathlib.Path(cache_path) if cache_path else None
+        """保存缓存的文件路径"""
+        self.hits = 0
+        """有效期内命中次数"""
+        self.stale_hits = 0
+        """过期后返回旧结果的次数"""
+        self.misses = 0
+        """同步请求次数"""
+        self._entries: OrderedDict = OrderedDict()  # {(接口名, 参数 JSON): (结果, 获取时间)}
+        self._refreshing = set()  # 正在后台重新请求的键
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "ResponseCache":
+        """进程内共享的响应缓存，第一次调用时创建，不保存到文件"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def cached(endpoint: str):
+        """
+        装饰 API 客户端的只读方法，使用客户端的 response_cache 缓存成功的结果
+        Args:
+            endpoint: 接口名，对应 policies 中的键
+
+        客户端的 response_cache 为 None 时不缓存；请求头带 Cookie 时按 Cookie 的摘要区分账号
+        """
+
+        def decorator(method: Callable[..., Dict[str, Any]]):
+            @functools.wraps(method)
+            def wrapper(client, *args, **kwargs):
+                cache = getattr(client, "response_cache", None)
+                if cache is None:
+                    return method(client, *args, **kwargs)
+                params = {"args": args, "kwargs": kwargs, "scope": ResponseCache.scope_of(client.headers)}
+                return cache.get_or_fetch(endpoint, params, lambda: method(client, *args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def invalidates(*endpoints: str):
+        """
+        装饰 API 客户端的写操作，成功后删除客户端 response_cache 中这些接口的结果
+        Args:
+            *endpoints: 受写操作影响的接口名
+        """
+
+        def decorator(method: Callable[..., Dict[str, Any]]):
+            @functools.wraps(method)
+            def wrapper(client, *args, **kwargs):
+                result = method(client, *args, **kwargs)
+                cache = getattr(client, "response_cache", None)
+                if cache is not None and isinstance(result, dict) and result.get("success"):
+                    for endpoint in endpoints:
+                        cache.invalidate(endpoint)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def scope_of(headers: Optional[Dict[str, str]]) -> str:
+        """请求头中 Cookie 的摘要，没有 Cookie 时为空字符串，缓存和文件中都不保存 Cookie 原文"""
+        cookie = (headers or {}).get("cookie", "")
+        return hashlib.sha256(cookie.encode()).hexdigest()[:16] if cookie else ""
+
+    def policy(self, endpoint: str) -> Tuple[float, float]:
+        """返回接口的 (有效期, 过期后可继续使用的时长)"""
+        return self.policies.get(endpoint, self.default_policy)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> Tuple[str, str]:
+        """缓存键 (接口名, 参数 JSON)"""
+        return endpoint, json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get_or_fetch(self, endpoint: str, params: Dict[str, Any],
+                     fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        取出缓存的结果，没有可用结果时调用 fetch 请求
+        Args:
+            endpoint: 接口名
+            params: 请求参数，用于区分缓存
+            fetch: 发出请求的函数，返回结果字典，success 为真时才缓存
+
+        Returns:
+            结果字典的副本
+        """
+        key = self.make_key(endpoint, params)
+        ttl, max_stale = self.policy(endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            result, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                self.hits += 1
+                return copy.deepcopy(result)
+            if age < ttl + max_stale:
+                self.stale_hits += 1
+                self._revalidate(key, fetch)
+                return copy.deepcopy(result)
+        self.misses += 1
+        return self._fetch_and_store(key, fetch)
+
+    def _fetch_and_store(self, key: Tuple[str, str], fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        result = fetch()
+        if isinstance(result, dict) and result.get("success"):
+            self._store(key, copy.deepcopy(result), time.time())
+        return result
+
+    def _store(self, key: Tuple[str, str], result: Dict[str, Any], fetched_at: float):
+        with self._lock:
+            self._entries[key] = (result, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key: Tuple[str, str], fetch: Callable[[], Dict[str, Any]]):
+        """在后台重新请求，同一个键同时只有一个请求"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if ResponseCache._revalidate_executor is None:
+            with ResponseCache._shared_lock:
+                if ResponseCache._revalidate_executor is None:
+                    ResponseCache._revalidate_executor = ThreadPoolExecutor(
+                        max_workers=2, thread_name_prefix="api-cache")
+
+        def revalidate():
+            try:
+                self._fetch_and_store(key, fetch)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        ResponseCache._revalidate_executor.submit(revalidate)
+
+    def invalidate(self, endpoint: Optional[str] = None) -> int:
+        """
+        删除缓存的结果
+        Args:
+            endpoint: 接口名，None 表示全部
+
+        Returns:
+            删除的数量
+        """
+        with self._lock:
+            keys = [key for key in self._entries if endpoint is None or key[0] == endpoint]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中统计和当前条目数"""
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "size": len(self)}
+
+    def load(self) -> int:
+        """
+        读取保存的缓存，丢弃已经不可使用的结果
+        Returns:
+            读取到的数量
+        """
+        if not self.cache_path or not self.cache_path.exists():
+            return 0
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("entries", [])
+        except (OSError, ValueError, AttributeError):
+            return 0
+        now = time.time()
+        count = 0
+        for endpoint, params_json, result, fetched_at in entries:
+            ttl, max_stale = self.policy(endpoint)
+            if now - fetched_at < ttl + max_stale:
+                self._store((endpoint, params_json), result, fetched_at)
+                count += 1
+        return count
+
+    def save(self):
+        """保存缓存，先写临时文件再替换，避免中途退出留下损坏的文件"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            entries = [[endpoint, params_json, result, fetched_at]
+                       for (endpoint, params_json), (result, fetched_at) in self._entries.items()]
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_suffix(self.cache_path.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"entries": entries}, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, self.cache_path)
@@ -0,0 +1,187 @@
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+
+class TimeBucketMessageDeduplication:
+    """
+    分桶的消息去重类
+
+    消息以 64 位整数指纹保存，指纹按时间分到若干个集合（桶）里，
+    过期时整桶丢弃，不需要逐条扫描，add/contains 的清理开销均摊为 O(1)。
+    接口与 OptimizedMessageDeduplication 相同 (add/contains/size/clear)，可直接替换。
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: Optional[float] = 5, bucket_count: int = 4):
+        """
+        Args:
+            max_size: 最大存储数量，超出时整桶丢弃最旧的消息
+            ttl_seconds: 消息存活时间（秒），None 或 0 表示不过期、只按 max_size 淘汰（与 OptimizedMessageDeduplication 一致）；
+                实际存活时间在 ttl 到 ttl + ttl/bucket_count 之间
+            bucket_count: 时间桶数量，越多过期越精确，contains 需要检查的集合也越多
+
+        Raises:
+            ValueError: ttl_seconds 为负数
+        """
+        self._max_size = max_size
+        self._ttl_seconds = self._check_ttl(ttl_seconds)
+        self.bucket_count = max(1, bucket_count)
+        """时间桶数量"""
+        self._buckets: Deque[Tuple[float, Set[int]]] = deque()  # [(桶创建时间, 指纹集合)]，右端为当前桶
+        self._count = 0
+        self._capacity = 1
+        """当前桶的容量"""
+        self._next_check = 0.0
+        """下一次需要轮换或清理桶的时间"""
+
+    @property
+    def max_size(self) -> int:
+        """最大存储数量"""
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int):
+        self._max_size = value
+        self._next_check = 0.0
+
+    @property
+    def ttl_seconds(self) -> Optional[float]:
+        """消息存活时间（秒），None 或 0 表示不过期"""
+        return self._ttl_seconds
+
+    @ttl_seconds.setter
+    def ttl_seconds(self, value: Optional[float]):
+        self._ttl_seconds = self._check_ttl(value)
+        self._next_check = 0.0
+
+    @staticmethod
+    def _check_ttl(value: Optional[float]) -> Optional[float]:
+        if value is not None and value < 0:
+            raise ValueError(f"ttl_seconds 不能为负数: {value}")
+        return value
+
+    @staticmethod
+    def _get_fingerprint(message: str) -> int:
+        """获取消息的 64 位整数指纹（字符串的哈希值会缓存在字符串对象上）"""
+        return hash(message)
+
+    def _maybe_rotate(self, current_time: float):
+        """快速判断是否需要轮换，绝大多数调用只做两次比较"""
+        if current_time >= self._next_check or len(self._buckets[-1][1]) >= self._capacity:
+            self._rotate(current_time)
+
+    def _rotate(self, current_time: float):
+        """丢弃过期或超出容量的旧桶，并在需要时开启新桶"""
+        buckets = self._buckets
+        ttl_seconds = self._ttl_seconds
+        span = ttl_seconds / self.bucket_count if ttl_seconds else 0
+        if ttl_seconds:
+            # 桶内最新的消息也已超过存活时间时，整桶丢弃
+            while buckets and current_time - buckets[0][0] - span >= ttl_seconds:
+                self._count -= len(buckets.popleft()[1])
+        while len(buckets) > 1 and self._count > self._max_size:
+            self._count -= len(buckets.popleft()[1])
+
+        self._capacity = max(1, self._max_size // self.bucket_count)
+        if not buckets or len(buckets[-1][1]) >= self._capacity \
+                or (ttl_seconds and current_time - buckets[-1][0] >= span):
+            buckets.append((current_time, set()))
+
+        if ttl_seconds:
+            # 当前桶关闭或最旧的桶过期，取较早者
+            self._next_check = min(buckets[-1][0] + span, buckets[0][0] + span + ttl_seconds)
+        else:
+            self._next_check = float('inf')
+
+    def _contains_fingerprint(self, fingerprint: int) -> bool:
+        for _, bucket in reversed(self._buckets):
+            if fingerprint in bucket:
+                return True
+        return False
+
+    def add(self, message: str) -> bool:
+        """添加消息，返回True如果是新消息"""
+        fingerprint = hash(message)  # 同 _get_fingerprint，热路径上内联
+        current_time = time.monotonic()
+        if not self._buckets:
+            self._rotate(current_time)
+        else:
+            self._maybe_rotate(current_time)
+
+        for _, bucket in reversed(self._buckets):
+            if fingerprint in bucket:
+                return False
+
+        self._buckets[-1][1].add(fingerprint)
+        self._count += 1
+        return True
+
+    def contains(self, message: str) -> bool:
+        """检查消息是否重复"""
+        if not self._buckets:
+            return False
+        self._maybe_rotate(time.monotonic())
+        return self._contains_fingerprint(self._get_fingerprint(message))
+
+    def size(self) -> int:
+        """返回当前消息数量"""
+        if self._buckets:
+            self._maybe_rotate(time.monotonic())
+        return self._count
+
+    def clear(self):
+        """清空所有消息"""
+        self._buckets.clear()
+        self._count = 0
+        self._next_check = 0.0
+
+    def get_memory_usage(self) -> int:
+        """返回实际内存使用（字节），包括桶容器、集合和其中的指纹对象"""
+        total = sys.getsizeof(self._buckets)
+        for bucket_entry in self._buckets:
+            start_time, bucket = bucket_entry
+            total += sys.getsizeof(bucket_entry) + sys.getsizeof(start_time) + sys.getsizeof(bucket)
+            total += sum(sys.getsizeof(fingerprint) for fingerprint in bucket)
+        return total
+
+
+def benchmark_deduplication(messages_per_second: int = 10000, connections: int = 30,
+                            seconds: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    模拟每秒 messages_per_second 条消息、每条由 connections 个连接各收到一次的去重负载
+    Args:
+        messages_per_second: 每秒的不同消息数
+        connections: 连接数，即每条消息重复到达的次数
+        seconds: 模拟的秒数
+
+    Returns:
+        {实现名: {"ns_per_call": 每次 add 的平均耗时, "unique": 放行条数, "memory_bytes": 报告的内存}}
+    """
+    from function.tools.OptimizedMessageDeduplication import OptimizedMessageDeduplication
+
+    batches = [[f'{{"cmd":"DANMU_MSG","info":[[0,1,25],"弹幕 {second}-{i}",[{i},"用户{i}"]]}}'
+                for i in range(messages_per_second)] for second in range(seconds)]
+    result = {}
+    for name, dedup in (("OptimizedMessageDeduplication", OptimizedMessageDeduplication(20000, 6)),
+                        ("TimeBucketMessageDeduplication", TimeBucketMessageDeduplication(20000, 6))):
+        unique = 0
+        calls = 0
+        elapsed = 0.0
+        for batch in batches:
+            # 各连接收到的是各自解码出的新字符串对象，构造过程不计入耗时
+            arrivals = [message.encode().decode() for message in batch for _ in range(connections)]
+            start = time.perf_counter()
+            for message in arrivals:
+                unique += dedup.add(message)
+            elapsed += time.perf_counter() - start
+            calls += len(arrivals)
+        result[name] = {"ns_per_call": elapsed / calls * 1e9, "unique": unique,
+                        "memory_bytes": dedup.get_memory_usage()}
+    return result
+
+
+if __name__ == '__main__':
+    for implementation, cost in benchmark_deduplication().items():
+        print(f"{implementation}: {cost['ns_per_call']:.0f} ns/次, 放行 {cost['unique']} 条, "
+              f"内存 {cost['memory_bytes'] / 1024:.0f} KiB")
@@ -1,20 +1,233 @@
 import asyncio
+import inspect
 import json
+import queue
 import time
-from typing import Set, Optional, Dict, Any, Callable
+from collections import deque
+from typing import Set, Optional, Dict, Any, Callable, List, Union
 
 import websockets
 
 
+class ClientChannel:
+    """
+    一个客户端的发送队列和写协程
+
+    广播只把消息放进队列，由写协程逐条发送，慢客户端不会拖慢其他客户端。
+    队列满时先丢弃最早的低优先级消息；可合并的消息在队列中只保留同类型的最新一条。
+    消息可以是文本，也可以是已编码的 UTF-8 字节，字节按文本帧发送，所有客户端共用同一份编码结果。
+    客户端声明支持批量接收后，写协程把队列中的多条消息合并为一个 JSON 数组帧发送；
+    丢弃和合并仍按单条消息处理，合并只发生在发送的时候。
+    """
+
+    _text_bytes_support: Dict[type, bool] = {}  # {连接类型: send 是否支持 text=True 把字节作为文本帧发送}
+
+    def __init__(self, websocket, maxsize: int = 256):
+        """
+        Args:
+            websocket: 客户端连接
+            maxsize: 队列的最大长度
+        """
+        self.websocket = websocket
+        """客户端连接"""
+        self.maxsize = maxsize
+        """队列的最大长度"""
+        self.sent = 0
+        """已发送的消息数"""
+        self.dropped = 0
+        """队列满时丢弃的消息数"""
+        self.coalesced = 0
+        """被同类型新消息替换的消息数"""
+        self.last_lag = 0.0
+        """最近一条消息从入队到发送完成的时间（秒）"""
+        self.max_lag = 0.0
+        """消息从入队到发送完成的最长时间（秒）"""
+        self.frames = 0
+        """已发送的帧数，批量发送时一帧包含多条消息"""
+        self.batch_size = 0
+        """一帧最多合并的消息数，0 表示每条消息单独发送"""
+        self.batch_interval = 0.0
+        """批量发送时等待更多消息的时间（秒）"""
+        self._queue: deque = deque()  # [消息类型, 消息文本, 入队时间, 处理方式]
+        self._latest: Dict[str, list] = {}  # {可合并的消息类型: 队列中的那一条}
+        self._ready = asyncio.Event()
+        self._batch_full = asyncio.Event()  # 队列中的消息已够一帧
+        self._task: Optional[asyncio.Task] = None
+        self._send_text_bytes = self._supports_text_bytes(websocket)
+
+    @classmethod
+    def _supports_text_bytes(cls, websocket) -> bool:
+        """连接的 send 是否接受 text 参数（websockets 13 以上的新实现），按连接类型只检查一次"""
+        connection_type = type(websocket)
+        if connection_type not in cls._text_bytes_support:
+            try:
+                supported = "text" in inspect.signature(websocket.send).parameters
+            except (TypeError, ValueError):
+                supported = False
+            cls._text_bytes_support[connection_type] = supported
+        return cls._text_bytes_support[connection_type]
+
+    def enable_batching(self, interval: float, size: int):
+        """
+        客户端声明支持数组帧后开启批量发送
+        Args:
+            interval: 等待更多消息的时间（秒）
+            size: 一帧最多合并的消息数
+        """
+        self.batch_interval = interval
+        self.batch_size = max(1, size)
+
+    def start(self):
+        """启动写协程"""
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """停止写协程，丢弃还没发送的消息"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._queue.clear()
+        self._latest.clear()
+
+    def put(self, message_type: Optional[str], payload: Union[str, bytes], policy: Optional[str] = None) -> bool:
+        """
+        放入一条消息
+        Args:
+            message_type: 消息类型
+            payload: 已序列化的消息文本，或已编码的 UTF-8 字节
+            policy: 低优先级消息的处理方式 "coalesce" / "drop_oldest"，None 表示普通消息
+
+        Returns:
+            是否放入（或合并、丢弃）成功；队列已满且没有可丢弃的消息时返回 False
+        """
+        if policy == "coalesce" and message_type in self._latest:
+            self._latest[message_type][1] = payload
+            self.coalesced += 1
+            return True
+        if len(self._queue) >= self.maxsize:
+            victim = next((entry for entry in self._queue if entry[3]), None)
+            if victim is not None:
+                self._queue.remove(victim)
+                if self._latest.get(victim[0]) is victim:
+                    del self._latest[victim[0]]
+                self.dropped += 1
+            elif policy:
+                self.dropped += 1
+                return True
+            else:
+                return False
+        entry = [message_type, payload, time.monotonic(), policy]
+        self._queue.append(entry)
+        if policy == "coalesce":
+            self._latest[message_type] = entry
+        if self.batch_size and len(self._queue) >= self.batch_size:
+            self._batch_full.set()
+        self._ready.set()
+        return True
+
+    def _pop(self) -> list:
+        entry = self._queue.popleft()
+        if self._latest.get(entry[0]) is entry:
+            del self._latest[entry[0]]
+        return entry
+
+    async def _run(self):
+        """发送队列中的消息，批量发送时每帧最多 batch_size 条，连接断开时结束"""
+        try:
+            while True:
+                await self._ready.wait()
+                if self.batch_size and len(self._queue) < self.batch_size:
+                    # 等待攒够一帧或到达批量间隔，期间到达的低优先级消息仍可被合并或丢弃
+                    self._batch_full.clear()
+                    try:
+                        await asyncio.wait_for(self._batch_full.wait(), self.batch_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                while self._queue:
+                    if self.batch_size:
+                        entries = [self._pop() for _ in range(min(self.batch_size, len(self._queue)))]
+                        await self._send(b"[" + b",".join(
+                            entry[1] if isinstance(entry[1], bytes) else entry[1].encode("utf-8")
+                            for entry in entries) + b"]")
+                    else:
+                        entries = [self._pop()]
+                        await self._send(entries[0][1])
+                    self.frames += 1
+                    self.sent += len(entries)
+                    self.last_lag = time.monotonic() - entries[0][2]
+                    self.max_lag = max(self.max_lag, self.last_lag)
+                self._ready.clear()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _send(self, payload: Union[str, bytes]):
+        """发送一条消息，字节按文本帧发送；旧版 websockets 不支持时先解码"""
+        if isinstance(payload, bytes):
+            if self._send_text_bytes:
+                await self.websocket.send(payload, text=True)
+                return
+            payload = payload.decode("utf-8")
+        await self.websocket.send(payload)
+
+    def metrics(self) -> Dict[str, Any]:
+        """队列深度、延迟和计数"""
+        oldest = time.monotonic() - self._queue[0][2] if self._queue else 0.0
+        return {
+            "remote": str(getattr(self.websocket, "remote_address", "")),
+            "queue_depth": len(self._queue),
+            "oldest_ms": round(oldest * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "sent": self.sent,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
 class WebSocketServer:
-    def __init__(self, host='localhost', port=8765):
+    SEND_QUEUE_SIZE = 256
+    """每个客户端发送队列的最大长度"""
+    LOW_PRIORITY_POLICIES: Dict[str, str] = {
+        "like_update": "coalesce",
+        "watched_change": "coalesce",
+        "online_rank_count": "coalesce",
+        "interact": "drop_oldest",
+    }
+    """低优先级消息的处理方式 {消息类型: "coalesce" 只保留最新一条 / "drop_oldest" 队列满时最先丢弃}"""
+    COMPRESSION: Optional[str] = None
+    """
+    WebSocket 压缩扩展，None 表示不压缩
+    客户端是本机的浏览器源，压缩没有意义；压缩时每个连接要各自压缩同一条消息，无法共用编码好的消息
+    """
+
+    def __init__(self, host='localhost', port=8765, batch_interval_ms: int = 0, batch_size: int = 50):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口
+            batch_interval_ms: 批量发送的间隔（毫秒），0 表示每条消息单独发送；
+                只对发送 {"type": "hello", "batch": true} 声明支持数组帧的客户端生效
+            batch_size: 批量发送时一帧的最大消息数，攒够后不等间隔立即发送
+        """
         self.host = host
         self.port = port
+        self.batch_interval_ms = batch_interval_ms
+        """批量发送的间隔（毫秒），0 表示不批量"""
+        self.batch_size = batch_size
+        """一批的最大消息数"""
         self.connected_clients: Set = set()
+        self.channels: Dict[Any, ClientChannel] = {}
+        """{客户端连接: 发送队列}"""
         self.server: Optional[websockets.WebSocketServer] = None
         self.danmu_processor = None
         self.running = False
         self._server_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inbox: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        """其他线程放入的待广播消息，由服务器事件循环批量取出"""
+        self._inbox_ready: Optional[asyncio.Event] = None
+        self._wakeup_scheduled = False  # 已经通知事件循环取消息，还没开始取
+        self._inbox_task: Optional[asyncio.Task] = None
         self.registerCallback: Callable = lambda clients_count : None
         """注册新的客户端连接回调, 参数为注册用户数量"""
         self.unregisterCallback: Callable = lambda clients_count : None
@@ -27,10 +240,14 @@ class WebSocketServer:
         """服务器错误回调, 参数为错误信息"""
         self.serverStopCallback: Callable = lambda : None
         """服务器停止回调, 无参"""
+        self.broadcastErrorCallback: Callable = lambda message, error: None
+        """广播 publish 放入的消息出错的回调, 参数为消息和异常；出错的消息被丢弃，之后的消息照常广播"""
 
 
     async def register(self, websocket):
         """注册新的客户端连接"""
+        channel = ClientChannel(websocket, self.SEND_QUEUE_SIZE)
+        self.channels[websocket] = channel
         self.connected_clients.add(websocket)
         self.registerCallback(len(self.connected_clients))
 
@@ -41,40 +258,44 @@ class WebSocketServer:
             "timestamp": time.time(),
             "clients_count": len(self.connected_clients)
         }
-        await websocket.send(json.dumps(welcome_msg))
+        channel.put("system", json.dumps(welcome_msg))
+        channel.start()
 
     async def unregister(self, websocket):
         """移除断开连接的客户端"""
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.stop()
         if websocket in self.connected_clients:
             self.connected_clients.remove(websocket)
             self.unregisterCallback(len(self.connected_clients))
 
     async def broadcast_message(self, message: Dict[str, Any]):
-        """向所有连接的客户端广播消息"""
-        if not self.connected_clients:
-            return
-
-        message_json = json.dumps(message, ensure_ascii=False)
+        """
+        向所有连接的客户端广播消息
 
-        # 收集断开连接的客户端
-        disconnected_clients = []
+        消息只序列化并编码一次，同一份字节放入各客户端的发送队列，不等待发送完成；
+        队列已满且没有可丢弃消息的客户端视为过慢，断开连接后由客户端重连。
+        批量发送由各客户端的发送队列在发送时合并，见 ClientChannel
+        """
+        if not self.channels:
+            return
 
-        # 使用 asyncio.gather 并行发送消息
-        tasks = []
-        for client in self.connected_clients:
-            try:
-                task = asyncio.create_task(client.send(message_json))
-                tasks.append(task)
-            except Exception:
-                disconnected_clients.append(client)
+        message_type = message.get("type")
+        frame = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        policy = self.LOW_PRIORITY_POLICIES.get(message_type)
 
-        # 等待所有发送任务完成
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        slow_clients = [client for client, channel in list(self.channels.items())
+                        if not channel.put(message_type, frame, policy)]
 
-        # 移除断开连接的客户端
-        for client in disconnected_clients:
+        # 断开过慢的客户端
+        for client in slow_clients:
             await self.unregister(client)
+            asyncio.create_task(client.close(code=1013, reason="send queue full"))
+
+    def client_metrics(self) -> List[Dict[str, Any]]:
+        """各客户端发送队列的深度、延迟和计数"""
+        return [channel.metrics() for channel in self.channels.values()]
 
     async def handle_client(self, websocket):
         """处理客户端连接"""
@@ -101,7 +322,12 @@ class WebSocketServer:
         """处理来自客户端的消息"""
         message_type = data.get("type")
 
-        if message_type == "ping":
+        if message_type == "hello":
+            # 新版网页在连接后声明支持数组帧，旧版网页不发送，始终逐条接收
+            channel = self.channels.get(websocket)
+            if channel is not None and data.get("batch") and self.batch_interval_ms > 0:
+                channel.enable_batching(self.batch_interval_ms / 1000, self.batch_size)
+        elif message_type == "ping":
             # 响应 ping 消息
             pong_msg = {
                 "type": "pong",
@@ -113,6 +339,7 @@ class WebSocketServer:
             stats_msg = {
                 "type": "stats",
                 "clients_count": len(self.connected_clients),
+                "clients": self.client_metrics(),
                 "timestamp": time.time()
             }
             await websocket.send(json.dumps(stats_msg))
@@ -123,20 +350,58 @@ class WebSocketServer:
 
     def send_danmu_message_sync(self, danmu_data: Dict[str, Any]):
         """同步方式发送弹幕消息（用于从其他线程调用）"""
-        if self.running:
-            # 如果从其他线程调用，使用 run_coroutine_threadsafe
-            asyncio.run_coroutine_threadsafe(
-                self.send_danmu_message(danmu_data),
-                asyncio.get_event_loop()
-            )
+        self.publish(danmu_data)
+
+    def publish(self, message: Dict[str, Any]) -> bool:
+        """
+        放入一条待广播的消息，不等待发送，可以在任意线程（包括服务器事件循环）中调用
+
+        消息进入线程安全的队列，事件循环每次被唤醒时取出队列中的全部消息依次广播，
+        连续放入的消息只唤醒一次事件循环
+        Returns:
+            服务器没有运行时返回 False
+        """
+        loop = self._loop
+        if not self.running or loop is None:
+            return False
+        self._inbox.put(message)
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._inbox_ready.set)
+            except RuntimeError:  # 事件循环已经关闭
+                self._wakeup_scheduled = False
+                return False
+        return True
+
+    async def _drain_inbox(self):
+        """在服务器事件循环中取出 publish 放入的消息并广播"""
+        while True:
+            await self._inbox_ready.wait()
+            self._inbox_ready.clear()
+            self._wakeup_scheduled = False
+            while True:
+                try:
+                    message = self._inbox.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    await self.broadcast_message(message)
+                except Exception as e:  # 一条消息出错（如无法序列化）不能结束取消息的任务
+                    self.broadcastErrorCallback(message, e)
 
     async def start_server_async(self):
         """异步启动 WebSocket 服务器"""
+        self._loop = asyncio.get_running_loop()
+        self._inbox_ready = asyncio.Event()
+        self._wakeup_scheduled = False
+        self._inbox_task = asyncio.create_task(self._drain_inbox())
         self.running = True
         self.server = await websockets.serve(
             self.handle_client,
             self.host,
-            self.port
+            self.port,
+            compression=self.COMPRESSION
         )
         self.startServerCallback(self.host, self.port)
 
@@ -157,6 +422,9 @@ class WebSocketServer:
     async def stop_server_async(self):
         """异步停止服务器"""
         self.running = False
+        self._loop = None
+        if self._inbox_task and not self._inbox_task.done():
+            self._inbox_task.cancel()
 
         # 关闭所有客户端连接
         if self.connected_clients:
@@ -166,6 +434,9 @@ class WebSocketServer:
             if close_tasks:
                 await asyncio.gather(*close_tasks, return_exceptions=True)
             self.connected_clients.clear()
+        for channel in self.channels.values():
+            channel.stop()
+        self.channels.clear()
 
         # 停止服务器
         if self.server:
@@ -190,3 +461,86 @@ class WebSocketServer:
             await self._server_task
         except asyncio.CancelledError:
             self.serverCancelledCallback()
+
+
+def benchmark_broadcast(clients: int = 50, messages: int = 1000) -> Dict[str, float]:
+    """
+    在本机启动服务器并连接多个客户端，对比三种从其他线程广播的方式：
+    原来的每条消息一个 run_coroutine_threadsafe、每个客户端各自编码并压缩文本，
+    publish 放入队列、不压缩、每条消息只编码一次，以及在 publish 的基础上每 50 毫秒或 50 条合并为一帧
+    Args:
+        clients: 客户端数量
+        messages: 每种方式广播的消息数
+
+    Returns:
+        {"per_future_ms": 旧方式全部客户端收齐的耗时, "publish_ms": publish 方式全部客户端收齐的耗时,
+        "batch_ms": 批量方式全部客户端收齐的耗时, "batch_frames": 批量方式每个客户端收到的帧数}
+    """
+    import threading
+
+    message = {
+        "type": "danmu", "uName": "测试用户", "uId": 12345678, "messageData": "这是一条用于测试广播的弹幕消息" * 3,
+        "facePicture": "/face/12345678.png", "medal": {"name": "粉丝牌", "level": 21, "color": "#ff9900"},
+        "timestamp": time.time(),
+    }
+
+    frame_counts: Dict[str, int] = {}
+
+    async def run(mode: str) -> float:
+        server = WebSocketServer("127.0.0.1", 0, batch_interval_ms=50 if mode == "batch" else 0)
+        server.SEND_QUEUE_SIZE = messages + 1
+        server.COMPRESSION = "deflate" if mode == "per_future" else None
+        server_task = asyncio.create_task(server.run_forever())
+        while server.server is None:
+            await asyncio.sleep(0.01)
+        port = server.server.sockets[0].getsockname()[1]
+        connections = [await websockets.connect(f"ws://127.0.0.1:{port}", max_queue=None) for _ in range(clients)]
+        for connection in connections:
+            await connection.recv()  # 欢迎消息
+            if mode == "batch":
+                await connection.send(json.dumps({"type": "hello", "batch": True}))
+        while mode == "batch" and not all(channel.batch_size for channel in server.channels.values()):
+            await asyncio.sleep(0.01)
+
+        async def receive_all(connection):
+            received = frames = 0
+            while received < messages:
+                data = await connection.recv()
+                frames += 1
+                received += len(json.loads(data)) if mode == "batch" else 1
+            frame_counts[mode] = frames
+
+        loop = asyncio.get_running_loop()
+
+        async def legacy_broadcast(data):
+            text = json.dumps(data, ensure_ascii=False)
+            for channel in list(server.channels.values()):
+                channel.put(data.get("type"), text)
+
+        def produce():
+            for _ in range(messages):
+                if mode != "per_future":
+                    server.publish(message)
+                else:
+                    asyncio.run_coroutine_threadsafe(legacy_broadcast(message), loop)
+
+        started_at = time.perf_counter()
+        threading.Thread(target=produce, daemon=True).start()
+        await asyncio.gather(*(receive_all(connection) for connection in connections))
+        elapsed = (time.perf_counter() - started_at) * 1000
+        for connection in connections:
+            await connection.close()
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+        return elapsed
+
+    cost = {f"{mode}_ms": asyncio.run(run(mode)) for mode in ("per_future", "publish", "batch")}
+    cost["batch_frames"] = frame_counts["batch"]
+    return cost
+
+
+if __name__ == '__main__':
+    cost = benchmark_broadcast()
+    print(f"50 个客户端 × 1000 条消息: 每条一个 future {cost['per_future_ms']:.0f} ms, "
+          f"publish 队列 {cost['publish_ms']:.0f} ms, "
+          f"批量发送 {cost['batch_ms']:.0f} ms（每个客户端 {cost['batch_frames']} 帧）")
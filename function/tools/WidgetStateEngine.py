@@ -0,0 +1,90 @@
+import operator
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class WidgetStateEngine:
+    """
+    声明式的控件状态
+
+    每个控件注册一条规则，规则声明它读取的输入（缓存函数名或外部状态名），并设置控件的可见、可用和值。
+    刷新时按缓存依赖图中各输入的版本号判断，只重新计算从未计算过或输入失效过的规则；
+    重新计算过的控件记为待推送，由界面更新函数取出后推送到 OBS。
+    """
+
+    def __init__(self, graph: Any):
+        """
+        Args:
+            graph: 缓存依赖图，需要提供 version(name) 和 expire_due()
+        """
+        self.graph = graph
+        """缓存依赖图"""
+        self.last_evaluated = 0
+        """最近一次刷新重新计算的规则数"""
+        self._rules: Dict[str, Tuple[Callable[[Any], None], Tuple[str, ...]]] = {}  # {控件路径: (规则, 输入)}
+        self._versions: Dict[str, Tuple[int, ...]] = {}  # {控件路径: 上次计算后各输入的版本号}
+        self._pending: Dict[str, Any] = {}  # {控件名: 控件} 重新计算后还没推送的控件
+
+    def rule(self, path: str, *inputs: str):
+        """
+        注册控件规则的装饰器，规则函数的参数为控件对象
+        Args:
+            path: 控件在控件表单中的路径，如 "Button.login"
+            *inputs: 规则读取的缓存函数名或外部状态名
+        """
+
+        def decorator(func: Callable[[Any], None]):
+            self._rules[path] = (func, inputs)
+            return func
+
+        return decorator
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def inputs(self, path: str) -> Tuple[str, ...]:
+        """返回控件规则声明的输入"""
+        return self._rules[path][1]
+
+    def _snapshot(self, inputs: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self.graph.version(name) for name in inputs)
+
+    def render(self, root: Any, names: Optional[Set[str]] = None) -> int:
+        """
+        重新计算输入发生变化的规则
+        Args:
+            root: 控件表单，按规则的路径取出控件
+            names: 本次允许更新的控件名，None 表示全部；范围外的控件保持原状，下次在范围内时再计算
+
+        Returns:
+            重新计算的规则数
+        """
+        self.graph.expire_due()
+        evaluated = 0
+        for path, (func, inputs) in self._rules.items():
+            control = operator.attrgetter(path)(root)
+            if names is not None and control.Name not in names:
+                continue
+            if self._versions.get(path) == self._snapshot(inputs):
+                continue
+            func(control)
+            # 计算过程中过期的缓存在调用时才失效，所以记录计算之后的版本号
+            self._versions[path] = self._snapshot(inputs)
+            self._pending[control.Name] = control
+            evaluated += 1
+        self.last_evaluated = evaluated
+        return evaluated
+
+    def mark_all(self, root: Any):
+        """把所有规则的控件记为待推送但不重新计算，用于 OBS 重新创建控件之后"""
+        for path in self._rules:
+            control = operator.attrgetter(path)(root)
+            self._pending[control.Name] = control
+
+    def take_pending(self) -> List[Any]:
+        """取出并清空待推送的控件"""
+        pending, self._pending = list(self._pending.values()), {}
+        return pending
+
+    def reset(self):
+        """清除所有计算记录，下次刷新时重新计算全部规则"""
+        self._versions.clear()
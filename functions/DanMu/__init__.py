@@ -3,6 +3,7 @@ import datetime
 import hashlib
 import json
 import os
+import queue
 import re
 import struct
 import threading
@@ -20,7 +21,9 @@ from function.api.Special.Csrf import BilibiliCSRFAuthenticator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
 from function.tools.EncodingConversion.dict_to_cookie_string import dict_to_cookie_string
 from function.tools.EncodingConversion.DanmuProtoDecoder import DanmuProtoDecoder
+from function.tools.EncodingConversion.iter_danmu_packets import iter_danmu_packets, SUPPORTED_PROTOVER
 from function.tools.ConfigControl.BilibiliUserConfigManager import BilibiliUserConfigManager
+from function.tools.TimeBucketMessageDeduplication import TimeBucketMessageDeduplication
 
 import websockets
 
@@ -109,6 +112,116 @@ o_m_d = OptimizedMessageDeduplication(500, 6)
 
 
 
+class DanmuDispatchPipeline:
+    """
+    有界的弹幕分发流水线
+
+    所有连接共用一个事件循环作为唯一生产者，收到的帧只做入队；
+    固定数量的工作线程负责解包和回调。同一连接的帧总是进入同一个工作队列，
+    因此同一连接内的消息保持到达顺序。队列满时丢弃新帧并计数。
+    """
+
+    def __init__(self, handler: Callable[[bytes], None], worker_count: int = 2, max_queue_size: int = 1000):
+        """
+        Args:
+            handler: 处理单个 wss 帧的函数，在工作线程中调用
+            worker_count: 工作线程数量
+            max_queue_size: 每个工作队列的最大长度
+        """
+        self.handler = handler
+        """处理单个 wss 帧的函数"""
+        self.worker_count = max(1, worker_count)
+        """工作线程数量"""
+        self.max_queue_size = max_queue_size
+        """每个工作队列的最大长度"""
+        self.dropped_count = 0
+        """队列满而丢弃的帧数，只由生产者线程修改"""
+        self.processed_count = 0
+        """已处理的帧数"""
+        self.error_count = 0
+        """处理出错的帧数"""
+        self.max_queue_depth = 0
+        """观察到的最大排队帧数"""
+        self._queues: list[queue.Queue] = []
+        self._workers: list[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """启动工作线程"""
+        if self._running:
+            return
+        self._running = True
+        self._queues = [queue.Queue(maxsize=self.max_queue_size) for _ in range(self.worker_count)]
+        self._workers = []
+        for i, work_queue in enumerate(self._queues):
+            worker = threading.Thread(target=self._worker, args=(work_queue,), name=f"DanmuWorker-{i}")
+            worker.daemon = True
+            self._workers.append(worker)
+            worker.start()
+
+    def submit(self, connection_id: int, message: bytes) -> bool:
+        """
+        提交一个帧，不阻塞
+        Args:
+            connection_id: 连接序号，用于选择工作队列
+            message: wss 帧
+
+        Returns:
+            是否入队成功，队列已满时返回 False
+        """
+        if not self._running:
+            return False
+        work_queue = self._queues[connection_id % self.worker_count]
+        try:
+            work_queue.put_nowait(message)
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+        depth = work_queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return True
+
+    def _worker(self, work_queue: queue.Queue):
+        """工作线程：按顺序处理所属队列中的帧"""
+        while self._running:
+            try:
+                message = work_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.handler(message)
+            except Exception:
+                with self._stats_lock:
+                    self.error_count += 1
+            with self._stats_lock:
+                self.processed_count += 1
+
+    def queue_depth(self) -> int:
+        """返回当前所有工作队列中排队的帧数"""
+        return sum(work_queue.qsize() for work_queue in self._queues)
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回流水线统计信息"""
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "dropped": self.dropped_count,
+            "processed": self.processed_count,
+            "errors": self.error_count,
+            "workers": self.worker_count,
+        }
+
+    def stop(self, timeout: float = 2.0):
+        """停止工作线程，未处理的帧会被丢弃"""
+        self._running = False
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join(timeout=timeout)
+        self._workers = []
+
+
 class DanmuWebSocketServer:
     def __init__(self, host='localhost', port=8765):
         self.host = host
@@ -251,7 +364,7 @@ class Danmu:
         auth_body = {
             "uid": user_info["uid"],
             "roomid": roomid,
-            "protover": 2,
+            "protover": SUPPORTED_PROTOVER,
             "buvid": cookies['buvid3'],
             "platform": "web",
             "type": 3,
@@ -259,9 +372,19 @@ class Danmu:
         }
         return wss_url, auth_body
 
-    def connect_room(self, roomid: int):
+    def connect_room(self, roomid: int, worker_count: int = 2, max_queue_size: int = 1000):
+        """
+        连接直播间
+        Args:
+            roomid: 直播间真实id
+            worker_count: 处理弹幕的工作线程数量
+            max_queue_size: 每个工作队列的最大长度，超出后丢弃新帧
+
+        Returns:
+            ws客户端实例
+        """
         wss_url, auth_body = self._get_websocket_client(roomid)
-        return self._WebSocketClient(wss_url, auth_body)
+        return self._WebSocketClient(wss_url, auth_body, worker_count, max_queue_size)
 
     class _WebSocketClient:
         HEARTBEAT_INTERVAL = 30
@@ -273,7 +396,8 @@ class Danmu:
         VERSION_BTI = 3
         """协议版本:3: 普通包 (使用 brotli 压缩的多个带文件头的普通包)"""
 
-        def __init__(self, url: str, auth_body: dict[str, Union[str, int]]):
+        def __init__(self, url: str, auth_body: dict[str, Union[str, int]], worker_count: int = 2,
+                     max_queue_size: int = 1000):
             self.danmu_working_event = threading.Event()
             self.url = url
             self.auth_body = auth_body
@@ -283,15 +407,23 @@ class Danmu:
             """接收普通包 (命令)的回调函数"""
             self.wssCertificationAndHeartbeat: Callable[[bytes], None] = lambda a: a
             """发送认证包接收时的回调函数"""
+            self.proto_decoder = DanmuProtoDecoder()
+            """protobuf 解码器，pb2 模块在进程内共用"""
             self.saved_danmu_data = deque(maxlen=1000)  # 固定大小队列
-            self.message_hashes = set()  # 使用哈希去重
-            """排除相同弹幕"""
+            self.o_m_d = TimeBucketMessageDeduplication(10000, 6)
+            """排除多个连接收到的相同弹幕"""
+            self._o_m_d_lock = threading.Lock()
+            """多个工作线程共用去重实例时的锁"""
             self.num_r = 20
             """同时连接多个弹幕减少丢包"""
-            self.connection_threads = []  # 新增：管理所有连接线程
+            self.connection_interval = 1.0
+            """同时连接多个弹幕的间隔秒"""
+            self.pipeline = DanmuDispatchPipeline(self.unpack, worker_count, max_queue_size)
+            """接收协程与回调之间的有界分发流水线"""
+            self.connection_threads = []  # 运行事件循环的线程
             self.running = False  # 新增：运行状态标志
 
-        async def connect(self):
+        async def connect(self, connection_id: int = 0):
             retry_count = 0
             max_retries = 5
             base_delay = 3
@@ -313,7 +445,7 @@ class Danmu:
                             try:
                                 # 使用较短的超时时间，以便更频繁地检查停止信号
                                 message = await asyncio.wait_for(ws.recv(), timeout=10.0)
-                                await self.on_message(message)
+                                await self.on_message(message, connection_id)
                             except asyncio.TimeoutError:
                                 # 检查是否应该停止
                                 if not self.running:
@@ -370,7 +502,7 @@ class Danmu:
                         
                         [16:]正文内容
                     """
-                    threading.Thread(self.wssCertificationAndHeartbeat(auth_response))
+                    self.wssCertificationAndHeartbeat(auth_response)
                     # 启动心跳任务
                     asyncio.create_task(self.send_heartbeat(ws))
                 except asyncio.TimeoutError:
@@ -394,9 +526,9 @@ class Danmu:
                 except Exception as e:
                     break
 
-        async def on_message(self, message):
+        async def on_message(self, message, connection_id: int = 0):
             if isinstance(message, bytes):
-                threading.Thread(self.unpack(message)).start()
+                self.pipeline.submit(connection_id, message)
 
         def pack(self, content: Optional[dict], code: int) -> bytes:
             """
@@ -425,103 +557,78 @@ class Danmu:
             return header + content_bytes
 
         def unpack(self, byte_buffer: bytes):
-            # 头部格式:
-            package_len = int.from_bytes(byte_buffer[0:4], 'big')
-            """
-            封包总大小 (头部大小 + 正文大小)
-            """
-            head_length = int.from_bytes(byte_buffer[4:6], 'big')
-            """
-            头部大小 (一般为 0x0010, 即 16 字节)
-            """
-            prot_ver = int.from_bytes(byte_buffer[6:8], 'big')
-            """
-            协议版本:
-                - 0: 普通包 (正文不使用压缩)
-                - 1: 心跳及认证包 (正文不使用压缩)
-                - 2: 普通包 (正文使用 zlib 压缩)
-                - 3: 普通包 (使用 brotli 压缩的多个带文件头的普通包)
-            """
-            opt_code = int.from_bytes(byte_buffer[8:12], 'big')
             """
-            操作码 (封包类型)
-                - 2	心跳包
-                - 3	心跳包回复 (人气值)
-                - 5	普通包 (命令)
-                - 7	认证包
-                - 8	认证包回复
+            解析 wss 消息，头部格式:
+                [0:4]封包总大小 (头部大小 + 正文大小)
+                [4:6]头部大小 (一般为 0x0010, 即 16 字节)
+                [6:8]协议版本
+                    - 0: 普通包 (正文不使用压缩)
+                    - 1: 心跳及认证包 (正文不使用压缩)
+                    - 2: 普通包 (正文使用 zlib 压缩)
+                    - 3: 普通包 (使用 brotli 压缩的多个带文件头的普通包)
+                [8:12]操作码 (封包类型)
+                    - 2	心跳包
+                    - 3	心跳包回复 (人气值)
+                    - 5	普通包 (命令)
+                    - 7	认证包
+                    - 8	认证包回复
+                [12:16]sequence, 每次发包时向上递增
             """
-            sequence = int.from_bytes(byte_buffer[12:16], 'big')
-            """
-            sequence, 每次发包时向上递增
-            """
-
-            content_bytes = byte_buffer[16:package_len]
-
-            # print(f"头部长度: {head_length} 字节")
-            if prot_ver == self.VERSION_NORMAL:
-                pass
-            elif prot_ver == self.VERSION_ZIP:
-                content_bytes = zlib.decompress(content_bytes)
-                thread = threading.Thread(target=self.unpack, args=(content_bytes,))
-                thread.daemon = True  # 设置为守护线程
-                thread.start()
-                return
-            elif prot_ver == self.VERSION_BTI:
-                pass
-
-            # print(f"序列号: {sequence}")
-
-            content = content_bytes.decode('utf-8')
-            content_hash = hashlib.md5(content.encode()).hexdigest()
-            if content_hash in self.message_hashes:
-                return  # 快速去重
-
-            self.message_hashes.add(content_hash)
-            if len(self.message_hashes) > 10000:  # 定期清理
-                self.message_hashes.clear()
-
-            if opt_code == 5:  # SEND_SMS_REPLY
-                content_dict: dict = json.loads(content)
-                if content_dict['cmd'] == "INTERACT_WORD_V2":
-                    content_dict['data'] = DanmuProtoDecoder().decode_interact_word_v2_protobuf(
-                        content_dict['data']['pb'])
-                elif content_dict['cmd'] == "ONLINE_RANK_V3":
-                    content_dict['data'] = DanmuProtoDecoder().decode_online_rank_v3_protobuf(
-                        content_dict['data']['pb'])
-                thread = threading.Thread(target=self.Callable_opt_code5, args=(content_dict,))
-                thread.daemon = True
-                thread.start()
-                pass
-            elif opt_code == 8:  # AUTH_REPLY
-                self.Callable_opt_code8(content)
-                pass
-
-            if len(byte_buffer) > package_len:
-                thread = threading.Thread(target=self.unpack, args=(byte_buffer[package_len:],))
-                thread.daemon = True
-                thread.start()
+            for opt_code, sequence, body in iter_danmu_packets(byte_buffer):
+                if opt_code not in (5, 8):
+                    continue
+
+                content = str(body, 'utf-8')
+                with self._o_m_d_lock:
+                    if not self.o_m_d.add(content):
+                        continue  # 快速去重
+
+                if opt_code == 5:  # SEND_SMS_REPLY
+                    content_dict: dict = json.loads(content)
+                    if content_dict['cmd'] == "INTERACT_WORD_V2":
+                        content_dict['data'] = self.proto_decoder.decode_interact_word_v2_protobuf(
+                            content_dict['data']['pb'])
+                    elif content_dict['cmd'] == "ONLINE_RANK_V3":
+                        content_dict['data'] = self.proto_decoder.decode_online_rank_v3_protobuf(
+                            content_dict['data']['pb'])
+                    self.Callable_opt_code5(content_dict)
+                elif opt_code == 8:  # AUTH_REPLY
+                    self.Callable_opt_code8(content)
+
+        async def _run_connections(self):
+            """在同一个事件循环中按间隔启动所有连接"""
+            connection_tasks = []
+            for i in range(self.num_r):
+                if not self.running:
+                    break
+                connection_tasks.append(asyncio.create_task(self.connect(i), name=f"DanmuConn-{i}"))
+                if i < self.num_r - 1:
+                    await asyncio.sleep(self.connection_interval)
+            await asyncio.gather(*connection_tasks, return_exceptions=True)
 
         def start(self):
             try:
                 self.running = True  # 设置运行状态
                 self.connection_threads.clear()  # 清空线程列表
+                self.pipeline.start()
 
                 def connection_task():
-                    asyncio.run(self.connect())
+                    asyncio.run(self._run_connections())
 
-                for i in range(self.num_r):
-                    thread = threading.Thread(target=connection_task, name=f"DanmuConn-{i}")
-                    thread.daemon = True  # 设置为守护线程
-                    self.connection_threads.append(thread)
-                    thread.start()
-                    time.sleep(1)
+                thread = threading.Thread(target=connection_task, name="DanmuConnections")
+                thread.daemon = True  # 设置为守护线程
+                self.connection_threads.append(thread)
+                thread.start()
 
             except KeyboardInterrupt:
                 self.stop()
             except Exception as e:
                 self.stop()
 
+        def get_pipeline_stats(self) -> Dict[str, int]:
+            """返回分发流水线的队列深度和丢弃计数"""
+            return self.pipeline.get_stats()
+
         def stop(self):
             """优雅停止连接"""
             self.running = False  # 设置停止标志
@@ -531,6 +638,7 @@ class Danmu:
             for thread in self.connection_threads:
                 if thread.is_alive():
                     thread.join(timeout=2.0)  # 最多等待2秒
+            self.pipeline.stop()
 
 
 if __name__ == "__main__":
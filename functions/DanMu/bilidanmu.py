@@ -14,7 +14,9 @@ from function.api.Special.Wbi import WbiSigna
 from function.api.Special.Csrf import BilibiliCSRFAuthenticator
 from function.tools.EncodingConversion.parse_cookie import parse_cookie
 from function.tools.EncodingConversion.DanmuProtoDecoder import DanmuProtoDecoder
-from function.tools.OptimizedMessageDeduplication import OptimizedMessageDeduplication
+from function.tools.EncodingConversion.iter_danmu_packets import iter_danmu_packets, SUPPORTED_PROTOVER
+from function.tools.TimeBucketMessageDeduplication import TimeBucketMessageDeduplication
+from function.tools.DanmuFanIn import DanmuFanIn
 
 
 class BiliDanmu:
@@ -34,7 +36,7 @@ class BiliDanmu:
         auth_body = {
             "uid": user_info["uid"],
             "roomid": roomid,
-            "protover": 2,
+            "protover": SUPPORTED_PROTOVER,
             "buvid": cookies['buvid3'],
             "platform": "web",
             "type": 3,
@@ -67,8 +69,12 @@ class BiliDanmu:
             """同时连接多个弹幕减少丢包"""
             self.connection_interval = connection_interval
             """同时连接多个弹幕的间隔秒"""
-            self.o_m_d = OptimizedMessageDeduplication()
-            """用于多弹幕返回去重的实例"""
+            self.o_m_d = TimeBucketMessageDeduplication()
+            """用于认证回复等无标识消息去重的实例"""
+            self.fan_in = DanmuFanIn()
+            """按消息标识合并多个连接的普通包，并统计各连接的丢失和延迟"""
+            self.proto_decoder = DanmuProtoDecoder()
+            """protobuf 解码器，pb2 模块在进程内共用"""
             self.replyAuthenticationPackageCallable: Callable[[str], None] = lambda a: None
             """接收认证包回复的回调函数， 参数为接收到的数据"""
             self.ordinaryBagCallable: Callable[[Dict[str, Any]], None] = lambda a: None
@@ -104,7 +110,7 @@ class BiliDanmu:
             self._stop_event = asyncio.Event()  # 用于等待停止信号
             self._loop = None  # 存储事件循环引用
 
-        async def connect(self):
+        async def connect(self, connection_id: int = 0):
             base_delay = 3
             retry_count = 0
             max_retries = 5
@@ -118,13 +124,14 @@ class BiliDanmu:
                             close_timeout=10
                     ) as ws:
                         await self.on_open(ws)
+                        self.fan_in.register_connection(connection_id)
                         retry_count = 0  # 成功连接后重置重试计数
 
                         while self.running:
                             try:
                                 message = await asyncio.wait_for(ws.recv(), timeout=10.0)
                                 try:
-                                    await self.on_message(message)
+                                    await self.on_message(message, connection_id)
                                 except:
                                     pass
                             except asyncio.TimeoutError:
@@ -136,8 +143,10 @@ class BiliDanmu:
                                     break
                             except websockets.exceptions.ConnectionClosed:
                                 break
+                        self.fan_in.unregister_connection(connection_id)
 
                 except Exception as e:
+                    self.fan_in.unregister_connection(connection_id)
                     if not self.running:
                         break
                     retry_count += 1
@@ -205,9 +214,9 @@ class BiliDanmu:
         async def _heart_rate_failure_callback(self, e):
             self.heartRateFailureCallback(e)
 
-        async def on_message(self, message):
+        async def on_message(self, message, connection_id: int = 0):
             if isinstance(message, bytes):
-                await self.unpack(message)
+                await self.unpack(message, connection_id)
 
         def pack(self, content: Optional[dict], code: int) -> bytes:
             """
@@ -233,47 +242,32 @@ class BiliDanmu:
                      (1).to_bytes(4, 'big')
             return header + content_bytes
 
-        async def unpack(self, byte_buffer: bytes):
-            package_len = int.from_bytes(byte_buffer[0:4], 'big')
-            head_length = int.from_bytes(byte_buffer[4:6], 'big')
-            prot_ver = int.from_bytes(byte_buffer[6:8], 'big')
-            opt_code = int.from_bytes(byte_buffer[8:12], 'big')
-            sequence = int.from_bytes(byte_buffer[12:16], 'big')
-
-            content_bytes = byte_buffer[16:package_len]
-
-            if prot_ver == 0:
-                pass
-            elif prot_ver == 2:
-                content_bytes = zlib.decompress(content_bytes)
-                await self.unpack(content_bytes)
-                return
-            elif prot_ver == 3:
-                pass
-
-            content = content_bytes.decode('utf-8')
-            if not self.o_m_d.add(content):
-                return
-
-            if opt_code == 5:  # SEND_SMS_REPLY
-                try:
-                    content_dict: dict = json.loads(content)
-                    if content_dict['cmd'] == "INTERACT_WORD_V2":
-                        content_dict['data'] = DanmuProtoDecoder().decode_interact_word_v2_protobuf(
-                            content_dict['data']['pb'])
-                    elif content_dict['cmd'] == "ONLINE_RANK_V3":
-                        content_dict['data'] = DanmuProtoDecoder().decode_online_rank_v3_protobuf(
-                            content_dict['data']['pb'])
-
-                    # 异步处理回调
-                    asyncio.create_task(self._handle_opt_code5(content_dict))
-                except:
-                    pass
-            elif opt_code == 8:  # AUTH_REPLY
-                asyncio.create_task(self._handle_opt_code8(content))
-
-            if len(byte_buffer) > package_len:
-                await self.unpack(byte_buffer[package_len:])
+        async def unpack(self, byte_buffer: bytes, connection_id: int = 0):
+            for opt_code, sequence, body in iter_danmu_packets(byte_buffer):
+                if opt_code not in (5, 8):
+                    continue
+
+                content = str(body, 'utf-8')
+                if opt_code == 5:  # SEND_SMS_REPLY
+                    if not self.fan_in.accept(connection_id, content):
+                        continue
+                    try:
+                        content_dict: dict = json.loads(content)
+                        if content_dict['cmd'] == "INTERACT_WORD_V2":
+                            content_dict['data'] = self.proto_decoder.decode_interact_word_v2_protobuf(
+                                content_dict['data']['pb'])
+                        elif content_dict['cmd'] == "ONLINE_RANK_V3":
+                            content_dict['data'] = self.proto_decoder.decode_online_rank_v3_protobuf(
+                                content_dict['data']['pb'])
+
+                        # 异步处理回调
+                        asyncio.create_task(self._handle_opt_code5(content_dict))
+                    except:
+                        pass
+                elif opt_code == 8:  # AUTH_REPLY
+                    if not self.o_m_d.add(content):
+                        continue
+                    asyncio.create_task(self._handle_opt_code8(content))
 
         async def _handle_opt_code8(self, content: str):
             """异步处理 opt_code 8 回调"""
@@ -294,7 +288,7 @@ class BiliDanmu:
 
             # 创建多个连接任务
             for i in range(self.num_r):
-                task = asyncio.create_task(self.connect(), name=f"DanmuConn-{i}")
+                task = asyncio.create_task(self.connect(i), name=f"DanmuConn-{i}")
                 self.connection_tasks.append(task)
                 if i < self.num_r - 1:  # 最后一个连接不需要等待
                     await asyncio.sleep(self.connection_interval)  # 间隔连接
@@ -306,6 +300,15 @@ class BiliDanmu:
 
             asyncio.create_task(self._messages_stop_callback())
 
+        def get_connection_stats(self) -> Dict[int, Dict[str, Union[int, float, bool]]]:
+            """
+            返回每个连接的统计信息，用于根据实际丢包和延迟调整连接数
+
+            Returns:
+                {连接序号: {"received", "first", "missed", "loss_rate", "avg_lag_ms", "max_lag_ms", "active"}}
+            """
+            return self.fan_in.get_connection_stats()
+
         async def _multiple_messages_callback(self, num):
             self.multipleMessagesCallback(num)
 
@@ -341,6 +344,8 @@ class BiliDanmu:
 
             self.running = False
             self._stop_event.set()  # 触发停止信号
+            # 停止后窗口内的消息不会再到达，先结算再断开连接，否则断开的连接不再计入丢失
+            self.fan_in.settle_pending()
 
             asyncio.create_task(self._stop_connection_callback())
 